@@ -1,6 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from artisans.cache import invalidate_artisan_cache
+from .authentication import invalidate_auth_user
 from .models import User, UserRole
 
 
@@ -83,8 +86,7 @@ class UserAdmin(BaseUserAdmin):
     @admin.action(description=_('✅ Aprobar artesanos seleccionados'))
     def approve_artisans(self, request, queryset):
         """Aprueba los artesanos seleccionados para que puedan vender."""
-        artisans = queryset.filter(role=UserRole.ARTISAN)
-        updated = artisans.update(is_approved=True)
+        updated = self._set_approval(queryset, True)
         self.message_user(
             request,
             _(f'{updated} artesano(s) aprobado(s) correctamente.'),
@@ -94,11 +96,26 @@ class UserAdmin(BaseUserAdmin):
     @admin.action(description=_('❌ Desaprobar artesanos seleccionados'))
     def disapprove_artisans(self, request, queryset):
         """Desaprueba artesanos (no podrán vender hasta nueva aprobación)."""
-        artisans = queryset.filter(role=UserRole.ARTISAN)
-        updated = artisans.update(is_approved=False)
+        updated = self._set_approval(queryset, False)
         self.message_user(
             request,
             _(f'{updated} artesano(s) desaprobado(s).'),
             level='warning'
         )
 
+    def _set_approval(self, queryset, is_approved: bool) -> int:
+        """
+        Aprueba o desaprueba los artesanos del queryset con un UPDATE.
+
+        El UPDATE no dispara post_save: se actualiza updated_at (versión del
+        usuario en los tokens) y se invalidan las caches a mano.
+        """
+        artisan_ids = list(queryset.filter(role=UserRole.ARTISAN).values_list('id', flat=True))
+        updated = User.objects.filter(id__in=artisan_ids).update(
+            is_approved=is_approved, updated_at=timezone.now()
+        )
+        for user_id in artisan_ids:
+            invalidate_artisan_cache(user_id)
+            invalidate_auth_user(user_id)
+        return updated
+
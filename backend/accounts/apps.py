@@ -5,3 +5,9 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
 
+    def ready(self):
+        """
+        Importa signals cuando la app está lista.
+        Esto registra los receivers que invalidan la cache de autenticación.
+        """
+        import accounts.signals  # noqa: F401
@@ -0,0 +1,148 @@
+"""
+Autenticación JWT sin consultar accounts_user en cada petición.
+
+El access token lleva los claims del usuario (CustomTokenObtainPairSerializer
+y CustomTokenRefreshSerializer):
+- role, is_approved, artisan_profile_id
+- ver: versión del usuario (updated_at en microsegundos)
+
+CachedJWTAuthentication construye `request.user` sin queries a partir de
+una copia cacheada de la fila del usuario (sin password ni last_login, que
+se cargan al leerlos). La copia se invalida al guardar el usuario, al
+crear/borrar su perfil y en las acciones en bloque (moderate y las
+acciones del admin), y caduca a los AUTH_USER_CACHE_TTL segundos (con una
+cache por proceso, el retraso máximo en otros procesos).
+
+Los datos del usuario salen siempre de la fila (cacheada o recién leída),
+nunca de los claims: un UPDATE en bloque puede cambiarla sin tocar
+updated_at. La versión del token solo sirve para detectar una copia
+desactualizada: si el token es más nuevo que la cache, se recarga de la
+base de datos (1 query).
+
+El perfil de artesano se adjunta solo con su id, así que
+`hasattr(request.user, 'artisan_profile')` no hace query; el resto de sus
+campos se cargan de una vez al leer el primero.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+
+AUTH_USER_CACHE_KEY = 'accounts:auth_user:{user_id}'
+
+# Campos del usuario que no se cachean (se cargan de la base de datos al leerlos)
+UNCACHED_FIELDS = ('password', 'last_login')
+
+
+def user_version(updated_at) -> int:
+    """Versión del usuario: su updated_at en microsegundos."""
+    return int(updated_at.timestamp() * 1_000_000)
+
+
+def profile_id(user) -> int | None:
+    """ID del perfil de artesano del usuario (None si no tiene)."""
+    profile = getattr(user, 'artisan_profile', None)
+    return profile.id if profile else None
+
+
+def add_user_claims(token, user):
+    """Añade al token los claims del usuario."""
+    token['role'] = user.role
+    token['is_approved'] = user.is_approved
+    token['artisan_profile_id'] = profile_id(user)
+    token['ver'] = user_version(user.updated_at)
+    return token
+
+
+def cached_field_names() -> list[str]:
+    """Campos de la fila del usuario que se guardan en la cache."""
+    return [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname not in UNCACHED_FIELDS
+    ]
+
+
+def load_auth_user(user_id) -> dict | None:
+    """
+    Lee de la base de datos la fila del usuario y la guarda en la cache
+    (1 query, con el id del perfil de artesano).
+    """
+    state = User.objects.filter(id=user_id).values(
+        *cached_field_names(),
+        artisan_profile_id=F('artisan_profile__id'),
+    ).first()
+    if state is not None:
+        state['ver'] = user_version(state['updated_at'])
+        cache.set(AUTH_USER_CACHE_KEY.format(user_id=user_id), state, settings.AUTH_USER_CACHE_TTL)
+    return state
+
+
+def invalidate_auth_user(user_id) -> None:
+    """
+    Borra la copia cacheada del usuario (la siguiente petición la recarga).
+
+    Se borra ya y otra vez al hacer commit: una petición concurrente que la
+    recargue antes del commit cachea la fila anterior a la transacción.
+    """
+    def delete():
+        cache.delete(AUTH_USER_CACHE_KEY.format(user_id=user_id))
+
+    delete()
+    transaction.on_commit(delete)
+
+
+def build_user(state: dict) -> User:
+    """
+    Usuario a partir de su fila cacheada, con el perfil de artesano
+    adjunto (solo id).
+
+    Es un User normal: los campos no cacheados se cargan al leerlos y
+    save() solo escribe los campos cargados.
+    """
+    # Importar aquí para evitar circular imports
+    from artisans.models import ArtisanProfile
+
+    field_names = cached_field_names()
+    user = User.from_db(DEFAULT_DB_ALIAS, field_names, [state[name] for name in field_names])
+
+    profile = None
+    if state['artisan_profile_id'] is not None:
+        profile = ArtisanProfile.from_db(DEFAULT_DB_ALIAS, ['id', 'user_id'], [state['artisan_profile_id'], user.id])
+        ArtisanProfile._meta.get_field('user').set_cached_value(profile, user)
+    # Con None cacheado, hasattr(user, 'artisan_profile') es False sin query
+    User._meta.get_field('artisan_profile').set_cached_value(user, profile)
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que resuelve el usuario desde la cache (ver docstring
+    del módulo), sin query a accounts_user.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        state = cache.get(AUTH_USER_CACHE_KEY.format(user_id=user_id))
+        token_version = validated_token.get('ver')
+
+        if state is None or (token_version is not None and token_version > state['ver']):
+            state = load_auth_user(user_id)
+            if state is None:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not state['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return build_user(state)
@@ -0,0 +1,120 @@
+"""
+Registro de last_login agrupado.
+
+Con SIMPLE_JWT['UPDATE_LAST_LOGIN'] cada login escribía su fila de
+accounts_user. En su lugar, el login apunta la hora en un buffer en
+memoria y LastLoginBuffer la escribe cada LAST_LOGIN_FLUSH_INTERVAL
+segundos en un hilo de fondo, con un UPDATE por lote de usuarios:
+
+    UPDATE accounts_user SET last_login = GREATEST(COALESCE(last_login, x), x)
+    WHERE id IN (...)     -- x = CASE id WHEN ... THEN ... END
+
+GREATEST hace que el flush de otro proceso con una hora más antigua no
+retroceda last_login. El UPDATE no toca updated_at ni dispara signals.
+
+Los logins pendientes se escriben también al salir del proceso; si se
+cae, se pierden como mucho LAST_LOGIN_FLUSH_INTERVAL segundos de
+last_login (un dato informativo). Con LAST_LOGIN_FLUSH_INTERVAL=0 se
+escribe en el momento.
+"""
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, DateTimeField, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import User
+
+
+logger = logging.getLogger(__name__)
+
+# Usuarios por UPDATE
+FLUSH_BATCH_SIZE = 500
+
+
+class LastLoginBuffer:
+    """
+    Horas de login pendientes de escribir, por ID de usuario.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def record(self, user_id: int, when) -> None:
+        """Apunta un login y programa el flush si no hay uno programado."""
+        interval = settings.LAST_LOGIN_FLUSH_INTERVAL
+        with self._lock:
+            self._pending[user_id] = max(when, self._pending.get(user_id, when))
+            if interval > 0 and self._timer is None:
+                self._timer = threading.Timer(interval, self.flush_in_background)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if interval <= 0:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Escribe los logins pendientes (un UPDATE por FLUSH_BATCH_SIZE usuarios).
+
+        Returns:
+            int: Usuarios actualizados
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+
+        items = list(pending.items())
+        for start in range(0, len(items), FLUSH_BATCH_SIZE):
+            batch = dict(items[start:start + FLUSH_BATCH_SIZE])
+            login = Case(
+                *[When(id=user_id, then=Value(when)) for user_id, when in batch.items()],
+                output_field=DateTimeField(),
+            )
+            User.objects.filter(id__in=batch).update(
+                last_login=Greatest(Coalesce('last_login', login), login)
+            )
+        return len(items)
+
+    def flush_in_background(self) -> None:
+        """Flush desde el hilo del temporizador."""
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Flushing last_login failed')
+        finally:
+            # Conexión propia del hilo
+            connection.close()
+
+
+last_login_buffer = LastLoginBuffer()
+
+
+def record_login(user: User) -> None:
+    """
+    Registra un login: last_login del objeto al momento, en la base de
+    datos en el siguiente flush.
+    """
+    now = timezone.now()
+    user.last_login = now
+    last_login_buffer.record(user.pk, now)
+
+
+@atexit.register
+def flush_on_exit() -> None:
+    """Escribe los logins pendientes al salir del proceso."""
+    if len(last_login_buffer):
+        try:
+            last_login_buffer.flush()
+        except Exception:
+            logger.exception('Flushing last_login on exit failed')
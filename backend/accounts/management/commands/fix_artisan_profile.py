@@ -98,7 +98,6 @@ class Command(BaseCommand):
         
         profile = ArtisanProfile.objects.create(
             user=user,
-            slug=user.username,
             display_name=user.get_full_name() or user.username,
             craft_type=CraftType.OTHER,
             location=MenorcaLocation.OTHER,
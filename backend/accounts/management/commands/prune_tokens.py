@@ -0,0 +1,49 @@
+"""
+Management command para purgar los refresh tokens caducados.
+
+Cada refresh (ROTATE_REFRESH_TOKENS + BLACKLIST_AFTER_ROTATION) añade
+filas a OutstandingToken y BlacklistedToken; las de tokens caducados ya
+no sirven. Este comando las borra por lotes. Programarlo (cron) o
+dejarlo como worker con --watch.
+
+Uso:
+    python manage.py prune_tokens
+    python manage.py prune_tokens --watch --interval 3600
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.revocation import PRUNE_BATCH_SIZE, prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Borra los refresh tokens caducados (y su entrada en la blacklist)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=PRUNE_BATCH_SIZE,
+            help=f'Tokens por lote (default: {PRUNE_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Seguir purgando periódicamente (worker)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=3600,
+            help='Segundos entre purgas con --watch (default: 3600)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = prune_expired_tokens(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'🧹 {deleted} token(s) caducado(s) borrado(s)'))
+
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
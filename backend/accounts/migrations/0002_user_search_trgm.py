@@ -0,0 +1,73 @@
+"""
+Índices de trigramas para la búsqueda del listado de artesanos del panel
+de admin (username/email icontains, ver admin_panel/views.py).
+
+Django traduce `icontains` en PostgreSQL a
+`UPPER("username"::text) LIKE UPPER('%...%')`: un índice B-tree no sirve
+para un patrón con comodín al principio, pero un índice GIN de trigramas
+sobre esa misma expresión sí.
+
+Solo en PostgreSQL con la extensión pg_trgm disponible; en otra base de
+datos, o si no está disponible, la migración no hace nada y la búsqueda
+funciona igual (escaneando la tabla).
+"""
+
+from django.db import migrations
+
+
+FORWARD_SQL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """
+    CREATE INDEX IF NOT EXISTS accounts_user_username_trgm
+    ON accounts_user
+    USING gin ((UPPER(username::text)) gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS accounts_user_email_trgm
+    ON accounts_user
+    USING gin ((UPPER(email::text)) gin_trgm_ops)
+    """,
+]
+
+REVERSE_SQL = [
+    'DROP INDEX IF EXISTS accounts_user_email_trgm',
+    'DROP INDEX IF EXISTS accounts_user_username_trgm',
+]
+
+
+def trigram_available(schema_editor) -> bool:
+    """Comprueba que el servidor Postgres tiene pg_trgm."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return False
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone()[0] == 1
+
+
+def create_indexes(apps, schema_editor):
+    if not trigram_available(schema_editor):
+        # La búsqueda usará un escaneo secuencial
+        return
+
+    for sql in FORWARD_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for sql in REVERSE_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
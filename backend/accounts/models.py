@@ -154,14 +154,70 @@ class User(AbstractBaseUser, PermissionsMixin):
         """
         return (self.is_artisan and self.is_approved) or self.is_admin
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Guarda los valores leídos de la base de datos para que save()
+        solo escriba los campos que cambian.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        """Recarga campos y los marca como leídos (sin cambios)."""
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if hasattr(self, '_loaded_values'):
+            self._loaded_values.update(self.current_values(fields))
+    
+    def current_values(self, fields=None) -> dict:
+        """Valores actuales de los campos cargados (no diferidos)."""
+        deferred = self.get_deferred_fields()
+        return {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if not field.primary_key
+            and field.attname not in deferred
+            and (fields is None or field.attname in fields)
+        }
+    
+    def changed_fields(self) -> list[str]:
+        """
+        Campos que han cambiado desde que se leyó de la base de datos.
+        """
+        loaded = getattr(self, '_loaded_values', {})
+        return [
+            name for name, value in self.current_values().items()
+            if name not in loaded or loaded[name] != value
+        ]
+    
     def save(self, *args, **kwargs):
         """
         Override save para auto-aprobar admins.
+        
+        Un usuario leído de la base de datos solo escribe los campos que han
+        cambiado (y updated_at); si no ha cambiado nada no hace UPDATE.
         """
         # Los admins siempre están aprobados
         if self.role == UserRole.ADMIN:
             self.is_approved = True
             self.is_staff = True
         
+        tracked = (
+            not self._state.adding
+            and hasattr(self, '_loaded_values')
+            and not args
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        )
+        if tracked:
+            changed = self.changed_fields()
+            if not changed:
+                return
+            kwargs['update_fields'] = {*changed, 'updated_at'}
+        
         super().save(*args, **kwargs)
+        
+        if hasattr(self, '_loaded_values'):
+            self._loaded_values.update(self.current_values(kwargs.get('update_fields')))
 
@@ -0,0 +1,139 @@
+"""
+Blacklist de refresh tokens: filtro en memoria y purga de caducados.
+
+Con ROTATE_REFRESH_TOKENS y BLACKLIST_AFTER_ROTATION cada refresh añade
+una fila a OutstandingToken y otra a BlacklistedToken, y comprueba el
+token contra la blacklist.
+
+- RevocationFilter: filtro de Bloom por proceso con los jti en la
+  blacklist (sin caducar). Si dice que un jti no está, no hace falta
+  consultar la base de datos; si dice que puede estar, se consulta. Se
+  reconstruye cada TOKEN_REVOCATION_FILTER_REFRESH segundos y añade al
+  momento los tokens que este proceso mete en la blacklist.
+- Un token revocado en otro proceso después de construir el filtro no
+  está en él, pero el refresh lo detecta igualmente: al rotar, el token
+  se mete en la blacklist con get_or_create y, si ya estaba, se rechaza
+  (ver accounts/tokens.py). Es la misma fila única, así que tampoco dos
+  refresh simultáneos pueden usar el mismo token.
+- prune_expired_tokens: borra por lotes los tokens caducados (y su fila
+  en la blacklist), que ya no se pueden usar. Comando prune_tokens.
+"""
+
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+# Tasa de falsos positivos del filtro (consultas a la base de datos de más)
+FALSE_POSITIVE_RATE = 0.01
+
+# Capacidad mínima: margen para los tokens revocados hasta la próxima reconstrucción
+MIN_CAPACITY = 1024
+
+# Tokens borrados por lote al purgar
+PRUNE_BATCH_SIZE = 1000
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom sobre strings (k posiciones por doble hashing de un
+    digest blake2b).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = FALSE_POSITIVE_RATE):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(item))
+
+
+class RevocationFilter:
+    """
+    jti revocados (BlacklistedToken) en memoria, reconstruido periódicamente.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._built_at = 0.0
+
+    def reset(self) -> None:
+        """Descarta el filtro: se reconstruye en la siguiente comprobación."""
+        with self._lock:
+            self._bloom = None
+
+    def is_stale(self) -> bool:
+        return self._bloom is None or time.monotonic() - self._built_at >= settings.TOKEN_REVOCATION_FILTER_REFRESH
+
+    def rebuild(self) -> None:
+        """Carga los jti de la blacklist que aún no han caducado (1 query)."""
+        jtis = list(
+            BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+            .values_list('token__jti', flat=True)
+        )
+        bloom = BloomFilter(max(MIN_CAPACITY, len(jtis) * 2))
+        for jti in jtis:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._built_at = time.monotonic()
+
+    def might_contain(self, jti: str) -> bool:
+        """False si el jti seguro que no está en la blacklist."""
+        if self.is_stale():
+            with self._lock:
+                # Otro hilo puede haberlo reconstruido mientras esperábamos
+                if self.is_stale():
+                    self.rebuild()
+        return jti in self._bloom
+
+    def add(self, jti: str) -> None:
+        """Añade un jti recién revocado por este proceso."""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+
+revocation_filter = RevocationFilter()
+
+
+def prune_expired_tokens(batch_size: int = PRUNE_BATCH_SIZE) -> int:
+    """
+    Borra por lotes los tokens caducados y su fila en la blacklist.
+
+    Cada lote es un DELETE corto por id, en lugar de uno solo que bloquee
+    toda la tabla.
+
+    Returns:
+        int: Tokens borrados
+    """
+    now = timezone.now()
+    deleted = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+
+        # BlacklistedToken se borra en cascada
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
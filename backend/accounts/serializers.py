@@ -6,7 +6,12 @@ from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import authenticate
 from django.core.exceptions import ValidationError as DjangoValidationError
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from .authentication import add_user_claims
+from .logins import record_login
+from .tokens import FilteredRefreshToken
 from .models import User, UserRole
 import re
 
@@ -239,10 +244,18 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     Además de los tokens, retorna datos del usuario.
     
     Usa 'email' como campo de identificación (en lugar de 'username').
+    
+    Los tokens llevan los claims del usuario (role, is_approved,
+    artisan_profile_id, ver) que usa CachedJWTAuthentication.
     """
     # Cambiar el nombre del campo de username a email
     username_field = User.USERNAME_FIELD
     
+    @classmethod
+    def get_token(cls, user):
+        """Refresh token (y su access token) con los claims del usuario."""
+        return add_user_claims(super().get_token(user), user)
+    
     def validate(self, attrs: dict) -> dict:
         """
         Valida credenciales y retorna tokens + datos de usuario.
@@ -263,6 +276,9 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             logger.warning(f"[LOGIN] Fallo de autenticación para {email}: {str(e)}")
             raise
         
+        # last_login se escribe agrupado con otros logins (accounts/logins.py)
+        record_login(self.user)
+        
         try:
             # El usuario autenticado está disponible en self.user después de super().validate()
             logger.info(f"[LOGIN] Usuario autenticado: {self.user.email} (ID: {self.user.id})")
@@ -293,6 +309,31 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             )
 
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh de JWT que actualiza los claims del usuario en el access token.
+    
+    El access token copia los claims del refresh token, que son los del
+    login; si el usuario ha cambiado desde entonces (aprobado, perfil
+    creado...) se ponen al día aquí.
+    
+    La blacklist se comprueba con el filtro en memoria (FilteredRefreshToken).
+    """
+    token_class = FilteredRefreshToken
+    
+    def validate(self, attrs: dict) -> dict:
+        data = super().validate(attrs)
+        
+        access = AccessToken(data['access'], verify=False)
+        user = User.objects.select_related('artisan_profile').filter(
+            id=access[api_settings.USER_ID_CLAIM]
+        ).first()
+        if user is not None:
+            data['access'] = str(add_user_claims(access, user))
+        
+        return data
+
+
 class LoginSerializer(serializers.Serializer):
     """
     Serializer para login (alternativa simple).
@@ -0,0 +1,19 @@
+"""
+Signals para la app accounts.
+
+Invalidan la copia cacheada del usuario autenticado
+(accounts/authentication.py) cuando cambia.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_auth_user
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_user_on_change(sender, instance: User, **kwargs) -> None:
+    """Invalida la cache del usuario al guardarlo o borrarlo."""
+    invalidate_auth_user(instance.id)
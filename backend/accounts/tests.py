@@ -1,6 +1,32 @@
-from django.test import TestCase
+import io
+import uuid
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.contrib import admin
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
 from django.core.exceptions import ValidationError
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from .authentication import (
+    AUTH_USER_CACHE_KEY,
+    CachedJWTAuthentication,
+    invalidate_auth_user,
+    load_auth_user,
+    user_version,
+)
 from .models import User, UserRole
+from .logins import LastLoginBuffer
+from .tokens import FilteredRefreshToken
+from .revocation import BloomFilter, prune_expired_tokens, revocation_filter
+from .serializers import CustomTokenObtainPairSerializer
 
 
 class UserModelTests(TestCase):
@@ -257,3 +283,344 @@ class CustomUserManagerTests(TestCase):
                 is_superuser=False  # Esto debe fallar
             )
 
+
+class CachedJWTAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='ceramista@example.com', password='Secreta123!', username='ceramista', role=UserRole.ARTISAN
+        )
+        self.refresh = CustomTokenObtainPairSerializer.get_token(self.user)
+        self.access = self.refresh.access_token
+        self.auth = CachedJWTAuthentication()
+
+    @override_settings(LAST_LOGIN_FLUSH_INTERVAL=0)
+    def test_login_token_has_user_claims(self):
+        """Test that the login access token carries role, approval and profile"""
+        response = self.client.post(
+            '/api/v1/auth/login/', {'email': 'ceramista@example.com', 'password': 'Secreta123!'}, format='json'
+        )
+        token = AccessToken(response.data['access'])
+
+        self.assertEqual(token['role'], UserRole.ARTISAN)
+        self.assertFalse(token['is_approved'])
+        self.assertEqual(token['artisan_profile_id'], self.user.artisan_profile.id)
+        self.assertIn('ver', token)
+
+    def test_warm_cache_resolves_without_queries(self):
+        """Test that the user and its profile come from the cache"""
+        self.auth.get_user(self.access)
+
+        with self.assertNumQueries(0):
+            user = self.auth.get_user(self.access)
+            self.assertEqual(user.email, 'ceramista@example.com')
+            self.assertTrue(user.is_artisan)
+            self.assertTrue(hasattr(user, 'artisan_profile'))
+            self.assertEqual(user.artisan_profile.id, self.access['artisan_profile_id'])
+
+        # El resto del perfil se carga de una vez
+        with self.assertNumQueries(1):
+            self.assertEqual(user.artisan_profile.display_name, 'ceramista@example.com')
+            self.assertEqual(user.artisan_profile.slug, 'ceramista')
+
+    def test_cold_cache_costs_one_query(self):
+        """Test that a cache miss loads the user and profile id in one query"""
+        with self.assertNumQueries(1):
+            self.auth.get_user(self.access)
+
+    def test_user_without_profile(self):
+        """Test that hasattr(user, 'artisan_profile') is False without a query"""
+        admin = User.objects.create_user(email='admin@example.com', password='x', username='admin', role=UserRole.ADMIN)
+        access = CustomTokenObtainPairSerializer.get_token(admin).access_token
+        self.auth.get_user(access)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(hasattr(self.auth.get_user(access), 'artisan_profile'))
+
+    def test_changes_after_login_win_over_claims(self):
+        """Test that approving the user is visible with the old token"""
+        self.user.is_approved = True
+        self.user.save()
+
+        user = self.auth.get_user(self.access)
+
+        self.assertTrue(user.is_approved)
+
+    def test_set_based_disapproval_wins_over_claims(self):
+        """Test that an UPDATE that keeps updated_at is not masked by the token claims"""
+        User.objects.filter(pk=self.user.pk).update(is_approved=True)
+        access = CustomTokenObtainPairSerializer.get_token(User.objects.get(pk=self.user.pk)).access_token
+        self.assertTrue(self.auth.get_user(access).is_approved)
+
+        User.objects.filter(pk=self.user.pk).update(is_approved=False)
+        cache.clear()
+
+        self.assertFalse(self.auth.get_user(access).is_approved)
+
+    def test_admin_disapproval_invalidates_cached_user(self):
+        """Test that the admin bulk action bumps the version and drops the cached user"""
+        User.objects.filter(pk=self.user.pk).update(is_approved=True)
+        self.user.refresh_from_db()
+        access = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.auth.get_user(access)
+
+        admin.site._registry[User].disapprove_artisans(Mock(), User.objects.filter(pk=self.user.pk))
+
+        self.assertFalse(self.auth.get_user(access).is_approved)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_approved)
+        self.assertGreater(user_version(self.user.updated_at), access['ver'])
+
+    def test_deleted_profile_wins_over_claims(self):
+        """Test that a deleted artisan profile is not restored from the token claims"""
+        self.auth.get_user(self.access)
+        self.user.artisan_profile.delete()
+
+        user = self.auth.get_user(self.access)
+
+        self.assertFalse(hasattr(user, 'artisan_profile'))
+
+    def test_user_cached_during_transaction_is_invalidated_on_commit(self):
+        """Test that a copy cached before the commit is dropped when it commits"""
+        self.auth.get_user(self.access)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+            invalidate_auth_user(self.user.pk)
+            # Petición concurrente: aún ve la fila anterior y la vuelve a cachear
+            state = load_auth_user(self.user.pk)
+            state['is_active'] = True
+            cache.set(AUTH_USER_CACHE_KEY.format(user_id=self.user.pk), state)
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.get_user(self.access)
+
+    def test_inactive_user_is_rejected(self):
+        """Test that a deactivated user cannot authenticate with a cached state"""
+        self.auth.get_user(self.access)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.get_user(self.access)
+
+    def test_saving_resolved_user_keeps_password(self):
+        """Test that saving the lightweight user does not overwrite uncached fields"""
+        user = self.auth.get_user(self.access)
+        user.first_name = 'Marta'
+        user.save()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Marta')
+        self.assertTrue(self.user.check_password('Secreta123!'))
+
+    def test_bearer_request(self):
+        """Test that API requests authenticate with the cached user"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+
+        response = self.client.get('/api/v1/auth/profile/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['email'], 'ceramista@example.com')
+
+    def test_refresh_updates_claims(self):
+        """Test that refreshing stamps the current user state on the access token"""
+        self.user.is_approved = True
+        self.user.save()
+
+        response = self.client.post('/api/v1/auth/token/refresh/', {'refresh': str(self.refresh)}, format='json')
+        token = AccessToken(response.data['access'])
+
+        self.assertTrue(token['is_approved'])
+        self.assertGreater(token['ver'], self.access['ver'])
+
+
+class TokenRevocationTests(APITestCase):
+
+    url = '/api/v1/auth/token/refresh/'
+
+    def setUp(self):
+        revocation_filter.reset()
+        self.user = User.objects.create_user(
+            email='ceramista@example.com', password='Secreta123!', username='ceramista'
+        )
+        self.refresh = str(CustomTokenObtainPairSerializer.get_token(self.user))
+
+    def test_bloom_filter(self):
+        """Test that added items are always found and false positives are rare"""
+        bloom = BloomFilter(1000)
+        added = [str(uuid.uuid4()) for _ in range(1000)]
+        for item in added:
+            bloom.add(item)
+
+        self.assertTrue(all(item in bloom for item in added))
+        false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_refresh_skips_blacklist_lookup(self):
+        """Test that a token missing from the filter is not looked up in the database"""
+        with patch.object(RefreshToken, 'check_blacklist') as check_blacklist:
+            response = self.client.post(self.url, {'refresh': self.refresh}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        check_blacklist.assert_not_called()
+
+    def test_rotated_token_cannot_be_reused(self):
+        """Test that a rotated token is rejected, by the filter or by the blacklist insert"""
+        self.client.post(self.url, {'refresh': self.refresh}, format='json')
+
+        response = self.client.post(self.url, {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+        # Filtro de otro proceso, construido antes de la rotación
+        with patch.object(revocation_filter, 'might_contain', return_value=False):
+            response = self.client.post(self.url, {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_without_rotation_blacklist_is_always_checked(self):
+        """Test that the filter is not trusted when refresh does not blacklist the used token"""
+        RefreshToken(self.refresh).blacklist()
+        token = FilteredRefreshToken(self.refresh, verify=False)
+
+        with patch('accounts.tokens.api_settings.BLACKLIST_AFTER_ROTATION', False), \
+                patch.object(revocation_filter, 'might_contain', return_value=False):
+            with self.assertRaises(TokenError):
+                token.check_blacklist()
+
+    def test_logged_out_token_is_rejected(self):
+        """Test that logout revokes the refresh token"""
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/v1/auth/logout/', {'refresh': self.refresh}, format='json')
+
+        response = self.client.post(self.url, {'refresh': self.refresh}, format='json')
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_filter_rebuilt_from_blacklist(self):
+        """Test that a rebuilt filter contains the unexpired blacklist"""
+        token = RefreshToken(self.refresh)
+        token.blacklist()
+        revocation_filter.reset()
+
+        self.assertTrue(revocation_filter.might_contain(token['jti']))
+
+    def test_prune_expired_tokens(self):
+        """Test that expired tokens and their blacklist rows are deleted in batches"""
+        expired = timezone.now() - timedelta(days=1)
+        for i in range(5):
+            token = OutstandingToken.objects.create(
+                user=self.user, jti=f'expired-{i}', token='x', expires_at=expired
+            )
+            BlacklistedToken.objects.create(token=token)
+
+        self.assertEqual(prune_expired_tokens(batch_size=2), 5)
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    def test_prune_command(self):
+        """Test that the command reports the deleted tokens"""
+        OutstandingToken.objects.create(
+            user=self.user, jti='expired', token='x', expires_at=timezone.now() - timedelta(days=1)
+        )
+        out = io.StringIO()
+
+        call_command('prune_tokens', stdout=out)
+
+        self.assertIn('1 token(s)', out.getvalue())
+
+
+class LoginWriteTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='ceramista@example.com', password='Secreta123!', username='ceramista'
+        )
+        self.other = User.objects.create_user(
+            email='joyera@example.com', password='Secreta123!', username='joyera'
+        )
+
+    def user_updates(self, queries):
+        return [q['sql'] for q in queries if q['sql'].startswith('UPDATE "accounts_user"')]
+
+    def test_login_defers_last_login(self):
+        """Test that logging in does not write the user row"""
+        buffer = LastLoginBuffer()
+
+        with patch('accounts.logins.last_login_buffer', buffer), patch('accounts.logins.threading.Timer') as timer:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    '/api/v1/auth/login/', {'email': 'ceramista@example.com', 'password': 'Secreta123!'}, format='json'
+                )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.user_updates(queries.captured_queries), [])
+        self.assertEqual(len(buffer), 1)
+        timer.return_value.start.assert_called_once()
+
+    def test_flush_is_one_update(self):
+        """Test that buffered logins are written in one UPDATE, without touching updated_at"""
+        buffer = LastLoginBuffer()
+        now = timezone.now()
+        updated_at = self.user.updated_at
+
+        with patch('accounts.logins.threading.Timer'):
+            buffer.record(self.user.id, now)
+            buffer.record(self.other.id, now - timedelta(minutes=1))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(buffer.flush(), 2)
+
+        self.assertEqual(len(self.user_updates(queries.captured_queries)), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, now)
+        self.assertEqual(self.user.updated_at, updated_at)
+        self.assertEqual(len(buffer), 0)
+
+    def test_flush_never_moves_last_login_back(self):
+        """Test that an older buffered login does not overwrite a newer one"""
+        now = timezone.now()
+        User.objects.filter(id=self.user.id).update(last_login=now)
+        buffer = LastLoginBuffer()
+
+        with patch('accounts.logins.threading.Timer'):
+            buffer.record(self.user.id, now - timedelta(hours=1))
+        buffer.flush()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, now)
+
+    def test_save_writes_changed_fields_only(self):
+        """Test that User.save only updates what changed"""
+        user = User.objects.get(id=self.user.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+        self.assertEqual(self.user_updates(queries.captured_queries), [])
+
+        user.first_name = 'Marta'
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+
+        [sql] = self.user_updates(queries.captured_queries)
+        self.assertIn('"first_name"', sql)
+        self.assertIn('"updated_at"', sql)
+        self.assertNotIn('"password"', sql)
+        self.assertNotIn('"email"', sql)
+
+    def test_profile_update_writes_changed_fields_only(self):
+        """Test that the profile endpoint skips unchanged fields"""
+        self.client.force_authenticate(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.patch('/api/v1/auth/profile/', {'first_name': ''}, format='json')
+        self.assertEqual(self.user_updates(queries.captured_queries), [])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                '/api/v1/auth/profile/', {'first_name': 'Marta', 'last_name': ''}, format='json'
+            )
+
+        self.assertEqual(response.data['user']['first_name'], 'Marta')
+        [sql] = self.user_updates(queries.captured_queries)
+        self.assertNotIn('"last_name"', sql)
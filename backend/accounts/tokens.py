@@ -0,0 +1,37 @@
+"""
+Refresh token que comprueba la blacklist con el filtro en memoria
+(ver accounts/revocation.py).
+"""
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .revocation import revocation_filter
+
+
+class FilteredRefreshToken(RefreshToken):
+    """
+    RefreshToken que solo consulta la blacklist si el filtro de Bloom dice
+    que el token puede estar en ella.
+
+    Meterlo en la blacklist falla si ya estaba: así se rechaza un token
+    revocado en otro proceso después de construir su filtro. Ese respaldo
+    solo existe si el refresh rota y blacklistea el token usado; sin
+    ROTATE_REFRESH_TOKENS y BLACKLIST_AFTER_ROTATION se consulta siempre la
+    blacklist.
+    """
+
+    def check_blacklist(self) -> None:
+        if not (api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION):
+            super().check_blacklist()
+        elif revocation_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        blacklisted, created = super().blacklist()
+        revocation_filter.add(self.payload[api_settings.JTI_CLAIM])
+        if not created:
+            raise TokenError(_('Token is blacklisted'))
+        return blacklisted, created
@@ -3,10 +3,10 @@ URLs para la app accounts.
 Maneja rutas de autenticación JWT y gestión de perfiles.
 """
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     RegisterView,
     CustomTokenObtainPairView,
+    CustomTokenRefreshView,
     UserProfileView,
     LogoutView,
     DebugAuthView,
@@ -22,7 +22,7 @@ urlpatterns = [
     path('login/', CustomTokenObtainPairView.as_view(), name='login'),
     
     # Refresh token (obtener nuevo access token)
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
     
     # Logout (blacklist refresh token)
     path('logout/', LogoutView.as_view(), name='logout'),
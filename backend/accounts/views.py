@@ -6,14 +6,15 @@ from rest_framework import status, generics, serializers
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .serializers import (
     RegisterSerializer,
     UserSerializer,
-    CustomTokenObtainPairSerializer
+    CustomTokenObtainPairSerializer,
+    CustomTokenRefreshSerializer,
 )
 from .models import User
+from .tokens import FilteredRefreshToken
 
 
 class RegisterView(APIView):
@@ -147,6 +148,15 @@ class CustomTokenObtainPairView(TokenObtainPairView):
             )
 
 
+class CustomTokenRefreshView(TokenRefreshView):
+    """
+    Refresh de JWT con los claims del usuario al día.
+    
+    POST /api/v1/auth/token/refresh/
+    """
+    serializer_class = CustomTokenRefreshSerializer
+
+
 class UserProfileView(generics.RetrieveUpdateAPIView):
     """
     Vista para ver y actualizar el perfil del usuario autenticado.
@@ -199,7 +209,16 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
             partial=partial
         )
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+        
+        # Escribir solo los campos que cambian (sin UPDATE si no cambia nada)
+        changed = [
+            field for field, value in serializer.validated_data.items()
+            if getattr(instance, field) != value
+        ]
+        for field in changed:
+            setattr(instance, field, serializer.validated_data[field])
+        if changed:
+            instance.save(update_fields=[*changed, 'updated_at'])
         
         return Response(
             {
@@ -245,7 +264,7 @@ class LogoutView(APIView):
                 )
             
             # Blacklist del token
-            token = RefreshToken(refresh_token)
+            token = FilteredRefreshToken(refresh_token)
             token.blacklist()
             
             return Response(
@@ -0,0 +1,97 @@
+"""
+Feed de actividad del panel de administración.
+
+Los signals de admin_panel/signals.py añaden un ActivityEvent por cada
+registro de artesano, producto creado, pedido y pago completado. El feed
+(`/api/v1/admin/activity/` y la actividad reciente del dashboard) lee un
+rango del índice (created_at, id), sin límite de historial.
+
+Las funciones `*_activity` devuelven los campos del evento de cada
+objeto; las usan los signals y la migración que rellena el historial.
+"""
+
+from django.db import transaction
+
+from .models import ActivityEvent, ActivityType
+
+
+def artisan_activity(user) -> dict:
+    """Evento de registro de un artesano."""
+    return {
+        'type': ActivityType.ARTISAN,
+        'object_id': user.id,
+        'message': f'Nuevo artesano: {user.username}',
+        'status': 'approved' if user.is_approved else 'pending',
+        'created_at': user.date_joined,
+    }
+
+
+def product_activity(product) -> dict:
+    """Evento de creación de un producto."""
+    return {
+        'type': ActivityType.PRODUCT,
+        'object_id': product.id,
+        'message': f'Producto: {product.name} por {product.artisan.username}',
+        'status': '',
+        'created_at': product.created_at,
+    }
+
+
+def order_activity(order) -> dict:
+    """Evento de un pedido nuevo."""
+    return {
+        'type': ActivityType.ORDER,
+        'object_id': order.id,
+        'message': f'Pedido #{order.id}: €{order.total_amount}',
+        'status': order.status,
+        'created_at': order.created_at,
+    }
+
+
+def payment_activity(payment) -> dict:
+    """Evento de un pago completado."""
+    return {
+        'type': ActivityType.PAYMENT,
+        'object_id': payment.id,
+        'message': f'Pago del pedido {payment.order.order_number}: €{payment.amount}',
+        'status': payment.status,
+        'created_at': payment.paid_at or payment.updated_at,
+    }
+
+
+def record_activity(*events: dict) -> None:
+    """
+    Añade eventos al feed (un INSERT).
+
+    Un evento ya registrado (mismo tipo y objeto) se ignora, así que
+    se puede llamar en cada guardado sin duplicar.
+    """
+    ActivityEvent.objects.bulk_create(
+        [ActivityEvent(**event) for event in events],
+        ignore_conflicts=True,
+    )
+
+
+def record_order_activity(order_id: int) -> None:
+    """
+    Registra un pedido nuevo con su total ya calculado.
+
+    El total se calcula después de crear el pedido (al añadir los items),
+    así que se lee de nuevo al hacer commit.
+    """
+    # Importar aquí para evitar circular imports
+    from orders.models import Order
+
+    order = Order.objects.filter(id=order_id).first()
+    if order is not None:
+        record_activity(order_activity(order))
+
+
+def schedule_order_activity(order_id: int) -> None:
+    """Registra el pedido al hacer commit de la transacción que lo crea."""
+    transaction.on_commit(lambda: record_order_activity(order_id))
+
+
+def recent_activity(limit: int = 10):
+    """Últimos eventos del feed (una query por el índice)."""
+    return ActivityEvent.objects.order_by('-created_at', '-id')[:limit]
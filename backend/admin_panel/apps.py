@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AdminPanelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'admin_panel'
+
+    def ready(self):
+        """
+        Importa signals cuando la app está lista.
+        Esto registra los receivers del feed de actividad.
+        """
+        import admin_panel.signals  # noqa: F401
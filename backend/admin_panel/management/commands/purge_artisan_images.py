@@ -0,0 +1,60 @@
+"""
+Management command para reintentar el borrado de imágenes de artesanos
+eliminados.
+
+Procesa los ImagePurgeJob pendientes, fallidos (solo sus imágenes
+fallidas) o abandonados (en curso desde hace más de 30 minutos, p. ej.
+tras reiniciar el servidor). Es idempotente: las imágenes que ya no
+existen en Cloudinary cuentan como borradas.
+
+Uso:
+    python manage.py purge_artisan_images
+    python manage.py purge_artisan_images --job 12 --concurrency 8
+"""
+from django.core.management.base import BaseCommand
+
+from admin_panel.models import ImagePurgeStatus
+from admin_panel.purge import PURGE_CONCURRENCY, claimable_jobs, run_purge_job
+
+
+class Command(BaseCommand):
+    help = 'Borra de Cloudinary las imágenes pendientes de artesanos eliminados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--job',
+            type=int,
+            help='Procesar solo este job',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=PURGE_CONCURRENCY,
+            help=f'Lotes de 100 imágenes borrados a la vez (default: {PURGE_CONCURRENCY})',
+        )
+
+    def handle(self, *args, **options):
+        jobs = claimable_jobs()
+        if options['job']:
+            jobs = jobs.filter(id=options['job'])
+        job_ids = list(jobs.order_by('created_at').values_list('id', flat=True))
+
+        if not job_ids:
+            self.stdout.write(self.style.SUCCESS('✅ No hay imágenes pendientes de borrar'))
+            return
+
+        self.stdout.write(f'🗑️  Procesando {len(job_ids)} borrado(s) de imágenes...')
+
+        for job_id in job_ids:
+            job = run_purge_job(job_id, concurrency=options['concurrency'])
+            if job is None:
+                # Otro proceso lo ha reclamado mientras tanto
+                continue
+
+            message = f'{job.username}: {job.purged}/{job.total} imágenes borradas'
+            if job.status == ImagePurgeStatus.COMPLETED:
+                self.stdout.write(self.style.SUCCESS(f'  ✅ {message}'))
+            else:
+                self.stdout.write(self.style.WARNING(
+                    f'  ⚠️  {message}, {len(job.failed_ids)} fallidas ({job.error})'
+                ))
@@ -0,0 +1,52 @@
+"""
+Management command para enviar los emails de moderación pendientes.
+
+Normalmente se envían solos en segundo plano al moderar; este comando
+vacía la cola a mano (reintentos, MODERATION_EMAILS_ASYNC=False) o como
+worker dedicado con --watch.
+
+Uso:
+    python manage.py send_moderation_emails
+    python manage.py send_moderation_emails --watch --interval 30
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from admin_panel.notifications import SEND_BATCH_SIZE, send_pending_notifications
+
+
+class Command(BaseCommand):
+    help = 'Envía los emails pendientes de las acciones de moderación de artesanos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SEND_BATCH_SIZE,
+            help=f'Emails por lote (default: {SEND_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Seguir comprobando la cola (worker)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=30,
+            help='Segundos entre comprobaciones con --watch (default: 30)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_pending_notifications(batch_size=options['batch_size'])
+
+            if sent or failed or not options['watch']:
+                self.stdout.write(self.style.SUCCESS(f'📧 {sent} email(s) enviado(s)'))
+                if failed:
+                    self.stdout.write(self.style.WARNING(f'⚠️  {failed} email(s) fallido(s) (se reintentarán)'))
+
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
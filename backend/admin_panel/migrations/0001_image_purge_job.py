@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImagePurgeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('artisan_id', models.PositiveIntegerField(help_text='ID del User eliminado (ya no existe)', verbose_name='ID del artesano')),
+                ('username', models.CharField(max_length=150, verbose_name='usuario')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En curso'), ('completed', 'Completado'), ('failed', 'Fallido')], db_index=True, default='pending', max_length=10, verbose_name='estado')),
+                ('public_ids', models.JSONField(default=list, help_text='Imágenes a borrar de Cloudinary', verbose_name='public_ids')),
+                ('purged', models.PositiveIntegerField(default=0, help_text='Imágenes ya borradas (o que ya no existían)', verbose_name='borradas')),
+                ('failed_ids', models.JSONField(blank=True, default=list, help_text='Imágenes cuyo lote falló (se reintentan)', verbose_name='public_ids fallidos')),
+                ('error', models.TextField(blank=True, verbose_name='error')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='intentos')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='fecha de creación')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='fin')),
+            ],
+            options={
+                'verbose_name': 'Borrado de imágenes',
+                'verbose_name_plural': 'Borrados de imágenes',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
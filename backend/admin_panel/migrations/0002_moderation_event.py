@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0001_image_purge_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('approve', 'Aprobar'), ('reject', 'Rechazar'), ('feature', 'Destacar'), ('unfeature', 'Quitar de destacados')], max_length=10, verbose_name='acción')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('sent', 'Enviado'), ('failed', 'Fallido')], default='pending', max_length=10, verbose_name='estado')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='intentos')),
+                ('error', models.TextField(blank=True, verbose_name='error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='fecha de creación')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='enviado')),
+                ('artisan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='moderation_events', to=settings.AUTH_USER_MODEL, verbose_name='artesano')),
+                ('moderator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='moderador')),
+            ],
+            options={
+                'verbose_name': 'Evento de moderación',
+                'verbose_name_plural': 'Eventos de moderación',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'id'], name='admin_panel_status_36a2eb_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+from admin_panel.activity import (
+    artisan_activity,
+    order_activity,
+    payment_activity,
+    product_activity,
+)
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_activity(apps, schema_editor):
+    """
+    Rellena el feed con el historial existente: artesanos, productos,
+    pedidos y pagos completados (aunque se hayan reembolsado después).
+    """
+    ActivityEvent = apps.get_model('admin_panel', 'ActivityEvent')
+    User = apps.get_model('accounts', 'User')
+    Product = apps.get_model('shop', 'Product')
+    Order = apps.get_model('orders', 'Order')
+    Payment = apps.get_model('payments', 'Payment')
+
+    sources = [
+        (User.objects.filter(role='artisan'), artisan_activity),
+        (Product.objects.select_related('artisan'), product_activity),
+        (Order.objects.all(), order_activity),
+        (Payment.objects.filter(status__in=['succeeded', 'partially_refunded', 'refunded']).select_related('order'), payment_activity),
+    ]
+
+    for queryset, build in sources:
+        batch = []
+        for obj in queryset.iterator(chunk_size=BATCH_SIZE):
+            batch.append(ActivityEvent(**build(obj)))
+            if len(batch) >= BATCH_SIZE:
+                ActivityEvent.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        ActivityEvent.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0002_moderation_event'),
+        ('accounts', '0002_user_search_trgm'),
+        ('orders', '0003_orderitem_refunded_quantity'),
+        ('payments', '0006_fee_rules'),
+        ('shop', '0004_artisan_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('artisan', 'Registro de artesano'), ('product', 'Producto creado'), ('order', 'Pedido'), ('payment', 'Pago')], max_length=10, verbose_name='tipo')),
+                ('object_id', models.PositiveBigIntegerField(help_text='ID del usuario, producto, pedido o pago', verbose_name='ID del objeto')),
+                ('message', models.CharField(max_length=400, verbose_name='mensaje')),
+                ('status', models.CharField(blank=True, help_text='Estado del objeto cuando ocurrió el evento', max_length=20, verbose_name='estado')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='fecha')),
+            ],
+            options={
+                'verbose_name': 'Evento de actividad',
+                'verbose_name_plural': 'Eventos de actividad',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='admin_panel_created_450adb_idx'), models.Index(fields=['type', '-created_at', '-id'], name='admin_panel_type_36ec8d_idx')],
+                'constraints': [models.UniqueConstraint(fields=('type', 'object_id'), name='unique_activity_event')],
+            },
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+    ]
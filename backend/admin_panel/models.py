@@ -1,3 +1,230 @@
+"""
+Modelos para la app admin_panel.
+
+ImagePurgeJob: borrado en segundo plano de las imágenes de Cloudinary de
+un artesano eliminado (ver admin_panel/purge.py).
+
+ModerationEvent: cola de emails de las acciones de moderación sobre
+artesanos (ver admin_panel/moderation.py y admin_panel/notifications.py).
+
+ActivityEvent: registro de actividad del marketplace (solo se añaden
+filas) que alimenta el feed del panel (ver admin_panel/activity.py).
+"""
 from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class ImagePurgeStatus(models.TextChoices):
+    """
+    Estado de un borrado de imágenes.
+    """
+    PENDING = 'pending', _('Pendiente')
+    RUNNING = 'running', _('En curso')
+    COMPLETED = 'completed', _('Completado')
+    FAILED = 'failed', _('Fallido')
+
+
+class ImagePurgeJob(models.Model):
+    """
+    Imágenes de Cloudinary pendientes de borrar tras eliminar un artesano.
+
+    Se crea en la misma transacción que borra al artesano de la base de
+    datos y se procesa al hacer commit. Los lotes que fallan quedan en
+    `failed_ids` y se reintentan con el comando purge_artisan_images.
+    """
+
+    artisan_id = models.PositiveIntegerField(
+        _('ID del artesano'),
+        help_text=_('ID del User eliminado (ya no existe)')
+    )
+
+    username = models.CharField(_('usuario'), max_length=150)
+
+    status = models.CharField(
+        _('estado'),
+        max_length=10,
+        choices=ImagePurgeStatus.choices,
+        default=ImagePurgeStatus.PENDING,
+        db_index=True
+    )
+
+    public_ids = models.JSONField(
+        _('public_ids'),
+        default=list,
+        help_text=_('Imágenes a borrar de Cloudinary')
+    )
+
+    purged = models.PositiveIntegerField(
+        _('borradas'),
+        default=0,
+        help_text=_('Imágenes ya borradas (o que ya no existían)')
+    )
+
+    failed_ids = models.JSONField(
+        _('public_ids fallidos'),
+        default=list,
+        blank=True,
+        help_text=_('Imágenes cuyo lote falló (se reintentan)')
+    )
+
+    error = models.TextField(_('error'), blank=True)
+
+    attempts = models.PositiveSmallIntegerField(_('intentos'), default=0)
+
+    created_at = models.DateTimeField(_('fecha de creación'), auto_now_add=True)
+    started_at = models.DateTimeField(_('inicio'), null=True, blank=True)
+    finished_at = models.DateTimeField(_('fin'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Borrado de imágenes')
+        verbose_name_plural = _('Borrados de imágenes')
+        ordering = ['-created_at']
+
+    def __str__(self) -> str:
+        return f'{self.username}: {self.purged}/{self.total} ({self.get_status_display()})'
+
+    @property
+    def total(self) -> int:
+        return len(self.public_ids)
+
+    @property
+    def progress(self) -> int:
+        """Porcentaje de imágenes borradas (0-100)."""
+        if not self.public_ids:
+            return 100
+        return min(100, self.purged * 100 // self.total)
+
+
+class ModerationAction(models.TextChoices):
+    """
+    Acciones de moderación sobre artesanos.
+    """
+    APPROVE = 'approve', _('Aprobar')
+    REJECT = 'reject', _('Rechazar')
+    FEATURE = 'feature', _('Destacar')
+    UNFEATURE = 'unfeature', _('Quitar de destacados')
+
+
+class NotificationStatus(models.TextChoices):
+    """
+    Estado del email de una acción de moderación.
+    """
+    PENDING = 'pending', _('Pendiente')
+    SENT = 'sent', _('Enviado')
+    FAILED = 'failed', _('Fallido')
+
+
+class ModerationEvent(models.Model):
+    """
+    Acción de moderación aplicada a un artesano, pendiente de notificar.
+
+    Es la cola de emails de moderación: admin_panel/moderation.py crea un
+    evento por artesano en la misma transacción que la acción, y
+    admin_panel/notifications.py los envía por lotes.
+    """
+
+    artisan = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.CASCADE,
+        related_name='moderation_events',
+        verbose_name=_('artesano')
+    )
+
+    action = models.CharField(
+        _('acción'),
+        max_length=10,
+        choices=ModerationAction.choices
+    )
+
+    moderator = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_('moderador')
+    )
+
+    status = models.CharField(
+        _('estado'),
+        max_length=10,
+        choices=NotificationStatus.choices,
+        default=NotificationStatus.PENDING
+    )
+
+    attempts = models.PositiveSmallIntegerField(_('intentos'), default=0)
+    error = models.TextField(_('error'), blank=True)
+
+    created_at = models.DateTimeField(_('fecha de creación'), auto_now_add=True)
+    sent_at = models.DateTimeField(_('enviado'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Evento de moderación')
+        verbose_name_plural = _('Eventos de moderación')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.get_action_display()}: {self.artisan_id} ({self.get_status_display()})'
+
+
+class ActivityType(models.TextChoices):
+    """
+    Tipo de evento del feed de actividad.
+    """
+    ARTISAN = 'artisan', _('Registro de artesano')
+    PRODUCT = 'product', _('Producto creado')
+    ORDER = 'order', _('Pedido')
+    PAYMENT = 'payment', _('Pago')
+
+
+class ActivityEvent(models.Model):
+    """
+    Evento del feed de actividad del panel de administración.
+
+    Solo se añaden filas (signals de admin_panel/signals.py): el feed es
+    un rango del índice (created_at, id) en lugar de consultar y mezclar
+    usuarios, productos y pedidos en cada petición. Los campos son una
+    foto del momento del evento.
+    """
+
+    type = models.CharField(
+        _('tipo'),
+        max_length=10,
+        choices=ActivityType.choices
+    )
+
+    object_id = models.PositiveBigIntegerField(
+        _('ID del objeto'),
+        help_text=_('ID del usuario, producto, pedido o pago')
+    )
+
+    message = models.CharField(_('mensaje'), max_length=400)
+
+    status = models.CharField(
+        _('estado'),
+        max_length=20,
+        blank=True,
+        help_text=_('Estado del objeto cuando ocurrió el evento')
+    )
+
+    created_at = models.DateTimeField(_('fecha'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('Evento de actividad')
+        verbose_name_plural = _('Eventos de actividad')
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['type', '-created_at', '-id']),
+        ]
+        constraints = [
+            # Un evento por objeto: registrar dos veces no duplica
+            models.UniqueConstraint(fields=['type', 'object_id'], name='unique_activity_event'),
+        ]
 
-# Create your models here.
+    def __str__(self) -> str:
+        return f'{self.created_at:%Y-%m-%d %H:%M} {self.message}'
@@ -0,0 +1,102 @@
+"""
+Moderación de artesanos en bloque.
+
+`moderate` aplica una acción a cualquier número de artesanos con un único
+UPDATE (sin cargar ni guardar los usuarios uno a uno) y, en la misma
+transacción, encola un ModerationEvent por artesano afectado. Al hacer
+commit los emails se envían en segundo plano (admin_panel/notifications.py).
+
+Acciones:
+- approve: artesanos pendientes (o rechazados) → aprobados y activos
+- reject: artesanos pendientes → cuenta desactivada (no pueden entrar)
+- feature / unfeature: destacar o quitar de destacados (ArtisanProfile)
+
+Solo cuentan los artesanos cuyo estado cambia: repetir una acción no
+genera eventos ni emails nuevos.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.authentication import invalidate_auth_user
+from accounts.models import User, UserRole
+from artisans.cache import invalidate_artisan_cache
+from artisans.models import ArtisanProfile
+from .models import ModerationAction, ModerationEvent
+from .notifications import NOTIFY_ACTIONS, enqueue_notifications
+
+
+# Filas por INSERT al encolar eventos
+EVENT_BATCH_SIZE = 1000
+
+
+def moderation_targets(action: str, artisan_ids):
+    """
+    Filas a las que se aplica la acción y valores a escribir.
+
+    Returns:
+        tuple: (queryset, campo con el ID del User, valores del UPDATE)
+    """
+    artisans = User.objects.filter(id__in=artisan_ids, role=UserRole.ARTISAN)
+    now = timezone.now()
+
+    if action == ModerationAction.APPROVE:
+        return (
+            artisans.filter(is_approved=False),
+            'id',
+            {'is_approved': True, 'is_active': True, 'updated_at': now},
+        )
+
+    if action == ModerationAction.REJECT:
+        return (
+            artisans.filter(is_approved=False, is_active=True),
+            'id',
+            {'is_active': False, 'updated_at': now},
+        )
+
+    featured = action == ModerationAction.FEATURE
+    return (
+        ArtisanProfile.objects.filter(user_id__in=artisans.values('id'), is_featured=not featured),
+        'user_id',
+        {'is_featured': featured, 'updated_at': now},
+    )
+
+
+def moderate(action: str, artisan_ids, moderator=None) -> list[int]:
+    """
+    Aplica una acción de moderación a varios artesanos.
+
+    Args:
+        action: ModerationAction
+        artisan_ids: IDs de User (los que no son artesanos se ignoran)
+        moderator: Admin que modera (queda en los eventos)
+
+    Returns:
+        list[int]: IDs de los artesanos cuyo estado ha cambiado
+    """
+    if action not in ModerationAction.values:
+        raise ValueError(f'Unknown moderation action: {action}')
+
+    targets, user_field, values = moderation_targets(action, artisan_ids)
+
+    with transaction.atomic():
+        # Bloquear las filas: una moderación concurrente no las cuenta dos veces
+        changed = list(targets.select_for_update().values_list(user_field, flat=True))
+        if not changed:
+            return []
+
+        targets.model.objects.filter(**{f'{user_field}__in': changed}).update(**values)
+
+        if action in NOTIFY_ACTIONS:
+            ModerationEvent.objects.bulk_create([
+                ModerationEvent(artisan_id=user_id, action=action, moderator=moderator)
+                for user_id in changed
+            ], batch_size=EVENT_BATCH_SIZE)
+            transaction.on_commit(enqueue_notifications)
+
+        # El UPDATE no dispara post_save: invalidar las caches a mano
+        for user_id in changed:
+            invalidate_artisan_cache(user_id)
+            invalidate_auth_user(user_id)
+
+    return changed
@@ -0,0 +1,144 @@
+"""
+Envío de los emails de moderación (cola ModerationEvent).
+
+`send_pending_notifications` vacía la cola por lotes: renderiza la
+plantilla de cada acción (templates/admin_panel/emails/<acción>.txt) y
+envía todos los emails por una sola conexión SMTP, abierta una vez por
+ejecución en lugar de una por email.
+
+Los eventos de cada lote se reclaman con SELECT ... FOR UPDATE SKIP
+LOCKED, así que varios workers pueden vaciar la cola a la vez sin enviar
+dos veces el mismo email. Un email que falla se reintenta en la siguiente
+ejecución hasta MAX_ATTEMPTS veces.
+
+Tras moderar, la cola se vacía en un hilo del propio proceso al hacer
+commit (no hay cola de tareas en el proyecto); el comando
+send_moderation_emails la vacía a mano o como worker (--watch).
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import ModerationAction, ModerationEvent, NotificationStatus
+
+
+logger = logging.getLogger(__name__)
+
+# Acciones que se notifican al artesano
+NOTIFY_ACTIONS = (ModerationAction.APPROVE, ModerationAction.REJECT, ModerationAction.FEATURE)
+
+SUBJECTS = {
+    ModerationAction.APPROVE: '¡Tu taller ya está publicado en MiTaller!',
+    ModerationAction.REJECT: 'Tu solicitud de registro en MiTaller',
+    ModerationAction.FEATURE: 'Tu taller aparece destacado en MiTaller',
+}
+
+# Eventos por lote (una transacción por lote)
+SEND_BATCH_SIZE = 100
+
+# Intentos antes de dar un email por fallido
+MAX_ATTEMPTS = 5
+
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Hilo del proceso para enviar emails (se crea al primer uso)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='moderation-emails')
+    return _executor
+
+
+def build_message(event: ModerationEvent, email_connection=None) -> EmailMessage:
+    """Email de un evento de moderación, renderizado con su plantilla."""
+    artisan = event.artisan
+    profile = getattr(artisan, 'artisan_profile', None)
+
+    body = render_to_string(f'admin_panel/emails/{event.action}.txt', {
+        'name': profile.display_name if profile else artisan.username,
+        'profile': profile,
+        'frontend_url': settings.FRONTEND_URL,
+    })
+    return EmailMessage(
+        subject=SUBJECTS[event.action],
+        body=body,
+        to=[artisan.email],
+        connection=email_connection,
+    )
+
+
+def send_pending_notifications(batch_size: int = SEND_BATCH_SIZE) -> tuple[int, int]:
+    """
+    Envía los emails pendientes por una única conexión SMTP.
+
+    Returns:
+        tuple: (emails enviados, emails fallidos en esta ejecución)
+    """
+    sent = failed = 0
+    last_id = 0
+    email_connection = get_connection()
+
+    # La conexión se abre al entrar y se reutiliza para todos los lotes
+    with email_connection:
+        while True:
+            with transaction.atomic():
+                events = list(
+                    ModerationEvent.objects.select_for_update(skip_locked=True, of=('self',))
+                    .filter(status=NotificationStatus.PENDING, id__gt=last_id)
+                    .select_related('artisan__artisan_profile')
+                    .order_by('id')[:batch_size]
+                )
+                if not events:
+                    break
+
+                now = timezone.now()
+                for event in events:
+                    event.attempts += 1
+                    try:
+                        build_message(event, email_connection).send()
+                    except Exception as e:
+                        logger.warning(f"Moderation email {event.id} failed: {e}")
+                        event.error = str(e)
+                        if event.attempts >= MAX_ATTEMPTS:
+                            event.status = NotificationStatus.FAILED
+                        failed += 1
+                    else:
+                        event.status = NotificationStatus.SENT
+                        event.sent_at = now
+                        event.error = ''
+                        sent += 1
+
+                ModerationEvent.objects.bulk_update(events, ['status', 'attempts', 'error', 'sent_at'])
+                last_id = events[-1].id
+
+    return sent, failed
+
+
+def drain_in_background() -> None:
+    """Vacía la cola desde el hilo de fondo."""
+    try:
+        send_pending_notifications()
+    except Exception:
+        logger.exception('Sending moderation emails failed')
+    finally:
+        # Conexión propia del hilo
+        connection.close()
+
+
+def enqueue_notifications() -> None:
+    """
+    Programa el envío de los emails pendientes en segundo plano.
+
+    Llamar desde transaction.on_commit: los eventos tienen que estar ya
+    guardados.
+    """
+    if not settings.MODERATION_EMAILS_ASYNC:
+        return
+    get_executor().submit(drain_in_background)
@@ -0,0 +1,163 @@
+"""
+Borrado en segundo plano de las imágenes de un artesano eliminado.
+
+delete_artisan_cascade borra al artesano de la base de datos y crea un
+ImagePurgeJob en la misma transacción; al hacer commit el job se procesa
+en un hilo del propio proceso (no hay cola de tareas en el proyecto).
+
+- Las imágenes se borran con `cloudinary.api.delete_resources`, en lotes
+  de DELETE_BATCH_SIZE (el máximo de la API), con como mucho
+  `concurrency` lotes a la vez
+- Las llamadas a Cloudinary van en hilos; las escrituras en base de datos
+  (progreso y resultado) en el hilo que procesa el job, como en
+  payments/refunds.py
+- Es idempotente: una imagen que ya no existe cuenta como borrada, así
+  que reintentar un job (comando purge_artisan_images) nunca falla por
+  lo ya hecho
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+import cloudinary.api
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ImagePurgeJob, ImagePurgeStatus
+
+
+logger = logging.getLogger(__name__)
+
+# Máximo de public_ids por llamada a delete_resources
+DELETE_BATCH_SIZE = 100
+
+# Lotes borrados a la vez
+PURGE_CONCURRENCY = 4
+
+# Un job en curso desde hace más se considera abandonado (proceso reiniciado)
+STALE_AFTER = timedelta(minutes=30)
+
+# Resultados de delete_resources que dejan la imagen fuera de Cloudinary
+DELETED_RESULTS = ('deleted', 'not_found')
+
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Hilo del proceso para procesar jobs (se crea al primer uso)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-purge')
+    return _executor
+
+
+def delete_batch(public_ids: list[str]) -> tuple[list[str], list[str], str]:
+    """
+    Borra un lote de imágenes de Cloudinary (una llamada a la API).
+
+    Returns:
+        tuple: (public_ids borrados, public_ids fallidos, error)
+    """
+    try:
+        result = cloudinary.api.delete_resources(public_ids, invalidate=True)
+    except Exception as e:
+        logger.error(f"Error deleting {len(public_ids)} images from Cloudinary: {e}")
+        return [], public_ids, str(e)
+
+    deleted = result.get('deleted', {})
+    done = [public_id for public_id in public_ids if deleted.get(public_id) in DELETED_RESULTS]
+    failed = [public_id for public_id in public_ids if deleted.get(public_id) not in DELETED_RESULTS]
+    return done, failed, f'{len(failed)} image(s) not deleted' if failed else ''
+
+
+def claimable_jobs():
+    """Jobs que se pueden (re)procesar: pendientes, fallidos o abandonados."""
+    return ImagePurgeJob.objects.filter(
+        Q(status__in=[ImagePurgeStatus.PENDING, ImagePurgeStatus.FAILED])
+        | Q(status=ImagePurgeStatus.RUNNING, started_at__lt=timezone.now() - STALE_AFTER)
+    )
+
+
+def run_purge_job(job_id: int, concurrency: int = PURGE_CONCURRENCY) -> ImagePurgeJob | None:
+    """
+    Procesa un job de borrado de imágenes.
+
+    Un job fallido solo reintenta sus `failed_ids`; uno pendiente o
+    abandonado procesa todas sus imágenes.
+
+    Args:
+        job_id: ID del ImagePurgeJob
+        concurrency: Lotes borrados a la vez
+
+    Returns:
+        ImagePurgeJob | None: El job actualizado, o None si no se pudo
+        reclamar (no existe, ya está completado o en curso)
+    """
+    # Reclamar el job con un UPDATE condicional: nunca dos ejecuciones a la vez
+    claimed = claimable_jobs().filter(id=job_id).update(
+        status=ImagePurgeStatus.RUNNING,
+        started_at=timezone.now(),
+        attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        return None
+
+    job = ImagePurgeJob.objects.get(id=job_id)
+    targets = list(job.failed_ids or job.public_ids)
+    batches = [targets[i:i + DELETE_BATCH_SIZE] for i in range(0, len(targets), DELETE_BATCH_SIZE)]
+
+    remaining = set(targets)
+    failed, errors = [], []
+    try:
+        if batches:
+            with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(batches)))) as executor:
+                futures = [executor.submit(delete_batch, batch) for batch in batches]
+                for future in as_completed(futures):
+                    done, batch_failed, error = future.result()
+                    remaining.difference_update(done)
+                    failed += batch_failed
+                    if error:
+                        errors.append(error)
+                    if done:
+                        # Progreso visible mientras se procesan los demás lotes
+                        ImagePurgeJob.objects.filter(id=job.id).update(purged=F('purged') + len(done))
+    except Exception as e:
+        logger.exception(f"Image purge job {job.id} failed")
+        failed = sorted(remaining)
+        errors.append(str(e))
+
+    job.refresh_from_db(fields=['purged'])
+    job.failed_ids = failed
+    job.status = ImagePurgeStatus.FAILED if failed else ImagePurgeStatus.COMPLETED
+    job.error = errors[0] if failed and errors else ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['failed_ids', 'status', 'error', 'finished_at'])
+
+    logger.info(
+        f"Image purge job {job.id} ({job.username}): "
+        f"{job.purged}/{job.total} deleted, {len(failed)} failed"
+    )
+    return job
+
+
+def purge_in_background(job_id: int) -> None:
+    """Procesa un job desde el hilo de fondo."""
+    try:
+        run_purge_job(job_id)
+    except Exception:
+        logger.exception(f"Image purge job {job_id} failed")
+    finally:
+        # Conexión propia del hilo
+        connection.close()
+
+
+def enqueue_purge(job_id: int) -> None:
+    """
+    Programa un job en segundo plano.
+
+    Llamar desde transaction.on_commit: el job y el borrado del artesano
+    tienen que estar ya guardados.
+    """
+    get_executor().submit(purge_in_background, job_id)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from accounts.models import User
 from artisans.models import ArtisanProfile
+from .models import ActivityEvent, ImagePurgeJob
 
 
 class AdminArtisanSerializer(serializers.ModelSerializer):
@@ -26,15 +27,48 @@ class AdminArtisanSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
-            'id', 'username', 'email', 'role', 'is_approved',
+            'id', 'username', 'email', 'role', 'is_approved', 'is_active',
             'date_joined', 'updated_at',
             'slug', 'bio', 'avatar', 'cover_image', 'is_featured',
             'works_count', 'products_count', 'completed_orders_count',
             'can_be_deleted'
         ]
-        read_only_fields = ['id', 'date_joined', 'updated_at', 'can_be_deleted']
+        read_only_fields = ['id', 'is_active', 'date_joined', 'updated_at', 'can_be_deleted']
     
     def get_can_be_deleted(self, obj):
         """Puede eliminarse si no tiene pedidos completados"""
         return getattr(obj, 'completed_orders_count', 0) == 0
 
+
+class ImagePurgeJobSerializer(serializers.ModelSerializer):
+    """
+    Progreso del borrado de imágenes de un artesano eliminado.
+    """
+    total = serializers.IntegerField(read_only=True)
+    progress = serializers.IntegerField(read_only=True)
+    failed = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ImagePurgeJob
+        fields = [
+            'id', 'artisan_id', 'username', 'status',
+            'total', 'purged', 'failed', 'progress',
+            'error', 'attempts', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+    
+    def get_failed(self, obj):
+        """Número de imágenes pendientes de reintento"""
+        return len(obj.failed_ids)
+
+
+class ActivityEventSerializer(serializers.ModelSerializer):
+    """
+    Evento del feed de actividad (mismo formato que recent_activity del dashboard).
+    """
+    timestamp = serializers.DateTimeField(source='created_at', read_only=True)
+    
+    class Meta:
+        model = ActivityEvent
+        fields = ['id', 'type', 'object_id', 'message', 'status', 'timestamp']
+        read_only_fields = fields
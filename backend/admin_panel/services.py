@@ -1,53 +1,29 @@
 import logging
-import re
-from urllib.parse import urlparse
-import cloudinary.uploader
+from functools import partial
 from django.db import transaction
 from django.core.exceptions import ValidationError
 
 from accounts.models import User
 from artisans.models import ArtisanProfile
+from images.metadata import IMAGE_FIELDS, image_urls, public_id_from_url
+from shop.models import Product
 from works.models import Work
 from orders.models import Order
+from .models import ImagePurgeJob
+from .purge import enqueue_purge
+from .stats import SALE_PAYMENT_STATUSES
 
 logger = logging.getLogger(__name__)
 
 
-def extract_cloudinary_public_id(url: str) -> str | None:
-    """
-    Extrae el public_id de una URL de Cloudinary.
-    
-    Input: https://res.cloudinary.com/xxx/image/upload/v1234567890/works/abc123.jpg
-    Output: works/abc123
-    """
-    if not url or 'cloudinary.com' not in url:
-        return None
-    
-    try:
-        # Split por '/upload/' y tomar parte derecha
-        parts = url.split('/upload/')
-        if len(parts) != 2:
-            return None
-        
-        path = parts[1]
-        
-        # Remover versión (v[números]/)
-        path = re.sub(r'^v\d+/', '', path)
-        
-        # Remover extensión
-        path = re.sub(r'\.[^.]+$', '', path)
-        
-        return path
-    
-    except Exception as e:
-        logger.warning(f"Error extrayendo public_id de {url}: {e}")
-        return None
-
-
 def delete_artisan_cascade(artisan_id: str) -> dict:
     """
     Deletes an artisan and all related content.
     Includes validation for completed orders.
+
+    Images are not deleted here: the DB deletion commits first and an
+    ImagePurgeJob created in the same transaction removes them from
+    Cloudinary in the background (see admin_panel/purge.py).
     """
     logger.info(f"Starting cascade deletion for artisan {artisan_id}")
 
@@ -57,10 +33,10 @@ def delete_artisan_cascade(artisan_id: str) -> dict:
     except User.DoesNotExist:
         raise ValidationError("Artisan not found")
     
-    # Check for completed orders (through OrderItem relationship)
+    # Check for completed orders (sales as in the dashboard, through OrderItem)
     completed_orders = Order.objects.filter(
         items__artisan=user,
-        status='completed'
+        payment_status__in=SALE_PAYMENT_STATUSES
     ).distinct().count()
 
     if completed_orders > 0:
@@ -69,42 +45,28 @@ def delete_artisan_cascade(artisan_id: str) -> dict:
             f"completed orders. Must be kept for audit purposes."
         )
 
-    # 2. COLLECT DATA
-    images_to_delete = []
-    works_count = 0
+    # 2. COLLECT IMAGES (profile, works and products)
+    image_urls_to_delete = []
     
     try:
         profile = user.artisan_profile
-        if profile.avatar:
-            images_to_delete.append(profile.avatar)
-        if profile.cover_image:
-            images_to_delete.append(profile.cover_image)
+        image_urls_to_delete += image_urls(profile, IMAGE_FIELDS['artisans.ArtisanProfile'])
     except ArtisanProfile.DoesNotExist:
         profile = None
     
-    works = Work.objects.filter(artisan=user)
-    works_count = works.count()
-    
+    works = list(Work.objects.filter(artisan=user).only('id', *IMAGE_FIELDS['works.Work']))
     for work in works:
-        if work.thumbnail_url:
-            images_to_delete.append(work.thumbnail_url)
-        if hasattr(work, 'images') and work.images:
-            images_to_delete.extend(work.images)
-    
-    # 3. DELETE FROM CLOUDINARY
-    images_deleted = 0
-    for image_url in images_to_delete:
-        public_id = extract_cloudinary_public_id(image_url)
-        if public_id:
-            try:
-                result = cloudinary.uploader.destroy(public_id)
-                if result.get('result') == 'ok':
-                    images_deleted += 1
-                    logger.info(f"Image deleted: {public_id}")
-            except Exception as e:
-                logger.error(f"Error deleting image {public_id}: {e}")
-
-    # 4. DELETE FROM DB (with transaction)
+        image_urls_to_delete += image_urls(work, IMAGE_FIELDS['works.Work'])
+
+    products = list(Product.objects.filter(artisan=user).only('id', *IMAGE_FIELDS['shop.Product']))
+    for product in products:
+        image_urls_to_delete += image_urls(product, IMAGE_FIELDS['shop.Product'])
+
+    public_ids = list(dict.fromkeys(
+        public_id for public_id in map(public_id_from_url, image_urls_to_delete) if public_id
+    ))
+
+    # 3. DELETE FROM DB (with transaction), then purge images after commit
     with transaction.atomic():
         # Important order: works → profile → user
         Work.objects.filter(artisan=user).delete()
@@ -112,20 +74,28 @@ def delete_artisan_cascade(artisan_id: str) -> dict:
         if profile:
             profile.delete()
 
-        username = user.username
+        user_id, username = user.id, user.username
         user.delete()
 
+        job = ImagePurgeJob.objects.create(
+            artisan_id=user_id,
+            username=username,
+            public_ids=public_ids,
+        )
+        transaction.on_commit(partial(enqueue_purge, job.id))
+
     logger.info(
-        f"Artisan {username} deleted: {works_count} works, "
-        f"{images_deleted} images"
+        f"Artisan {username} deleted: {len(works)} works, {len(products)} products, "
+        f"{len(public_ids)} images queued for deletion (job {job.id})"
     )
 
-    # 5. RETURN SUMMARY
+    # 4. RETURN SUMMARY
     return {
         'user_id': artisan_id,
         'username': username,
-        'works_deleted': works_count,
-        'images_deleted': images_deleted,
+        'works_deleted': len(works),
+        'products_deleted': len(products),
+        'images_to_delete': len(public_ids),
+        'image_purge_job': job.id,
         'success': True
     }
-
@@ -0,0 +1,64 @@
+"""
+Signals para la app admin_panel.
+
+Alimentan el feed de actividad (admin_panel/activity.py) con los
+registros de artesanos, productos, pedidos y pagos.
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from accounts.models import User, UserRole
+from orders.models import Order
+from payments.models import Payment, PaymentStatus
+from shop.models import Product
+from .activity import (
+    artisan_activity,
+    payment_activity,
+    product_activity,
+    record_activity,
+    schedule_order_activity,
+)
+
+
+@receiver(post_save, sender=User)
+def record_artisan_registration(sender, instance: User, created: bool, **kwargs) -> None:
+    """Registra en el feed los artesanos nuevos."""
+    if created and instance.role == UserRole.ARTISAN:
+        record_activity(artisan_activity(instance))
+
+
+@receiver(post_save, sender=Product)
+def record_product_creation(sender, instance: Product, created: bool, **kwargs) -> None:
+    """Registra en el feed los productos nuevos."""
+    if created:
+        record_activity(product_activity(instance))
+
+
+@receiver(post_save, sender=Order)
+def record_order_creation(sender, instance: Order, created: bool, **kwargs) -> None:
+    """
+    Registra en el feed los pedidos nuevos.
+
+    El total se añade después de crear el pedido: se registra al hacer
+    commit.
+    """
+    if created:
+        schedule_order_activity(instance.id)
+
+
+@receiver(post_save, sender=Payment)
+def record_payment_success(sender, instance: Payment, **kwargs) -> None:
+    """
+    Registra en el feed los pagos completados.
+
+    Un pago se guarda varias veces (reembolsos, disputas, conciliación):
+    el evento solo se crea cuando el estado pasa a SUCCEEDED, sin queries
+    en el resto de guardados.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    # post_save llega antes de que save() actualice el estado de referencia
+    if instance.status == PaymentStatus.SUCCEEDED and instance.status_changed:
+        record_activity(payment_activity(instance))
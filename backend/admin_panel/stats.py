@@ -0,0 +1,188 @@
+"""
+Estadísticas del dashboard de administración.
+
+`compute_dashboard_stats` calcula todos los KPIs con consultas agrupadas
+(5 queries en total, sin depender del volumen de datos):
+
+- Artesanos, productos y pedidos: un aggregate() condicional cada uno
+- Gráfico de ventas: un GROUP BY por día (TruncDate) de los últimos 30 días
+- Actividad reciente: últimos eventos del feed (admin_panel/activity.py)
+
+`get_dashboard_stats` sirve una instantánea cacheada: leerla cuesta una
+lectura de cache. Cuando tiene más de DASHBOARD_STATS_REFRESH segundos se
+sigue sirviendo y se recalcula en un hilo en segundo plano (uno a la vez
+por instancia de cache). Solo la primera petición, con la cache vacía,
+la calcula en el momento.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from accounts.models import User, UserRole
+from orders.models import Order
+from payments.models import PaymentStatus
+from shop.models import Product
+from .activity import recent_activity
+from .serializers import ActivityEventSerializer
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_CACHE_KEY = 'admin_panel:dashboard_stats'
+REFRESH_LOCK_KEY = 'admin_panel:dashboard_stats:refreshing'
+
+# La instantánea caduca si nadie la lee en REFRESH x SNAPSHOT_TTL_FACTOR
+SNAPSHOT_TTL_FACTOR = 10
+
+# Días del gráfico de ventas
+SALES_CHART_DAYS = 30
+
+# Pedidos que cuentan como venta (pagados, aunque se haya devuelto una parte)
+SALE_PAYMENT_STATUSES = (PaymentStatus.SUCCEEDED, PaymentStatus.PARTIALLY_REFUNDED)
+
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Hilo del proceso para recalcular la instantánea (se crea al primer uso)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dashboard-stats')
+    return _executor
+
+
+def sales_chart(today, paid: Q) -> list[dict]:
+    """
+    Ventas por día de los últimos SALES_CHART_DAYS días (una query).
+
+    Los días sin ventas aparecen con 0.
+    """
+    start = today - timedelta(days=SALES_CHART_DAYS - 1)
+
+    totals = dict(
+        Order.objects.filter(paid, created_at__date__gte=start)
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(total=Sum('total_amount'))
+        .order_by('day')
+        .values_list('day', 'total')
+    )
+
+    return [
+        {
+            'date': day.isoformat(),
+            'sales': float(totals.get(day) or 0),
+        }
+        for day in (start + timedelta(days=offset) for offset in range(SALES_CHART_DAYS))
+    ]
+
+
+def compute_dashboard_stats() -> dict:
+    """
+    Calcula las estadísticas del dashboard (5 queries).
+
+    Returns:
+        dict: KPIs, actividad reciente y gráfico de ventas, listo para JSON
+    """
+    now = timezone.now()
+    today = timezone.localdate(now)
+    week_ago = now - timedelta(days=7)
+    month_ago = now - timedelta(days=30)
+    paid = Q(payment_status__in=SALE_PAYMENT_STATUSES)
+
+    artisans = User.objects.filter(role=UserRole.ARTISAN).aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(is_approved=False)),
+        new_this_week=Count('id', filter=Q(is_approved=True, date_joined__gte=week_ago)),
+    )
+
+    products = Product.objects.aggregate(
+        active=Count('id', filter=Q(is_active=True)),
+        created_today=Count('id', filter=Q(created_at__date=today)),
+        out_of_stock=Count('id', filter=Q(is_active=True, stock=0)),
+    )
+
+    orders = Order.objects.aggregate(
+        total=Count('id'),
+        last_hour=Count('id', filter=Q(created_at__gte=now - timedelta(hours=1))),
+        sales=Sum('total_amount', filter=paid),
+        sales_last_month=Sum('total_amount', filter=paid & Q(created_at__gte=month_ago)),
+    )
+
+    return {
+        'total_artisans': artisans['total'],
+        'pending_artisans': artisans['pending'],
+        'new_artisans_this_week': artisans['new_this_week'],
+        'total_products': products['active'],
+        'products_created_today': products['created_today'],
+        'total_sales': float(orders['sales'] or 0),
+        'sales_last_month': float(orders['sales_last_month'] or 0),
+        'total_orders': orders['total'],
+        'recent_orders_count': orders['last_hour'],
+        'products_out_of_stock': products['out_of_stock'],
+        'recent_activity': [dict(event) for event in ActivityEventSerializer(recent_activity(), many=True).data],
+        'sales_chart': sales_chart(today, paid),
+        'generated_at': now.isoformat(),
+    }
+
+
+def refresh_dashboard_stats() -> dict:
+    """Recalcula la instantánea y la guarda en cache."""
+    stats = compute_dashboard_stats()
+    cache.set(
+        SNAPSHOT_CACHE_KEY,
+        {'stats': stats, 'computed_at': time.time()},
+        settings.DASHBOARD_STATS_REFRESH * SNAPSHOT_TTL_FACTOR,
+    )
+    return stats
+
+
+def refresh_in_background() -> None:
+    """Recalcula la instantánea desde el hilo de fondo."""
+    try:
+        refresh_dashboard_stats()
+    except Exception:
+        logger.exception('Dashboard stats refresh failed')
+    finally:
+        cache.delete(REFRESH_LOCK_KEY)
+        # Conexión propia del hilo
+        connection.close()
+
+
+def schedule_refresh() -> bool:
+    """
+    Programa un recálculo en segundo plano si no hay otro en curso.
+
+    Returns:
+        bool: True si se ha programado
+    """
+    # cache.add es atómico: solo una petición consigue el candado
+    if not cache.add(REFRESH_LOCK_KEY, True, settings.DASHBOARD_STATS_REFRESH):
+        return False
+    get_executor().submit(refresh_in_background)
+    return True
+
+
+def get_dashboard_stats() -> dict:
+    """
+    Estadísticas del dashboard desde la instantánea cacheada.
+
+    Si la instantánea ha caducado se sirve igualmente y se recalcula en
+    segundo plano; si no existe se calcula ahora.
+    """
+    snapshot = cache.get(SNAPSHOT_CACHE_KEY)
+    if snapshot is None:
+        return refresh_dashboard_stats()
+
+    if time.time() - snapshot['computed_at'] >= settings.DASHBOARD_STATS_REFRESH:
+        schedule_refresh()
+    return snapshot['stats']
@@ -1,8 +1,42 @@
-from django.test import TestCase
-from accounts.models import User
+import io
+import json
+import pstats
+import tempfile
+import time
+from importlib import import_module
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from asgiref.sync import iscoroutinefunction
+from django.apps import apps
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.models import User, UserRole
 from artisans.models import ArtisanProfile
+from config.metrics import Budget, BudgetTestMixin, RequestMetricsMiddleware, registry
+from config.profiling import ProfilerMiddleware
+from orders.models import Order, OrderItem
+from payments.models import Payment, PaymentStatus
+from shop.models import Product
 from works.models import Work
+from . import notifications, stats
+from .models import (
+    ActivityEvent, ActivityType, ImagePurgeJob, ImagePurgeStatus,
+    ModerationAction, ModerationEvent, NotificationStatus
+)
+from .moderation import moderate
+from .purge import DELETE_BATCH_SIZE, run_purge_job
 from .services import delete_artisan_cascade
+from .signals import record_payment_success
 from django.core.exceptions import ValidationError
 
 
@@ -32,6 +66,872 @@ class DeleteArtisanCascadeTests(TestCase):
 
     def test_delete_with_completed_orders(self):
         """Test that fails if there are completed orders"""
-        # TODO: Create Order with status='completed'
-        # Verify that it raises ValidationError
-        pass
+        product = Product.objects.create(artisan=self.user, name='Cuenco', price='20.00', stock=3)
+        order = Order.objects.create(
+            customer_email='comprador@test.com',
+            customer_name='Test Comprador',
+            shipping_address='Calle Test 123',
+            shipping_city='Maó',
+            shipping_postal_code='07701',
+            payment_status=PaymentStatus.SUCCEEDED,
+        )
+        OrderItem.objects.create(
+            order=order, product=product, artisan=self.user,
+            product_name=product.name, product_price=product.price,
+        )
+
+        with self.assertRaisesMessage(ValidationError, '1 completed orders'):
+            delete_artisan_cascade(str(self.user.id))
+        self.assertTrue(User.objects.filter(id=self.user.id).exists())
+
+
+class AdminArtisanListTests(APITestCase):
+
+    url = '/api/v1/admin/artisans/'
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            username='admin', email='admin@example.com', role=UserRole.ADMIN, is_approved=True
+        )
+        self.artisan = User.objects.create(
+            username='prolific', email='prolific@example.com', role=UserRole.ARTISAN, is_approved=True
+        )
+        User.objects.create(username='quiet', email='quiet@example.com', role=UserRole.ARTISAN)
+
+        for i in range(3):
+            Work.objects.create(artisan=self.artisan, title=f'Obra {i}')
+        products = [
+            Product.objects.create(artisan=self.artisan, name=f'Producto {i}', price='10.00', stock=5)
+            for i in range(4)
+        ]
+        # Dos ventas (pagada y reembolsada en parte) con varios artículos y un pedido sin pagar
+        for payment_status, items in (
+            (PaymentStatus.SUCCEEDED, 3), (PaymentStatus.PARTIALLY_REFUNDED, 2), (PaymentStatus.PENDING, 1),
+        ):
+            order = Order.objects.create(
+                customer_email='comprador@test.com',
+                customer_name='Test Comprador',
+                shipping_address='Calle Test 123',
+                shipping_city='Maó',
+                shipping_postal_code='07701',
+                payment_status=payment_status,
+            )
+            for product in products[:items]:
+                OrderItem.objects.create(
+                    order=order, product=product, artisan=self.artisan,
+                    product_name=product.name, product_price=product.price,
+                )
+
+        self.client.force_authenticate(self.admin)
+
+    def test_counts_are_not_multiplied(self):
+        """Test that works, products and orders are counted independently"""
+        response = self.client.get(self.url)
+
+        rows = {row['username']: row for row in response.data['results']}
+        prolific = rows['prolific']
+        self.assertEqual(prolific['works_count'], 3)
+        self.assertEqual(prolific['products_count'], 4)
+        self.assertEqual(prolific['completed_orders_count'], 2)
+        self.assertFalse(prolific['can_be_deleted'])
+
+        quiet = rows['quiet']
+        self.assertEqual((quiet['works_count'], quiet['products_count'], quiet['completed_orders_count']), (0, 0, 0))
+        self.assertTrue(quiet['can_be_deleted'])
+
+    def test_ordering_and_search_by_counts(self):
+        """Test that the annotated counts can be ordered and combined with search"""
+        response = self.client.get(self.url, {'ordering': '-works_count', 'search': 'EXAMPLE.com'})
+
+        self.assertEqual([row['username'] for row in response.data['results']], ['prolific', 'quiet'])
+
+
+class DashboardStatsTests(APITestCase):
+
+    url = '/api/v1/admin/artisans/dashboard-stats/'
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create(
+            username='admin', email='admin@example.com', role=UserRole.ADMIN, is_approved=True
+        )
+        self.artisan = User.objects.create(
+            username='approved', email='approved@example.com', role=UserRole.ARTISAN, is_approved=True
+        )
+        User.objects.create(
+            username='pending', email='pending@example.com', role=UserRole.ARTISAN, is_approved=False
+        )
+        Product.objects.create(artisan=self.artisan, name='Cuenco', price='20.00', stock=3)
+        Product.objects.create(artisan=self.artisan, name='Plato', price='15.00', stock=0)
+
+        today = timezone.now()
+        self.order(Decimal('50.00'), PaymentStatus.SUCCEEDED, today)
+        self.order(Decimal('30.00'), PaymentStatus.SUCCEEDED, today)
+        self.order(Decimal('20.00'), PaymentStatus.PARTIALLY_REFUNDED, today - timedelta(days=2))
+        self.order(Decimal('99.00'), PaymentStatus.PENDING, today)
+        self.order(Decimal('40.00'), PaymentStatus.SUCCEEDED, today - timedelta(days=60))
+
+        self.client.force_authenticate(self.admin)
+
+    def order(self, total, payment_status, created_at):
+        order = Order.objects.create(
+            customer_email='comprador@test.com',
+            customer_name='Test Comprador',
+            shipping_address='Calle Test 123',
+            shipping_city='Maó',
+            shipping_postal_code='07701',
+            total_amount=total,
+            payment_status=payment_status,
+        )
+        Order.objects.filter(pk=order.pk).update(created_at=created_at)
+        return order
+
+    def test_kpis_use_choice_values(self):
+        """Test that KPIs count artisans and paid orders by their real choice values"""
+        data = stats.compute_dashboard_stats()
+
+        self.assertEqual(data['total_artisans'], 2)
+        self.assertEqual(data['pending_artisans'], 1)
+        self.assertEqual(data['new_artisans_this_week'], 1)
+        self.assertEqual(data['total_products'], 2)
+        self.assertEqual(data['products_created_today'], 2)
+        self.assertEqual(data['products_out_of_stock'], 1)
+        self.assertEqual(data['total_orders'], 5)
+        self.assertEqual(data['total_sales'], 140.0)
+        self.assertEqual(data['sales_last_month'], 100.0)
+
+    def test_sales_chart_grouped_by_day(self):
+        """Test that the chart has 30 days, zero-filled, with paid sales per day"""
+        chart = stats.compute_dashboard_stats()['sales_chart']
+
+        self.assertEqual(len(chart), stats.SALES_CHART_DAYS)
+        self.assertEqual(chart[-1]['date'], timezone.localdate().isoformat())
+        self.assertEqual(chart[-1]['sales'], 80.0)
+        self.assertEqual(chart[-3]['sales'], 20.0)
+        self.assertEqual(sum(day['sales'] for day in chart), 100.0)
+
+    def test_compute_query_count_is_constant(self):
+        """Test that computing the stats costs a fixed number of queries"""
+        for i in range(10):
+            self.order(Decimal('10.00'), PaymentStatus.SUCCEEDED, timezone.now() - timedelta(days=i))
+
+        with self.assertNumQueries(5):
+            stats.compute_dashboard_stats()
+
+    def test_endpoint_serves_cached_snapshot(self):
+        """Test that a warm snapshot costs no queries"""
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+
+        self.assertEqual(second.data, first.data)
+
+    def test_stale_snapshot_refreshes_in_background(self):
+        """Test that a stale snapshot is still served and refreshed once"""
+        stats.refresh_dashboard_stats()
+        snapshot = cache.get(stats.SNAPSHOT_CACHE_KEY)
+        snapshot['computed_at'] = time.time() - 3600
+        cache.set(stats.SNAPSHOT_CACHE_KEY, snapshot)
+
+        with patch.object(stats, 'get_executor') as executor:
+            with self.assertNumQueries(0):
+                self.client.get(self.url)
+                self.client.get(self.url)
+
+        executor.return_value.submit.assert_called_once_with(stats.refresh_in_background)
+
+    def test_requires_admin(self):
+        """Test that non-admin users cannot read the stats"""
+        self.client.force_authenticate(self.artisan)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 403)
+
+
+CLOUD = 'https://res.cloudinary.com/test/image/upload'
+
+
+def fake_delete_resources(public_ids, **options):
+    """delete_resources de Cloudinary: borra todo lo pedido"""
+    return {'deleted': {public_id: 'deleted' for public_id in public_ids}}
+
+
+@override_settings(CLOUDINARY_CLOUD_NAME='test')
+class ImagePurgeTests(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            username='admin', email='admin@example.com', role=UserRole.ADMIN, is_approved=True
+        )
+        self.user = User.objects.create(
+            username='test_artisan', email='test@example.com', role=UserRole.ARTISAN, is_approved=True
+        )
+        profile = self.user.artisan_profile
+        profile.avatar = f'{CLOUD}/v1/mitaller/avatar.jpg'
+        profile.save()
+        Work.objects.create(
+            artisan=self.user,
+            title='Jarrón',
+            thumbnail_url=f'{CLOUD}/v1/mitaller/jarron.jpg',
+            images=[
+                f'{CLOUD}/v1/mitaller/jarron.jpg',
+                # Con transformaciones delante de la versión
+                f'{CLOUD}/a_auto/c_limit,w_2000/q_auto:good/v1712/mitaller/jarron-2.jpg',
+                # De otra cuenta: no se puede borrar desde la nuestra
+                'https://res.cloudinary.com/otra/image/upload/v1/mitaller/ajena.jpg',
+            ],
+        )
+        Product.objects.create(
+            artisan=self.user, name='Cuenco', price='20.00', stock=3,
+            thumbnail_url=f'{CLOUD}/v1/mitaller/cuenco.jpg',
+        )
+
+    def job(self, count):
+        return ImagePurgeJob.objects.create(
+            artisan_id=999, username='gone', public_ids=[f'mitaller/img{i}' for i in range(count)]
+        )
+
+    @patch('admin_panel.services.enqueue_purge')
+    @patch('admin_panel.purge.cloudinary.api.delete_resources')
+    def test_cascade_queues_all_images_after_commit(self, delete_resources, enqueue_purge):
+        """Test that the DB deletion commits first and images are purged later"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            result = delete_artisan_cascade(str(self.user.id))
+
+        delete_resources.assert_not_called()
+        enqueue_purge.assert_not_called()
+        self.assertFalse(User.objects.filter(id=self.user.id).exists())
+        self.assertEqual(result['products_deleted'], 1)
+        self.assertEqual(result['images_to_delete'], 4)
+
+        job = ImagePurgeJob.objects.get(id=result['image_purge_job'])
+        self.assertEqual(job.status, ImagePurgeStatus.PENDING)
+        self.assertEqual(job.public_ids, [
+            'mitaller/avatar', 'mitaller/jarron', 'mitaller/jarron-2', 'mitaller/cuenco'
+        ])
+
+        for callback in callbacks:
+            callback()
+        enqueue_purge.assert_called_once_with(job.id)
+
+    @patch('admin_panel.purge.cloudinary.api.delete_resources', side_effect=fake_delete_resources)
+    def test_purge_in_batches(self, delete_resources):
+        """Test that images are deleted in batches of up to 100 public_ids"""
+        job = self.job(250)
+
+        job = run_purge_job(job.id, concurrency=2)
+
+        self.assertEqual(delete_resources.call_count, 3)
+        self.assertTrue(all(
+            len(call.args[0]) <= DELETE_BATCH_SIZE for call in delete_resources.call_args_list
+        ))
+        self.assertEqual(job.status, ImagePurgeStatus.COMPLETED)
+        self.assertEqual((job.purged, job.progress), (250, 100))
+
+    def test_failed_batch_is_retried_alone(self):
+        """Test that a retry only processes the images whose batch failed"""
+        job = self.job(150)
+        first_batch = job.public_ids[:DELETE_BATCH_SIZE]
+
+        def flaky(public_ids, **options):
+            if public_ids == first_batch:
+                raise Exception('Rate limited')
+            return fake_delete_resources(public_ids)
+
+        with patch('admin_panel.purge.cloudinary.api.delete_resources', side_effect=flaky):
+            job = run_purge_job(job.id)
+
+        self.assertEqual(job.status, ImagePurgeStatus.FAILED)
+        self.assertEqual((job.purged, len(job.failed_ids)), (50, 100))
+        self.assertEqual(job.error, 'Rate limited')
+
+        with patch(
+            'admin_panel.purge.cloudinary.api.delete_resources', side_effect=fake_delete_resources
+        ) as delete_resources:
+            job = run_purge_job(job.id)
+
+        delete_resources.assert_called_once_with(first_batch, invalidate=True)
+        self.assertEqual(job.status, ImagePurgeStatus.COMPLETED)
+        self.assertEqual((job.purged, job.failed_ids, job.attempts), (150, [], 2))
+
+    @patch('admin_panel.purge.cloudinary.api.delete_resources')
+    def test_missing_images_count_as_purged(self, delete_resources):
+        """Test that re-running a purge is idempotent (not_found is success)"""
+        delete_resources.return_value = {'deleted': {'mitaller/img0': 'not_found'}}
+        job = self.job(1)
+
+        job = run_purge_job(job.id)
+
+        self.assertEqual(job.status, ImagePurgeStatus.COMPLETED)
+        self.assertIsNone(run_purge_job(job.id))
+
+    def test_job_status_endpoint(self):
+        """Test that admins can follow the purge progress"""
+        job = self.job(4)
+        ImagePurgeJob.objects.filter(id=job.id).update(status=ImagePurgeStatus.RUNNING, purged=1)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(f'/api/v1/admin/image-purge-jobs/{job.id}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'running')
+        self.assertEqual((response.data['total'], response.data['purged'], response.data['progress']), (4, 1, 25))
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(f'/api/v1/admin/image-purge-jobs/{job.id}/').status_code, 403)
+
+    @patch('admin_panel.purge.cloudinary.api.delete_resources', side_effect=fake_delete_resources)
+    def test_command_processes_pending_jobs(self, delete_resources):
+        """Test that the command picks up pending jobs"""
+        job = self.job(3)
+        out = io.StringIO()
+
+        call_command('purge_artisan_images', stdout=out)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImagePurgeStatus.COMPLETED)
+        self.assertIn('3/3', out.getvalue())
+
+
+class ModerationTests(APITestCase):
+
+    url = '/api/v1/admin/artisans/bulk-moderate/'
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            username='admin', email='admin@example.com', role=UserRole.ADMIN, is_approved=True
+        )
+        self.pending = [
+            User.objects.create(
+                username=f'pending{i}', email=f'pending{i}@example.com', role=UserRole.ARTISAN, is_approved=False
+            )
+            for i in range(5)
+        ]
+        self.approved = User.objects.create(
+            username='approved', email='approved@example.com', role=UserRole.ARTISAN, is_approved=True
+        )
+        self.client.force_authenticate(self.admin)
+
+    def ids(self, users):
+        return [user.id for user in users]
+
+    def user_updates(self, queries):
+        return [q for q in queries if q['sql'].startswith('UPDATE "accounts_user"')]
+
+    def test_bulk_approve_is_one_update(self):
+        """Test that many artisans are approved with one UPDATE and one event each"""
+        artisan_ids = self.ids(self.pending) + [self.approved.id, self.admin.id]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/api/v1/admin/artisans/bulk-approve/', {'artisan_ids': artisan_ids}, format='json'
+            )
+
+        self.assertEqual(response.data['approved_count'], 5)
+        self.assertEqual(len(self.user_updates(queries.captured_queries)), 1)
+        self.assertFalse(User.objects.filter(role=UserRole.ARTISAN, is_approved=False).exists())
+        self.assertEqual(
+            sorted(ModerationEvent.objects.values_list('artisan_id', flat=True)), self.ids(self.pending)
+        )
+
+    def test_repeated_action_emits_nothing(self):
+        """Test that only artisans whose state changes get an event"""
+        moderate(ModerationAction.APPROVE, self.ids(self.pending))
+
+        self.assertEqual(moderate(ModerationAction.APPROVE, self.ids(self.pending)), [])
+        self.assertEqual(ModerationEvent.objects.count(), 5)
+
+    def test_events_dispatched_after_commit(self):
+        """Test that the queue is drained in the background after commit"""
+        with patch.object(notifications, 'get_executor') as executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                moderate(ModerationAction.APPROVE, self.ids(self.pending))
+
+        executor.return_value.submit.assert_called_once_with(notifications.drain_in_background)
+
+    def test_worker_sends_templated_emails_over_one_connection(self):
+        """Test that the worker sends one email per event reusing one connection"""
+        moderate(ModerationAction.APPROVE, self.ids(self.pending))
+
+        with patch.object(notifications, 'get_connection', wraps=notifications.get_connection) as get_connection:
+            sent, failed = notifications.send_pending_notifications(batch_size=2)
+
+        self.assertEqual((sent, failed), (5, 0))
+        get_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 5)
+        message = next(m for m in mail.outbox if m.to == ['pending0@example.com'])
+        self.assertEqual(message.subject, notifications.SUBJECTS[ModerationAction.APPROVE])
+        self.assertIn(f'/artesanos/{self.pending[0].artisan_profile.slug}', message.body)
+        self.assertFalse(ModerationEvent.objects.exclude(status=NotificationStatus.SENT).exists())
+
+        # La cola ya está vacía
+        self.assertEqual(notifications.send_pending_notifications(), (0, 0))
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_failed_email_is_retried(self):
+        """Test that a failed email stays pending until MAX_ATTEMPTS"""
+        moderate(ModerationAction.APPROVE, [self.pending[0].id])
+        event = ModerationEvent.objects.get()
+
+        with patch('django.core.mail.EmailMessage.send', side_effect=OSError('SMTP down')):
+            self.assertEqual(notifications.send_pending_notifications(), (0, 1))
+            event.refresh_from_db()
+            self.assertEqual((event.status, event.attempts), (NotificationStatus.PENDING, 1))
+
+            ModerationEvent.objects.filter(id=event.id).update(attempts=notifications.MAX_ATTEMPTS - 1)
+            notifications.send_pending_notifications()
+
+        event.refresh_from_db()
+        self.assertEqual(event.status, NotificationStatus.FAILED)
+        self.assertEqual(event.error, 'SMTP down')
+
+    def test_reject_deactivates_pending_artisans(self):
+        """Test that rejecting disables pending accounts and sends the rejection email"""
+        response = self.client.post(
+            self.url, {'action': 'reject', 'artisan_ids': self.ids(self.pending[:2]) + [self.approved.id]}, format='json'
+        )
+
+        self.assertEqual(response.data['updated_count'], 2)
+        self.assertEqual(User.objects.filter(is_active=False).count(), 2)
+
+        listing = self.client.get('/api/v1/admin/artisans/', {'status': 'rejected'})
+        self.assertEqual(len(listing.data['results']), 2)
+
+        notifications.send_pending_notifications()
+        self.assertEqual(mail.outbox[0].subject, notifications.SUBJECTS[ModerationAction.REJECT])
+
+    def test_bulk_feature_and_unfeature(self):
+        """Test that featuring updates the profiles and only featuring notifies"""
+        artisan_ids = self.ids(self.pending)
+
+        self.client.post(self.url, {'action': 'feature', 'artisan_ids': artisan_ids}, format='json')
+        self.assertEqual(ArtisanProfile.objects.filter(is_featured=True).count(), 5)
+
+        self.client.post(self.url, {'action': 'unfeature', 'artisan_ids': artisan_ids[:2]}, format='json')
+        self.assertEqual(ArtisanProfile.objects.filter(is_featured=True).count(), 3)
+        self.assertEqual(ModerationEvent.objects.filter(action=ModerationAction.FEATURE).count(), 5)
+        self.assertEqual(ModerationEvent.objects.count(), 5)
+
+    def test_single_approve_and_toggle(self):
+        """Test that the per-artisan endpoints use the same pipeline"""
+        artisan = self.pending[0]
+
+        response = self.client.patch(f'/api/v1/admin/artisans/{artisan.id}/approve/')
+        self.assertTrue(response.data['artisan']['is_approved'])
+
+        response = self.client.patch(f'/api/v1/admin/artisans/{artisan.id}/toggle-featured/')
+        self.assertTrue(response.data['is_featured'])
+        self.assertEqual(
+            list(ModerationEvent.objects.order_by('id').values_list('action', flat=True)),
+            [ModerationAction.APPROVE, ModerationAction.FEATURE]
+        )
+
+    def test_invalid_action(self):
+        """Test that unknown actions are rejected"""
+        response = self.client.post(self.url, {'action': 'ban', 'artisan_ids': [1]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_drains_queue(self):
+        """Test that the command sends pending emails"""
+        moderate(ModerationAction.FEATURE, self.ids(self.pending[:3]))
+        out = io.StringIO()
+
+        call_command('send_moderation_emails', stdout=out)
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn('3 email(s)', out.getvalue())
+
+
+class ActivityFeedTests(APITestCase):
+
+    url = '/api/v1/admin/activity/'
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            username='admin', email='admin@example.com', role=UserRole.ADMIN, is_approved=True
+        )
+        self.artisan = User.objects.create(
+            username='ceramista', email='ceramista@example.com', role=UserRole.ARTISAN, is_approved=False
+        )
+        self.client.force_authenticate(self.admin)
+
+    def create_order(self, total=Decimal('45.00')):
+        """Pedido creado como OrderCreateSerializer: el total se añade después"""
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(
+                customer_email='comprador@test.com',
+                customer_name='Test Comprador',
+                shipping_address='Calle Test 123',
+                shipping_city='Maó',
+                shipping_postal_code='07701',
+            )
+            order.total_amount = total
+            order.save(update_fields=['total_amount'])
+        return order
+
+    def test_signals_record_events(self):
+        """Test that registrations, products, orders and payments are logged once"""
+        product = Product.objects.create(artisan=self.artisan, name='Cuenco', price='20.00', stock=3)
+        order = self.create_order()
+        payment = Payment.objects.create(
+            order=order,
+            artisan=self.artisan,
+            amount=Decimal('45.00'),
+            marketplace_fee=Decimal('4.50'),
+            artisan_amount=Decimal('40.50'),
+        )
+        payment.status = PaymentStatus.SUCCEEDED
+        payment.save()
+        payment.save()
+
+        events = {event.type: event for event in ActivityEvent.objects.all()}
+
+        self.assertEqual(ActivityEvent.objects.count(), 4)
+        self.assertEqual(events[ActivityType.ARTISAN].message, 'Nuevo artesano: ceramista')
+        self.assertEqual(events[ActivityType.ARTISAN].status, 'pending')
+        self.assertEqual(events[ActivityType.PRODUCT].object_id, product.id)
+        self.assertEqual(events[ActivityType.ORDER].message, f'Pedido #{order.id}: €45.00')
+        self.assertEqual(events[ActivityType.PAYMENT].status, PaymentStatus.SUCCEEDED)
+
+    def test_later_payment_saves_skip_feed(self):
+        """Test that saving an already succeeded payment does not touch the feed"""
+        order = self.create_order()
+        payment = Payment.objects.create(
+            order=order,
+            artisan=self.artisan,
+            amount=Decimal('45.00'),
+            marketplace_fee=Decimal('4.50'),
+            artisan_amount=Decimal('40.50'),
+            status=PaymentStatus.SUCCEEDED,
+        )
+        self.assertTrue(ActivityEvent.objects.filter(type=ActivityType.PAYMENT, object_id=payment.id).exists())
+
+        payment = Payment.objects.get(pk=payment.pk)
+        with self.assertNumQueries(0):
+            record_payment_success(Payment, payment, created=False)
+            record_payment_success(Payment, payment, created=False, update_fields={'updated_at'})
+
+    def test_feed_is_cursor_paginated(self):
+        """Test that the feed pages through the whole history, newest first"""
+        now = timezone.now()
+        ActivityEvent.objects.bulk_create([
+            ActivityEvent(
+                type=ActivityType.PRODUCT, object_id=i, message=f'Producto {i}', created_at=now - timedelta(minutes=i + 1)
+            )
+            for i in range(30)
+        ])
+
+        with self.assertNumQueries(1):
+            first = self.client.get(self.url)
+        second = self.client.get(first.data['next'])
+
+        messages = [event['message'] for event in first.data['results'] + second.data['results']]
+        self.assertEqual(len(messages), 31)
+        self.assertEqual(messages[:2], ['Nuevo artesano: ceramista', 'Producto 0'])
+        self.assertEqual(messages[-1], 'Producto 29')
+        self.assertIsNone(second.data['next'])
+
+    def test_feed_filters_by_type(self):
+        """Test that ?type= returns only that kind of event"""
+        Product.objects.create(artisan=self.artisan, name='Cuenco', price='20.00', stock=3)
+
+        response = self.client.get(self.url, {'type': 'artisan'})
+
+        self.assertEqual([event['type'] for event in response.data['results']], ['artisan'])
+
+    def test_dashboard_reads_feed(self):
+        """Test that the dashboard recent activity comes from the feed"""
+        self.create_order(Decimal('12.00'))
+
+        activity = stats.compute_dashboard_stats()['recent_activity']
+
+        self.assertEqual(
+            [(event['type'], event['message']) for event in activity],
+            [('order', f'Pedido #{Order.objects.get().id}: €12.00'), ('artisan', 'Nuevo artesano: ceramista')]
+        )
+
+    def test_backfill_migration(self):
+        """Test that the migration rebuilds the feed from existing rows"""
+        Product.objects.create(artisan=self.artisan, name='Cuenco', price='20.00', stock=3)
+        self.create_order()
+        ActivityEvent.objects.all().delete()
+
+        migration = import_module('admin_panel.migrations.0003_activity_event')
+        migration.backfill_activity(apps, None)
+
+        self.assertEqual(
+            sorted(ActivityEvent.objects.values_list('type', flat=True)),
+            ['artisan', 'order', 'product']
+        )
+
+    def test_requires_admin(self):
+        """Test that non-admin users cannot read the feed"""
+        self.client.force_authenticate(self.artisan)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 403)
+
+
+class RequestMetricsTests(BudgetTestMixin, APITestCase):
+
+    url = '/api/v1/admin/metrics/'
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            username='admin', email='admin@example.com', role=UserRole.ADMIN, is_approved=True
+        )
+        self.artisan = User.objects.create(
+            username='ceramista', email='ceramista@example.com', role=UserRole.ARTISAN, is_approved=True
+        )
+        for i in range(3):
+            Product.objects.create(artisan=self.artisan, name=f'Cuenco {i}', price='20.00', stock=3)
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def route(self, name):
+        self.client.force_authenticate(self.admin)
+        routes = self.client.get(self.url).data['routes']
+        return next(route for route in routes if route['route'] == name)
+
+    def test_response_carries_metrics(self):
+        """Test that DRF responses are measured against the view budget"""
+        response = self.client.get('/api/v1/shop/products/')
+
+        metrics = response.metrics
+        self.assertEqual(metrics.route, 'GET product-list')
+        self.assertEqual(metrics.view, 'shop.views.ProductViewSet')
+        self.assertEqual(metrics.action, 'list')
+        self.assertEqual(metrics.budget, Budget(queries=3, ms=300))
+        self.assertEqual(metrics.queries, 2)
+        self.assertGreater(metrics.total_ms, 0)
+        self.assertGreaterEqual(metrics.total_ms, metrics.db_ms + metrics.render_ms)
+        self.assertWithinBudget(response)
+
+    def test_histograms_by_route(self):
+        """Test that every request is added to its route histograms"""
+        for _ in range(3):
+            self.client.get('/api/v1/shop/products/')
+
+        route = self.route('GET product-list')
+
+        self.assertEqual(route['requests'], 3)
+        self.assertEqual(route['over_budget'], 0)
+        self.assertEqual(route['budget'], {'queries': 3, 'ms': 300})
+        self.assertEqual(route['queries']['max'], 2)
+        self.assertEqual(route['queries']['p95'], 2)
+        self.assertEqual(sum(bucket['count'] for bucket in route['total_ms']['buckets']), 3)
+
+    def test_over_budget_is_logged_and_counted(self):
+        """Test that a request over budget logs a warning and fails the test helper"""
+        with patch('shop.views.ProductViewSet.performance_budgets', {'list': Budget(queries=1)}):
+            with self.assertLogs('config.metrics', 'WARNING') as logs:
+                response = self.client.get('/api/v1/shop/products/')
+
+        self.assertIn('GET product-list over budget: 2 queries (presupuesto 1)', logs.output[0])
+        with self.assertRaisesMessage(AssertionError, 'supera su presupuesto'):
+            self.assertWithinBudget(response)
+        self.assertEqual(self.route('GET product-list')['over_budget'], 1)
+
+    def test_view_without_budget(self):
+        """Test that views without a budget are measured but fail the test helper"""
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/v1/admin/activity/')
+
+        self.assertIsNone(response.metrics.budget)
+        with self.assertRaisesMessage(AssertionError, 'no declara presupuesto'):
+            self.assertWithinBudget(response)
+
+    def test_server_timing_header(self):
+        """Test that Server-Timing is only sent when enabled"""
+        self.assertNotIn('Server-Timing', self.client.get('/api/v1/shop/products/'))
+
+        with override_settings(REQUEST_METRICS_SERVER_TIMING=True):
+            response = self.client.get('/api/v1/shop/products/')
+
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="2 queries", render;dur=[\d.]+, total;dur=[\d.]+$')
+
+    async def test_async_request_is_measured(self):
+        """Test that under ASGI the middleware stays async and still counts the view queries"""
+        async def get_response(request):
+            return None
+
+        self.assertTrue(iscoroutinefunction(RequestMetricsMiddleware(get_response)))
+
+        response = await self.async_client.get('/api/v1/shop/products/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.metrics.route, 'GET product-list')
+        self.assertEqual(response.metrics.queries, 2)
+
+    @override_settings(REQUEST_METRICS_ENABLED=False)
+    def test_disabled(self):
+        """Test that nothing is measured when metrics are disabled"""
+        response = self.client.get('/api/v1/shop/products/')
+
+        self.assertFalse(hasattr(response, 'metrics'))
+
+    def test_requires_admin(self):
+        """Test that only admins can read and reset the metrics"""
+        self.client.force_authenticate(self.artisan)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.client.get('/api/v1/shop/products/')
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.post(f'{self.url}reset/').status_code, 204)
+        # Queda solo la propia petición de reset
+        routes = self.client.get(self.url).data['routes']
+        self.assertEqual([route['route'] for route in routes], ['POST admin-metrics-reset'])
+
+
+class RequestProfilerTests(APITestCase):
+
+    url = '/api/v1/admin/profiles/'
+    products_url = '/api/v1/shop/products/'
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            username='admin', email='admin@example.com', role=UserRole.ADMIN, is_approved=True
+        )
+        self.artisan = User.objects.create(
+            username='ceramista', email='ceramista@example.com', role=UserRole.ARTISAN, is_approved=True
+        )
+        for i in range(3):
+            Product.objects.create(artisan=self.artisan, name=f'Cuenco {i}', price='20.00', stock=3)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(PROFILER_DIR=directory.name, PROFILER_MAX_PROFILES=3)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def bearer(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+    def profile(self, **extra):
+        """Lists the products with the profile header as the admin (JWT)"""
+        response = self.client.get(self.products_url, HTTP_X_PROFILE='1', **self.bearer(self.admin), **extra)
+        self.assertEqual(response.status_code, 200)
+        return response['X-Profile-Id']
+
+    def admin_get(self, url):
+        self.client.force_authenticate(self.admin)
+        try:
+            return self.client.get(url)
+        finally:
+            self.client.force_authenticate(None)
+
+    def test_staff_request_is_profiled(self):
+        """Test that the header profiles the view with its SQL for a staff JWT"""
+        profile_id = self.profile()
+
+        profile = self.admin_get(f'{self.url}{profile_id}/').data
+        self.assertEqual(profile['id'], profile_id)
+        self.assertEqual(profile['method'], 'GET')
+        self.assertEqual(profile['path'], self.products_url)
+        self.assertEqual(profile['view'], 'product-list')
+        self.assertEqual(profile['username'], 'admin')
+        self.assertEqual(profile['status_code'], 200)
+        self.assertEqual(profile['queries'], len(profile['sql']))
+        self.assertTrue(any('shop_product' in query['sql'] for query in profile['sql']))
+        self.assertTrue(any(row['name'] == 'list' for row in profile['top_functions']))
+
+    async def test_async_stack(self):
+        """Test that under ASGI the middleware is async and still profiles sync views"""
+        async def get_response(request):
+            return None
+
+        middleware = ProfilerMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertTrue(iscoroutinefunction(middleware.process_view))
+
+        response = await self.async_client.get(
+            self.products_url, headers={'X-Profile': '1', 'Authorization': self.bearer(self.admin)['HTTP_AUTHORIZATION']}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('X-Profile-Id', response)
+
+    def test_query_flag(self):
+        """Test that ?_profile=1 works for staff users without the admin role"""
+        self.artisan.is_staff = True
+        self.artisan.save()
+
+        response = self.client.get(f'{self.products_url}?_profile=1', **self.bearer(self.artisan))
+
+        self.assertIn('X-Profile-Id', response)
+
+    def test_ignored_without_flag_or_staff(self):
+        """Test that nothing is profiled without the flag or for non-staff users"""
+        responses = [
+            self.client.get(self.products_url, **self.bearer(self.admin)),
+            self.client.get(self.products_url, HTTP_X_PROFILE='1'),
+            self.client.get(self.products_url, HTTP_X_PROFILE='1', **self.bearer(self.artisan)),
+            self.client.get(self.products_url, HTTP_X_PROFILE='1', HTTP_AUTHORIZATION='Bearer invalid'),
+        ]
+
+        self.assertEqual([response.status_code for response in responses], [200, 200, 200, 401])
+        self.assertFalse(any('X-Profile-Id' in response for response in responses))
+        self.assertEqual(self.admin_get(self.url).data, [])
+
+    def test_ring_buffer_keeps_latest(self):
+        """Test that only the newest PROFILER_MAX_PROFILES profiles are kept"""
+        ids = [self.profile() for _ in range(5)]
+
+        listed = self.admin_get(self.url).data
+
+        self.assertEqual([profile['id'] for profile in listed], ids[:-4:-1])
+        self.assertNotIn('sql', listed[0])
+        self.assertEqual(self.admin_get(f'{self.url}{ids[0]}/').status_code, 404)
+
+    def test_download_pstats(self):
+        """Test that the .prof download loads with pstats"""
+        profile_id = self.profile()
+
+        response = self.admin_get(f'{self.url}{profile_id}/pstats/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'{profile_id}.prof', response['Content-Disposition'])
+        with tempfile.NamedTemporaryFile(suffix='.prof') as f:
+            f.write(b''.join(response.streaming_content))
+            f.flush()
+            stats = pstats.Stats(f.name)
+        self.assertTrue(any(name == 'list' for _, _, name in stats.stats))
+
+    def test_download_speedscope(self):
+        """Test that the speedscope export has CPU stacks and SQL events"""
+        profile_id = self.profile()
+
+        response = self.admin_get(f'{self.url}{profile_id}/speedscope/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('.speedscope.json', response['Content-Disposition'])
+        data = json.loads(response.content)
+        frames = data['shared']['frames']
+        cpu, sql = data['profiles']
+        self.assertEqual(cpu['type'], 'sampled')
+        self.assertEqual(len(cpu['samples']), len(cpu['weights']))
+        self.assertAlmostEqual(cpu['endValue'], sum(cpu['weights']))
+        self.assertTrue(all(0 <= frame < len(frames) for sample in cpu['samples'] for frame in sample))
+        self.assertTrue(any(frames[frame]['name'] == 'list' for sample in cpu['samples'] for frame in sample))
+        self.assertEqual(sql['type'], 'evented')
+        self.assertEqual(len(sql['events']), 2 * self.admin_get(f'{self.url}{profile_id}/').data['queries'])
+        self.assertIn('shop_product', frames[sql['events'][-1]['frame']]['name'])
+
+    def test_requires_admin(self):
+        """Test that only admins can list or download profiles"""
+        profile_id = self.profile()
+        self.client.force_authenticate(self.artisan)
+
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(f'{self.url}{profile_id}/pstats/').status_code, 403)
+
+    def test_disabled(self):
+        """Test that the middleware is not installed when disabled"""
+        with override_settings(PROFILER_ENABLED=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                ProfilerMiddleware(lambda request: None)
@@ -1,9 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AdminArtisanViewSet
+from .views import (
+    ActivityEventViewSet, AdminArtisanViewSet, ImagePurgeJobViewSet, RequestMetricsViewSet,
+    RequestProfileViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'artisans', AdminArtisanViewSet, basename='admin-artisans')
+router.register(r'image-purge-jobs', ImagePurgeJobViewSet, basename='admin-image-purge-jobs')
+router.register(r'activity', ActivityEventViewSet, basename='admin-activity')
+router.register(r'metrics', RequestMetricsViewSet, basename='admin-metrics')
+router.register(r'profiles', RequestProfileViewSet, basename='admin-profiles')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -13,7 +20,15 @@ urlpatterns = [
 # GET    /api/v1/admin/artisans/                      → list (with filters: status, search)
 # GET    /api/v1/admin/artisans/{id}/                 → retrieve
 # PATCH  /api/v1/admin/artisans/{id}/approve/        → approve
-# DELETE /api/v1/admin/artisans/{id}/                → destroy (cascade)
+# DELETE /api/v1/admin/artisans/{id}/                → destroy (cascade, imágenes en segundo plano)
 # GET    /api/v1/admin/artisans/dashboard-stats/     → dashboard_stats (KPIs completos)
 # POST   /api/v1/admin/artisans/bulk-approve/        → bulk_approve (aprobar múltiples)
-
+# POST   /api/v1/admin/artisans/bulk-moderate/       → bulk_moderate (aprobar/rechazar/destacar múltiples)
+# GET    /api/v1/admin/image-purge-jobs/{id}/        → progreso del borrado de imágenes
+# GET    /api/v1/admin/activity/                     → feed de actividad (paginado por cursor, ?type=)
+# GET    /api/v1/admin/metrics/                      → métricas por endpoint (queries, tiempos, presupuestos) de un worker
+# POST   /api/v1/admin/metrics/reset/                → reinicia los histogramas de este proceso
+# GET    /api/v1/admin/profiles/                     → perfiles guardados (X-Profile: 1 en cualquier petición, staff)
+# GET    /api/v1/admin/profiles/{id}/                → SQL y funciones más costosas del perfil
+# GET    /api/v1/admin/profiles/{id}/pstats/         → descarga .prof (pstats)
+# GET    /api/v1/admin/profiles/{id}/speedscope/     → descarga JSON para speedscope.app
@@ -1,16 +1,41 @@
-from rest_framework import viewsets, status
+import json
+
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
-from django.db.models import Count, Q
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
+from django.http import FileResponse, Http404, HttpResponse
 
 from accounts.models import User
-from works.models import Work
+from config.metrics import registry
+from config.profiling import (
+    PROFILE_ID_PATTERN, list_profiles, load_profile, load_stats, profile_path,
+    speedscope_profile, top_functions
+)
+from orders.models import OrderItem
 from shop.models import Product
-from orders.models import Order
-from .serializers import AdminArtisanSerializer
+from works.models import Work
+from .models import ActivityEvent, ActivityType, ImagePurgeJob, ModerationAction
+from .moderation import moderate
+from .serializers import ActivityEventSerializer, AdminArtisanSerializer, ImagePurgeJobSerializer
 from .permissions import IsAdminUser
 from .services import delete_artisan_cascade
+from .stats import SALE_PAYMENT_STATUSES, get_dashboard_stats
+
+
+def subquery_count(queryset, field='id', distinct=False):
+    """
+    Correlated COUNT of `queryset` (filtered by OuterRef) as an annotation.
+    Returns 0 when there are no rows.
+    """
+    # Constant GROUP BY key: a single aggregate row per outer artisan
+    counts = queryset.order_by().annotate(
+        group=Value(1)
+    ).values('group').annotate(count=Count(field, distinct=distinct)).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
 
 
 class AdminArtisanViewSet(viewsets.ModelViewSet):
@@ -25,23 +50,36 @@ class AdminArtisanViewSet(viewsets.ModelViewSet):
         """
         Queryset with count annotations.
         Includes filters and search.
+
+        Each count is a correlated subquery over its own table. Joining
+        works, products and sales in one GROUP BY multiplies the rows of
+        each artisan (works × products × sales) before counting.
+
+        Completed orders are sales as in the dashboard (admin_panel/stats.py):
+        orders with a succeeded or partially refunded payment. Works and
+        products are counted exactly instead of reading the incremental
+        ArtisanProfile counters, which can drift until reconcile_counters runs.
         """
         queryset = User.objects.filter(role='artisan').annotate(
-            works_count=Count('works', distinct=True),
-            products_count=Count('products', distinct=True),
-            completed_orders_count=Count(
-                'sales',
-                filter=Q(sales__order__status='completed'),
-                distinct=True
+            works_count=subquery_count(Work.objects.filter(artisan=OuterRef('pk'))),
+            products_count=subquery_count(Product.objects.filter(artisan=OuterRef('pk'))),
+            completed_orders_count=subquery_count(
+                OrderItem.objects.filter(
+                    artisan=OuterRef('pk'), order__payment_status__in=SALE_PAYMENT_STATUSES
+                ),
+                field='order',
+                distinct=True,
             )
         ).select_related('artisan_profile')
 
         # Filter by approval status
         status_filter = self.request.query_params.get('status')
         if status_filter == 'pending':
-            queryset = queryset.filter(is_approved=False)
+            queryset = queryset.filter(is_approved=False, is_active=True)
         elif status_filter == 'approved':
             queryset = queryset.filter(is_approved=True)
+        elif status_filter == 'rejected':
+            queryset = queryset.filter(is_approved=False, is_active=False)
 
         # Search by name or email
         search = self.request.query_params.get('search')
@@ -60,7 +98,7 @@ class AdminArtisanViewSet(viewsets.ModelViewSet):
     def approve(self, request, pk=None):
         """
         PATCH /api/v1/admin/artisans/{id}/approve/
-        Approve a pending artisan.
+        Approve a pending artisan (and email them).
         """
         artisan = self.get_object()
 
@@ -70,8 +108,8 @@ class AdminArtisanViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        artisan.is_approved = True
-        artisan.save()
+        moderate(ModerationAction.APPROVE, [artisan.id], moderator=request.user)
+        artisan = self.get_object()
 
         return Response({
             'message': f'Artisan {artisan.username} approved successfully',
@@ -92,15 +130,19 @@ class AdminArtisanViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        profile = artisan.artisan_profile
-        profile.is_featured = not profile.is_featured
-        profile.save()
+        action = (
+            ModerationAction.UNFEATURE if artisan.artisan_profile.is_featured
+            else ModerationAction.FEATURE
+        )
+        moderate(action, [artisan.id], moderator=request.user)
+        artisan = self.get_object()
+        is_featured = artisan.artisan_profile.is_featured
 
-        status_text = 'destacado' if profile.is_featured else 'no destacado'
+        status_text = 'destacado' if is_featured else 'no destacado'
 
         return Response({
             'message': f'Artisan {artisan.username} marked as {status_text}',
-            'is_featured': profile.is_featured,
+            'is_featured': is_featured,
             'artisan': self.get_serializer(artisan).data
         })
     
@@ -130,147 +172,201 @@ class AdminArtisanViewSet(viewsets.ModelViewSet):
         """
         GET /api/v1/admin/artisans/dashboard-stats/
         Complete statistics for admin dashboard with KPIs
-        """
-        from django.utils import timezone
-        from datetime import timedelta
-        from django.db.models import Sum
-
-        now = timezone.now()
-        week_ago = now - timedelta(days=7)
-        month_ago = now - timedelta(days=30)
-
-        # KPIs principales
-        total_artisans = User.objects.filter(role='ARTISAN').count()
-        pending_artisans = User.objects.filter(role='ARTISAN', is_approved=False).count()
-        approved_artisans_this_week = User.objects.filter(
-            role='ARTISAN',
-            is_approved=True,
-            date_joined__gte=week_ago
-        ).count()
-
-        total_products = Product.objects.filter(is_active=True).count()
-        products_created_today = Product.objects.filter(
-            created_at__date=now.date()
-        ).count()
-
-        # Ventas (asumiendo que Order tiene total_amount y payment_status)
-        total_sales = Order.objects.filter(
-            status='COMPLETED'  # Ajustar según tu modelo
-        ).aggregate(total=Sum('total_amount'))['total'] or 0
-
-        sales_last_month = Order.objects.filter(
-            status='COMPLETED',
-            created_at__gte=month_ago
-        ).aggregate(total=Sum('total_amount'))['total'] or 0
-
-        total_orders = Order.objects.count()
-        orders_last_hour = Order.objects.filter(
-            created_at__gte=now - timedelta(hours=1)
-        ).count()
-
-        # Alertas
-        products_out_of_stock = Product.objects.filter(stock=0, is_active=True).count()
-
-        # Actividad reciente (últimas 10 acciones)
-        recent_artisans = User.objects.filter(role='ARTISAN').order_by('-date_joined')[:5]
-        recent_products = Product.objects.select_related('artisan').order_by('-created_at')[:5]
-        recent_orders = Order.objects.order_by('-created_at')[:5]
-
-        recent_activity = []
-
-        for artisan in recent_artisans:
-            recent_activity.append({
-                'type': 'artisan',
-                'timestamp': artisan.date_joined.isoformat(),
-                'message': f'Nuevo artesano: {artisan.username}',
-                'status': 'pending' if not artisan.is_approved else 'approved',
-            })
-
-        for product in recent_products:
-            recent_activity.append({
-                'type': 'product',
-                'timestamp': product.created_at.isoformat(),
-                'message': f'Producto: {product.name} por {product.artisan.username}',
-            })
-
-        for order in recent_orders:
-            recent_activity.append({
-                'type': 'order',
-                'timestamp': order.created_at.isoformat(),
-                'message': f'Pedido #{order.id}: €{order.total_amount}',
-                'status': order.status,
-            })
-
-        # Ordenar por timestamp descendente
-        recent_activity.sort(key=lambda x: x['timestamp'], reverse=True)
-        recent_activity = recent_activity[:10]
-
-        # Gráfico de ventas (últimos 30 días)
-        sales_chart = []
-        for i in range(30):
-            date = (now - timedelta(days=29-i)).date()
-            daily_sales = Order.objects.filter(
-                status='COMPLETED',
-                created_at__date=date
-            ).aggregate(total=Sum('total_amount'))['total'] or 0
-
-            sales_chart.append({
-                'date': date.isoformat(),
-                'sales': float(daily_sales),
-            })
 
-        return Response({
-            'total_artisans': total_artisans,
-            'pending_artisans': pending_artisans,
-            'new_artisans_this_week': approved_artisans_this_week,
-            'total_products': total_products,
-            'products_created_today': products_created_today,
-            'total_sales': float(total_sales),
-            'sales_last_month': float(sales_last_month),
-            'total_orders': total_orders,
-            'recent_orders_count': orders_last_hour,
-            'products_out_of_stock': products_out_of_stock,
-            'recent_activity': recent_activity,
-            'sales_chart': sales_chart,
-        })
+        Served from a cached snapshot refreshed in the background
+        (see admin_panel/stats.py): a page load is one cache read.
+        """
+        return Response(get_dashboard_stats())
 
-    @action(detail=False, methods=['post'], url_path='bulk-approve')
-    def bulk_approve(self, request):
+    def artisan_ids_or_error(self, request):
         """
-        POST /api/v1/admin/artisans/bulk-approve/
-        Approve multiple artisans at once
+        Read and validate `artisan_ids` from the body.
 
-        Body:
-        {
-            "artisan_ids": [1, 2, 3]
-        }
+        Returns:
+            tuple: (ids, None) or (None, error Response)
         """
         artisan_ids = request.data.get('artisan_ids', [])
 
-        if not artisan_ids:
-            return Response(
+        if not artisan_ids or not isinstance(artisan_ids, list):
+            return None, Response(
                 {'error': 'No se proporcionaron IDs'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         # Validar que sean números
         if not all(isinstance(id, int) for id in artisan_ids):
-            return Response(
+            return None, Response(
                 {'error': 'Todos los IDs deben ser números enteros'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Actualizar artesanos
-        updated_count = User.objects.filter(
-            id__in=artisan_ids,
-            role='ARTISAN',
-            is_approved=False
-        ).update(is_approved=True)
+        return artisan_ids, None
+
+    @action(detail=False, methods=['post'], url_path='bulk-approve')
+    def bulk_approve(self, request):
+        """
+        POST /api/v1/admin/artisans/bulk-approve/
+        Approve multiple artisans at once (and email them)
+
+        Body:
+        {
+            "artisan_ids": [1, 2, 3]
+        }
+        """
+        artisan_ids, error = self.artisan_ids_or_error(request)
+        if error:
+            return error
 
-        # TODO: Enviar emails de aprobación a cada artesano
+        updated_count = len(moderate(ModerationAction.APPROVE, artisan_ids, moderator=request.user))
 
         return Response({
             'success': True,
             'approved_count': updated_count,
             'message': f'{updated_count} artesano(s) aprobado(s) correctamente'
         })
+
+    @action(detail=False, methods=['post'], url_path='bulk-moderate')
+    def bulk_moderate(self, request):
+        """
+        POST /api/v1/admin/artisans/bulk-moderate/
+        Approve, reject, feature or unfeature many artisans in one statement.
+        Affected artisans are emailed in the background (see
+        admin_panel/moderation.py).
+
+        Body:
+        {
+            "action": "approve" | "reject" | "feature" | "unfeature",
+            "artisan_ids": [1, 2, 3]
+        }
+        """
+        action = request.data.get('action')
+        if action not in ModerationAction.values:
+            return Response(
+                {'error': f'Acción no válida. Opciones: {", ".join(ModerationAction.values)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        artisan_ids, error = self.artisan_ids_or_error(request)
+        if error:
+            return error
+
+        updated_count = len(moderate(action, artisan_ids, moderator=request.user))
+
+        return Response({
+            'success': True,
+            'action': action,
+            'updated_count': updated_count,
+            'message': f'{updated_count} artesano(s) actualizado(s)'
+        })
+
+
+class ImagePurgeJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Progress of the background image purges started by artisan deletion.
+    Requires role='admin'
+
+    GET /api/v1/admin/image-purge-jobs/
+    GET /api/v1/admin/image-purge-jobs/{id}/
+    """
+    permission_classes = [IsAdminUser]
+    serializer_class = ImagePurgeJobSerializer
+    queryset = ImagePurgeJob.objects.all()
+
+
+class ActivityPagination(CursorPagination):
+    """
+    Cursor pagination for the activity feed: every page is a range of the
+    (created_at, id) index, with no COUNT(*) or OFFSET.
+    """
+    page_size = 20
+    ordering = ('-created_at', '-id')
+
+
+class ActivityEventViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Marketplace activity feed (registrations, products, orders, payments).
+    Requires role='admin'
+
+    GET /api/v1/admin/activity/
+    GET /api/v1/admin/activity/?type=order
+    """
+    permission_classes = [IsAdminUser]
+    serializer_class = ActivityEventSerializer
+    pagination_class = ActivityPagination
+
+    def get_queryset(self):
+        queryset = ActivityEvent.objects.all()
+        activity_type = self.request.query_params.get('type')
+        if activity_type in ActivityType.values:
+            queryset = queryset.filter(type=activity_type)
+        return queryset
+
+
+class RequestMetricsViewSet(viewsets.ViewSet):
+    """
+    Per-endpoint query count and latency histograms of this process
+    (see config/metrics.py).
+    Requires role='admin'
+
+    Metrics are not aggregated across processes: each gunicorn worker keeps
+    its own and answers with its `pid`. Callers must poll until they have
+    seen every worker and merge the buckets per pid (reset only clears the
+    worker that serves it).
+
+    GET  /api/v1/admin/metrics/
+    POST /api/v1/admin/metrics/reset/
+    """
+    permission_classes = [IsAdminUser]
+
+    def list(self, request):
+        return Response(registry.snapshot())
+
+    @action(detail=False, methods=['post'])
+    def reset(self, request):
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class RequestProfileViewSet(viewsets.ViewSet):
+    """
+    On-demand request profiles stored by ProfilerMiddleware
+    (see config/profiling.py).
+    Requires role='admin'
+
+    GET /api/v1/admin/profiles/
+    GET /api/v1/admin/profiles/{id}/             → SQL + top functions
+    GET /api/v1/admin/profiles/{id}/pstats/      → .prof download
+    GET /api/v1/admin/profiles/{id}/speedscope/  → speedscope JSON download
+    """
+    permission_classes = [IsAdminUser]
+    lookup_value_regex = PROFILE_ID_PATTERN
+
+    def list(self, request):
+        return Response(list_profiles())
+
+    def retrieve(self, request, pk=None):
+        profile = load_profile(pk)
+        stats = load_stats(pk)
+        if profile is None or stats is None:
+            raise Http404
+        profile['top_functions'] = top_functions(stats)
+        return Response(profile)
+
+    @action(detail=True, methods=['get'])
+    def pstats(self, request, pk=None):
+        path = profile_path(pk, '.prof')
+        if path is None or not path.exists():
+            raise Http404
+        return FileResponse(
+            open(path, 'rb'), as_attachment=True, filename=f'{pk}.prof',
+            content_type='application/octet-stream'
+        )
+
+    @action(detail=True, methods=['get'])
+    def speedscope(self, request, pk=None):
+        profile = speedscope_profile(pk)
+        if profile is None:
+            raise Http404
+        response = HttpResponse(json.dumps(profile), content_type='application/json')
+        response['Content-Disposition'] = f'attachment; filename="{pk}.speedscope.json"'
+        return response
@@ -0,0 +1,171 @@
+"""
+Cache de las respuestas públicas de un artesano.
+
+- Escaparate (perfil + obras + productos): `build_storefront` lo arma con
+  un número fijo de queries (perfil, obras, productos y metadatos de
+  sus imágenes: 4)
+- Listados paginados de obras y productos del artesano (uno por página y
+  combinación de filtros)
+
+Todas las claves de un artesano llevan su versión; invalidar es publicar
+una versión nueva, que deja huérfanas (y expiran solas) todas las
+variantes ya cacheadas.
+
+Claves:
+- `artisans:slug:<slug>` → user_id del artesano
+- `artisans:version:<user_id>` → versión actual (token aleatorio)
+- `artisans:<user_id>:<versión>:storefront` → escaparate serializado
+- `artisans:<user_id>:<versión>:<colección>:<hash de la URL>` → página
+
+Se indexa por user_id para que guardar una obra o un producto (que solo
+conoce `artisan_id`) invalide sin ninguna query. Los signals de
+artisans/signals.py invalidan al cambiar el perfil, sus obras o sus
+productos.
+
+La invalidación solo es inmediata en el proceso que hace el cambio: sin
+CACHES configurado la cache es LocMem, una por proceso, así que los demás
+workers de gunicorn no ven la versión nueva y siguen sirviendo lo que
+tienen cacheado hasta que caduca. Por eso las entradas duran solo
+STOREFRONT_CACHE_TIMEOUT segundos (60 por defecto): es el retraso máximo
+con el que otro worker muestra un cambio.
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+# Cache-Control de la respuesta (CDN / navegador)
+STOREFRONT_MAX_AGE = 60
+STOREFRONT_STALE_WHILE_REVALIDATE = 60 * 5
+
+# Máximo de obras y productos en el escaparate
+STOREFRONT_WORKS_LIMIT = 24
+STOREFRONT_PRODUCTS_LIMIT = 24
+
+
+def slug_key(slug: str) -> str:
+    return f'artisans:slug:{slug}'
+
+
+def version_key(user_id: int) -> str:
+    return f'artisans:version:{user_id}'
+
+
+def artisan_version(user_id: int) -> str:
+    """Retorna la versión actual de la cache de un artesano."""
+    version = cache.get(version_key(user_id))
+    if version is None:
+        version = cache.get_or_set(version_key(user_id), uuid.uuid4().hex, None)
+    return version
+
+
+def storefront_key(user_id: int) -> str:
+    return f'artisans:{user_id}:{artisan_version(user_id)}:storefront'
+
+
+def collection_key(user_id: int, collection: str, url: str) -> str:
+    """
+    Clave de una página de un listado del artesano.
+
+    Args:
+        user_id: ID del User artesano
+        collection: 'works' o 'products'
+        url: URL completa de la petición (incluye cursor y filtros)
+    """
+    digest = hashlib.md5(url.encode()).hexdigest()
+    return f'artisans:{user_id}:{artisan_version(user_id)}:{collection}:{digest}'
+
+
+def cached_user_id(slug: str) -> int | None:
+    """Retorna el user_id cacheado de un slug o None."""
+    return cache.get(slug_key(slug))
+
+
+def cache_user_id(profile) -> None:
+    """Guarda la relación slug → user_id de un perfil."""
+    cache.set(slug_key(profile.slug), profile.user_id, settings.STOREFRONT_CACHE_TIMEOUT)
+
+
+def get_cached_storefront(slug: str) -> dict | None:
+    """Retorna el escaparate cacheado de un slug o None."""
+    user_id = cached_user_id(slug)
+    if user_id is None:
+        return None
+    return cache.get(storefront_key(user_id))
+
+
+def build_storefront(profile) -> dict:
+    """
+    Arma el escaparate de un artesano.
+
+    Args:
+        profile: ArtisanProfile con `user` cargado (select_related)
+
+    Returns:
+        dict: profile, works (activas, destacadas primero) y products
+        (activos con stock, destacados primero)
+    """
+    # Importar aquí para evitar circular imports
+    from images.metadata import IMAGE_FIELDS, image_urls, metadata_for_urls
+    from shop.models import Product
+    from shop.serializers import ProductListSerializer
+    from works.models import Work
+    from works.serializers import WorkListSerializer
+    from .serializers import ArtisanProfileSerializer
+
+    user = profile.user
+
+    works = Work.objects.filter(
+        artisan=user, is_active=True
+    ).order_by('-is_featured', 'display_order', '-created_at')[:STOREFRONT_WORKS_LIMIT]
+
+    products = list(Product.objects.filter(
+        artisan=user, is_active=True, stock__gt=0
+    ).order_by('-is_featured', '-created_at')[:STOREFRONT_PRODUCTS_LIMIT])
+
+    # Reutilizar el usuario (y su perfil) ya cargado: sin query por producto
+    for product in products:
+        product.artisan = user
+
+    # Metadatos de todas las imágenes del escaparate en una sola query
+    works = list(works)
+    urls = image_urls(profile, IMAGE_FIELDS['artisans.ArtisanProfile'])
+    for item in works:
+        urls += image_urls(item, IMAGE_FIELDS['works.Work'])
+    for item in products:
+        urls += image_urls(item, IMAGE_FIELDS['shop.Product'])
+    context = {'image_metadata': metadata_for_urls(urls)}
+
+    return {
+        'profile': ArtisanProfileSerializer(profile, context=context).data,
+        'works': WorkListSerializer(works, many=True, context=context).data,
+        'products': ProductListSerializer(products, many=True, context=context).data,
+    }
+
+
+def cache_storefront(profile, data: dict) -> None:
+    """Guarda el escaparate de un artesano."""
+    cache_user_id(profile)
+    cache.set(storefront_key(profile.user_id), data, settings.STOREFRONT_CACHE_TIMEOUT)
+
+
+def invalidate_artisan_cache(user_id: int, slug: str = None) -> None:
+    """
+    Invalida todo lo cacheado de un artesano (sin queries) en este proceso;
+    en los demás caduca a los STOREFRONT_CACHE_TIMEOUT segundos.
+
+    Se publica una versión nueva ya y otra vez al hacer commit, para que
+    una petición concurrente no deje cacheados datos anteriores a la
+    transacción con la versión vigente.
+    """
+    def bump():
+        cache.set(version_key(user_id), uuid.uuid4().hex, None)
+        if slug:
+            cache.delete(slug_key(slug))
+
+    bump()
+    transaction.on_commit(bump)
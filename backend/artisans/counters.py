@@ -0,0 +1,144 @@
+"""
+Contadores públicos del perfil de artesano (total_works, total_products).
+
+Se mantienen de forma incremental:
+- Crear una obra/producto suma 1 con un UPDATE atómico (F())
+- Borrarla resta 1 (sin bajar de 0)
+- Los guardados parciales (p. ej. update_fields=['stock'] en checkout)
+  no tocan el contador
+
+Cuando una obra/producto cambia de artesano se programa el recuento de
+los dos. Los recuentos se agrupan por transacción: todos los artesanos
+afectados se recuentan en un solo UPDATE al hacer commit.
+
+El comando `reconcile_counters` repara en bloque cualquier desviación.
+"""
+
+import threading
+
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import ArtisanProfile
+
+
+# Campo del perfil que cuenta cada modelo
+COUNTER_FIELDS = {
+    'works.Work': 'total_works',
+    'shop.Product': 'total_products',
+}
+
+
+def counter_field(model) -> str:
+    """Retorna el campo contador de ArtisanProfile para un modelo."""
+    return COUNTER_FIELDS[model._meta.label]
+
+
+def increment_counter(user_id: int, field: str, delta: int) -> None:
+    """
+    Suma `delta` al contador `field` del perfil del artesano (una query).
+
+    Args:
+        user_id: ID del User artesano
+        field: 'total_works' o 'total_products'
+        delta: +1 al crear, -1 al borrar
+    """
+    profiles = ArtisanProfile.objects.filter(user_id=user_id)
+    if delta < 0:
+        profiles = profiles.filter(**{f'{field}__gte': -delta})
+    profiles.update(**{field: F(field) + delta})
+
+
+def count_subquery(model):
+    """
+    Subquery con el número de filas de `model` del artesano del perfil.
+    """
+    counts = model.objects.filter(
+        artisan_id=OuterRef('user_id')
+    ).order_by().values('artisan_id').annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+
+def actual_counts():
+    """Expresiones con los recuentos reales de obras y productos."""
+    from shop.models import Product
+    from works.models import Work
+
+    return {
+        'total_works': count_subquery(Work),
+        'total_products': count_subquery(Product),
+    }
+
+
+def recount_counters(user_ids=None) -> int:
+    """
+    Recalcula los contadores de varios artesanos en un solo UPDATE.
+
+    Args:
+        user_ids: IDs de User a recontar (None = todos)
+
+    Returns:
+        int: Perfiles actualizados
+    """
+    profiles = ArtisanProfile.objects.all()
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=user_ids)
+    return profiles.update(**actual_counts())
+
+
+def drifted_profiles():
+    """
+    Perfiles cuyo contador no coincide con el recuento real.
+
+    Anotados con `actual_works` y `actual_products`.
+    """
+    counts = actual_counts()
+    return ArtisanProfile.objects.annotate(
+        actual_works=counts['total_works'],
+        actual_products=counts['total_products'],
+    ).filter(
+        ~Q(total_works=F('actual_works')) | ~Q(total_products=F('actual_products'))
+    )
+
+
+# Artesanos pendientes de recuento en la transacción de cada hilo
+_pending = threading.local()
+
+
+def pending_recounts() -> set:
+    """IDs de User pendientes de recuento en este hilo."""
+    if not hasattr(_pending, 'user_ids'):
+        _pending.user_ids = set()
+    return _pending.user_ids
+
+
+def flush_recounts() -> None:
+    """
+    Callback on_commit: recuenta los artesanos pendientes en un UPDATE y
+    vacía el conjunto (los callbacks siguientes de la transacción no hacen
+    nada).
+    """
+    user_ids = pending_recounts()
+    if user_ids:
+        _pending.user_ids = set()
+        recount_counters(user_ids)
+
+
+def schedule_recount(user_id: int) -> None:
+    """
+    Programa el recuento de un artesano al hacer commit.
+
+    Cada llamada registra su callback, pero todos comparten el conjunto de
+    pendientes y solo el primero hace el UPDATE. Así, si un savepoint hace
+    rollback y descarta sus callbacks, los registrados fuera de él siguen
+    recontando todo. Tras un rollback completo los IDs se quedan en el
+    conjunto y se recuentan en el siguiente commit (sin efecto, el
+    recuento es idempotente).
+    """
+    if not connection.in_atomic_block:
+        recount_counters([user_id])
+        return
+
+    pending_recounts().add(user_id)
+    transaction.on_commit(flush_recounts)
@@ -0,0 +1,63 @@
+"""
+Management command para reparar los contadores de los perfiles de artesano.
+
+Los contadores total_works y total_products se mantienen de forma
+incremental (artisans/counters.py). Si se desvían (cambios de artesano
+desde el admin, borrados con SQL, datos importados...), este comando los
+recalcula en bloque: una query para detectar los perfiles desviados y un
+UPDATE por lote para corregirlos.
+
+Pensado para ejecutarse periódicamente (cron).
+
+Uso:
+    python manage.py reconcile_counters
+    python manage.py reconcile_counters --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+from artisans.counters import drifted_profiles, recount_counters
+
+
+class Command(BaseCommand):
+    help = 'Repara los contadores de obras y productos de los perfiles de artesano'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Perfiles por UPDATE (default: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo muestra los perfiles desviados, sin corregirlos',
+        )
+
+    def handle(self, *args, **options):
+        drifted = list(drifted_profiles().values_list(
+            'user_id', 'slug',
+            'total_works', 'actual_works',
+            'total_products', 'actual_products',
+        ))
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('✅ Todos los contadores están al día'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'⚠️  {len(drifted)} perfil(es) con contadores desviados'))
+        for _, slug, works, actual_works, products, actual_products in drifted[:20]:
+            self.stdout.write(
+                f'   @{slug}: obras {works} → {actual_works}, productos {products} → {actual_products}'
+            )
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('✅ Dry-run completado'))
+            return
+
+        user_ids = [row[0] for row in drifted]
+        batch_size = options['batch_size']
+        for start in range(0, len(user_ids), batch_size):
+            recount_counters(user_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(drifted)} perfil(es) corregidos'))
@@ -0,0 +1,82 @@
+"""
+Soporte de búsqueda por trigramas para artesanos (artisans/search.py).
+
+Solo en PostgreSQL con las extensiones pg_trgm y unaccent disponibles
+(incluidas en la imagen oficial de Postgres). En otra base de datos, o si
+no están disponibles, la migración no hace nada y la búsqueda usa icontains.
+
+- Extensiones pg_trgm y unaccent
+- Función immutable_unaccent(text): unaccent no es IMMUTABLE y no se puede
+  usar directamente en un índice
+- Índices GIN de trigramas sobre immutable_unaccent(lower(...)) de
+  display_name y short_description
+"""
+
+from django.db import migrations
+
+
+FORWARD_SQL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    """
+    CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text AS $$
+        SELECT public.unaccent('public.unaccent', $1)
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS artisans_profile_name_trgm
+    ON artisans_artisanprofile
+    USING gin (immutable_unaccent(lower(display_name)) gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS artisans_profile_short_desc_trgm
+    ON artisans_artisanprofile
+    USING gin (immutable_unaccent(lower(short_description)) gin_trgm_ops)
+    """,
+]
+
+REVERSE_SQL = [
+    'DROP INDEX IF EXISTS artisans_profile_short_desc_trgm',
+    'DROP INDEX IF EXISTS artisans_profile_name_trgm',
+    'DROP FUNCTION IF EXISTS immutable_unaccent(text)',
+]
+
+
+def extensions_available(schema_editor) -> bool:
+    """Comprueba que el servidor Postgres tiene pg_trgm y unaccent."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return False
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_available_extensions WHERE name IN ('pg_trgm', 'unaccent')"
+        )
+        return cursor.fetchone()[0] == 2
+
+
+def create_search_support(apps, schema_editor):
+    if not extensions_available(schema_editor):
+        # La búsqueda de artesanos usará icontains
+        return
+
+    for sql in FORWARD_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_support(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for sql in REVERSE_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artisans', '0003_artisanprofile_short_description'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_support, drop_search_support),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artisans', '0004_trigram_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artisanprofile',
+            name='last_work_position',
+            field=models.IntegerField(default=0, editable=False, help_text='Último display_order asignado a una obra nueva (ver works/ordering.py)', verbose_name='última posición de obra'),
+        ),
+    ]
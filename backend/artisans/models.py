@@ -5,10 +5,10 @@ Define perfiles públicos de artesanos con información de taller y ubicación.
 from decimal import Decimal
 from django.db import models
 from django.conf import settings
-from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from payments.models import StripeAccountStatus
 from profiles.models import BaseCreatorProfile
+from .slugs import base_slug_for, save_with_unique_slug
 
 
 class CraftType(models.TextChoices):
@@ -180,6 +180,12 @@ class ArtisanProfile(BaseCreatorProfile):
         default=0,
         help_text=_('Número total de productos en venta')
     )
+    last_work_position = models.IntegerField(
+        _('última posición de obra'),
+        default=0,
+        editable=False,
+        help_text=_('Último display_order asignado a una obra nueva (ver works/ordering.py)')
+    )
     
     # Destacado
     is_featured = models.BooleanField(
@@ -215,24 +221,31 @@ class ArtisanProfile(BaseCreatorProfile):
         Ejemplo: /artesanos/juan-ceramista/
         """
         return f'/artesanos/{self.slug}/'
-    
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None) -> None:
+        """
+        Al leer un campo diferido se cargan todos los diferidos en una
+        query (no una por campo).
+
+        El perfil del usuario autenticado llega solo con su id (ver
+        accounts/authentication.py): las vistas que lo leen entero hacen
+        una query, no una por campo.
+        """
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
     def save(self, *args, **kwargs) -> None:
         """
         Override save para auto-generar slug si no existe.
-        El slug se genera a partir del username del usuario.
+        El slug se genera a partir del username del usuario, con el primer
+        sufijo libre (-1, -2...) si ya está ocupado (ver artisans/slugs.py).
         """
         if not self.slug:
-            # Generar slug base desde username
-            base_slug = slugify(self.user.username)
-            slug = base_slug
-            counter = 1
-            
-            # Asegurar que el slug sea único
-            while ArtisanProfile.objects.filter(slug=slug).exists():
-                slug = f'{base_slug}-{counter}'
-                counter += 1
-            
-            self.slug = slug
+            base = base_slug_for(self.user.username, self._meta.get_field('slug').max_length)
+            save_with_unique_slug(self, base, lambda: super(ArtisanProfile, self).save(*args, **kwargs))
+            return
         
         super().save(*args, **kwargs)
     
@@ -0,0 +1,153 @@
+"""
+Búsqueda de artesanos por similitud de trigramas (pg_trgm).
+
+En PostgreSQL con las extensiones `pg_trgm` y `unaccent` (ver migración
+0004_trigram_search) se busca por similitud de palabra sobre
+`display_name` y `short_description`, normalizados con
+`immutable_unaccent(lower(...))`. Así:
+- Los errores de tecleo siguen encontrando resultados ("ceramicca")
+- Los acentos no importan ("Mao" encuentra "Maó")
+- Los resultados salen ordenados por similitud
+- Las consultas usan los índices GIN de trigramas en lugar de escanear
+  la tabla con ILIKE
+
+Sin esas extensiones (SQLite en tests, Postgres sin contrib) se usa la
+búsqueda anterior con `icontains`.
+
+En ambos casos los municipios y tipos de artesanía se comparan contra su
+nombre visible sin acentos ("mao" → MenorcaLocation.MAO).
+"""
+
+import unicodedata
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import CharField, F, Func, Q, Value
+from django.db.models.functions import Greatest, Lower
+
+from .models import CraftType, MenorcaLocation
+
+
+# Campos con índice GIN de trigramas
+TRIGRAM_FIELDS = ('display_name', 'short_description')
+
+# Campos de la búsqueda sin trigramas (icontains)
+FALLBACK_FIELDS = ('display_name', 'short_description', 'bio')
+
+TYPEAHEAD_MIN_LENGTH = 2
+TYPEAHEAD_LIMIT = 8
+
+_available = {}
+
+
+def normalize(text: str) -> str:
+    """
+    Minúsculas y sin acentos (equivalente en Python a immutable_unaccent(lower())).
+
+    Example:
+        >>> normalize('Maó')
+        'mao'
+    """
+    decomposed = unicodedata.normalize('NFKD', str(text).lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def choice_codes(choices, term: str) -> list[str]:
+    """
+    Retorna los valores de unas choices cuyo nombre visible contiene `term`.
+
+    Example:
+        >>> choice_codes(MenorcaLocation, 'mao')
+        ['mao']
+    """
+    term = normalize(term)
+    return [value for value, label in choices.choices if term in normalize(label)]
+
+
+def label_filter(term: str) -> Q:
+    """Filtro por municipio o tipo de artesanía según su nombre visible."""
+    query = Q()
+    locations = choice_codes(MenorcaLocation, term)
+    if locations:
+        query |= Q(location__in=locations)
+    crafts = choice_codes(CraftType, term)
+    if crafts:
+        query |= Q(craft_type__in=crafts)
+    return query
+
+
+def trigram_search_available() -> bool:
+    """
+    Indica si la base de datos soporta la búsqueda por trigramas.
+
+    Requiere PostgreSQL con pg_trgm y la función immutable_unaccent de la
+    migración. Se comprueba una vez por base de datos.
+    """
+    if connection.vendor != 'postgresql':
+        return False
+
+    name = connection.settings_dict['NAME']
+    if name not in _available:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') "
+                "AND EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'immutable_unaccent')"
+            )
+            _available[name] = cursor.fetchone()[0]
+    return _available[name]
+
+
+def unaccented(expression):
+    """Expresión SQL immutable_unaccent(lower(expression))."""
+    return Func(Lower(expression), function='immutable_unaccent', output_field=CharField())
+
+
+def trigram_search(queryset, query: str):
+    """
+    Filtra y ordena artesanos por similitud de trigramas.
+
+    Anota `search_rank` (0-1) y ordena por él antes que por el orden
+    que ya tuviera el queryset.
+    """
+    term = unaccented(Value(query))
+
+    queryset = queryset.alias(**{
+        f'{field}_search': unaccented(F(field)) for field in TRIGRAM_FIELDS
+    }).annotate(
+        search_rank=Greatest(*(
+            TrigramWordSimilarity(term, f'{field}_search') for field in TRIGRAM_FIELDS
+        ))
+    )
+
+    matches = label_filter(query)
+    for field in TRIGRAM_FIELDS:
+        matches |= Q(**{f'{field}_search__trigram_word_similar': term})
+
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    return queryset.filter(matches).order_by('-search_rank', *ordering)
+
+
+def icontains_search(queryset, terms: list[str]):
+    """
+    Búsqueda sin trigramas: cada término debe aparecer en algún campo
+    (mismo comportamiento que SearchFilter de DRF).
+    """
+    for term in terms:
+        matches = label_filter(term)
+        for field in FALLBACK_FIELDS:
+            matches |= Q(**{f'{field}__icontains': term})
+        queryset = queryset.filter(matches)
+    return queryset
+
+
+def search_artisans(queryset, query: str):
+    """
+    Busca artesanos con trigramas si están disponibles o con icontains si no.
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+
+    if trigram_search_available():
+        return trigram_search(queryset, query)
+    return icontains_search(queryset, query.replace(',', ' ').split())
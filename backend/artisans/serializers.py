@@ -3,6 +3,8 @@ Serializers para la app artisans.
 Maneja la serialización de perfiles de artesanos para la API pública.
 """
 from rest_framework import serializers
+
+from images.serializers import ImageMetadataField, ImageMetadataListSerializer, ImageSrcsetField
 from .models import ArtisanProfile, CraftType, MenorcaLocation
 
 
@@ -92,6 +94,9 @@ class ArtisanProfileSerializer(serializers.ModelSerializer):
     instagram_url = serializers.ReadOnlyField()
     full_location = serializers.ReadOnlyField()
     
+    # Dimensiones y placeholder de avatar y portada
+    image_meta = ImageMetadataField('avatar', 'cover_image')
+    
     class Meta:
         model = ArtisanProfile
         fields = (
@@ -105,6 +110,7 @@ class ArtisanProfileSerializer(serializers.ModelSerializer):
             'location',
             'avatar',
             'cover_image',
+            'image_meta',
             'website',
             'instagram',
             'instagram_url',
@@ -154,8 +160,15 @@ class ArtisanProfileListSerializer(serializers.ModelSerializer):
     respuestas con múltiples artesanos.
     """
     
+    # Dimensiones y placeholder del avatar (una query por listado)
+    image_meta = ImageMetadataField('avatar')
+    
+    # srcset responsive del avatar (solo con ?images=responsive)
+    thumbnail_srcset = ImageSrcsetField('avatar')
+    
     class Meta:
         model = ArtisanProfile
+        list_serializer_class = ImageMetadataListSerializer
         fields = (
             'slug',
             'display_name',
@@ -163,8 +176,26 @@ class ArtisanProfileListSerializer(serializers.ModelSerializer):
             'craft_type',
             'location',
             'avatar',
+            'thumbnail_srcset',
+            'image_meta',
             'total_works',
             'total_products',
             'is_featured',
         )
 
+
+
+class ArtisanTypeaheadSerializer(serializers.ModelSerializer):
+    """
+    Serializer mínimo para sugerencias de búsqueda (typeahead).
+    """
+    
+    class Meta:
+        model = ArtisanProfile
+        fields = (
+            'slug',
+            'display_name',
+            'avatar',
+            'craft_type',
+            'location',
+        )
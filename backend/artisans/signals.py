@@ -4,8 +4,15 @@ Gestiona la creación automática de perfiles de artesanos y actualización de c
 """
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from accounts.authentication import invalidate_auth_user
 from accounts.models import User, UserRole
 from .models import ArtisanProfile, CraftType, MenorcaLocation
+from .cache import invalidate_artisan_cache
+from .counters import (
+    counter_field,
+    increment_counter,
+    schedule_recount,
+)
 
 
 @receiver(post_save, sender=User)
@@ -19,7 +26,7 @@ def create_artisan_profile(sender, instance: User, created: bool, **kwargs):
     3. Crea ArtisanProfile asociado con valores por defecto
     
     Campos por defecto:
-    - slug: generado desde username
+    - slug: generado desde username (primer sufijo libre si está ocupado)
     - display_name: full_name del usuario o username como fallback
     - craft_type: OTHER (el artesano lo completa después)
     - location: OTHER (el artesano lo completa después)
@@ -43,120 +50,92 @@ def create_artisan_profile(sender, instance: User, created: bool, **kwargs):
     # Crear perfil de artesano con valores por defecto
     ArtisanProfile.objects.create(
         user=instance,
-        slug=instance.username,  # Se puede regenerar en save() si hay conflicto
         display_name=instance.get_full_name() or instance.username,
         craft_type=CraftType.OTHER,
         location=MenorcaLocation.OTHER,
     )
 
 
-def update_artisan_work_count(artisan_profile):
+# Contadores de obras (works) y productos (shop)
+@receiver(post_save, sender='works.Work')
+@receiver(post_save, sender='shop.Product')
+def update_artisan_counter_on_save(sender, instance, created: bool, update_fields=None, **kwargs):
     """
-    Actualiza el contador de obras de un artesano.
-    
-    Args:
-        artisan_profile: Instancia de ArtisanProfile
+    Mantiene el contador del artesano al guardar una obra o un producto.
+    
+    - Creación: +1 con un UPDATE atómico (F())
+    - Guardado parcial sin 'artisan' (p. ej. update_fields=['stock'] al
+      hacer checkout): no hace nada
+    - Mismo artesano que al leerla: no hace nada
+    - Cambio de artesano: se programa el recuento del anterior y del nuevo,
+      agrupado por transacción (si no se sabe el anterior, solo el nuevo)
     """
-    if not artisan_profile:
+    field = counter_field(sender)
+    
+    if created:
+        increment_counter(instance.artisan_id, field, 1)
         return
     
-    # Importar aquí para evitar circular imports
-    from works.models import Work
+    if update_fields is not None and 'artisan' not in update_fields:
+        return
     
-    # Contar todas las obras (en Works no hay is_published)
-    count = Work.objects.filter(artisan=artisan_profile.user).count()
+    previous_artisan_id = getattr(instance, '_loaded_artisan_id', None)
+    if previous_artisan_id == instance.artisan_id:
+        return
     
-    # Actualizar contador
-    artisan_profile.total_works = count
-    artisan_profile.save(update_fields=['total_works'])
+    if previous_artisan_id is not None:
+        schedule_recount(previous_artisan_id)
+    schedule_recount(instance.artisan_id)
 
 
-# Signals para actualizar contador de obras
-@receiver(post_save, sender='works.Work')
-def update_work_count_on_save(sender, instance, **kwargs):
+@receiver(post_delete, sender='works.Work')
+@receiver(post_delete, sender='shop.Product')
+def update_artisan_counter_on_delete(sender, instance, **kwargs):
     """
-    Actualiza el contador de obras cuando se crea o modifica una obra.
-    Se ejecuta después de guardar una Work.
+    Resta 1 al contador del artesano al eliminar una obra o un producto.
     """
-    try:
-        artisan_profile = instance.artisan.artisan_profile
-        update_artisan_work_count(artisan_profile)
-    except Exception:
-        pass
+    increment_counter(instance.artisan_id, counter_field(sender), -1)
 
 
-@receiver(post_delete, sender='works.Work')
-def update_work_count_on_delete(sender, instance, **kwargs):
+
+# Invalidación de la cache pública del artesano (artisans/cache.py)
+@receiver(post_save, sender=ArtisanProfile)
+@receiver(post_delete, sender=ArtisanProfile)
+def invalidate_cache_on_profile_change(sender, instance: ArtisanProfile, **kwargs):
     """
-    Actualiza el contador de obras cuando se elimina una obra.
-    Se ejecuta después de eliminar una Work.
+    Invalida la cache del artesano al cambiar o borrar su perfil.
     """
-    try:
-        artisan_profile = instance.artisan.artisan_profile
-        update_artisan_work_count(artisan_profile)
-    except Exception:
-        pass
-
+    invalidate_artisan_cache(instance.user_id, instance.slug)
 
-# ========== SIGNALS PARA PRODUCTOS (SHOP) ==========
 
-def update_artisan_product_count(artisan_profile):
+# Invalidación de la cache de autenticación (accounts/authentication.py)
+@receiver(post_save, sender=ArtisanProfile)
+def invalidate_auth_user_on_profile_creation(sender, instance: ArtisanProfile, created: bool, **kwargs):
     """
-    Actualiza el contador de productos de un artesano.
-    
-    Args:
-        artisan_profile: Instancia de ArtisanProfile
+    Invalida la cache de autenticación del usuario al crear su perfil
+    (cambia su artisan_profile_id).
     """
-    if not artisan_profile:
-        return
-    
-    # Importar aquí para evitar circular imports
-    from shop.models import Product
-    
-    # Contar todos los productos del artesano
-    count = Product.objects.filter(artisan=artisan_profile.user).count()
-    
-    # Actualizar contador
-    artisan_profile.total_products = count
-    artisan_profile.save(update_fields=['total_products'])
+    if created:
+        invalidate_auth_user(instance.user_id)
 
 
-# Signals para actualizar contador de productos
-@receiver(post_save, sender='shop.Product')
-def update_product_count_on_save(sender, instance, created, **kwargs):
+@receiver(post_delete, sender=ArtisanProfile)
+def invalidate_auth_user_on_profile_deletion(sender, instance: ArtisanProfile, **kwargs):
     """
-    Actualiza el contador de productos cuando se crea o modifica un producto.
-    
-    Solo incrementa el contador cuando se crea un nuevo producto (created=True).
-    Si se edita un producto existente, no afecta el contador.
-    
-    Args:
-        sender: Modelo que envía la señal (Product)
-        instance: Instancia del producto guardado
-        created: True si es un producto nuevo, False si es actualización
-        **kwargs: Argumentos adicionales del signal
+    Invalida la cache de autenticación del usuario al borrar su perfil.
     """
-    # Siempre recalcular el total para mantener consistencia
-    try:
-        artisan_profile = instance.artisan.artisan_profile
-        update_artisan_product_count(artisan_profile)
-    except Exception:
-        pass
+    invalidate_auth_user(instance.user_id)
 
 
+@receiver(post_save, sender='works.Work')
+@receiver(post_delete, sender='works.Work')
+@receiver(post_save, sender='shop.Product')
 @receiver(post_delete, sender='shop.Product')
-def update_product_count_on_delete(sender, instance, **kwargs):
+def invalidate_cache_on_catalog_change(sender, instance, **kwargs):
     """
-    Actualiza el contador de productos cuando se elimina un producto.
-    Se ejecuta después de eliminar un Product.
+    Invalida la cache del artesano al cambiar una obra o un producto.
     
-    Args:
-        sender: Modelo que envía la señal (Product)
-        instance: Instancia del producto eliminado
-        **kwargs: Argumentos adicionales del signal
+    Incluye los guardados de solo stock (checkout): cambian qué productos
+    están disponibles. No hace queries, solo publica una versión nueva.
     """
-    try:
-        artisan_profile = instance.artisan.artisan_profile
-        update_artisan_product_count(artisan_profile)
-    except Exception:
-        pass
+    invalidate_artisan_cache(instance.artisan_id)
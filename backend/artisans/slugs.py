@@ -0,0 +1,114 @@
+"""
+Asignación de slugs únicos para perfiles de artesano.
+
+En lugar de probar `base`, `base-1`, `base-2`... con una query por
+intento, se leen de una vez todos los slugs que empiezan por `base`
+(LIKE 'base%', que usa el índice del slug) y se elige en memoria el
+primer sufijo libre.
+
+Dos registros simultáneos pueden elegir el mismo slug: la restricción
+única de la base de datos lo detecta y se reintenta con una lectura
+nueva.
+"""
+
+import logging
+import re
+
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+
+logger = logging.getLogger(__name__)
+
+# Reintentos ante una colisión concurrente del slug
+MAX_ATTEMPTS = 5
+
+# Caracteres reservados para el sufijo numérico ('-123456')
+SUFFIX_RESERVE = 7
+
+DEFAULT_BASE_SLUG = 'artesano'
+
+
+def base_slug_for(value: str, max_length: int) -> str:
+    """
+    Genera el slug base desde un texto (normalmente el username).
+
+    Se recorta para que siempre quepa un sufijo numérico.
+    """
+    base = slugify(value) or DEFAULT_BASE_SLUG
+    if len(base) > max_length - SUFFIX_RESERVE:
+        base = base[:max_length - SUFFIX_RESERVE].rstrip('-')
+    return base
+
+
+def next_free_slug(base: str, taken) -> str:
+    """
+    Elige el primer slug libre entre `base`, `base-1`, `base-2`...
+
+    Args:
+        base: Slug base
+        taken: Slugs existentes que empiezan por `base`
+
+    Example:
+        >>> next_free_slug('ana', ['ana', 'ana-1', 'ana-3', 'anabel'])
+        'ana-2'
+    """
+    pattern = re.compile(rf'^{re.escape(base)}(?:-(\d+))?$')
+
+    used = set()
+    for slug in taken:
+        match = pattern.match(slug)
+        if match:
+            used.add(int(match.group(1) or 0))
+
+    if 0 not in used:
+        return base
+
+    suffix = 1
+    while suffix in used:
+        suffix += 1
+    return f'{base}-{suffix}'
+
+
+def allocate_slug(model, base: str, exclude_pk=None) -> str:
+    """
+    Retorna un slug libre para `model` con una sola query.
+
+    Args:
+        model: Modelo con campo `slug` único
+        base: Slug base
+        exclude_pk: PK del objeto que se está guardando (su slug no cuenta)
+    """
+    candidates = model.objects.filter(slug__startswith=base)
+    if exclude_pk is not None:
+        candidates = candidates.exclude(pk=exclude_pk)
+    return next_free_slug(base, candidates.values_list('slug', flat=True))
+
+
+def save_with_unique_slug(instance, base: str, save) -> None:
+    """
+    Asigna un slug libre a `instance` y la guarda, reintentando si otro
+    proceso ocupa el mismo slug a la vez.
+
+    Args:
+        instance: Objeto a guardar (su `slug` se sobrescribe)
+        base: Slug base
+        save: Callable que guarda el objeto (p. ej. el save() del padre)
+
+    Raises:
+        IntegrityError: Si falla por otro motivo o se agotan los reintentos
+    """
+    model = type(instance)
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        instance.slug = allocate_slug(model, base, exclude_pk=instance.pk)
+        try:
+            # Savepoint: la colisión no invalida la transacción exterior
+            with transaction.atomic():
+                save()
+            return
+        except IntegrityError:
+            slug_taken = model.objects.filter(slug=instance.slug).exclude(pk=instance.pk).exists()
+            if not slug_taken or attempt == MAX_ATTEMPTS:
+                raise
+            logger.info(f"Slug '{instance.slug}' taken concurrently, retrying ({attempt}/{MAX_ATTEMPTS})")
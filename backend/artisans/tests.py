@@ -2,13 +2,26 @@
 Tests for artisans app.
 Verifies ArtisanProfile functionality, signals, and public API.
 """
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, transaction
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
 
 from accounts.models import UserRole
+from config.metrics import BudgetTestMixin
+from shop.models import Product, ProductCategory
+from works.models import Work
 from .models import ArtisanProfile, CraftType, MenorcaLocation
+from . import counters
+from .search import choice_codes, normalize, trigram_search_available
+from .slugs import allocate_slug, next_free_slug
 
 User = get_user_model()
 
@@ -133,7 +146,7 @@ class ArtisanProfileSignalTest(TestCase):
             _ = admin.artisan_profile
 
 
-class ArtisanProfileAPITest(APITestCase):
+class ArtisanProfileAPITest(BudgetTestMixin, APITestCase):
     """
     Tests para la API pública de ArtisanProfile.
     """
@@ -185,6 +198,14 @@ class ArtisanProfileAPITest(APITestCase):
             self.assertIn('results', response.data)
             self.assertEqual(len(response.data['results']), 2)
     
+    def test_read_within_budget(self):
+        """
+        Test que verifica que listado y detalle no superan el presupuesto
+        de queries de la vista.
+        """
+        self.assertWithinBudget(self.client.get('/api/v1/artisans/'))
+        self.assertWithinBudget(self.client.get(f'/api/v1/artisans/{self.profile1.slug}/'))
+    
     def test_retrieve_artist_by_slug(self):
         """
         Test que verifica el detalle de un artista por slug.
@@ -287,3 +308,442 @@ class ArtisanProfileAPITest(APITestCase):
         
         # Debe fallar (método no permitido)
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class ArtisanCounterTest(TestCase):
+    """
+    Tests for incremental total_works / total_products counters.
+    """
+    
+    def setUp(self):
+        """Artesano con un producto y una obra."""
+        self.user = User.objects.create_user(
+            email='counter@example.com',
+            username='counter',
+            password='Test1234',
+            role=UserRole.ARTISAN
+        )
+        self.other = User.objects.create_user(
+            email='other@example.com',
+            username='other',
+            password='Test1234',
+            role=UserRole.ARTISAN
+        )
+        self.product = Product.objects.create(
+            artisan=self.user,
+            name='Cuenco',
+            price=Decimal('20.00'),
+            stock=5,
+        )
+        self.work = Work.objects.create(
+            artisan=self.user,
+            title='Obra',
+            thumbnail_url='https://res.cloudinary.com/test/work.jpg',
+        )
+    
+    def profile(self, user=None):
+        """Helper: perfil recargado desde BD."""
+        return ArtisanProfile.objects.get(user=user or self.user)
+    
+    def test_create_increments_counters(self):
+        """Test que crear obra/producto suma 1 al contador."""
+        profile = self.profile()
+        self.assertEqual(profile.total_products, 1)
+        self.assertEqual(profile.total_works, 1)
+    
+    def test_stock_only_save_skips_counter(self):
+        """Test que un guardado de solo stock (checkout) no toca el perfil."""
+        self.product.stock = 4
+        
+        with self.assertNumQueries(1):
+            self.product.save(update_fields=['stock'])
+    
+    def test_delete_decrements_without_going_negative(self):
+        """Test que borrar resta 1 y nunca deja el contador en negativo."""
+        ArtisanProfile.objects.filter(user=self.user).update(total_products=0)
+        self.product.delete()
+        self.assertEqual(self.profile().total_products, 0)
+        
+        self.work.delete()
+        self.assertEqual(self.profile().total_works, 0)
+    
+    def test_full_saves_coalesce_recounts_per_transaction(self):
+        """Test que varios guardados completos generan un solo recuento al commit."""
+        Product.objects.create(artisan=self.other, name='Plato', price=Decimal('10.00'))
+        
+        work = Work.objects.create(artisan=self.user, title='Otra obra', thumbnail_url='https://res.cloudinary.com/test/otra.jpg')
+        
+        with patch.object(counters, 'recount_counters', wraps=counters.recount_counters) as recount:
+            with self.captureOnCommitCallbacks(execute=True):
+                # Reasignar un producto y una obra
+                self.product.artisan = self.other
+                self.product.save()
+                work.artisan = self.other
+                work.save()
+        
+        recount.assert_called_once_with({self.user.id, self.other.id})
+        self.assertEqual(self.profile(self.other).total_products, 2)
+        self.assertEqual(self.profile(self.other).total_works, 1)
+        # El artesano anterior también se recuenta
+        self.assertEqual(self.profile().total_products, 0)
+        self.assertEqual(self.profile().total_works, 1)
+    
+    def test_full_save_same_artisan_skips_recount(self):
+        """Test que un guardado completo sin cambio de artesano no recuenta."""
+        product = Product.objects.get(pk=self.product.pk)
+        product.name = 'Cuenco grande'
+        
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertNumQueries(1):
+                product.save()
+        
+        self.assertNotIn(counters.flush_recounts, callbacks)
+    
+    def test_recount_after_savepoint_rollback(self):
+        """Test que un savepoint deshecho no pierde los recuentos de fuera."""
+        ArtisanProfile.objects.filter(user=self.other).update(total_products=5)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.work.artisan = self.other
+                    self.work.save()
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+            self.product.artisan = self.other
+            self.product.save()
+        
+        self.assertEqual(self.profile(self.other).total_products, 1)
+        self.assertEqual(self.profile().total_products, 0)
+    
+    def test_reconcile_counters_command(self):
+        """Test que reconcile_counters repara los contadores desviados."""
+        ArtisanProfile.objects.filter(user=self.user).update(total_works=7, total_products=0)
+        out = StringIO()
+        
+        call_command('reconcile_counters', '--dry-run', stdout=out)
+        self.assertIn('1 perfil(es) con contadores desviados', out.getvalue())
+        self.assertEqual(self.profile().total_works, 7)
+        
+        call_command('reconcile_counters', stdout=StringIO())
+        profile = self.profile()
+        self.assertEqual(profile.total_works, 1)
+        self.assertEqual(profile.total_products, 1)
+        
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('al día', out.getvalue())
+
+
+class ArtisanSlugAllocationTest(TestCase):
+    """
+    Tests for single-query unique slug allocation.
+    """
+    
+    def create_artisan(self, username):
+        """Helper: crea un artesano (y su perfil vía signal)."""
+        return User.objects.create_user(
+            email=f'{username.replace(".", "_")}@example.com',
+            username=username,
+            password='Test1234',
+            role=UserRole.ARTISAN
+        )
+    
+    def test_next_free_slug(self):
+        """Test que se elige el primer sufijo libre ignorando otros prefijos."""
+        self.assertEqual(next_free_slug('ana', []), 'ana')
+        self.assertEqual(next_free_slug('ana', ['anabel', 'ana-x']), 'ana')
+        self.assertEqual(next_free_slug('ana', ['ana', 'ana-1', 'ana-3', 'anabel']), 'ana-2')
+        self.assertEqual(next_free_slug('ana', ['ana', 'ana-1', 'ana-2']), 'ana-3')
+    
+    def test_allocate_slug_single_query(self):
+        """Test que la asignación hace una sola query aunque haya muchas colisiones."""
+        self.create_artisan('ana')
+        for suffix in range(1, 30):
+            user = self.create_artisan(f'ana{suffix}')
+            ArtisanProfile.objects.filter(user=user).update(slug=f'ana-{suffix}')
+        
+        with self.assertNumQueries(1):
+            slug = allocate_slug(ArtisanProfile, 'ana')
+        
+        self.assertEqual(slug, 'ana-30')
+    
+    def test_signal_profile_gets_unique_slug(self):
+        """Test que el perfil creado por signal no choca con un slug existente."""
+        self.create_artisan('anab')
+        user = self.create_artisan('ana.b')
+        
+        self.assertEqual(user.artisan_profile.slug, 'anab-1')
+    
+    def test_retries_on_concurrent_collision(self):
+        """Test que si otro registro ocupa el slug a la vez se reintenta."""
+        self.create_artisan('marta.luz')
+        
+        # La primera lectura no ve el slug ocupado (registro concurrente)
+        with patch('artisans.slugs.next_free_slug', side_effect=['martaluz', 'martaluz-1']) as mock_next:
+            user = self.create_artisan('martaluz')
+        
+        self.assertEqual(mock_next.call_count, 2)
+        
+        self.assertEqual(user.artisan_profile.slug, 'martaluz-1')
+
+
+class ArtisanStorefrontAPITest(APITestCase):
+    """
+    Tests for the aggregated, cached storefront endpoint.
+    """
+    
+    def setUp(self):
+        """Artesano con obras y productos (activos e inactivos)."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        
+        self.user = User.objects.create_user(
+            email='storefront@example.com',
+            username='taller',
+            password='Test1234',
+            role=UserRole.ARTISAN
+        )
+        self.url = '/api/v1/artisans/taller/storefront/'
+        
+        self.work = Work.objects.create(
+            artisan=self.user,
+            title='Obra destacada',
+            thumbnail_url='https://res.cloudinary.com/test/work.jpg',
+            is_featured=True,
+        )
+        Work.objects.create(
+            artisan=self.user,
+            title='Obra oculta',
+            thumbnail_url='https://res.cloudinary.com/test/hidden.jpg',
+            is_active=False,
+        )
+        self.product = Product.objects.create(
+            artisan=self.user,
+            name='Cuenco',
+            price=Decimal('20.00'),
+            stock=2,
+        )
+        Product.objects.create(
+            artisan=self.user,
+            name='Agotado',
+            price=Decimal('15.00'),
+            stock=0,
+        )
+    
+    def test_storefront_aggregates_profile_works_and_products(self):
+        """Test que el escaparate incluye perfil, obras activas y productos disponibles."""
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['profile']['slug'], 'taller')
+        self.assertEqual([w['title'] for w in response.data['works']], ['Obra destacada'])
+        self.assertEqual([p['name'] for p in response.data['products']], ['Cuenco'])
+        self.assertEqual(response.data['products'][0]['artisan']['slug'], 'taller')
+    
+    def test_storefront_is_cached_with_cache_control(self):
+        """Test que la segunda petición sale de la cache, sin queries."""
+        self.client.get(self.url)
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        cache_control = response['Cache-Control']
+        self.assertIn('public', cache_control)
+        self.assertIn('max-age=60', cache_control)
+        self.assertIn('stale-while-revalidate=300', cache_control)
+    
+    def test_storefront_invalidated_by_catalog_and_profile_changes(self):
+        """Test que cambios de obras, productos (incluido stock) y perfil invalidan la cache."""
+        self.client.get(self.url)
+        
+        self.product.stock = 0
+        self.product.save(update_fields=['stock'])
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['products'], [])
+        
+        self.work.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['works'], [])
+        
+        profile = self.user.artisan_profile
+        profile.display_name = 'Nuevo nombre'
+        profile.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['profile']['display_name'], 'Nuevo nombre')
+    
+    def test_storefront_not_found(self):
+        """Test que un slug inexistente devuelve 404."""
+        response = self.client.get('/api/v1/artisans/no-existe/storefront/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ArtisanCollectionsAPITest(APITestCase):
+    """
+    Tests for the paginated, filtered and cached works/products actions.
+    """
+    
+    def setUp(self):
+        """Artesano con varias obras y productos."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        
+        self.user = User.objects.create_user(
+            email='coleccion@example.com',
+            username='coleccion',
+            password='Test1234',
+            role=UserRole.ARTISAN
+        )
+        for order in range(1, 6):
+            Work.objects.create(
+                artisan=self.user,
+                title=f'Obra {order}',
+                thumbnail_url='https://res.cloudinary.com/test/work.jpg',
+                display_order=order,
+            )
+        Work.objects.create(
+            artisan=self.user,
+            title='Obra oculta',
+            thumbnail_url='https://res.cloudinary.com/test/hidden.jpg',
+            is_active=False,
+        )
+        self.product = Product.objects.create(
+            artisan=self.user,
+            name='Cuenco de barro',
+            category=ProductCategory.CERAMICS,
+            price=Decimal('20.00'),
+            stock=2,
+        )
+        Product.objects.create(
+            artisan=self.user,
+            name='Anillo',
+            category=ProductCategory.JEWELRY,
+            price=Decimal('80.00'),
+            stock=1,
+        )
+        Product.objects.create(
+            artisan=self.user,
+            name='Inactivo',
+            price=Decimal('10.00'),
+            stock=3,
+            is_active=False,
+        )
+    
+    def test_works_cursor_paginated(self):
+        """Test que las obras activas se paginan por cursor en display_order."""
+        response = self.client.get('/api/v1/artisans/coleccion/works/?page_size=3')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([w['title'] for w in response.data['results']], ['Obra 1', 'Obra 2', 'Obra 3'])
+        self.assertIn('cursor=', response.data['next'])
+        
+        response = self.client.get(response.data['next'])
+        self.assertEqual([w['title'] for w in response.data['results']], ['Obra 4', 'Obra 5'])
+        self.assertIsNone(response.data['next'])
+    
+    def test_products_exclude_inactive_and_apply_filters(self):
+        """Test que los productos inactivos no salen y se aplican los filtros de la tienda."""
+        response = self.client.get('/api/v1/artisans/coleccion/products/')
+        names = {p['name'] for p in response.data['results']}
+        self.assertEqual(names, {'Cuenco de barro', 'Anillo'})
+        
+        response = self.client.get('/api/v1/artisans/coleccion/products/?category=jewelry')
+        self.assertEqual([p['name'] for p in response.data['results']], ['Anillo'])
+        
+        response = self.client.get('/api/v1/artisans/coleccion/products/?search=barro')
+        self.assertEqual([p['name'] for p in response.data['results']], ['Cuenco de barro'])
+        
+        response = self.client.get('/api/v1/artisans/coleccion/products/?ordering=-price')
+        self.assertEqual([p['name'] for p in response.data['results']], ['Anillo', 'Cuenco de barro'])
+    
+    def test_pages_cached_per_artisan_version(self):
+        """Test que las páginas se cachean y un cambio del artesano las invalida."""
+        url = '/api/v1/artisans/coleccion/products/'
+        self.client.get(url)
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertIn('stale-while-revalidate', response['Cache-Control'])
+        
+        self.product.is_active = False
+        self.product.save()
+        
+        response = self.client.get(url)
+        self.assertEqual([p['name'] for p in response.data['results']], ['Anillo'])
+    
+    def test_unknown_artisan_returns_404(self):
+        """Test que un slug inexistente devuelve 404."""
+        response = self.client.get('/api/v1/artisans/no-existe/works/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ArtisanSearchTest(APITestCase):
+    """
+    Tests for accent-insensitive artisan search and typeahead.
+    """
+    
+    def setUp(self):
+        """Artesanos en distintos municipios."""
+        self.juan = User.objects.create_user(
+            email='juan@example.com',
+            username='juan',
+            password='Test1234',
+            role=UserRole.ARTISAN
+        ).artisan_profile
+        self.juan.display_name = 'Cerámica Joan'
+        self.juan.short_description = 'Torno y esmaltes tradicionales'
+        self.juan.craft_type = CraftType.CERAMICS
+        self.juan.location = MenorcaLocation.MAO
+        self.juan.save()
+        
+        self.marta = User.objects.create_user(
+            email='marta@example.com',
+            username='marta',
+            password='Test1234',
+            role=UserRole.ARTISAN
+        ).artisan_profile
+        self.marta.display_name = 'Marta Joyas'
+        self.marta.craft_type = CraftType.JEWELRY
+        self.marta.location = MenorcaLocation.CIUTADELLA
+        self.marta.save()
+    
+    def search(self, query):
+        """Helper: slugs encontrados por ?search=."""
+        response = self.client.get('/api/v1/artisans/', {'search': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [artisan['slug'] for artisan in response.data['results']]
+    
+    def test_normalize_and_choice_codes(self):
+        """Test que los nombres visibles se comparan sin acentos."""
+        self.assertEqual(normalize('Maó'), 'mao')
+        self.assertEqual(choice_codes(MenorcaLocation, 'Mao'), [MenorcaLocation.MAO])
+        self.assertEqual(choice_codes(CraftType, 'ceramica'), [CraftType.CERAMICS])
+    
+    def test_search_by_place_name_without_accents(self):
+        """Test que 'mao' encuentra artesanos de Maó."""
+        self.assertEqual(self.search('mao'), ['juan'])
+    
+    def test_search_by_name(self):
+        """Test que la búsqueda por nombre sigue funcionando."""
+        self.assertEqual(self.search('Joyas'), ['marta'])
+    
+    def test_typeahead(self):
+        """Test que typeahead sugiere artesanos y exige 2 caracteres."""
+        response = self.client.get('/api/v1/artisans/typeahead/', {'q': 'marta'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['slug'], 'marta')
+        self.assertEqual(set(response.data[0]), {'slug', 'display_name', 'avatar', 'craft_type', 'location'})
+        
+        response = self.client.get('/api/v1/artisans/typeahead/', {'q': 'm'})
+        self.assertEqual(response.data, [])
+    
+    def test_trigram_search_tolerates_typos(self):
+        """Test que con pg_trgm los errores de tecleo encuentran resultados."""
+        if not trigram_search_available():
+            self.skipTest('pg_trgm/unaccent no disponibles')
+        
+        self.assertEqual(self.search('ceramicca joan'), ['juan'])
+        self.assertEqual(self.search('marta joyaz')[0], 'marta')
@@ -5,18 +5,75 @@ Incluye endpoint privado para que artesanos editen su perfil.
 """
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
 from django_filters.rest_framework import DjangoFilterBackend
 from accounts.models import UserRole
+from config.metrics import Budget
+from .cache import (
+    STOREFRONT_MAX_AGE,
+    STOREFRONT_STALE_WHILE_REVALIDATE,
+    build_storefront,
+    cache_storefront,
+    cache_user_id,
+    cached_user_id,
+    collection_key,
+    get_cached_storefront,
+)
 from .models import ArtisanProfile
+from .search import TYPEAHEAD_LIMIT, TYPEAHEAD_MIN_LENGTH, search_artisans
 from .serializers import (
     ArtisanProfileSerializer, 
     ArtisanProfileListSerializer,
-    ArtisanProfileUpdateSerializer
+    ArtisanProfileUpdateSerializer,
+    ArtisanTypeaheadSerializer,
 )
 
 
+class ArtisanSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter (`?search=`) con búsqueda por trigramas (artisans/search.py).
+    
+    Va después de OrderingFilter: con trigramas ordena por similitud y
+    usa el orden elegido para desempatar.
+    """
+    
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return search_artisans(queryset, ' '.join(terms))
+
+
+class ArtisanWorksPagination(CursorPagination):
+    """
+    Paginación por cursor para las obras de un artesano.
+    
+    Sin COUNT(*) ni OFFSET: cada página es un rango del índice
+    (artisan, is_active, display_order).
+    """
+    page_size = 24
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('display_order', '-created_at')
+
+
+class ArtisanProductsPagination(CursorPagination):
+    """
+    Paginación por cursor para los productos de un artesano.
+    
+    Cada página es un rango del índice (artisan, is_active, -created_at).
+    """
+    page_size = 24
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at',)
+
+
 class ArtisanProfileViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet de solo lectura para perfiles de artesanos.
@@ -24,10 +81,15 @@ class ArtisanProfileViewSet(viewsets.ReadOnlyModelViewSet):
     Endpoints públicos:
     - GET /api/v1/artisans/ - Lista todos los artesanos
     - GET /api/v1/artisans/{slug}/ - Detalle de un artesano
+    - GET /api/v1/artisans/{slug}/works/ - Obras activas (paginadas por cursor)
+    - GET /api/v1/artisans/{slug}/products/ - Productos activos (paginados por cursor)
+    - GET /api/v1/artisans/{slug}/storefront/ - Perfil + obras + productos
     
     Características:
     - Acceso público (sin autenticación requerida)
-    - Búsqueda por nombre, bio, tipo de artesanía, ubicación
+    - Búsqueda tolerante a errores y acentos (trigramas) por nombre,
+      descripción, tipo de artesanía y municipio
+    - Typeahead: GET /api/v1/artisans/typeahead/?q=
     - Filtros por craft_type, location, is_featured
     - Ordenamiento por fecha de creación, nombre
     - Artesanos destacados aparecen primero
@@ -41,21 +103,22 @@ class ArtisanProfileViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = ArtisanProfile.objects.all()
     lookup_field = 'slug'
     permission_classes = [AllowAny]
+
+    # Presupuesto por acción (config/metrics.py)
+    performance_budgets = {
+        'list': Budget(queries=3, ms=300),
+        'retrieve': Budget(queries=2, ms=200),
+    }
     
-    # Filtros y búsqueda
+    # Filtros y búsqueda (la búsqueda va la última para ordenar por similitud)
     filter_backends = [
-        filters.SearchFilter,
-        filters.OrderingFilter,
         DjangoFilterBackend,
+        filters.OrderingFilter,
+        ArtisanSearchFilter,
     ]
     
-    # Campos de búsqueda (búsqueda de texto libre)
-    search_fields = [
-        'display_name',
-        'bio',
-        'craft_type',
-        'location',
-    ]
+    # Búsqueda de texto libre: display_name y short_description por
+    # trigramas, municipio y tipo de artesanía por nombre (ver search.py)
     
     # Campos de ordenamiento permitidos
     ordering_fields = [
@@ -152,6 +215,53 @@ class ArtisanProfileViewSet(viewsets.ReadOnlyModelViewSet):
             response_serializer = ArtisanProfileSerializer(profile)
             return Response(response_serializer.data)
     
+    def paginated_collection(self, request, slug, collection, viewset_class, queryset, serializer_class, pagination_class):
+        """
+        Responde una página (cacheada) de un listado público del artesano.
+        
+        Aplica los mismos filtros, búsqueda y ordenamiento que el ViewSet
+        principal del listado (`viewset_class`) y pagina por cursor. La
+        página se cachea con la versión del artesano (artisans/cache.py).
+        
+        Args:
+            request: Request de DRF
+            slug: Slug del artesano
+            collection: Nombre del listado ('works' o 'products')
+            viewset_class: ViewSet del que se toman los filtros
+            queryset: Callable(user_id) que retorna el queryset base
+            serializer_class: Serializer ligero del listado
+            pagination_class: Paginación por cursor
+        """
+        user_id = cached_user_id(slug)
+        if user_id is None:
+            profile = self.get_object()
+            cache_user_id(profile)
+            user_id = profile.user_id
+        
+        key = collection_key(user_id, collection, request.build_absolute_uri())
+        data = cache.get(key)
+        
+        if data is None:
+            view = viewset_class(request=request, action='list', format_kwarg=None, args=(), kwargs={})
+            items = queryset(user_id)
+            for backend in view.filter_backends:
+                items = backend().filter_queryset(request, items, view)
+            
+            paginator = pagination_class()
+            page = paginator.paginate_queryset(items, request, view=view)
+            serializer = serializer_class(page, many=True, context={'request': request})
+            data = paginator.get_paginated_response(serializer.data).data
+            cache.set(key, data, settings.STOREFRONT_CACHE_TIMEOUT)
+        
+        response = Response(data)
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=STOREFRONT_MAX_AGE,
+            stale_while_revalidate=STOREFRONT_STALE_WHILE_REVALIDATE,
+        )
+        return response
+    
     @action(
         detail=True,
         methods=['get'],
@@ -160,46 +270,52 @@ class ArtisanProfileViewSet(viewsets.ReadOnlyModelViewSet):
     )
     def works(self, request, slug=None):
         """
-        Endpoint para obtener todas las obras de un artesano.
+        Endpoint para obtener las obras activas de un artesano (paginado).
         
         GET /api/v1/artisans/{slug}/works/
         
-        Retorna todas las obras del artesano ordenadas por display_order.
-        Útil para la página de perfil del artesano donde se muestran
-        sus obras en un grid/galería.
+        Paginación por cursor (`?cursor=...`, `?page_size=...`) y los mismos
+        filtros que /api/v1/works/: category, is_featured, search y
+        ordering (por defecto display_order).
         
         Permisos:
         - Público (sin autenticación requerida)
         
         Returns:
-        - 200: Lista de obras del artesano
+        - 200: Página de obras del artesano
         - 404: Artesano no encontrado
         
         Example:
             GET /api/v1/artisans/juan-ceramista/works/
-            [
-                {
-                    "id": 101,
-                    "title": "Vasijas tradicionales",
-                    "thumbnail_url": "https://...",
-                    "category": "ceramics",
-                    "is_featured": false,
-                    "display_order": 1
-                }
-            ]
+            {
+                "next": "http://.../works/?cursor=cD0x",
+                "previous": null,
+                "results": [
+                    {
+                        "id": 101,
+                        "title": "Vasijas tradicionales",
+                        "thumbnail_url": "https://...",
+                        "category": "ceramics",
+                        "is_featured": false,
+                        "display_order": 1
+                    }
+                ]
+            }
         """
         # Importar aquí para evitar circular imports
+        from works.models import Work
         from works.serializers import WorkListSerializer
+        from works.views import WorkViewSet
         
-        # Obtener el artesano por slug
-        artisan = self.get_object()
-        
-        # Obtener solo obras activas del artesano ordenadas
-        works = artisan.user.works.filter(is_active=True).order_by('display_order', '-created_at')
-        
-        # Serializar y retornar
-        serializer = WorkListSerializer(works, many=True)
-        return Response(serializer.data)
+        return self.paginated_collection(
+            request,
+            slug,
+            'works',
+            viewset_class=WorkViewSet,
+            queryset=lambda user_id: Work.objects.filter(artisan_id=user_id, is_active=True),
+            serializer_class=WorkListSerializer,
+            pagination_class=ArtisanWorksPagination,
+        )
 
     @action(
         detail=True,
@@ -209,57 +325,130 @@ class ArtisanProfileViewSet(viewsets.ReadOnlyModelViewSet):
     )
     def products(self, request, slug=None):
         """
-        Endpoint para obtener productos de un artesano específico.
+        Endpoint para obtener los productos activos de un artesano (paginado).
 
         GET /api/v1/artisans/{slug}/products/
 
-        Filtros disponibles vía query params:
-        - is_active: bool - Filtrar por estado activo
-        - is_featured: bool - Filtrar productos destacados
-        - category: string - Filtrar por categoría
-
-        Ordenamiento:
-        - Destacados primero (is_featured=True)
-        - Más recientes primero (created_at desc)
+        Paginación por cursor (`?cursor=...`, `?page_size=...`) y los mismos
+        filtros que /api/v1/shop/: category, search y ordering (por
+        defecto los más recientes primero). Los productos inactivos no se
+        muestran.
 
         Permisos:
         - Público (sin autenticación requerida)
 
         Returns:
-        - 200: Lista de productos del artesano
+        - 200: Página de productos del artesano
         - 404: Artesano no encontrado
 
         Example:
             GET /api/v1/artisans/juan-ceramista/products/
-            GET /api/v1/artisans/juan-ceramista/products/?is_featured=true
             GET /api/v1/artisans/juan-ceramista/products/?category=ceramics
+            GET /api/v1/artisans/juan-ceramista/products/?ordering=price
         """
         # Importar aquí para evitar circular imports
-        from shop.serializers import ProductSerializer
-
-        # Obtener el artesano por slug
-        artisan_profile = self.get_object()
-        artisan_user = artisan_profile.user
+        from shop.models import Product
+        from shop.serializers import ProductListSerializer
+        from shop.views import ProductViewSet
 
-        # Filtrar productos del artesano
-        products = artisan_user.products.all()
+        return self.paginated_collection(
+            request,
+            slug,
+            'products',
+            viewset_class=ProductViewSet,
+            queryset=lambda user_id: Product.objects.filter(
+                artisan_id=user_id, is_active=True
+            ).select_related('artisan', 'artisan__artisan_profile'),
+            serializer_class=ProductListSerializer,
+            pagination_class=ArtisanProductsPagination,
+        )
 
-        # Aplicar filtros adicionales desde query params
-        is_active = request.query_params.get('is_active')
-        if is_active is not None:
-            products = products.filter(is_active=is_active.lower() == 'true')
-
-        is_featured = request.query_params.get('is_featured')
-        if is_featured is not None:
-            products = products.filter(is_featured=is_featured.lower() == 'true')
-
-        category = request.query_params.get('category')
-        if category:
-            products = products.filter(category=category)
-
-        # Ordenar por destacados primero, luego por fecha
-        products = products.order_by('-is_featured', '-created_at')
+    @action(
+        detail=True,
+        methods=['get'],
+        permission_classes=[AllowAny],
+        url_path='storefront'
+    )
+    def storefront(self, request, slug=None):
+        """
+        Escaparate público de un artesano en una sola respuesta.
+        
+        GET /api/v1/artisans/{slug}/storefront/
+        
+        Reemplaza las tres peticiones de la página /artesanos/[slug]
+        (perfil, obras y productos). Se arma con 4 queries y se cachea por
+        artesano; se invalida al cambiar su perfil, sus obras o sus
+        productos (ver artisans/cache.py).
+        
+        Permisos:
+        - Público (sin autenticación requerida)
+        
+        Returns:
+        - 200: Escaparate del artesano
+        - 404: Artesano no encontrado
+        
+        Example:
+            GET /api/v1/artisans/juan-ceramista/storefront/
+            {
+                "profile": {"slug": "juan-ceramista", ...},
+                "works": [{"id": 101, "title": "Vasijas tradicionales", ...}],
+                "products": [{"id": 5, "name": "Cuenco", "is_available": true, ...}]
+            }
+        """
+        data = get_cached_storefront(slug)
+        
+        if data is None:
+            profile = self.get_object()
+            data = build_storefront(profile)
+            cache_storefront(profile, data)
+        
+        response = Response(data)
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=STOREFRONT_MAX_AGE,
+            stale_while_revalidate=STOREFRONT_STALE_WHILE_REVALIDATE,
+        )
+        return response
 
-        # Serializar y retornar
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[AllowAny],
+        url_path='typeahead'
+    )
+    def typeahead(self, request):
+        """
+        Sugerencias de artesanos mientras se escribe.
+        
+        GET /api/v1/artisans/typeahead/?q=ceram
+        
+        Retorna como máximo 8 artesanos ordenados por similitud (tolera
+        errores de tecleo y acentos). Con menos de 2 caracteres retorna
+        una lista vacía.
+        
+        Permisos:
+        - Público (sin autenticación requerida)
+        
+        Example:
+            GET /api/v1/artisans/typeahead/?q=mao
+            [
+                {
+                    "slug": "juan-ceramista",
+                    "display_name": "Juan Ceramista",
+                    "avatar": "https://...",
+                    "craft_type": "ceramics",
+                    "location": "mao"
+                }
+            ]
+        """
+        query = request.query_params.get('q', '').strip()
+        
+        results = []
+        if len(query) >= TYPEAHEAD_MIN_LENGTH:
+            profiles = search_artisans(self.get_queryset(), query)[:TYPEAHEAD_LIMIT]
+            results = ArtisanTypeaheadSerializer(profiles, many=True).data
+        
+        response = Response(results)
+        patch_cache_control(response, public=True, max_age=STOREFRONT_MAX_AGE)
+        return response
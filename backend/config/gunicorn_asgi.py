@@ -0,0 +1,43 @@
+"""
+Perfil de despliegue ASGI (gunicorn + workers de uvicorn).
+
+Sirve config.asgi:application para que las vistas async de pagos
+(payments.async_views) atiendan muchas peticiones por proceso mientras
+esperan a Stripe.
+
+Uso:
+    gunicorn config.asgi:application -c config/gunicorn_asgi.py
+
+Variables de entorno:
+    GUNICORN_BIND       Dirección de escucha (default: 0.0.0.0:8000, o PORT)
+    GUNICORN_WORKERS    Procesos (default: 2 * CPUs + 1)
+    GUNICORN_TIMEOUT    Segundos antes de reiniciar un worker colgado (default: 30)
+    GUNICORN_LOG_LEVEL  Nivel de log (default: info)
+
+Notas:
+- Cada worker es un proceso con su propio event loop; no hace falta
+  subir el número de workers para absorber la latencia de Stripe.
+- Las vistas síncronas siguen funcionando: Django las ejecuta en un hilo
+  (sync_to_async). Bajo ASGI no conviene CONN_MAX_AGE > 0, porque cada
+  hilo abre su propia conexión a la base de datos y no se reutilizan
+  entre peticiones.
+"""
+
+import multiprocessing
+import os
+
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'uvicorn_worker.UvicornWorker'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar workers de vez en cuando para acotar fugas de memoria
+max_requests = 1000
+max_requests_jitter = 100
+
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+accesslog = '-'
+errorlog = '-'
@@ -0,0 +1,359 @@
+"""
+Métricas por endpoint de la API: queries, tiempo de base de datos,
+tiempo de render y tiempo total de cada petición a una vista DRF.
+
+RequestMetricsMiddleware mide cada petición:
+- queries y db: con connection.execute_wrapper (todas las queries de la
+  petición, también las de autenticación y las de los serializers)
+- render: serialización de la respuesta a JSON (Response.render). El
+  serializer (`.data`) se ejecuta dentro de la vista, así que sus queries
+  cuentan en queries/db y su tiempo en total
+- total: desde que la petición entra en el middleware hasta que sale
+
+Cada vista puede declarar su presupuesto por acción:
+
+    class ProductViewSet(viewsets.ModelViewSet):
+        performance_budgets = {
+            'list': Budget(queries=4),
+            'retrieve': Budget(queries=3, ms=200),
+        }
+
+Las APIView sin acciones usan el método en minúsculas ('get', 'post') y
+'*' vale para cualquier acción. Los presupuestos de las vistas dejan una
+query de margen para la autenticación (CachedJWTAuthentication la hace
+cuando el usuario no está en la cache). Pasarse del presupuesto deja un warning en
+el log y se cuenta en las métricas; en los tests, assertWithinBudget
+(BudgetTestMixin) hace fallar el test.
+
+Con REQUEST_METRICS_SERVER_TIMING (por defecto, DEBUG) la respuesta lleva
+la cabecera Server-Timing, que el navegador muestra en DevTools.
+
+El middleware funciona en los dos modos de Django. Bajo ASGI las vistas
+síncronas (todas las de DRF) y sus queries se ejecutan en el hilo de
+sync_to_async de la petición, así que el medidor de queries se instala en
+la conexión de ese hilo.
+
+Los histogramas se agregan en memoria por proceso y se sirven en
+GET /api/v1/admin/metrics/. No hay agregación entre procesos: cada worker
+de gunicorn tiene los suyos y cada petición al endpoint la atiende uno
+cualquiera (el campo `pid` dice cuál). Para ver el total hay que pedir el
+endpoint varias veces y sumar los buckets de cada pid distinto.
+"""
+
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import asdict, dataclass
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from rest_framework.views import APIView
+
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores de los buckets (el último bucket no tiene límite)
+MS_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+@dataclass(frozen=True)
+class Budget:
+    """Presupuesto de una vista: máximo de queries y de milisegundos (total)."""
+    queries: int | None = None
+    ms: float | None = None
+
+    def violations(self, metrics: 'RequestMetrics', check_time: bool = True) -> list[str]:
+        """Descripción de cada límite superado (vacía si cumple)."""
+        problems = []
+        if self.queries is not None and metrics.queries > self.queries:
+            problems.append(f'{metrics.queries} queries (presupuesto {self.queries})')
+        if check_time and self.ms is not None and metrics.total_ms > self.ms:
+            problems.append(f'{metrics.total_ms:.1f} ms (presupuesto {self.ms:g} ms)')
+        return problems
+
+
+@dataclass
+class RequestMetrics:
+    """Medidas de una petición (en response.metrics)."""
+    route: str
+    view: str
+    action: str
+    queries: int = 0
+    db_ms: float = 0.0
+    render_ms: float = 0.0
+    total_ms: float = 0.0
+    budget: Budget | None = None
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries", '
+            f'render;dur={self.render_ms:.1f}, '
+            f'total;dur={self.total_ms:.1f}'
+        )
+
+
+class QueryTimer:
+    """execute_wrapper que cuenta las queries y su tiempo."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.queries += 1
+
+
+class Histogram:
+    """Histograma de buckets fijos con recuento, suma y máximo."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float | None:
+        """Límite superior del bucket que contiene el cuantil q (estimación)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            'buckets': [
+                {'le': bound, 'count': count}
+                for bound, count in zip(self.bounds + (None,), self.counts)
+            ],
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'max': round(self.max, 3),
+            'mean': round(self.sum / self.count, 3) if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+        }
+
+
+class RouteMetrics:
+    """Histogramas acumulados de una ruta."""
+
+    def __init__(self, view: str, action: str, budget: Budget | None):
+        self.view = view
+        self.action = action
+        self.budget = budget
+        self.over_budget = 0
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_ms = Histogram(MS_BUCKETS)
+        self.render_ms = Histogram(MS_BUCKETS)
+        self.total_ms = Histogram(MS_BUCKETS)
+
+    def observe(self, metrics: RequestMetrics, over_budget: bool) -> None:
+        self.over_budget += over_budget
+        self.queries.observe(metrics.queries)
+        self.db_ms.observe(metrics.db_ms)
+        self.render_ms.observe(metrics.render_ms)
+        self.total_ms.observe(metrics.total_ms)
+
+
+class MetricsRegistry:
+    """Métricas de todas las rutas de este proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes = {}
+            self._since = timezone.now()
+
+    def record(self, metrics: RequestMetrics, over_budget: bool) -> None:
+        with self._lock:
+            route = self._routes.get(metrics.route)
+            if route is None:
+                route = self._routes[metrics.route] = RouteMetrics(metrics.view, metrics.action, metrics.budget)
+            route.observe(metrics, over_budget)
+
+    def snapshot(self) -> dict:
+        """Histogramas por ruta (las rutas más lentas en p95 primero)."""
+        with self._lock:
+            routes = [
+                {
+                    'route': name,
+                    'view': route.view,
+                    'action': route.action,
+                    'budget': asdict(route.budget) if route.budget else None,
+                    'requests': route.total_ms.count,
+                    'over_budget': route.over_budget,
+                    'queries': route.queries.as_dict(),
+                    'db_ms': route.db_ms.as_dict(),
+                    'render_ms': route.render_ms.as_dict(),
+                    'total_ms': route.total_ms.as_dict(),
+                }
+                for name, route in self._routes.items()
+            ]
+            since = self._since
+
+        routes.sort(key=lambda route: (route['total_ms']['p95'] or 0, route['requests']), reverse=True)
+        return {'pid': os.getpid(), 'since': since.isoformat(), 'routes': routes}
+
+
+registry = MetricsRegistry()
+
+
+def get_budget(view_class, action: str) -> Budget | None:
+    """Presupuesto declarado por la vista para la acción ('*' para todas)."""
+    budgets = getattr(view_class, 'performance_budgets', None) or {}
+    return budgets.get(action, budgets.get('*'))
+
+
+def resolve_view(request):
+    """
+    Clase de vista DRF y acción de la petición, o (None, None) si la ruta
+    no es de una vista DRF.
+    """
+    match = getattr(request, 'resolver_match', None)
+    view_class = getattr(match.func, 'cls', None) if match else None
+    if view_class is None or not issubclass(view_class, APIView):
+        return None, None
+
+    method = request.method.lower()
+    actions = getattr(match.func, 'actions', None) or {}
+    return view_class, actions.get(method, method)
+
+
+def add_query_timer(timer: QueryTimer) -> None:
+    """Instala el medidor en la conexión del hilo actual."""
+    connection.execute_wrappers.append(timer)
+
+
+def remove_query_timer(timer: QueryTimer) -> None:
+    connection.execute_wrappers.remove(timer)
+
+
+class RequestMetricsMiddleware:
+    """
+    Mide las peticiones a vistas DRF, las compara con su presupuesto y las
+    agrega al registro (ver docstring del módulo).
+
+    Va el primero en MIDDLEWARE para que el total incluya el resto de
+    middlewares.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.REQUEST_METRICS_ENABLED:
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        return self.record(request, response, timer, start)
+
+    async def __acall__(self, request):
+        if not settings.REQUEST_METRICS_ENABLED:
+            return await self.get_response(request)
+
+        # Las queries de la petición se hacen en su hilo de sync_to_async
+        # (ThreadSensitiveContext), no en el del event loop
+        timer = QueryTimer()
+        start = time.perf_counter()
+        await sync_to_async(add_query_timer)(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(remove_query_timer)(timer)
+        return self.record(request, response, timer, start)
+
+    def record(self, request, response, timer: QueryTimer, start: float):
+        """Agrega las medidas de la petición y las adjunta a la respuesta."""
+        total_ms = (time.perf_counter() - start) * 1000
+
+        view_class, action = resolve_view(request)
+        if view_class is None:
+            return response
+
+        metrics = RequestMetrics(
+            route=f'{request.method} {request.resolver_match.view_name}',
+            view=f'{view_class.__module__}.{view_class.__qualname__}',
+            action=action,
+            queries=timer.queries,
+            db_ms=timer.seconds * 1000,
+            render_ms=getattr(request, '_metrics_render_ms', 0.0),
+            total_ms=total_ms,
+            budget=get_budget(view_class, action),
+        )
+
+        problems = metrics.budget.violations(metrics) if metrics.budget else []
+        if problems:
+            logger.warning('%s over budget: %s', metrics.route, ', '.join(problems))
+        registry.record(metrics, over_budget=bool(problems))
+
+        response.metrics = metrics
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing()
+        return response
+
+    def process_template_response(self, request, response):
+        """Mide el render de las Response de DRF (SimpleTemplateResponse)."""
+        if settings.REQUEST_METRICS_ENABLED:
+            start = time.perf_counter()
+
+            def rendered(response):
+                request._metrics_render_ms = (time.perf_counter() - start) * 1000
+
+            response.add_post_render_callback(rendered)
+        return response
+
+
+class BudgetTestMixin:
+    """
+    Mixin de TestCase: assertWithinBudget(response) falla si la petición
+    superó el presupuesto de su vista.
+
+    Por defecto solo comprueba las queries (el tiempo en los tests depende
+    de la máquina); check_time=True comprueba también los milisegundos.
+    """
+
+    def assertWithinBudget(self, response, check_time: bool = False) -> None:
+        metrics = getattr(response, 'metrics', None)
+        if metrics is None:
+            self.fail('La respuesta no tiene métricas: ¿es una vista DRF con RequestMetricsMiddleware activo?')
+        if metrics.budget is None:
+            self.fail(f'{metrics.view} no declara presupuesto para la acción {metrics.action!r}')
+
+        problems = metrics.budget.violations(metrics, check_time=check_time)
+        if problems:
+            self.fail(f'{metrics.route} supera su presupuesto: {", ".join(problems)}')
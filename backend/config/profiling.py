@@ -0,0 +1,438 @@
+"""
+Profiling bajo demanda de peticiones concretas (solo staff).
+
+Un endpoint lento en producción se perfila repitiendo la petición con la
+cabecera `X-Profile: 1` o el parámetro `?_profile=1`:
+
+    curl -H "Authorization: Bearer <token>" -H "X-Profile: 1" \\
+        https://api.mitaller.art/api/v1/shop/products/
+
+ProfilerMiddleware ejecuta entonces la vista (y el render de la respuesta)
+dentro de cProfile, con las queries capturadas por
+connection.execute_wrapper (SQL sin parámetros, duración y momento). La
+respuesta lleva la cabecera X-Profile-Id con el id del perfil, que se
+descarga desde el panel de admin:
+
+- GET /api/v1/admin/profiles/                  perfiles guardados
+- GET /api/v1/admin/profiles/{id}/             SQL y funciones más costosas
+- GET /api/v1/admin/profiles/{id}/pstats/      .prof (pstats, snakeviz)
+- GET /api/v1/admin/profiles/{id}/speedscope/  JSON para speedscope.app
+
+Solo se perfilan peticiones de usuarios staff o admin (sesión o JWT);
+para el resto el flag se ignora. Sin flag el middleware solo mira una
+cabecera y el query string, y con PROFILER_ENABLED=False ni siquiera se
+instala (MiddlewareNotUsed). Se perfila una petición a la vez por
+proceso: si ya hay otra en curso, la petición se sirve sin perfilar.
+
+Solo se perfilan vistas síncronas (las de DRF). Bajo ASGI el middleware
+es async: las vistas async (payments/async_views.py) pasan sin salto de
+hilo, y una vista síncrona con el flag se perfila en el hilo de
+sync_to_async de la petición.
+
+Los perfiles se guardan en PROFILER_DIR como un buffer circular: al
+guardar uno se borran los más antiguos por encima de
+PROFILER_MAX_PROFILES. Con varios servidores, cada uno guarda los suyos.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import pstats
+import re
+import secrets
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+
+from accounts.authentication import CachedJWTAuthentication
+from accounts.models import UserRole
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '_profile'
+
+# Ids de perfil: momento de la petición + sufijo aleatorio (ordenan por fecha)
+PROFILE_ID_PATTERN = r'\d{8}T\d{12}-[0-9a-f]{8}'
+
+# Funciones del detalle de un perfil, por tiempo acumulado
+TOP_FUNCTIONS = 30
+
+# Speedscope: rama mínima (fracción del total) y máximo de pilas
+MIN_BRANCH_FRACTION = 0.001
+MAX_STACKS = 20000
+MAX_DEPTH = 200
+
+# Un perfil a la vez por proceso
+_profile_lock = threading.Lock()
+
+
+class SQLRecorder:
+    """execute_wrapper que guarda el SQL de cada query con su momento y duración."""
+
+    def __init__(self, start: float, limit: int):
+        self.start = start
+        self.limit = limit
+        self.queries = []
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if len(self.queries) < self.limit:
+                self.queries.append({
+                    'sql': sql,
+                    'many': many,
+                    'at_ms': round((started - self.start) * 1000, 3),
+                    'ms': round(elapsed * 1000, 3),
+                })
+
+
+def is_requested(request) -> bool:
+    """Si la petición pide el perfil (cabecera o query string)."""
+    return PROFILE_HEADER in request.META or PROFILE_PARAM in request.GET
+
+
+def can_profile(user) -> bool:
+    return bool(user and user.is_authenticated and (user.is_staff or user.role == UserRole.ADMIN))
+
+
+def profiling_user(request):
+    """
+    Usuario staff que pide el perfil, por sesión o por JWT (la API no pasa
+    por AuthenticationMiddleware), o None.
+    """
+    user = getattr(request, 'user', None)
+    if can_profile(user):
+        return user
+    try:
+        authenticated = CachedJWTAuthentication().authenticate(request)
+    except APIException:
+        # Token inválido: la vista responderá el error
+        return None
+    if authenticated and can_profile(authenticated[0]):
+        return authenticated[0]
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Buffer circular en disco
+# ---------------------------------------------------------------------------
+
+def profile_dir() -> Path:
+    path = Path(settings.PROFILER_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def profile_path(profile_id: str, suffix: str) -> Path | None:
+    """Ruta de un fichero del perfil (None si el id no es válido)."""
+    if not re.fullmatch(PROFILE_ID_PATTERN, profile_id):
+        return None
+    return profile_dir() / f'{profile_id}{suffix}'
+
+
+def write_atomic(path: Path, write) -> None:
+    """Escribe en un temporal y lo renombra (nadie lee un fichero a medias)."""
+    tmp = path.with_name(f'.{path.name}.tmp')
+    write(str(tmp))
+    os.replace(tmp, path)
+
+
+def save_profile(profiler: cProfile.Profile, meta: dict) -> str:
+    """
+    Guarda el perfil (.prof) y sus metadatos con el SQL (.json), y borra
+    los más antiguos por encima de PROFILER_MAX_PROFILES.
+
+    Returns:
+        str: Id del perfil
+    """
+    now = timezone.now()
+    profile_id = f"{now.strftime('%Y%m%dT%H%M%S%f')}-{secrets.token_hex(4)}"
+    directory = profile_dir()
+
+    write_atomic(directory / f'{profile_id}.prof', pstats.Stats(profiler).dump_stats)
+
+    meta = {'id': profile_id, 'created_at': now.isoformat(), **meta}
+
+    def write_meta(path):
+        with open(path, 'w') as f:
+            json.dump(meta, f)
+
+    write_atomic(directory / f'{profile_id}.json', write_meta)
+    prune_profiles(settings.PROFILER_MAX_PROFILES)
+    return profile_id
+
+
+def prune_profiles(keep: int) -> None:
+    """Borra los perfiles más antiguos, dejando los `keep` más recientes."""
+    stored = sorted(profile_dir().glob('*.json'), reverse=True)
+    for path in stored[keep:]:
+        path.unlink(missing_ok=True)
+        path.with_suffix('.prof').unlink(missing_ok=True)
+
+
+def load_profile(profile_id: str) -> dict | None:
+    """Metadatos y SQL de un perfil (None si no existe o ya se borró)."""
+    path = profile_path(profile_id, '.json')
+    if path is None:
+        return None
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def list_profiles() -> list[dict]:
+    """Perfiles guardados, los más recientes primero (sin el SQL)."""
+    profiles = []
+    for path in sorted(profile_dir().glob('*.json'), reverse=True):
+        meta = load_profile(path.stem)
+        if meta is not None:
+            meta.pop('sql', None)
+            profiles.append(meta)
+    return profiles
+
+
+def load_stats(profile_id: str) -> dict | None:
+    """Estadísticas de cProfile del perfil, o None."""
+    path = profile_path(profile_id, '.prof')
+    if path is None or not path.exists():
+        return None
+    return pstats.Stats(str(path)).stats
+
+
+def function_label(func) -> dict:
+    filename, line, name = func
+    return {'name': name, 'file': filename, 'line': line}
+
+
+def top_functions(stats: dict, limit: int = TOP_FUNCTIONS) -> list[dict]:
+    """Funciones con más tiempo acumulado."""
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            **function_label(func),
+            'calls': nc,
+            'primitive_calls': cc,
+            'self_ms': round(tt * 1000, 3),
+            'cumulative_ms': round(ct * 1000, 3),
+        }
+        for func, (cc, nc, tt, ct, callers) in rows
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Speedscope
+# ---------------------------------------------------------------------------
+
+def call_stacks(stats: dict):
+    """
+    Pilas de llamadas con su tiempo propio, reconstruidas del grafo de
+    cProfile.
+
+    cProfile solo guarda el tiempo por par llamante/llamado, así que el
+    tiempo de una función se reparte entre sus llamados en proporción a
+    ese par. Las ramas de menos de MIN_BRANCH_FRACTION del total se suman
+    al tiempo propio de su padre.
+    """
+    callees = defaultdict(dict)
+    for func, (cc, nc, tt, ct, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+
+    roots = [func for func, row in stats.items() if not row[4]]
+    total = sum(stats[func][3] for func in roots)
+    threshold = total * MIN_BRANCH_FRACTION
+    stacks = []
+
+    def walk(func, seconds, stack):
+        tt, ct = stats[func][2], stats[func][3]
+        ratio = seconds / ct if ct else 0.0
+        stack = stack + [func]
+        own = tt * ratio
+
+        for callee, edge_ct in callees.get(func, {}).items():
+            if callee in stack:
+                # Recursión: su tiempo ya cuenta en la llamada exterior
+                continue
+            branch = edge_ct * ratio
+            if branch < threshold or len(stack) >= MAX_DEPTH or len(stacks) >= MAX_STACKS:
+                own += branch
+                continue
+            walk(callee, branch, stack)
+
+        if own > 0:
+            stacks.append((stack, own))
+
+    for root in roots:
+        walk(root, stats[root][3], [])
+    return stacks
+
+
+def speedscope_profile(profile_id: str) -> dict | None:
+    """
+    Perfil en formato speedscope (https://www.speedscope.app/): un perfil
+    'sampled' con el tiempo de CPU por pila y uno 'evented' con las
+    queries en el orden y momento en que se ejecutaron.
+    """
+    meta = load_profile(profile_id)
+    stats = load_stats(profile_id)
+    if meta is None or stats is None:
+        return None
+
+    frames = []
+    frame_ids = {}
+
+    def frame(key, label):
+        if key not in frame_ids:
+            frame_ids[key] = len(frames)
+            frames.append(label)
+        return frame_ids[key]
+
+    samples, weights = [], []
+    for stack, seconds in call_stacks(stats):
+        samples.append([frame(func, function_label(func)) for func in stack])
+        weights.append(seconds)
+
+    events = []
+    for query in meta['sql']:
+        sql_frame = frame(('sql', query['sql']), {'name': query['sql'][:300]})
+        events.append({'type': 'O', 'frame': sql_frame, 'at': query['at_ms']})
+        events.append({'type': 'C', 'frame': sql_frame, 'at': query['at_ms'] + query['ms']})
+
+    name = f"{meta['method']} {meta['path']}"
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'mitaller',
+        'activeProfileIndex': 0,
+        'shared': {'frames': frames},
+        'profiles': [
+            {
+                'type': 'sampled',
+                'name': f'{name} (CPU)',
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights,
+            },
+            {
+                'type': 'evented',
+                'name': f"{name} (SQL, {meta['queries']} queries)",
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': max([meta['duration_ms']] + [event['at'] for event in events]),
+                'events': events,
+            },
+        ],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+class ProfilerMiddleware:
+    """
+    Perfila la vista cuando un usuario staff lo pide (ver docstring del
+    módulo).
+
+    Va el último en MIDDLEWARE: process_view ejecuta la propia vista, así
+    que el resto de process_view (CSRF) tienen que haberse ejecutado antes.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Bajo ASGI Django adapta un process_view síncrono con
+            # sync_to_async en cada petición: el async evita ese salto
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not is_requested(request) or iscoroutinefunction(view_func):
+            return None
+        return self.profile_request(request, view_func, view_args, view_kwargs)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        if not is_requested(request) or iscoroutinefunction(view_func):
+            return None
+        return await sync_to_async(self.profile_request)(request, view_func, view_args, view_kwargs)
+
+    def profile_request(self, request, view_func, view_args, view_kwargs):
+        """Perfila la vista si el usuario es staff y no hay otro perfil en curso."""
+        user = profiling_user(request)
+        if user is None:
+            return None
+
+        if not _profile_lock.acquire(blocking=False):
+            logger.info('Profiling %s skipped: another request is being profiled', request.path)
+            return None
+        try:
+            return self.profile_view(request, user, view_func, view_args, view_kwargs)
+        finally:
+            _profile_lock.release()
+
+    def profile_view(self, request, user, view_func, view_args, view_kwargs):
+        """Ejecuta la vista y el render con cProfile y guarda el perfil."""
+        start = time.perf_counter()
+        recorder = SQLRecorder(start, settings.PROFILER_MAX_QUERIES)
+        profiler = cProfile.Profile()
+
+        with connection.execute_wrapper(recorder):
+            profiler.enable()
+            try:
+                response = view_func(request, *view_args, **view_kwargs)
+                if callable(getattr(response, 'render', None)):
+                    response = response.render()
+            finally:
+                profiler.disable()
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        profile_id = save_profile(profiler, {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': request.resolver_match.view_name,
+            'status_code': response.status_code,
+            'user_id': user.id,
+            'username': user.username,
+            'duration_ms': round(duration_ms, 3),
+            'queries': recorder.count,
+            'db_ms': round(recorder.seconds * 1000, 3),
+            'sql': recorder.queries,
+        })
+        logger.info('Profiled %s %s as %s', request.method, request.path, profile_id)
+        response['X-Profile-Id'] = profile_id
+        return response
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 import dj_database_url
@@ -49,6 +50,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # Búsqueda por trigramas (artisans/search.py)
     
     # Third party apps
     'rest_framework',
@@ -66,9 +68,11 @@ INSTALLED_APPS = [
     'orders',
     'payments',
     'admin_panel',
+    'images',  # Metadatos de imágenes de Cloudinary
 ]
 
 MIDDLEWARE = [
+    'config.metrics.RequestMetricsMiddleware',  # Primero: el total incluye el resto de middlewares
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS debe estar antes de CommonMiddleware
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -77,6 +81,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'config.profiling.ProfilerMiddleware',  # Último: perfila la vista con X-Profile (solo staff)
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -169,7 +174,7 @@ AUTH_USER_MODEL = 'accounts.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -196,7 +201,8 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login se escribe agrupado (accounts/logins.py), no en cada login
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -220,6 +226,24 @@ CORS_ALLOW_CREDENTIALS = True
 if DEBUG:
     CORS_ALLOW_ALL_ORIGINS = False  # Por seguridad, mejor especificar orígenes exactos
 
+# URL pública del frontend (enlaces en los emails)
+FRONTEND_URL = os.getenv('FRONTEND_URL', CORS_ALLOWED_ORIGINS[0]).rstrip('/')
+
+# Email
+# En desarrollo se imprimen en consola; en producción, SMTP
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '587'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True').lower() in ('true', '1', 'yes')
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'MiTaller <no-reply@mitaller.art>')
+
+# Notificaciones de moderación (admin_panel/notifications.py)
+# Enviar en segundo plano al moderar (si no, solo con send_moderation_emails)
+MODERATION_EMAILS_ASYNC = os.getenv('MODERATION_EMAILS_ASYNC', 'True').lower() in ('true', '1', 'yes')
+
 
 # Stripe Configuration
 # https://stripe.com/docs/api
@@ -231,8 +255,15 @@ STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY')
 STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET')
 STRIPE_CONNECT_WEBHOOK_SECRET = os.getenv('STRIPE_CONNECT_WEBHOOK_SECRET')
 
+# Base URL de la API de Stripe (vacío = API real)
+# En local/tests se puede apuntar a stripe-mock: http://localhost:12111
+STRIPE_API_BASE = os.getenv('STRIPE_API_BASE')
+
 # Comisión del marketplace (10% por defecto)
 MARKETPLACE_FEE_PERCENT = Decimal('10.0')
+# Segundos que cada proceso usa su tabla de comisiones sin comprobar si
+# cambiaron las reglas (payments/fees.py; la cache por defecto no es compartida)
+FEE_SCHEDULE_MAX_AGE = int(os.getenv('FEE_SCHEDULE_MAX_AGE', '60'))
 
 
 # Cloudinary Configuration
@@ -256,6 +287,42 @@ cloudinary.config(
     secure=True  # Usar HTTPS
 )
 
+# Metadatos de imágenes (images/tasks.py)
+# Calcular en segundo plano al guardar (si no, solo con backfill_image_metadata)
+IMAGE_METADATA_ASYNC = os.getenv('IMAGE_METADATA_ASYNC', 'True').lower() in ('true', '1', 'yes')
+# Hilos por proceso para el cálculo en segundo plano
+IMAGE_METADATA_WORKERS = int(os.getenv('IMAGE_METADATA_WORKERS', '2'))
+
+# Estadísticas del dashboard de admin (admin_panel/stats.py)
+# Segundos tras los que una lectura recalcula la instantánea en segundo plano
+DASHBOARD_STATS_REFRESH = int(os.getenv('DASHBOARD_STATS_REFRESH', '60'))
+
+# Páginas públicas de artesanos (artisans/cache.py)
+# Segundos que se cachean el escaparate y los listados; la cache por defecto
+# no es compartida, así que es el retraso máximo de un cambio en otros procesos
+STOREFRONT_CACHE_TIMEOUT = int(os.getenv('STOREFRONT_CACHE_TIMEOUT', '60'))
+
+# Autenticación JWT (accounts/authentication.py)
+# Segundos que se cachea el usuario autenticado (los cambios se invalidan al guardar)
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '60'))
+# Segundos entre reconstrucciones del filtro en memoria de la blacklist (accounts/revocation.py)
+TOKEN_REVOCATION_FILTER_REFRESH = int(os.getenv('TOKEN_REVOCATION_FILTER_REFRESH', '300'))
+# Segundos entre escrituras agrupadas de last_login (0: escribir en cada login)
+LAST_LOGIN_FLUSH_INTERVAL = int(os.getenv('LAST_LOGIN_FLUSH_INTERVAL', '30'))
+
+# Métricas por endpoint (config/metrics.py, GET /api/v1/admin/metrics/)
+REQUEST_METRICS_ENABLED = os.getenv('REQUEST_METRICS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+# Cabecera Server-Timing en las respuestas (por defecto solo con DEBUG)
+REQUEST_METRICS_SERVER_TIMING = os.getenv('REQUEST_METRICS_SERVER_TIMING', str(DEBUG)).lower() in ('true', '1', 'yes')
+
+# Profiling bajo demanda para staff (config/profiling.py, cabecera X-Profile o ?_profile=1)
+PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'True').lower() in ('true', '1', 'yes')
+# Directorio de los perfiles y cuántos se conservan (los más antiguos se borran)
+PROFILER_DIR = os.getenv('PROFILER_DIR', os.path.join(tempfile.gettempdir(), 'mitaller-profiles'))
+PROFILER_MAX_PROFILES = int(os.getenv('PROFILER_MAX_PROFILES', '50'))
+# Queries guardadas por perfil (el recuento incluye todas)
+PROFILER_MAX_QUERIES = int(os.getenv('PROFILER_MAX_QUERIES', '1000'))
+
 # ==============================================================================
 # SENTRY - Error Tracking & Performance Monitoring
 # ==============================================================================
@@ -0,0 +1,73 @@
+"""
+Configuración del admin de Django para la app images.
+"""
+from django.contrib import admin
+from django.utils.html import format_html
+
+from .metadata import process_images
+from .models import ImageMetadata
+
+
+@admin.register(ImageMetadata)
+class ImageMetadataAdmin(admin.ModelAdmin):
+    """
+    Admin de metadatos de imágenes (solo lectura).
+    
+    Permite ver qué imágenes están pendientes o han fallado y
+    recalcularlas.
+    """
+    
+    list_display = (
+        'public_id',
+        'status',
+        'dimensions',
+        'format',
+        'color_swatch',
+        'attempts',
+        'processed_at',
+    )
+    
+    list_filter = ('status', 'format')
+    
+    search_fields = ('public_id', 'url')
+    
+    readonly_fields = [field.name for field in ImageMetadata._meta.fields]
+    
+    actions = ['reprocess_selected']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    @admin.display(description='Dimensiones')
+    def dimensions(self, obj):
+        if obj.width and obj.height:
+            return f'{obj.width}×{obj.height}'
+        return '-'
+    
+    @admin.display(description='Color')
+    def color_swatch(self, obj):
+        if not obj.dominant_color:
+            return '-'
+        return format_html(
+            '<span style="display:inline-block;width:16px;height:16px;background:{};'
+            'border:1px solid #ccc;vertical-align:middle"></span> {}',
+            obj.dominant_color,
+            obj.dominant_color,
+        )
+    
+    @admin.action(description='🖼️ Recalcular metadatos')
+    def reprocess_selected(self, request, queryset):
+        """Descarga de nuevo las imágenes seleccionadas y recalcula sus metadatos."""
+        ready, failed = process_images(queryset)
+        
+        self.message_user(
+            request,
+            f'{ready} imagen(es) procesada(s).',
+            level='success'
+        )
+        if failed:
+            self.message_user(
+                request,
+                f'{failed} imagen(es) fallida(s). Ver el campo error.',
+                level='error'
+            )
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class ImagesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'images'
+    verbose_name = 'Imágenes'
+    
+    def ready(self):
+        """
+        Importa signals cuando la app está lista.
+        Esto registra los receivers que calculan los metadatos de imagen.
+        """
+        import images.signals
@@ -0,0 +1,118 @@
+"""
+Codificador BlurHash (https://blurha.sh) en Python puro.
+
+Un BlurHash es una cadena corta (~30 caracteres) que describe una versión
+muy borrosa de la imagen. El frontend la decodifica y la pinta como
+placeholder mientras se descarga la imagen real.
+
+La imagen se reduce antes a MAX_SAMPLE_SIZE px de lado: el hash solo
+guarda unos pocos componentes de baja frecuencia, así que el resultado
+es el mismo y el cálculo es instantáneo.
+"""
+
+import math
+
+from PIL import Image
+
+
+BASE83_CHARS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+# Lado máximo de la muestra sobre la que se calcula el hash
+MAX_SAMPLE_SIZE = 32
+
+
+def encode_base83(value: int, length: int) -> str:
+    """Codifica `value` en base 83 con `length` caracteres."""
+    return ''.join(
+        BASE83_CHARS[(value // 83 ** (length - i)) % 83]
+        for i in range(1, length + 1)
+    )
+
+
+def srgb_to_linear(value: int) -> float:
+    value = value / 255
+    if value <= 0.04045:
+        return value / 12.92
+    return ((value + 0.055) / 1.055) ** 2.4
+
+
+def linear_to_srgb(value: float) -> int:
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def sign_pow(value: float, exponent: float) -> float:
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def encode(image: Image.Image, x_components: int = 4, y_components: int = 3) -> str:
+    """
+    Calcula el BlurHash de una imagen.
+
+    Args:
+        image: Imagen de Pillow (cualquier modo)
+        x_components: Componentes horizontales (1-9)
+        y_components: Componentes verticales (1-9)
+
+    Returns:
+        str: BlurHash (p. ej. 'LEHV6nWB2yk8pyo0adR*.7kCMdnj')
+    """
+    if not (1 <= x_components <= 9 and 1 <= y_components <= 9):
+        raise ValueError('BlurHash components must be between 1 and 9')
+
+    sample = image.convert('RGB')
+    sample.thumbnail((MAX_SAMPLE_SIZE, MAX_SAMPLE_SIZE))
+    width, height = sample.size
+
+    pixels = [
+        tuple(srgb_to_linear(channel) for channel in pixel)
+        for pixel in sample.getdata()
+    ]
+
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(x_components)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(y_components)]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                basis_y = normalisation * cos_y[j][y]
+                for x in range(width):
+                    basis = basis_y * cos_x[i][x]
+                    pixel = pixels[row + x]
+                    r += basis * pixel[0]
+                    g += basis * pixel[1]
+                    b += basis * pixel[2]
+            scale = 1 / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+
+    blurhash = encode_base83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(channel) for factor in ac for channel in factor)
+        quantised_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        maximum = (quantised_max + 1) / 166
+        blurhash += encode_base83(quantised_max, 1)
+    else:
+        maximum = 1
+        blurhash += encode_base83(0, 1)
+
+    blurhash += encode_base83(
+        (linear_to_srgb(dc[0]) << 16) + (linear_to_srgb(dc[1]) << 8) + linear_to_srgb(dc[2]), 4
+    )
+
+    for factor in ac:
+        quantised = [
+            max(0, min(18, int(math.floor(sign_pow(channel / maximum, 0.5) * 9 + 9.5))))
+            for channel in factor
+        ]
+        blurhash += encode_base83(quantised[0] * 19 * 19 + quantised[1] * 19 + quantised[2], 2)
+
+    return blurhash
@@ -0,0 +1,165 @@
+"""
+Servidor local de imágenes de prueba.
+
+Responde a cualquier ruta con una imagen generada al vuelo, de modo que
+se puede ejecutar backfill_image_metadata en local (o en tests) sin
+descargar nada de Cloudinary:
+
+    python scripts/dev/image_fixture_server.py --port 8765 --latency 0.2
+    python manage.py backfill_image_metadata --origin http://127.0.0.1:8765
+
+- El tamaño sale del nombre del fichero (`jarron_1600x1200.jpg`); por
+  defecto 800×600
+- El formato sale de la extensión (jpg, png o webp)
+- Las rutas que contienen `missing` responden 404 y las que contienen
+  `broken` devuelven bytes que no son una imagen
+- `latency` simula el tiempo de respuesta de la CDN
+"""
+
+import hashlib
+import io
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image, ImageDraw
+
+
+DEFAULT_SIZE = (800, 600)
+
+SIZE_RE = re.compile(r'_(\d{1,4})x(\d{1,4})\.')
+
+FORMATS = {
+    'jpg': ('JPEG', 'image/jpeg'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'png': ('PNG', 'image/png'),
+    'webp': ('WEBP', 'image/webp'),
+}
+
+
+def render_image(path: str) -> tuple[bytes, str]:
+    """
+    Genera la imagen de una ruta (siempre la misma para la misma ruta).
+
+    Returns:
+        tuple: (contenido, content type)
+    """
+    match = SIZE_RE.search(path)
+    size = (int(match.group(1)), int(match.group(2))) if match else DEFAULT_SIZE
+
+    extension = path.rsplit('.', 1)[-1].lower() if '.' in path.rsplit('/', 1)[-1] else 'jpg'
+    image_format, content_type = FORMATS.get(extension, FORMATS['jpg'])
+
+    # Dos colores derivados de la ruta: fondo y una franja diagonal
+    digest = hashlib.md5(path.encode()).digest()
+    background, stripe = tuple(digest[0:3]), tuple(digest[3:6])
+
+    image = Image.new('RGB', size, background)
+    draw = ImageDraw.Draw(image)
+    width, height = size
+    draw.polygon([(0, height), (width // 2, 0), (width, 0), (width // 2, height)], fill=stripe)
+
+    buffer = io.BytesIO()
+    image.save(buffer, image_format)
+    return buffer.getvalue(), content_type
+
+
+class ImageFixtureHandler(BaseHTTPRequestHandler):
+    """Handler HTTP que sirve imágenes generadas."""
+
+    latency = 0.0
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        self.server.track(+1)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            self.respond(path)
+        finally:
+            self.server.track(-1)
+
+    def respond(self, path: str) -> None:
+        if 'missing' in path:
+            self.send_error(404)
+            return
+
+        if 'broken' in path:
+            content, content_type = b'not an image', 'image/jpeg'
+        else:
+            content, content_type = render_image(path)
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        """Sin log por petición."""
+
+
+class TrackingHTTPServer(ThreadingHTTPServer):
+    """Servidor que cuenta peticiones y el máximo de peticiones simultáneas."""
+
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def track(self, delta: int) -> None:
+        with self.lock:
+            self.in_flight += delta
+            if delta > 0:
+                self.requests += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+
+class ImageFixtureServer:
+    """
+    Servidor de imágenes de prueba en un hilo.
+
+    Example:
+        >>> with ImageFixtureServer(latency=0.1) as server:
+        ...     call_command('backfill_image_metadata', origin=server.origin)
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0):
+        handler = type('Handler', (ImageFixtureHandler,), {'latency': latency})
+        self.httpd = TrackingHTTPServer((host, port), handler)
+        self.thread = None
+
+    @property
+    def requests(self) -> int:
+        """Peticiones recibidas."""
+        return self.httpd.requests
+
+    @property
+    def max_in_flight(self) -> int:
+        """Máximo de peticiones atendidas a la vez."""
+        return self.httpd.max_in_flight
+
+    @property
+    def origin(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,114 @@
+"""
+Management command para calcular los metadatos de las imágenes existentes.
+
+1. Registra como pendientes las imágenes de Cloudinary de obras, productos
+   y perfiles que aún no tienen metadatos
+2. Descarga las pendientes por lotes, con como mucho `--concurrency`
+   descargas simultáneas, y guarda dimensiones, tamaño, formato, BlurHash
+   y color dominante
+
+Es idempotente: las imágenes ya calculadas se saltan.
+
+Uso:
+    python manage.py backfill_image_metadata
+    python manage.py backfill_image_metadata --concurrency 16 --retry-failed
+    # Contra el servidor de imágenes de prueba (scripts/dev/image_fixture_server.py)
+    python manage.py backfill_image_metadata --origin http://127.0.0.1:8765
+"""
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from images.metadata import IMAGE_FIELDS, MAX_ATTEMPTS, image_urls, process_images, register_images
+from images.models import ImageMetadata, ImageStatus
+
+
+class Command(BaseCommand):
+    help = 'Calcula los metadatos (dimensiones, BlurHash, color) de las imágenes de Cloudinary'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Imágenes por lote (default: 200)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Descargas simultáneas (default: 8)',
+        )
+        parser.add_argument(
+            '--origin',
+            help='Descargar de este servidor en lugar de Cloudinary (p. ej. http://127.0.0.1:8765)',
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help=f'Reintentar también las fallidas (menos de {MAX_ATTEMPTS} intentos)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        registered = self.register_existing(batch_size)
+        self.stdout.write(f'🔎 {registered} imagen(es) nueva(s) registrada(s)')
+
+        selection = Q(status=ImageStatus.PENDING)
+        if options['retry_failed']:
+            selection |= Q(status=ImageStatus.FAILED, attempts__lt=MAX_ATTEMPTS)
+        pending = ImageMetadata.objects.filter(selection)
+
+        total = pending.count()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"🖼️  Calculando metadatos de {total} imagen(es) "
+                f"({options['concurrency']} descargas simultáneas)..."
+            )
+        )
+
+        start = time.perf_counter()
+        ready = failed = 0
+        last_id = 0
+        while True:
+            batch = list(pending.filter(id__gt=last_id).order_by('id')[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            batch_ready, batch_failed = process_images(
+                batch, concurrency=options['concurrency'], origin=options['origin']
+            )
+            ready += batch_ready
+            failed += batch_failed
+            self.stdout.write(f'   {ready + failed}/{total}')
+
+        elapsed = time.perf_counter() - start
+        rate = (ready + failed) / elapsed if elapsed else 0
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ {ready} imagen(es) lista(s) en {elapsed:.1f}s ({rate:.1f} img/s)')
+        )
+        if failed:
+            self.stdout.write(
+                self.style.WARNING(f'⚠️  {failed} imagen(es) fallida(s) (ver el campo error en el admin)')
+            )
+
+    def register_existing(self, batch_size: int) -> int:
+        """Registra las imágenes de obras, productos y perfiles. Retorna las nuevas."""
+        before = ImageMetadata.objects.count()
+
+        for label, fields in IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            urls = []
+            for instance in model.objects.only('pk', *fields).iterator(chunk_size=batch_size):
+                urls.extend(image_urls(instance, fields))
+                if len(urls) >= batch_size:
+                    register_images(urls)
+                    urls = []
+            register_images(urls)
+
+        return ImageMetadata.objects.count() - before
@@ -0,0 +1,304 @@
+"""
+Cálculo y consulta de metadatos de imágenes de Cloudinary.
+
+- `public_id_from_url`: identifica la imagen a partir de su URL de entrega
+- `register_images`: registra imágenes nuevas como pendientes
+- `process_images`: descarga las pendientes (en paralelo, con un pool
+  acotado) y guarda dimensiones, tamaño, formato, BlurHash y color
+  dominante
+- `metadata_for_urls`: metadatos listos para una lista de URLs (una query)
+
+Las descargas se hacen en hilos; todas las escrituras en base de datos se
+hacen en el hilo que llama, como en payments/refunds.py.
+"""
+
+import io
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import httpx
+from django.conf import settings
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from . import blurhash
+from .models import ImageMetadata, ImageStatus
+
+
+logger = logging.getLogger(__name__)
+
+# Campos con imágenes de cada modelo (URL o lista de URLs)
+IMAGE_FIELDS = {
+    'works.Work': ('thumbnail_url', 'images'),
+    'shop.Product': ('thumbnail_url', 'images'),
+    'artisans.ArtisanProfile': ('avatar', 'cover_image'),
+}
+
+# Descargas
+FETCH_TIMEOUT = 15
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+
+# Intentos antes de dejar de reintentar una imagen fallida
+MAX_ATTEMPTS = 3
+
+CLOUDINARY_URL_RE = re.compile(
+    r'^https?://res\.cloudinary\.com/(?P<cloud>[^/]+)/image/upload/(?P<path>.+)$'
+)
+VERSION_RE = re.compile(r'^v\d+$')
+TRANSFORMATION_RE = re.compile(r'^[a-z]{1,3}_[^/]*$')
+
+# Parámetros de transformación de Cloudinary (w_800, c_fill, q_auto...)
+TRANSFORMATION_PARAMS = {
+    'a', 'ar', 'b', 'bo', 'c', 'co', 'dpr', 'e', 'f', 'fl', 'g', 'h', 'l',
+    'o', 'q', 'r', 't', 'u', 'w', 'x', 'y', 'z',
+}
+
+
+class ImageMetadataError(Exception):
+    """La imagen no se pudo descargar o no es una imagen válida."""
+
+
+def public_id_from_url(url: str) -> str | None:
+    """
+    Retorna el public_id de una URL de entrega de Cloudinary.
+
+    Solo reconoce imágenes de la cuenta configurada
+    (CLOUDINARY_CLOUD_NAME); cualquier otra URL retorna None.
+
+    Example:
+        >>> public_id_from_url(
+        ...     'https://res.cloudinary.com/mitaller/image/upload/w_800,c_fill/v17/mitaller/jarron.jpg'
+        ... )
+        'mitaller/jarron'
+    """
+    if not url or not isinstance(url, str):
+        return None
+
+    match = CLOUDINARY_URL_RE.match(url.split('?', 1)[0])
+    if not match or match.group('cloud') != settings.CLOUDINARY_CLOUD_NAME:
+        return None
+
+    segments = match.group('path').split('/')
+    versions = [index for index, segment in enumerate(segments) if VERSION_RE.match(segment)]
+    if versions:
+        # Todo lo anterior a la versión son transformaciones
+        segments = segments[versions[0] + 1:]
+    else:
+        while len(segments) > 1 and is_transformation(segments[0]):
+            segments = segments[1:]
+
+    public_id = '/'.join(segments)
+    if '.' in segments[-1]:
+        public_id = public_id.rsplit('.', 1)[0]
+    return public_id or None
+
+
+def is_transformation(segment: str) -> bool:
+    """Indica si un segmento de la URL es una transformación (w_800,c_fill)."""
+    return all(
+        TRANSFORMATION_RE.match(part) and part.split('_', 1)[0] in TRANSFORMATION_PARAMS
+        for part in segment.split(',')
+    )
+
+
+def image_urls(instance, fields) -> list[str]:
+    """
+    URLs de imagen de una instancia, en orden y sin repetir.
+
+    Args:
+        instance: Obra, producto o perfil
+        fields: Campos con una URL o una lista de URLs
+    """
+    urls = []
+    for field in fields:
+        value = getattr(instance, field, None)
+        for url in (value if isinstance(value, list) else [value]):
+            if isinstance(url, str) and url and url not in urls:
+                urls.append(url)
+    return urls
+
+
+def register_images(urls) -> list[str]:
+    """
+    Registra como pendientes las imágenes de Cloudinary aún desconocidas.
+
+    Una sola query (INSERT ... ON CONFLICT DO NOTHING); las URLs que no
+    son de Cloudinary se ignoran.
+
+    Returns:
+        list[str]: public_ids de las URLs reconocidas (nuevas o no)
+    """
+    entries = {}
+    for url in urls:
+        public_id = public_id_from_url(url)
+        if public_id:
+            entries.setdefault(public_id, url)
+
+    if entries:
+        ImageMetadata.objects.bulk_create(
+            [ImageMetadata(public_id=public_id, url=url) for public_id, url in entries.items()],
+            ignore_conflicts=True,
+            batch_size=500,
+        )
+    return list(entries)
+
+
+def metadata_for_urls(urls) -> dict:
+    """
+    Metadatos listos de una lista de URLs, con una sola query.
+
+    Returns:
+        dict: {url: {width, height, bytes, format, blurhash, dominant_color}}
+        (las imágenes pendientes, fallidas o ajenas no aparecen)
+    """
+    public_ids = {}
+    for url in urls:
+        public_id = public_id_from_url(url)
+        if public_id:
+            public_ids[url] = public_id
+
+    if not public_ids:
+        return {}
+
+    ready = {
+        metadata.public_id: metadata.as_dict()
+        for metadata in ImageMetadata.objects.filter(
+            public_id__in=set(public_ids.values()),
+            status=ImageStatus.READY,
+        )
+    }
+    return {url: ready[public_id] for url, public_id in public_ids.items() if public_id in ready}
+
+
+def dominant_color(image: Image.Image) -> str:
+    """Color más frecuente de la imagen (tras reducirla a 5 colores)."""
+    sample = image.convert('RGB')
+    sample.thumbnail((64, 64))
+    quantized = sample.quantize(colors=5, method=Image.Quantize.MEDIANCUT)
+    _, index = max(quantized.getcolors())
+    r, g, b = quantized.getpalette()[index * 3:index * 3 + 3]
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+
+def extract_metadata(content: bytes) -> dict:
+    """
+    Calcula los metadatos de una imagen descargada.
+
+    Raises:
+        ImageMetadataError: Si el contenido no es una imagen válida
+    """
+    try:
+        image = Image.open(io.BytesIO(content))
+        image_format = (image.format or '').lower()
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ImageMetadataError(f'Invalid image: {e}') from e
+
+    width, height = image.size
+    # Más componentes en el lado largo
+    x_components, y_components = (4, 3) if width >= height else (3, 4)
+
+    return {
+        'width': width,
+        'height': height,
+        'bytes': len(content),
+        'format': image_format[:10],
+        'blurhash': blurhash.encode(image, x_components, y_components),
+        'dominant_color': dominant_color(image),
+    }
+
+
+def source_url(url: str, origin: str = None) -> str:
+    """
+    URL desde la que descargar la imagen.
+
+    Con `origin` (p. ej. 'http://127.0.0.1:8765') se sustituye el
+    esquema y host de Cloudinary: útil para servidores de imágenes de
+    prueba en local.
+    """
+    if not origin:
+        return url
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    return origin.rstrip('/') + path
+
+
+def fetch_metadata(client: httpx.Client, url: str) -> dict:
+    """
+    Descarga una imagen y calcula sus metadatos.
+
+    Raises:
+        ImageMetadataError: Si la descarga falla, es demasiado grande o
+        no es una imagen
+    """
+    try:
+        with client.stream('GET', url) as response:
+            response.raise_for_status()
+            chunks = []
+            size = 0
+            for chunk in response.iter_bytes():
+                size += len(chunk)
+                if size > MAX_IMAGE_BYTES:
+                    raise ImageMetadataError(f'Image larger than {MAX_IMAGE_BYTES} bytes')
+                chunks.append(chunk)
+    except httpx.HTTPError as e:
+        raise ImageMetadataError(f'Download failed: {e}') from e
+
+    return extract_metadata(b''.join(chunks))
+
+
+def process_images(records, concurrency: int = 4, origin: str = None) -> tuple[int, int]:
+    """
+    Calcula los metadatos de varias imágenes.
+
+    Las descargas van en paralelo (como mucho `concurrency` a la vez); los
+    resultados se guardan al final con un único bulk_update.
+
+    Args:
+        records: Instancias de ImageMetadata
+        concurrency: Descargas simultáneas
+        origin: Servidor alternativo del que descargar (ver source_url)
+
+    Returns:
+        tuple: (imágenes listas, imágenes fallidas)
+    """
+    records = list(records)
+    if not records:
+        return 0, 0
+
+    def compute(record):
+        try:
+            return fetch_metadata(client, source_url(record.url, origin)), None
+        except ImageMetadataError as e:
+            return None, str(e)
+
+    with httpx.Client(timeout=FETCH_TIMEOUT, follow_redirects=True) as client:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(records)))) as executor:
+            results = list(executor.map(compute, records))
+
+    now = timezone.now()
+    ready = failed = 0
+    for record, (metadata, error) in zip(records, results):
+        record.attempts += 1
+        record.processed_at = now
+        record.updated_at = now
+        if metadata:
+            for field, value in metadata.items():
+                setattr(record, field, value)
+            record.status = ImageStatus.READY
+            record.error = ''
+            ready += 1
+        else:
+            logger.warning(f"Image metadata failed for {record.public_id}: {error}")
+            record.status = ImageStatus.FAILED
+            record.error = error
+            failed += 1
+
+    ImageMetadata.objects.bulk_update(records, [
+        'width', 'height', 'bytes', 'format', 'blurhash', 'dominant_color',
+        'status', 'error', 'attempts', 'processed_at', 'updated_at',
+    ])
+    return ready, failed
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageMetadata',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('public_id', models.CharField(help_text='Identificador de la imagen en Cloudinary (incluye carpeta)', max_length=255, unique=True, verbose_name='public_id')),
+                ('url', models.URLField(help_text='URL de la que se descarga la imagen para calcular los metadatos', max_length=500, verbose_name='URL')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('ready', 'Lista'), ('failed', 'Fallida')], db_index=True, default='pending', max_length=10, verbose_name='estado')),
+                ('width', models.PositiveIntegerField(blank=True, null=True, verbose_name='ancho')),
+                ('height', models.PositiveIntegerField(blank=True, null=True, verbose_name='alto')),
+                ('bytes', models.PositiveIntegerField(blank=True, null=True, verbose_name='tamaño (bytes)')),
+                ('format', models.CharField(blank=True, max_length=10, verbose_name='formato')),
+                ('blurhash', models.CharField(blank=True, help_text='Placeholder borroso codificado (https://blurha.sh)', max_length=64, verbose_name='BlurHash')),
+                ('dominant_color', models.CharField(blank=True, help_text='Color dominante en hexadecimal (#rrggbb)', max_length=7, verbose_name='color dominante')),
+                ('error', models.TextField(blank=True, help_text='Último error al calcular los metadatos', verbose_name='error')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='intentos')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='procesada')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='fecha de creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='última actualización')),
+            ],
+            options={
+                'verbose_name': 'Metadatos de imagen',
+                'verbose_name_plural': 'Metadatos de imágenes',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,101 @@
+"""
+Modelos para la app images.
+Metadatos precalculados de las imágenes de Cloudinary (obras, productos y
+perfiles) para que el frontend pueda reservar el espacio y mostrar un
+placeholder antes de descargar cada imagen.
+"""
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class ImageStatus(models.TextChoices):
+    """
+    Estado del cálculo de metadatos de una imagen.
+    """
+    PENDING = 'pending', _('Pendiente')
+    READY = 'ready', _('Lista')
+    FAILED = 'failed', _('Fallida')
+
+
+class ImageMetadata(models.Model):
+    """
+    Metadatos de una imagen de Cloudinary, indexados por su public_id.
+
+    Se registran como pendientes al guardar una obra, un producto o un
+    perfil con imágenes nuevas y se calculan en segundo plano
+    (images/tasks.py). El comando backfill_image_metadata calcula los
+    pendientes en bloque.
+    """
+
+    public_id = models.CharField(
+        _('public_id'),
+        max_length=255,
+        unique=True,
+        help_text=_('Identificador de la imagen en Cloudinary (incluye carpeta)')
+    )
+
+    url = models.URLField(
+        _('URL'),
+        max_length=500,
+        help_text=_('URL de la que se descarga la imagen para calcular los metadatos')
+    )
+
+    status = models.CharField(
+        _('estado'),
+        max_length=10,
+        choices=ImageStatus.choices,
+        default=ImageStatus.PENDING,
+        db_index=True
+    )
+
+    # Metadatos
+    width = models.PositiveIntegerField(_('ancho'), null=True, blank=True)
+    height = models.PositiveIntegerField(_('alto'), null=True, blank=True)
+    bytes = models.PositiveIntegerField(_('tamaño (bytes)'), null=True, blank=True)
+    format = models.CharField(_('formato'), max_length=10, blank=True)
+
+    blurhash = models.CharField(
+        _('BlurHash'),
+        max_length=64,
+        blank=True,
+        help_text=_('Placeholder borroso codificado (https://blurha.sh)')
+    )
+
+    dominant_color = models.CharField(
+        _('color dominante'),
+        max_length=7,
+        blank=True,
+        help_text=_('Color dominante en hexadecimal (#rrggbb)')
+    )
+
+    error = models.TextField(
+        _('error'),
+        blank=True,
+        help_text=_('Último error al calcular los metadatos')
+    )
+
+    attempts = models.PositiveSmallIntegerField(_('intentos'), default=0)
+
+    processed_at = models.DateTimeField(_('procesada'), null=True, blank=True)
+
+    created_at = models.DateTimeField(_('fecha de creación'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('última actualización'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('Metadatos de imagen')
+        verbose_name_plural = _('Metadatos de imágenes')
+        ordering = ['-created_at']
+
+    def __str__(self) -> str:
+        return f'{self.public_id} ({self.get_status_display()})'
+
+    def as_dict(self) -> dict:
+        """Metadatos que se incluyen en las respuestas de la API."""
+        return {
+            'width': self.width,
+            'height': self.height,
+            'bytes': self.bytes,
+            'format': self.format,
+            'blurhash': self.blurhash,
+            'dominant_color': self.dominant_color,
+        }
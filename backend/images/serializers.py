@@ -0,0 +1,102 @@
+"""
+Serializers para la app images.
+
+`ImageMetadataField` añade a una obra, producto o perfil los metadatos de
+sus imágenes (`image_meta`), indexados por URL:
+
+    "image_meta": {
+        "https://res.cloudinary.com/.../jarron.jpg": {
+            "width": 1600, "height": 1200, "bytes": 245123, "format": "jpeg",
+            "blurhash": "LEHV6nWB2yk8pyo0adR*.7kCMdnj", "dominant_color": "#a4573c"
+        }
+    }
+
+Solo aparecen las imágenes con metadatos ya calculados. En listados
+(`ImageMetadataListSerializer`) se cargan los de todas las filas con una
+sola query; también se pueden pasar ya cargados en el contexto
+(`image_metadata`, ver artisans/cache.py).
+
+`ImageSrcsetField` añade el `srcset` responsive de una imagen (ver
+images/variants.py), solo si la petición lleva `?images=responsive`.
+"""
+from django.db import models
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+
+from .metadata import image_urls, metadata_for_urls
+from .variants import srcset_for_url, wants_responsive
+
+
+class ImageMetadataField(serializers.Field):
+    """
+    Metadatos de las imágenes de la fila, por URL (solo lectura).
+    """
+    
+    def __init__(self, *sources, **kwargs):
+        """
+        Args:
+            *sources: Campos con una URL o una lista de URLs
+        """
+        self.sources = sources
+        self.preloaded = None
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+    
+    def preload(self, instances) -> None:
+        """Carga los metadatos de todas las filas de un listado."""
+        self.preloaded = metadata_for_urls(
+            url for instance in instances for url in image_urls(instance, self.sources)
+        )
+    
+    def to_representation(self, instance):
+        urls = image_urls(instance, self.sources)
+        
+        known = self.context.get('image_metadata', self.preloaded)
+        if known is None:
+            known = metadata_for_urls(urls)
+        
+        return {url: known[url] for url in urls if url in known}
+
+
+class ImageSrcsetField(serializers.Field):
+    """
+    `srcset` responsive de una URL de imagen (solo lectura).
+    
+    Sin `?images=responsive` en la petición el campo no aparece en la
+    respuesta.
+    """
+    
+    def __init__(self, source, **kwargs):
+        """
+        Args:
+            source: Campo con la URL de la imagen
+        """
+        kwargs['source'] = source
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+    
+    def get_attribute(self, instance):
+        if not wants_responsive(self.context.get('request')):
+            raise SkipField()
+        return super().get_attribute(instance)
+    
+    def to_representation(self, value):
+        return srcset_for_url(value)
+
+
+class ImageMetadataListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer que carga los metadatos de imagen de todas las filas
+    antes de serializarlas (una query por listado en vez de una por fila).
+    """
+    
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        
+        if 'image_metadata' not in self.context:
+            for field in self.child.fields.values():
+                if isinstance(field, ImageMetadataField):
+                    field.preload(items)
+        
+        return super().to_representation(items)
@@ -0,0 +1,36 @@
+"""
+Signals para la app images.
+
+Al guardar una obra, un producto o un perfil de artesano se registran sus
+imágenes de Cloudinary aún desconocidas y se calculan sus metadatos en
+segundo plano al hacer commit.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .metadata import IMAGE_FIELDS, image_urls, register_images
+from .tasks import enqueue
+
+
+@receiver(post_save, sender='works.Work')
+@receiver(post_save, sender='shop.Product')
+@receiver(post_save, sender='artisans.ArtisanProfile')
+def register_images_on_save(sender, instance, created, **kwargs):
+    """
+    Registra las imágenes del objeto guardado.
+    
+    Los guardados parciales que no tocan campos de imagen (stock,
+    contadores, display_order...) no hacen nada.
+    """
+    fields = IMAGE_FIELDS[sender._meta.label]
+    
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+    
+    public_ids = register_images(image_urls(instance, fields))
+    if public_ids:
+        transaction.on_commit(partial(enqueue, public_ids))
@@ -0,0 +1,63 @@
+"""
+Cálculo de metadatos de imágenes en segundo plano.
+
+Tras guardar una obra, un producto o un perfil con imágenes nuevas, se
+calculan sus metadatos en un hilo del propio proceso al hacer commit (no
+hay cola de tareas en el proyecto). Si el proceso se reinicia antes de
+terminar, las imágenes quedan pendientes y las recoge el comando
+backfill_image_metadata.
+
+Se desactiva con IMAGE_METADATA_ASYNC=False (p. ej. si solo se quiere
+usar el comando).
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+from .metadata import process_images
+from .models import ImageMetadata, ImageStatus
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Pool de hilos compartido del proceso (se crea al primer uso)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_METADATA_WORKERS,
+            thread_name_prefix='image-metadata',
+        )
+    return _executor
+
+
+def process_pending(public_ids) -> None:
+    """Calcula los metadatos de las imágenes pendientes indicadas."""
+    try:
+        records = ImageMetadata.objects.filter(
+            public_id__in=public_ids, status=ImageStatus.PENDING
+        )
+        process_images(records, concurrency=1)
+    except Exception:
+        logger.exception('Background image metadata processing failed')
+    finally:
+        # Conexión propia del hilo
+        connection.close()
+
+
+def enqueue(public_ids) -> None:
+    """
+    Programa el cálculo de metadatos en segundo plano.
+
+    Llamar desde transaction.on_commit: las filas pendientes tienen que
+    estar ya guardadas.
+    """
+    if not public_ids or not settings.IMAGE_METADATA_ASYNC:
+        return
+    get_executor().submit(process_pending, list(public_ids))
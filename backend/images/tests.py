@@ -0,0 +1,369 @@
+"""
+Tests para la app images (metadatos de imágenes de Cloudinary).
+"""
+import io
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts.models import User, UserRole
+from shop.models import Product
+from works.models import Work
+from . import blurhash
+from .fixture_server import ImageFixtureServer
+from .metadata import extract_metadata, metadata_for_urls, public_id_from_url
+from .models import ImageMetadata, ImageStatus
+from .tasks import enqueue
+from .variants import RESPONSIVE_WIDTHS, srcset_for_url
+
+
+CLOUD = 'https://res.cloudinary.com/mitaller/image/upload'
+
+
+def image_bytes(size, color, image_format='PNG') -> bytes:
+    """Imagen de un solo color en memoria."""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+@override_settings(CLOUDINARY_CLOUD_NAME='mitaller')
+class ImageMetadataUtilsTest(TestCase):
+    """
+    Tests de public_id, BlurHash y extracción de metadatos.
+    """
+    
+    def test_public_id_from_url(self):
+        """Test que se ignoran transformaciones, versión y extensión."""
+        self.assertEqual(public_id_from_url(f'{CLOUD}/v1712/mitaller/jarron.jpg'), 'mitaller/jarron')
+        self.assertEqual(
+            public_id_from_url(f'{CLOUD}/a_auto/c_limit,w_2000/q_auto:good/v1712/mitaller/jarron.jpg'),
+            'mitaller/jarron'
+        )
+        self.assertEqual(public_id_from_url(f'{CLOUD}/w_800,c_fill/mitaller/jarron.webp'), 'mitaller/jarron')
+        self.assertEqual(public_id_from_url(f'{CLOUD}/jarron'), 'jarron')
+    
+    def test_public_id_ignores_foreign_urls(self):
+        """Test que solo se reconocen imágenes de nuestra cuenta."""
+        self.assertIsNone(public_id_from_url('https://res.cloudinary.com/otra/image/upload/v1/a.jpg'))
+        self.assertIsNone(public_id_from_url('https://example.com/image/upload/v1/a.jpg'))
+        self.assertIsNone(public_id_from_url(''))
+        self.assertIsNone(public_id_from_url(None))
+    
+    def test_blurhash_solid_color(self):
+        """Test que el color medio (DC) de un color liso se codifica exacto."""
+        image = Image.new('RGB', (10, 10), (255, 0, 0))
+        
+        encoded = blurhash.encode(image)
+        
+        # Tamaño 4x3 ('L'), máximo AC y color medio #ff0000
+        self.assertEqual(encoded[0], 'L')
+        self.assertEqual(encoded[2:6], blurhash.encode_base83(255 << 16, 4))
+        self.assertEqual(encoded, blurhash.encode(image.copy()))
+    
+    def test_blurhash_components(self):
+        """Test que la longitud depende del número de componentes."""
+        image = Image.new('RGB', (40, 20), (10, 120, 200))
+        
+        self.assertEqual(len(blurhash.encode(image, 4, 3)), 4 + 2 + 2 * 12 - 2)
+        self.assertEqual(len(blurhash.encode(image, 1, 1)), 6)
+        with self.assertRaises(ValueError):
+            blurhash.encode(image, 10, 3)
+    
+    def test_extract_metadata(self):
+        """Test de dimensiones, formato, tamaño y color dominante."""
+        content = image_bytes((40, 30), (18, 52, 86))
+        
+        metadata = extract_metadata(content)
+        
+        self.assertEqual(metadata['width'], 40)
+        self.assertEqual(metadata['height'], 30)
+        self.assertEqual(metadata['format'], 'png')
+        self.assertEqual(metadata['bytes'], len(content))
+        self.assertEqual(metadata['dominant_color'], '#123456')
+        self.assertEqual(len(metadata['blurhash']), 28)
+
+
+@override_settings(CLOUDINARY_CLOUD_NAME='mitaller')
+class ImageRegistrationTest(TestCase):
+    """
+    Tests del registro de imágenes al guardar obras y productos.
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='artist@test.com',
+            username='artisan',
+            password='testpass123',
+            role=UserRole.ARTISAN
+        )
+    
+    def test_new_work_registers_images(self):
+        """Test que una obra nueva registra sus imágenes y las encola al commit."""
+        with patch('images.signals.enqueue') as mock_enqueue:
+            with self.captureOnCommitCallbacks(execute=True):
+                Work.objects.create(
+                    artisan=self.user,
+                    title='Jarrón',
+                    thumbnail_url=f'{CLOUD}/v1/mitaller/jarron.jpg',
+                    images=[f'{CLOUD}/v1/mitaller/detalle.jpg', 'https://example.com/otra.jpg'],
+                )
+        
+        self.assertEqual(
+            set(ImageMetadata.objects.values_list('public_id', flat=True)),
+            {'mitaller/jarron', 'mitaller/detalle'}
+        )
+        self.assertTrue(all(
+            metadata.status == ImageStatus.PENDING for metadata in ImageMetadata.objects.all()
+        ))
+        mock_enqueue.assert_called_once_with(['mitaller/jarron', 'mitaller/detalle'])
+    
+    def test_known_images_not_duplicated(self):
+        """Test que guardar de nuevo no duplica ni reinicia las imágenes."""
+        work = Work.objects.create(
+            artisan=self.user,
+            title='Jarrón',
+            thumbnail_url=f'{CLOUD}/v1/mitaller/jarron.jpg',
+        )
+        ImageMetadata.objects.update(status=ImageStatus.READY)
+        
+        work.title = 'Jarrón azul'
+        work.save()
+        
+        self.assertEqual(ImageMetadata.objects.get().status, ImageStatus.READY)
+    
+    def test_partial_save_skips_registration(self):
+        """Test que los guardados sin campos de imagen no hacen queries extra."""
+        product = Product.objects.create(
+            artisan=self.user,
+            name='Taza',
+            price='10.00',
+            stock=5,
+            thumbnail_url=f'{CLOUD}/v1/mitaller/taza.jpg',
+        )
+        product.stock = 4
+        
+        with self.assertNumQueries(1):
+            product.save(update_fields=['stock'])
+    
+    @override_settings(IMAGE_METADATA_ASYNC=False)
+    def test_enqueue_disabled(self):
+        """Test que con IMAGE_METADATA_ASYNC=False no se lanza nada."""
+        with patch('images.tasks.get_executor') as mock_executor:
+            enqueue(['mitaller/jarron'])
+        
+        mock_executor.assert_not_called()
+    
+    def test_enqueue_submits(self):
+        """Test que enqueue manda el cálculo al pool de hilos."""
+        with patch('images.tasks.get_executor') as mock_executor:
+            enqueue(['mitaller/jarron'])
+        
+        mock_executor.return_value.submit.assert_called_once()
+
+
+@override_settings(CLOUDINARY_CLOUD_NAME='mitaller')
+class ImageMetadataAPITest(APITestCase):
+    """
+    Tests de los metadatos incluidos en los listados.
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='artist@test.com',
+            username='artisan',
+            password='testpass123',
+            role=UserRole.ARTISAN
+        )
+        for i in range(5):
+            Work.objects.create(
+                artisan=self.user,
+                title=f'Obra {i}',
+                thumbnail_url=f'{CLOUD}/v1/mitaller/obra{i}.jpg',
+                images=[f'{CLOUD}/v1/mitaller/detalle{i}.jpg'],
+            )
+        # Solo las miniaturas tienen metadatos calculados
+        ImageMetadata.objects.filter(public_id__startswith='mitaller/obra').update(
+            status=ImageStatus.READY, width=1600, height=1200, blurhash='LEHV6nWB2yk8', dominant_color='#a4573c'
+        )
+    
+    def test_works_list_embeds_metadata(self):
+        """Test que el listado incluye los metadatos listos, por URL."""
+        response = self.client.get(reverse('work-list'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for work in response.data['results']:
+            self.assertEqual(list(work['image_meta']), [work['thumbnail_url']])
+            meta = work['image_meta'][work['thumbnail_url']]
+            self.assertEqual((meta['width'], meta['height']), (1600, 1200))
+            self.assertEqual(meta['dominant_color'], '#a4573c')
+    
+    def test_works_list_single_metadata_query(self):
+        """Test que los metadatos de toda la página cuestan una query."""
+        # COUNT + página + metadatos
+        with self.assertNumQueries(3):
+            self.client.get(reverse('work-list'))
+    
+    def test_storefront_embeds_metadata(self):
+        """Test que el escaparate incluye los metadatos (una query para todo)."""
+        slug = self.user.artisan_profile.slug
+        
+        response = self.client.get(f'/api/v1/artisans/{slug}/storefront/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['works']), 5)
+        self.assertTrue(all(len(work['image_meta']) == 1 for work in response.data['works']))
+        self.assertEqual(response.data['profile']['image_meta'], {})
+    
+    def test_metadata_for_urls_skips_pending(self):
+        """Test que las imágenes pendientes no aparecen."""
+        metadata = metadata_for_urls([f'{CLOUD}/v1/mitaller/obra0.jpg', f'{CLOUD}/v1/mitaller/detalle0.jpg'])
+        
+        self.assertEqual(list(metadata), [f'{CLOUD}/v1/mitaller/obra0.jpg'])
+
+
+@override_settings(CLOUDINARY_CLOUD_NAME='mitaller')
+class ImageVariantsTest(APITestCase):
+    """
+    Tests de las variantes responsive (srcset).
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='artist@test.com',
+            username='artisan',
+            password='testpass123',
+            role=UserRole.ARTISAN
+        )
+        self.profile = self.user.artisan_profile
+        self.profile.avatar = f'{CLOUD}/v9/mitaller/avatar.jpg'
+        self.profile.save()
+        Work.objects.create(
+            artisan=self.user, title='Jarrón', thumbnail_url=f'{CLOUD}/a_auto/c_limit,w_2000/v1712/mitaller/jarron.jpg'
+        )
+        Product.objects.create(
+            artisan=self.user, name='Cuenco', price='25.00', stock=3,
+            thumbnail_url=f'{CLOUD}/v1712/mitaller/cuenco.jpg'
+        )
+    
+    def test_srcset_for_url(self):
+        """Test que se generan todos los anchos sobre el public_id y su versión."""
+        srcset = srcset_for_url(f'{CLOUD}/a_auto/c_limit,w_2000/v1712/mitaller/jarron.jpg')
+        
+        candidates = srcset.split(', ')
+        self.assertEqual(len(candidates), len(RESPONSIVE_WIDTHS))
+        self.assertEqual(
+            candidates[0],
+            f'{CLOUD}/c_limit,w_{RESPONSIVE_WIDTHS[0]}/f_auto,q_auto/v1712/mitaller/jarron {RESPONSIVE_WIDTHS[0]}w'
+        )
+    
+    def test_srcset_ignores_foreign_urls(self):
+        """Test que las URLs ajenas no tienen srcset."""
+        self.assertIsNone(srcset_for_url('https://example.com/jarron.jpg'))
+        self.assertIsNone(srcset_for_url(None))
+    
+    def test_srcset_only_with_flag(self):
+        """Test que thumbnail_srcset solo aparece con ?images=responsive."""
+        slug = self.profile.slug
+        endpoints = [
+            reverse('work-list'),
+            f'/api/v1/artisans/{slug}/works/',
+            reverse('product-list'),
+            reverse('artisans-list'),
+        ]
+        
+        for url in endpoints:
+            with self.subTest(url=url):
+                plain = self.client.get(url).data['results'][0]
+                responsive = self.client.get(url, {'images': 'responsive'}).data['results'][0]
+                
+                self.assertNotIn('thumbnail_srcset', plain)
+                self.assertIn('w_320', responsive['thumbnail_srcset'])
+    
+    def test_artisan_srcset_uses_avatar(self):
+        """Test que el srcset de un artesano es el de su avatar."""
+        response = self.client.get(reverse('artisans-list'), {'images': 'responsive'})
+        
+        self.assertIn('mitaller/avatar', response.data['results'][0]['thumbnail_srcset'])
+
+
+@override_settings(CLOUDINARY_CLOUD_NAME='mitaller', IMAGE_METADATA_ASYNC=False)
+class BackfillImageMetadataCommandTest(TestCase):
+    """
+    Tests del comando backfill_image_metadata contra el servidor de
+    imágenes de prueba.
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='artist@test.com',
+            username='artisan',
+            password='testpass123',
+            role=UserRole.ARTISAN
+        )
+        # bulk_create: imágenes anteriores a la app (sin registrar)
+        Work.objects.bulk_create([
+            Work(
+                artisan=self.user,
+                title=f'Obra {i}',
+                display_order=i + 1,
+                thumbnail_url=f'{CLOUD}/v1/mitaller/obra{i}_320x240.jpg',
+                images=[f'{CLOUD}/v1/mitaller/detalle{i}_120x160.png'],
+            )
+            for i in range(10)
+        ])
+        Work.objects.bulk_create([
+            Work(artisan=self.user, title='Rota', display_order=20, thumbnail_url=f'{CLOUD}/v1/mitaller/broken.jpg'),
+            Work(artisan=self.user, title='Borrada', display_order=21, thumbnail_url=f'{CLOUD}/v1/mitaller/missing.jpg'),
+        ])
+        profile = self.user.artisan_profile
+        profile.avatar = f'{CLOUD}/v1/mitaller/avatar_64x64.webp'
+        profile.save()
+    
+    def run_backfill(self, server, **options):
+        out = io.StringIO()
+        call_command('backfill_image_metadata', origin=server.origin, stdout=out, **options)
+        return out.getvalue()
+    
+    def test_backfill_with_bounded_concurrency(self):
+        """Test que calcula todas las imágenes sin pasar de --concurrency."""
+        with ImageFixtureServer(latency=0.05) as server:
+            output = self.run_backfill(server, concurrency=3, batch_size=8)
+        
+        self.assertIn('21 imagen(es) lista(s)', output)
+        self.assertIn('2 imagen(es) fallida(s)', output)
+        self.assertEqual(server.requests, 23)
+        self.assertLessEqual(server.max_in_flight, 3)
+        self.assertGreater(server.max_in_flight, 1)
+        
+        thumbnail = ImageMetadata.objects.get(public_id='mitaller/obra0_320x240')
+        self.assertEqual((thumbnail.width, thumbnail.height, thumbnail.format), (320, 240, 'jpeg'))
+        self.assertEqual(len(thumbnail.blurhash), 28)
+        self.assertRegex(thumbnail.dominant_color, r'^#[0-9a-f]{6}$')
+        
+        avatar = ImageMetadata.objects.get(public_id='mitaller/avatar_64x64')
+        self.assertEqual((avatar.width, avatar.format), (64, 'webp'))
+        
+        broken = ImageMetadata.objects.get(public_id='mitaller/broken')
+        self.assertEqual(broken.status, ImageStatus.FAILED)
+        self.assertIn('Invalid image', broken.error)
+        self.assertEqual(ImageMetadata.objects.get(public_id='mitaller/missing').status, ImageStatus.FAILED)
+    
+    def test_backfill_is_idempotent(self):
+        """Test que una segunda ejecución solo reintenta las fallidas si se pide."""
+        with ImageFixtureServer() as server:
+            self.run_backfill(server)
+            self.run_backfill(server)
+            self.assertEqual(server.requests, 23)
+            
+            self.run_backfill(server, retry_failed=True)
+            self.assertEqual(server.requests, 25)
+        
+        self.assertEqual(
+            ImageMetadata.objects.get(public_id='mitaller/broken').attempts, 2
+        )
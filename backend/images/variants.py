@@ -0,0 +1,83 @@
+"""
+Variantes responsive de las imágenes de Cloudinary.
+
+Las imágenes se suben limitadas a 2000px (ver works/cloudinary_views.py) y
+los listados devuelven esa URL tal cual. `srcset_for_url` deriva de ella un
+`srcset` con anchos más pequeños generados por Cloudinary:
+
+    https://res.cloudinary.com/<cloud>/image/upload/c_limit,w_640/f_auto,q_auto/v1712/mitaller/jarron 640w
+
+- `c_limit`: nunca amplía imágenes más pequeñas que el ancho pedido
+- `f_auto,q_auto`: formato (WebP/AVIF) y calidad según el navegador
+
+Las URLs se calculan sin queries y se memorizan por URL en el proceso.
+"""
+
+from functools import lru_cache
+
+from django.conf import settings
+
+from .metadata import CLOUDINARY_URL_RE, VERSION_RE, public_id_from_url
+
+
+# Anchos del srcset (px)
+RESPONSIVE_WIDTHS = (320, 640, 960, 1280)
+
+# Valor del parámetro ?images= que activa los campos *_srcset
+RESPONSIVE_FLAG = 'responsive'
+
+# URLs distintas memorizadas por proceso
+SRCSET_CACHE_SIZE = 4096
+
+
+def variant_url(public_id: str, width: int, version: str = None) -> str:
+    """
+    URL de entrega de una imagen limitada a `width` px de ancho.
+
+    Args:
+        public_id: public_id de la imagen en Cloudinary
+        width: Ancho máximo
+        version: Segmento de versión ('v1712'), para no servir copias viejas
+        de la CDN si la imagen se reemplaza
+    """
+    path = f'{version}/{public_id}' if version else public_id
+    return (
+        f'https://res.cloudinary.com/{settings.CLOUDINARY_CLOUD_NAME}/image/upload/'
+        f'c_limit,w_{width}/f_auto,q_auto/{path}'
+    )
+
+
+def srcset_for_url(url: str) -> str | None:
+    """
+    `srcset` responsive de una URL de Cloudinary.
+
+    Returns:
+        str | None: 'url 320w, url 640w, ...' o None si la URL no es de
+        nuestra cuenta de Cloudinary
+    """
+    if not url or not isinstance(url, str):
+        return None
+    return _srcset(settings.CLOUDINARY_CLOUD_NAME, url)
+
+
+@lru_cache(maxsize=SRCSET_CACHE_SIZE)
+def _srcset(cloud_name: str, url: str) -> str | None:
+    # cloud_name forma parte de la clave: public_id_from_url depende de él
+    public_id = public_id_from_url(url)
+    if not public_id:
+        return None
+
+    path = CLOUDINARY_URL_RE.match(url.split('?', 1)[0]).group('path')
+    version = next((segment for segment in path.split('/') if VERSION_RE.match(segment)), None)
+
+    return ', '.join(
+        f'{variant_url(public_id, width, version)} {width}w'
+        for width in RESPONSIVE_WIDTHS
+    )
+
+
+def wants_responsive(request) -> bool:
+    """Indica si la petición pide las variantes (?images=responsive)."""
+    if request is None:
+        return False
+    return request.query_params.get('images') == RESPONSIVE_FLAG
@@ -23,11 +23,12 @@ class OrderItemInline(admin.TabularInline):
         'product_name',
         'product_price',
         'quantity',
+        'refunded_quantity',
         'subtotal',
         'formatted_subtotal',
         'artisan'
     ]
-    readonly_fields = ['formatted_subtotal', 'subtotal']
+    readonly_fields = ['formatted_subtotal', 'subtotal', 'refunded_quantity']
     extra = 0  # No mostrar filas vacías adicionales
     can_delete = False  # No permitir borrar items desde el admin por integridad
     
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_update_artisan_to_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='refunded_quantity',
+            field=models.PositiveIntegerField(default=0, help_text='Unidades reembolsadas (stock ya restaurado)'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='payment_status',
+            field=models.CharField(choices=[('pending', 'Pendiente'), ('processing', 'Procesando'), ('succeeded', 'Exitoso'), ('failed', 'Fallido'), ('refunded', 'Reembolsado'), ('partially_refunded', 'Reembolsado parcialmente'), ('disputed', 'En disputa'), ('cancelled', 'Cancelado')], default='pending', help_text='Estado del pago', max_length=20),
+        ),
+    ]
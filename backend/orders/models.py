@@ -219,6 +219,10 @@ class OrderItem(models.Model):
         decimal_places=2,
         help_text='Subtotal = precio x cantidad (calculado automáticamente)'
     )
+    refunded_quantity = models.PositiveIntegerField(
+        default=0,
+        help_text='Unidades reembolsadas (stock ya restaurado)'
+    )
     
     # Timestamp
     created_at = models.DateTimeField(
@@ -251,4 +255,9 @@ class OrderItem(models.Model):
     def formatted_subtotal(self) -> str:
         """Retorna el subtotal formateado para display."""
         return f'{self.subtotal} EUR'
+    
+    @property
+    def refundable_quantity(self) -> int:
+        """Unidades que aún se pueden reembolsar."""
+        return self.quantity - self.refunded_quantity
 
@@ -23,12 +23,16 @@ def restore_stock_on_item_delete(sender, instance: OrderItem, **kwargs) -> None:
         instance: OrderItem eliminado
         **kwargs: Argumentos adicionales del signal
     """
-    # Restaurar stock al producto
+    # Restaurar stock al producto (las unidades reembolsadas ya se restauraron)
+    quantity = instance.refundable_quantity
+    if not quantity:
+        return
+    
     product = instance.product
-    product.stock += instance.quantity
+    product.stock += quantity
     product.save(update_fields=['stock'])
     
-    print(f'✓ Stock restaurado: {instance.quantity}x {product.name} '
+    print(f'✓ Stock restaurado: {quantity}x {product.name} '
           f'(nuevo stock: {product.stock})')
 
 
@@ -69,14 +73,17 @@ def handle_order_cancellation(sender, instance: Order, created: bool, **kwargs)
         hasattr(instance, '_previous_status') and
         instance._previous_status != OrderStatus.CANCELLED):
         
-        # Restaurar stock de todos los items
+        # Restaurar stock de todos los items (salvo unidades ya reembolsadas)
         for item in instance.items.all():
+            if not item.refundable_quantity:
+                continue
+            
             product = item.product
-            product.stock += item.quantity
+            product.stock += item.refundable_quantity
             product.save(update_fields=['stock'])
             
             print(f'✓ Pedido {instance.order_number} cancelado: '
-                  f'stock restaurado {item.quantity}x {product.name}')
+                  f'stock restaurado {item.refundable_quantity}x {product.name}')
 
 
 # Alternativa: Si quieres más control sobre la cancelación
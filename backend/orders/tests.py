@@ -18,6 +18,7 @@ from decimal import Decimal
 
 from accounts.models import UserRole
 from artisans.models import ArtisanProfile, CraftType, MenorcaLocation
+from config.metrics import BudgetTestMixin
 from shop.models import Product, ProductCategory
 from .models import Order, OrderItem, OrderStatus
 
@@ -396,7 +397,7 @@ class OrderValidationTests(TestCase):
         self.assertIn('al menos un producto', str(response.data))
 
 
-class OrderQueryTests(TestCase):
+class OrderQueryTests(BudgetTestMixin, TestCase):
     """Tests para queries y filtrado de pedidos según rol."""
     
     def setUp(self):
@@ -513,6 +514,33 @@ class OrderQueryTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 2)
     
+    def test_read_within_budget(self):
+        """Listado y detalle dentro del presupuesto, sin una query por línea."""
+        for i in range(10):
+            order = Order.objects.create(
+                customer_email=f'comprador{i}@test.com',
+                customer_name='Comprador',
+                shipping_address='Test',
+                shipping_city='Maó',
+                shipping_postal_code='07701',
+                total_amount=Decimal('80.00')
+            )
+            for product, artisan in ((self.product1, self.artist1_user), (self.product2, self.artist2_user)):
+                OrderItem.objects.create(
+                    order=order,
+                    product=product,
+                    artisan=artisan,
+                    product_name=product.name,
+                    product_price=product.price,
+                    quantity=1
+                )
+        
+        for user in (self.admin_user, self.artist1_user):
+            with self.subTest(user=user.username):
+                self.client.force_authenticate(user=User.objects.get(pk=user.pk))
+                self.assertWithinBudget(self.client.get('/api/v1/orders/'))
+                self.assertWithinBudget(self.client.get(f'/api/v1/orders/{order.id}/'))
+    
     def test_unauthenticated_cannot_list_orders(self):
         """Usuarios no autenticados no pueden listar pedidos."""
         response = self.client.get('/api/v1/orders/')
@@ -16,6 +16,7 @@ from rest_framework import filters
 from django.db.models import QuerySet, Prefetch
 from typing import Type
 
+from config.metrics import Budget
 from .models import Order, OrderItem
 from .serializers import (
     OrderSerializer,
@@ -62,6 +63,13 @@ class OrderViewSet(viewsets.ModelViewSet):
     search_fields = ['order_number', 'customer_name', 'customer_email']
     ordering_fields = ['created_at', 'total_amount', 'status']
     ordering = ['-created_at']
+
+    # Presupuesto por acción (config/metrics.py): los prefetch de las líneas
+    # no dependen del número de pedidos
+    performance_budgets = {
+        'list': Budget(queries=8, ms=400),
+        'retrieve': Budget(queries=6, ms=200),
+    }
     
     def get_permissions(self) -> list:
         """
@@ -3,7 +3,17 @@ Configuración del admin para la app Payments.
 """
 
 from django.contrib import admin
-from .models import Payment
+from .models import (
+    Payment,
+    Refund,
+    PaymentDispute,
+    ReconciliationRun,
+    PaymentDiscrepancy,
+    EarningsEntry,
+    ArtisanMonthlyBalance,
+    FeeRule,
+)
+from .refunds import refund_payments
 
 
 @admin.register(Payment)
@@ -54,6 +64,7 @@ class PaymentAdmin(admin.ModelAdmin):
         'amount',
         'marketplace_fee',
         'artisan_amount',
+        'refunded_amount',
         'formatted_amount',
         'formatted_marketplace_fee',
         'formatted_artisan_amount',
@@ -83,6 +94,7 @@ class PaymentAdmin(admin.ModelAdmin):
                     'amount',
                     'marketplace_fee',
                     'artisan_amount',
+                    'refunded_amount',
                     'formatted_amount',
                     'formatted_marketplace_fee',
                     'formatted_artisan_amount',
@@ -136,4 +148,325 @@ class PaymentAdmin(admin.ModelAdmin):
         Preservar registro histórico para auditoría.
         """
         return False
+    
+    # Acciones personalizadas
+    actions = ['refund_selected_payments']
+    
+    @admin.action(description='💸 Reembolsar pagos seleccionados')
+    def refund_selected_payments(self, request, queryset):
+        """
+        Reembolsa por completo los pagos seleccionados.
+        
+        Las llamadas a Stripe se hacen en paralelo; pago, pedido y stock se
+        actualizan en una transacción por pago. Los pagos no reembolsables
+        (pendientes, fallidos, ya reembolsados) se ignoran.
+        """
+        payments = queryset.select_related('order')
+        refunds, failed = refund_payments(payments, requested_by=request.user)
+        
+        self.message_user(
+            request,
+            f'{len(refunds)} pago(s) reembolsado(s).',
+            level='success'
+        )
+        
+        for payment, error in failed:
+            self.message_user(
+                request,
+                f'Error al reembolsar el pedido {payment.order.order_number}: {error}',
+                level='error'
+            )
+
+
+class PaymentDiscrepancyInline(admin.TabularInline):
+    """
+    Discrepancias de una conciliación (solo lectura).
+    """
+    model = PaymentDiscrepancy
+    extra = 0
+    can_delete = False
+    fields = [
+        'discrepancy_type',
+        'payment',
+        'stripe_payment_intent_id',
+        'stripe_charge_id',
+        'expected_value',
+        'actual_value',
+    ]
+    readonly_fields = fields
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ReconciliationRun)
+class ReconciliationRunAdmin(admin.ModelAdmin):
+    """
+    Admin para revisar las ejecuciones de `manage.py reconcile_payments`.
+    
+    Todo es readonly: las ejecuciones solo se crean desde el comando.
+    """
+    
+    list_display = [
+        'id',
+        'window_start',
+        'window_end',
+        'status',
+        'transactions_scanned',
+        'payments_matched',
+        'discrepancies_found',
+        'started_at',
+        'finished_at',
+    ]
+    
+    list_filter = ['status', 'started_at']
+    
+    readonly_fields = [
+        'window_start',
+        'window_end',
+        'status',
+        'transactions_scanned',
+        'payments_matched',
+        'discrepancies_found',
+        'error_message',
+        'started_at',
+        'finished_at',
+    ]
+    
+    inlines = [PaymentDiscrepancyInline]
+    
+    def has_add_permission(self, request):
+        """Las conciliaciones se crean solo desde el comando."""
+        return False
+
+
+@admin.register(PaymentDiscrepancy)
+class PaymentDiscrepancyAdmin(admin.ModelAdmin):
+    """
+    Admin para filtrar discrepancias de conciliación por tipo y ejecución.
+    """
+    
+    list_display = [
+        'id',
+        'run',
+        'discrepancy_type',
+        'payment',
+        'stripe_payment_intent_id',
+        'expected_value',
+        'actual_value',
+        'created_at',
+    ]
+    
+    list_filter = ['discrepancy_type', 'run']
+    
+    search_fields = [
+        'stripe_payment_intent_id',
+        'stripe_charge_id',
+    ]
+    
+    readonly_fields = [
+        'run',
+        'payment',
+        'discrepancy_type',
+        'stripe_payment_intent_id',
+        'stripe_charge_id',
+        'expected_value',
+        'actual_value',
+        'created_at',
+    ]
+    
+    def has_add_permission(self, request):
+        """Las discrepancias se crean solo desde el comando."""
+        return False
+
+
+@admin.register(EarningsEntry)
+class EarningsEntryAdmin(admin.ModelAdmin):
+    """
+    Admin del libro de ganancias.
+    
+    El libro es append-only: no se permite crear, editar ni borrar
+    movimientos desde el admin.
+    """
+    
+    list_display = [
+        'id',
+        'artisan',
+        'kind',
+        'amount',
+        'payment',
+        'stripe_object_id',
+        'month',
+        'created_at',
+    ]
+    
+    list_filter = ['kind', 'month']
+    
+    search_fields = [
+        'artisan__email',
+        'artisan__username',
+        'stripe_object_id',
+    ]
+    
+    list_select_related = ['artisan', 'payment__order']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
 
+
+@admin.register(ArtisanMonthlyBalance)
+class ArtisanMonthlyBalanceAdmin(admin.ModelAdmin):
+    """
+    Admin de los saldos mensuales (solo lectura, los mantiene payments.ledger).
+    """
+    
+    list_display = [
+        'artisan',
+        'month',
+        'gross_amount',
+        'fees_amount',
+        'refunded_amount',
+        'transferred_amount',
+        'payments_count',
+    ]
+    
+    list_filter = ['month']
+    
+    search_fields = ['artisan__email', 'artisan__username']
+    
+    list_select_related = ['artisan']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Refund)
+class RefundAdmin(admin.ModelAdmin):
+    """
+    Admin de reembolsos (solo lectura).
+    
+    Se crean desde la acción de reembolso de pagos o desde el webhook
+    `charge.refunded` de Stripe.
+    """
+    
+    list_display = [
+        'stripe_refund_id',
+        'payment',
+        'amount',
+        'status',
+        'reason',
+        'requested_by',
+        'created_at',
+        'applied_at',
+    ]
+    
+    list_filter = ['status', 'created_at']
+    
+    search_fields = [
+        'stripe_refund_id',
+        'payment__order__order_number',
+        'payment__stripe_payment_intent_id',
+    ]
+    
+    list_select_related = ['payment__order', 'requested_by']
+    
+    readonly_fields = [
+        'payment',
+        'stripe_refund_id',
+        'amount',
+        'status',
+        'items',
+        'reason',
+        'requested_by',
+        'created_at',
+        'applied_at',
+    ]
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PaymentDispute)
+class PaymentDisputeAdmin(admin.ModelAdmin):
+    """
+    Admin de disputas (solo lectura, las gestiona el webhook de Stripe).
+    """
+    
+    list_display = [
+        'stripe_dispute_id',
+        'payment',
+        'amount',
+        'reason',
+        'status',
+        'created_at',
+        'closed_at',
+    ]
+    
+    list_filter = ['status', 'reason']
+    
+    search_fields = [
+        'stripe_dispute_id',
+        'payment__order__order_number',
+    ]
+    
+    list_select_related = ['payment__order']
+    
+    readonly_fields = [
+        'payment',
+        'stripe_dispute_id',
+        'amount',
+        'reason',
+        'status',
+        'previous_payment_status',
+        'created_at',
+        'closed_at',
+    ]
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(FeeRule)
+class FeeRuleAdmin(admin.ModelAdmin):
+    """
+    Admin del baremo de comisiones.
+    
+    Los cambios invalidan la tabla en memoria de todos los procesos. Para
+    aplicarlos a pagos ya creados: `python manage.py recompute_fees`.
+    """
+    
+    list_display = [
+        '__str__',
+        'artisan',
+        'category',
+        'min_amount',
+        'percent',
+        'is_active',
+        'updated_at',
+    ]
+    
+    list_filter = ['is_active', 'category']
+    
+    list_editable = ['percent', 'is_active']
+    
+    search_fields = ['artisan__email', 'artisan__username']
+    
+    list_select_related = ['artisan']
+    
+    autocomplete_fields = ['artisan']
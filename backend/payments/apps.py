@@ -17,6 +17,14 @@ class PaymentsConfig(AppConfig):
     def ready(self) -> None:
         """
         Importa los signals cuando la app está lista.
+        Si STRIPE_API_BASE está definido, apunta el cliente de Stripe
+        a esa URL (ej: stripe-mock en desarrollo).
         """
         import payments.signals  # noqa: F401
 
+        import stripe
+        from django.conf import settings
+
+        if settings.STRIPE_API_BASE:
+            stripe.api_base = settings.STRIPE_API_BASE
+
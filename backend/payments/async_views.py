@@ -0,0 +1,279 @@
+"""
+Versiones async (ASGI) de los endpoints de pagos que llaman a Stripe.
+
+Las vistas síncronas (payments.views) bloquean un worker durante toda la
+llamada a Stripe. Estas vistas usan los métodos `*_async` de la librería
+de Stripe, que hacen las peticiones con httpx (cliente HTTP async), así
+que un solo proceso ASGI atiende muchas peticiones mientras espera a Stripe.
+
+Solo tiene sentido servirlas bajo un servidor ASGI (ver
+config/gunicorn_asgi.py); bajo WSGI Django las ejecuta en un event loop
+por petición y no hay ganancia.
+
+DRF no soporta vistas async, así que son vistas de Django que:
+- Autentican con el mismo JWT que la API (CachedJWTAuthentication)
+- Reutilizan la validación y los parámetros de las vistas síncronas
+- Responden con el mismo formato JSON
+
+Endpoints:
+- POST /api/v1/payments/async/stripe-connect/start-onboarding/
+- POST /api/v1/payments/async/stripe-connect/refresh-onboarding/
+- GET  /api/v1/payments/async/stripe-connect/account-status/
+- POST /api/v1/payments/async/payments/create-checkout-session/
+"""
+
+import json
+import logging
+from functools import wraps
+
+import stripe
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import APIException, ValidationError
+
+from accounts.authentication import CachedJWTAuthentication
+from artisans.models import ArtisanProfile
+from .serializers import CheckoutSessionSerializer
+from .stripe_connect import (
+    express_account_params,
+    onboarding_link_params,
+    apply_account_status,
+)
+
+
+# Configurar API key de Stripe
+stripe.api_key = settings.STRIPE_SECRET_KEY
+
+logger = logging.getLogger(__name__)
+
+
+def request_data(request) -> dict:
+    """
+    Lee el body como JSON o formulario (igual que los parsers de DRF).
+    """
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return {}
+    return request.POST
+
+
+async def authenticate(request):
+    """
+    Autentica la petición con el JWT del header Authorization.
+
+    Returns:
+        User | None: Usuario autenticado o None si no hay token
+
+    Raises:
+        APIException: Si el token no es válido
+    """
+    result = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+    return result[0] if result else None
+
+
+def artisan_required(view):
+    """
+    Decorador para vistas async de artesanos.
+
+    Equivale a permission_classes = [IsAuthenticated, IsArtist] y pasa
+    a la vista el usuario y su ArtisanProfile.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            user = await authenticate(request)
+        except APIException as e:
+            detail = e.detail if isinstance(e.detail, dict) else {'detail': e.detail}
+            return JsonResponse(detail, status=e.status_code)
+
+        if user is None:
+            return JsonResponse(
+                {'detail': 'Las credenciales de autenticación no se proveyeron.'},
+                status=401
+            )
+
+        try:
+            artisan = await ArtisanProfile.objects.aget(user=user)
+        except ArtisanProfile.DoesNotExist:
+            return JsonResponse(
+                {'detail': 'Usted no tiene permiso para realizar esta acción.'},
+                status=403
+            )
+
+        return await view(request, user, artisan, *args, **kwargs)
+
+    return wrapper
+
+
+@csrf_exempt
+@require_POST
+@artisan_required
+async def start_onboarding(request, user, artisan):
+    """
+    Inicia el proceso de onboarding de Stripe Connect (async).
+
+    Mismo contrato que StripeConnectViewSet.onboarding.
+    """
+    # Verificar si ya completó onboarding
+    if artisan.stripe_onboarding_completed and artisan.can_receive_payments:
+        return JsonResponse(
+            {'error': 'Ya has completado el proceso de verificación en Stripe.'},
+            status=400
+        )
+
+    data = request_data(request)
+    refresh_url = data.get('refresh_url')
+    success_url = data.get('success_url')
+
+    if not refresh_url or not success_url:
+        return JsonResponse(
+            {'error': 'Se requieren refresh_url y success_url.'},
+            status=400
+        )
+
+    try:
+        # Crear cuenta Express si no existe
+        if not artisan.stripe_account_id:
+            account = await stripe.Account.create_async(**express_account_params(user.email))
+
+            artisan.stripe_account_id = account.id
+            await artisan.asave()
+
+            logger.info(f"Created Stripe account {account.id} for artisan {artisan.id}")
+
+        # Crear AccountLink para onboarding
+        account_link = await stripe.AccountLink.create_async(
+            **onboarding_link_params(artisan.stripe_account_id, refresh_url, success_url)
+        )
+
+        # Guardar URL de onboarding (temporal, expira en pocas horas)
+        artisan.stripe_onboarding_url = account_link.url
+        await artisan.asave()
+
+        logger.info(f"Created onboarding link for artisan {artisan.id}")
+
+        return JsonResponse({'onboarding_url': account_link.url})
+
+    except stripe.StripeError as e:
+        logger.error(f"Stripe error during onboarding: {str(e)}")
+        return JsonResponse(
+            {'error': f'Error al crear cuenta en Stripe: {str(e)}'},
+            status=500
+        )
+
+
+@csrf_exempt
+@require_POST
+@artisan_required
+async def refresh_onboarding(request, user, artisan):
+    """
+    Refresca el link de onboarding si expiró (async).
+
+    Mismo contrato que StripeConnectViewSet.refresh_onboarding.
+    """
+    if not artisan.stripe_account_id:
+        return JsonResponse(
+            {'error': 'No tienes una cuenta de Stripe. Inicia el proceso primero.'},
+            status=400
+        )
+
+    data = request_data(request)
+    refresh_url = data.get('refresh_url')
+    return_url = data.get('return_url')
+
+    if not refresh_url or not return_url:
+        return JsonResponse(
+            {'error': 'Se requieren refresh_url y return_url.'},
+            status=400
+        )
+
+    try:
+        account_link = await stripe.AccountLink.create_async(
+            **onboarding_link_params(artisan.stripe_account_id, refresh_url, return_url)
+        )
+
+        artisan.stripe_onboarding_url = account_link.url
+        await artisan.asave()
+
+        logger.info(f"Refreshed onboarding link for artisan {artisan.id}")
+
+        return JsonResponse({'onboarding_url': account_link.url})
+
+    except stripe.StripeError as e:
+        logger.error(f"Stripe error refreshing onboarding: {str(e)}")
+        return JsonResponse(
+            {'error': f'Error al refrescar link: {str(e)}'},
+            status=500
+        )
+
+
+@require_GET
+@artisan_required
+async def account_status(request, user, artisan):
+    """
+    Verifica el estado de la cuenta Stripe del artesano (async).
+
+    Mismo contrato que StripeConnectViewSet.account_status.
+    """
+    if not artisan.stripe_account_id:
+        return JsonResponse({
+            'status': 'pending',
+            'charges_enabled': False,
+            'payouts_enabled': False,
+            'details_submitted': False,
+        })
+
+    try:
+        account = await stripe.Account.retrieve_async(artisan.stripe_account_id)
+
+        response = apply_account_status(artisan, account)
+        await artisan.asave()
+
+        logger.info(f"Updated account status for artisan {artisan.id}")
+
+        return JsonResponse(response)
+
+    except stripe.StripeError as e:
+        logger.error(f"Stripe error checking account status: {str(e)}")
+        return JsonResponse(
+            {'error': f'Error al verificar estado: {str(e)}'},
+            status=500
+        )
+
+
+@csrf_exempt
+@require_POST
+async def create_checkout_session(request):
+    """
+    Crea una sesión de checkout para un pedido (async, público).
+
+    Mismo contrato que PaymentViewSet.create_checkout_session: la
+    validación y el Payment se hacen con CheckoutSessionSerializer y solo
+    la llamada a Stripe es async.
+    """
+    serializer = CheckoutSessionSerializer(data=request_data(request))
+
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=400)
+
+    payment = await sync_to_async(serializer.create_payment)()
+    params = await sync_to_async(serializer.payment_intent_params)(payment)
+
+    try:
+        payment_intent = await stripe.PaymentIntent.create_async(**params)
+    except stripe.StripeError as e:
+        try:
+            await sync_to_async(serializer.mark_failed)(payment, e)
+        except ValidationError as error:
+            return JsonResponse(error.detail, status=400, safe=False)
+
+    result = await sync_to_async(serializer.complete)(payment, payment_intent)
+
+    logger.info(f"Created checkout session for order {payment.order_id}")
+
+    return JsonResponse(result, status=201)
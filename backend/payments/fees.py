@@ -0,0 +1,267 @@
+"""
+Motor de comisiones del marketplace.
+
+Las reglas (FeeRule) se cargan una vez en una tabla en memoria
+(FeeSchedule) y se reutilizan en cada cálculo. La tabla se invalida por
+versión: al guardar o borrar una regla se publica una versión nueva en la
+cache, y cada proceso reconstruye su tabla cuando ve que la versión ha
+cambiado.
+
+Sin CACHES configurado la cache es por proceso (LocMemCache), así que la
+versión nueva solo la ve el proceso que editó la regla. Por eso, además,
+cada proceso comprueba cada FEE_SCHEDULE_MAX_AGE segundos la huella de
+las reglas (número de reglas y último updated_at, una query agregada) y
+recarga si cambió: con una cache compartida el cambio se ve al momento,
+y sin ella como mucho FEE_SCHEDULE_MAX_AGE segundos después.
+
+Todos los cálculos se hacen en céntimos enteros con redondeo bancario
+(ROUND_HALF_EVEN), línea a línea del pedido.
+"""
+
+import threading
+import time
+import uuid
+from decimal import Decimal, ROUND_HALF_EVEN
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+
+from orders.models import OrderItem
+from .models import FeeRule, Payment
+from .money import to_cents, from_cents
+
+
+FEE_SCHEDULE_VERSION_KEY = 'payments:fee_schedule_version'
+
+_schedule = None
+_schedule_version = None
+_schedule_checked_at = 0.0
+_schedule_lock = threading.Lock()
+
+
+def fee_cents(amount_cents: int, percent: Decimal) -> int:
+    """
+    Calcula la comisión de un importe en céntimos (redondeo bancario).
+
+    Example:
+        >>> fee_cents(25, Decimal('10'))   # 2.5 céntimos
+        2
+        >>> fee_cents(35, Decimal('10'))   # 3.5 céntimos
+        4
+    """
+    return int((Decimal(amount_cents) * percent / 100).quantize(Decimal('1'), rounding=ROUND_HALF_EVEN))
+
+
+class FeeSchedule:
+    """
+    Tabla de comisiones en memoria.
+
+    Indexa las reglas activas por ámbito (artisan_id, category) con sus
+    tramos ordenados de mayor a menor importe mínimo.
+    """
+
+    def __init__(self, rules, default_percent: Decimal, fingerprint: tuple = None):
+        """
+        Args:
+            rules: Iterable de tuplas (artisan_id, category, min_amount, percent)
+            default_percent: Porcentaje si ninguna regla aplica
+            fingerprint: Huella de las reglas con las que se construyó (ver rules_fingerprint)
+        """
+        self.default_percent = default_percent
+        self.fingerprint = fingerprint
+        self._tiers = {}
+
+        for artisan_id, category, min_amount, percent in rules:
+            self._tiers.setdefault((artisan_id, category or ''), []).append(
+                (to_cents(min_amount), percent)
+            )
+
+        for tiers in self._tiers.values():
+            tiers.sort(reverse=True)
+
+    def percent_for(self, artisan_id: int | None, category: str, amount_cents: int) -> Decimal:
+        """
+        Retorna el porcentaje de comisión de una línea.
+
+        Busca del ámbito más específico al más general y, dentro de cada
+        uno, el tramo de mayor importe mínimo que no supere la línea.
+        """
+        for key in (
+            (artisan_id, category),
+            (artisan_id, ''),
+            (None, category),
+            (None, ''),
+        ):
+            for min_cents, percent in self._tiers.get(key, ()):
+                if amount_cents >= min_cents:
+                    return percent
+
+        return self.default_percent
+
+    def payment_fee_cents(
+        self,
+        artisan_id: int | None,
+        total_cents: int,
+        lines: list[tuple[int, str]],
+    ) -> int:
+        """
+        Calcula la comisión de un pago sumando la de cada línea.
+
+        Args:
+            artisan_id: ID del artesano (User)
+            total_cents: Importe total del pago en céntimos
+            lines: Tuplas (importe de la línea en céntimos, categoría)
+
+        Lo que el total tenga por encima de las líneas (p. ej. envío)
+        usa la comisión general del artesano.
+        """
+        fee = 0
+        lines_cents = 0
+        for amount_cents, category in lines:
+            fee += fee_cents(amount_cents, self.percent_for(artisan_id, category, amount_cents))
+            lines_cents += amount_cents
+
+        remainder = total_cents - lines_cents
+        if remainder > 0:
+            fee += fee_cents(remainder, self.percent_for(artisan_id, '', remainder))
+
+        return min(fee, total_cents)
+
+
+def rules_fingerprint() -> tuple:
+    """
+    Número de reglas y última modificación: cambia al crear, editar o
+    borrar una regla (una query agregada).
+    """
+    fingerprint = FeeRule.objects.aggregate(count=Count('id'), last=Max('updated_at'))
+    return fingerprint['count'], fingerprint['last']
+
+
+def load_fee_schedule() -> FeeSchedule:
+    """
+    Construye la tabla a partir de las reglas activas, con la huella de
+    todas (una query).
+    """
+    rows = list(FeeRule.objects.order_by().values_list(
+        'artisan_id', 'category', 'min_amount', 'percent', 'is_active', 'updated_at'
+    ))
+    return FeeSchedule(
+        [row[:4] for row in rows if row[4]],
+        settings.MARKETPLACE_FEE_PERCENT,
+        fingerprint=(len(rows), max((row[5] for row in rows), default=None)),
+    )
+
+
+def get_fee_schedule() -> FeeSchedule:
+    """
+    Retorna la tabla de comisiones del proceso, recargándola si cambió la versión.
+
+    La versión es un token aleatorio: si la cache se vacía, cada proceso
+    ve un token distinto al suyo y recarga, en lugar de seguir con una
+    tabla antigua.
+
+    Pasados FEE_SCHEDULE_MAX_AGE segundos se compara además la huella de
+    las reglas, por si otro proceso las cambió sin que esta cache se
+    enterase (ver docstring del módulo).
+    """
+    global _schedule, _schedule_version, _schedule_checked_at
+
+    version = cache.get(FEE_SCHEDULE_VERSION_KEY)
+    if version is None:
+        version = cache.get_or_set(FEE_SCHEDULE_VERSION_KEY, uuid.uuid4().hex, None)
+
+    if _schedule is not None and version == _schedule_version:
+        if time.monotonic() - _schedule_checked_at < settings.FEE_SCHEDULE_MAX_AGE:
+            return _schedule
+        if rules_fingerprint() == _schedule.fingerprint:
+            _schedule_checked_at = time.monotonic()
+            return _schedule
+
+    with _schedule_lock:
+        _schedule = load_fee_schedule()
+        _schedule_version = version
+        _schedule_checked_at = time.monotonic()
+
+    return _schedule
+
+
+def invalidate_fee_schedule() -> None:
+    """
+    Publica una versión nueva de la tabla de comisiones.
+
+    Se invalida ya (para el proceso actual) y otra vez al hacer commit,
+    para que otros procesos no recarguen antes de que la regla sea visible.
+    """
+    cache.set(FEE_SCHEDULE_VERSION_KEY, uuid.uuid4().hex, None)
+    transaction.on_commit(
+        lambda: cache.set(FEE_SCHEDULE_VERSION_KEY, uuid.uuid4().hex, None)
+    )
+
+
+def payment_lines(order_id: int) -> list[tuple[int, str]]:
+    """
+    Retorna las líneas de un pedido como (importe en céntimos, categoría).
+    """
+    return [
+        (to_cents(price * quantity), category)
+        for price, quantity, category in OrderItem.objects.filter(
+            order_id=order_id
+        ).order_by().values_list('product_price', 'quantity', 'product__category')
+    ]
+
+
+def recompute_fees(payments, batch_size: int = 1000, dry_run: bool = False):
+    """
+    Recalcula las comisiones de muchos pagos con la tabla actual.
+
+    Procesa los pagos por lotes: por cada lote una query para los pagos,
+    otra para todas sus líneas y un bulk_update con los que cambian.
+
+    Args:
+        payments: QuerySet de Payment
+        batch_size: Pagos por lote
+        dry_run: Si True solo calcula, no guarda
+
+    Yields:
+        tuple: (pagos del lote, pagos que cambian, diferencia de comisión en céntimos)
+    """
+    schedule = get_fee_schedule()
+    rows = payments.order_by('id').values_list('id', 'order_id', 'artisan_id', 'amount', 'marketplace_fee')
+
+    last_id = 0
+    while True:
+        batch = list(rows.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return
+        last_id = batch[-1][0]
+
+        lines = {}
+        for order_id, price, quantity, category in OrderItem.objects.filter(
+            order_id__in=[row[1] for row in batch]
+        ).order_by().values_list('order_id', 'product_price', 'quantity', 'product__category'):
+            lines.setdefault(order_id, []).append((to_cents(price * quantity), category))
+
+        changed = []
+        delta = 0
+        for payment_id, order_id, artisan_id, amount, current_fee in batch:
+            fee = schedule.payment_fee_cents(artisan_id, to_cents(amount), lines.get(order_id, []))
+            if fee == to_cents(current_fee):
+                continue
+
+            delta += fee - to_cents(current_fee)
+            marketplace_fee = from_cents(fee)
+            changed.append(Payment(
+                id=payment_id,
+                marketplace_fee=marketplace_fee,
+                artisan_amount=amount - marketplace_fee,
+            ))
+
+        if changed and not dry_run:
+            Payment.objects.bulk_update(changed, ['marketplace_fee', 'artisan_amount'])
+
+        yield len(batch), len(changed), delta
+
+        if len(batch) < batch_size:
+            return
@@ -0,0 +1,196 @@
+"""
+Libro de ganancias de los artesanos.
+
+Cada evento de dinero de un Payment (cobro, comisión, reembolso,
+transferencia) se registra como un EarningsEntry append-only, y a la vez
+se suma a su ArtisanMonthlyBalance con un UPDATE atómico (F()).
+
+Así el dashboard del artesano lee sus totales de la tabla de saldos
+mensuales (una fila por mes) sin recorrer todos sus pagos.
+
+Idempotencia: un movimiento se identifica por (payment, kind,
+stripe_object_id). Registrar dos veces el mismo evento (webhooks
+reintentados, señales repetidas) no duplica el movimiento ni el saldo.
+
+El cobro, la comisión y la transferencia ocurren una vez por pago, así
+que su clave es el pago (`payment_{id}`), no un ID de Stripe que puede
+rellenarse más tarde (stripe_charge_id). Los reembolsos usan el ID del
+Refund de Stripe.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (
+    Payment,
+    EarningsEntry,
+    EarningsEntryKind,
+    ArtisanMonthlyBalance,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Campo de ArtisanMonthlyBalance que acumula cada tipo de movimiento
+BALANCE_FIELDS = {
+    EarningsEntryKind.CHARGE: 'gross_amount',
+    EarningsEntryKind.FEE: 'fees_amount',
+    EarningsEntryKind.REFUND: 'refunded_amount',
+    EarningsEntryKind.TRANSFER: 'transferred_amount',
+}
+
+# Movimientos que solo hay uno por pago (ver record_payment_succeeded)
+ONCE_PER_PAYMENT_KINDS = (
+    EarningsEntryKind.CHARGE,
+    EarningsEntryKind.FEE,
+    EarningsEntryKind.TRANSFER,
+)
+
+
+def month_of(moment: datetime) -> date:
+    """Retorna el primer día del mes (hora local) de un datetime."""
+    return timezone.localdate(moment).replace(day=1)
+
+
+def record_entries(
+    payment: Payment,
+    entries: list[tuple[str, Decimal, str]],
+    when: datetime = None,
+) -> list[EarningsEntry]:
+    """
+    Añade movimientos al libro y actualiza el saldo mensual del artesano.
+
+    Los movimientos ya registrados y los de importe cero se ignoran.
+
+    Args:
+        payment: Payment al que pertenecen los movimientos
+        entries: Tuplas (kind, importe, stripe_object_id)
+        when: Momento del evento (default: payment.paid_at o ahora)
+
+    Returns:
+        list: Movimientos creados (vacía si ya estaban todos registrados)
+    """
+    month = month_of(when or payment.paid_at or timezone.now())
+
+    with transaction.atomic():
+        existing = set(
+            EarningsEntry.objects.filter(payment=payment).values_list('kind', 'stripe_object_id')
+        )
+        # Los únicos por pago ya registrados cuentan con cualquier clave
+        # (los antiguos usaban el ID de Stripe)
+        recorded_once = {kind for kind, _ in existing if kind in ONCE_PER_PAYMENT_KINDS}
+
+        new_entries = [
+            EarningsEntry(
+                artisan_id=payment.artisan_id,
+                payment=payment,
+                kind=kind,
+                amount=amount,
+                stripe_object_id=stripe_object_id,
+                month=month,
+            )
+            for kind, amount, stripe_object_id in entries
+            if amount and (kind, stripe_object_id) not in existing and kind not in recorded_once
+        ]
+
+        if not new_entries:
+            return []
+
+        try:
+            with transaction.atomic():
+                EarningsEntry.objects.bulk_create(new_entries)
+        except IntegrityError:
+            # Otro proceso registró el mismo evento a la vez
+            logger.info(f"Earnings entries for payment {payment.id} already recorded")
+            return []
+
+        deltas = defaultdict(Decimal)
+        for entry in new_entries:
+            deltas[BALANCE_FIELDS[entry.kind]] += entry.amount
+
+        updates = {field: F(field) + delta for field, delta in deltas.items()}
+        if any(entry.kind == EarningsEntryKind.CHARGE for entry in new_entries):
+            updates['payments_count'] = F('payments_count') + 1
+        updates['updated_at'] = timezone.now()
+
+        balance, _ = ArtisanMonthlyBalance.objects.get_or_create(
+            artisan_id=payment.artisan_id,
+            month=month,
+        )
+        ArtisanMonthlyBalance.objects.filter(pk=balance.pk).update(**updates)
+
+    return new_entries
+
+
+def record_payment_succeeded(payment: Payment) -> list[EarningsEntry]:
+    """
+    Registra el cobro, la comisión y la transferencia de un pago exitoso.
+
+    Con destination charges Stripe transfiere `artisan_amount` a la cuenta
+    del artesano en el mismo cobro, así que la transferencia se registra
+    junto al cargo.
+
+    Los tres se identifican por el pago: si después se rellena
+    stripe_charge_id o stripe_transfer_id no se vuelven a registrar.
+    """
+    key = f'payment_{payment.id}'
+
+    return record_entries(payment, [
+        (EarningsEntryKind.CHARGE, payment.amount, key),
+        (EarningsEntryKind.FEE, payment.marketplace_fee, key),
+        (EarningsEntryKind.TRANSFER, payment.artisan_amount, key),
+    ])
+
+
+def record_refund(
+    payment: Payment,
+    amount: Decimal,
+    stripe_refund_id: str,
+    when: datetime = None,
+) -> list[EarningsEntry]:
+    """
+    Registra un reembolso (total o parcial) de un pago.
+
+    El reembolso se imputa al mes en que ocurre, no al mes del cobro.
+    """
+    return record_entries(
+        payment,
+        [(EarningsEntryKind.REFUND, amount, stripe_refund_id)],
+        when=when or timezone.now(),
+    )
+
+
+def earnings_summary(balances) -> dict:
+    """
+    Suma los saldos mensuales de un artesano.
+
+    Args:
+        balances: Iterable de ArtisanMonthlyBalance (ya evaluado)
+
+    Returns:
+        dict: Totales de ventas, comisiones, reembolsos, transferencias y neto
+    """
+    totals = {
+        'gross_amount': Decimal('0.00'),
+        'fees_amount': Decimal('0.00'),
+        'refunded_amount': Decimal('0.00'),
+        'transferred_amount': Decimal('0.00'),
+        'net_amount': Decimal('0.00'),
+        'payments_count': 0,
+    }
+
+    for balance in balances:
+        totals['gross_amount'] += balance.gross_amount
+        totals['fees_amount'] += balance.fees_amount
+        totals['refunded_amount'] += balance.refunded_amount
+        totals['transferred_amount'] += balance.transferred_amount
+        totals['net_amount'] += balance.net_amount
+        totals['payments_count'] += balance.payments_count
+
+    return totals
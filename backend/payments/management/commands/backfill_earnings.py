@@ -0,0 +1,61 @@
+"""
+Management command para registrar en el libro de ganancias los pagos
+anteriores a su creación.
+
+Es idempotente: los pagos ya registrados se saltan sin duplicar
+movimientos ni saldos, así que se puede ejecutar las veces que haga falta.
+
+Uso:
+    python manage.py backfill_earnings
+    python manage.py backfill_earnings --batch-size 1000
+"""
+from django.core.management.base import BaseCommand
+
+from payments.ledger import record_payment_succeeded, record_refund
+from payments.models import Payment, PaymentStatus
+
+
+class Command(BaseCommand):
+    help = 'Registra en el libro de ganancias los pagos exitosos y reembolsados existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Pagos leídos por lote (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        payments = Payment.objects.filter(
+            status__in=[
+                PaymentStatus.SUCCEEDED,
+                PaymentStatus.PARTIALLY_REFUNDED,
+                PaymentStatus.REFUNDED,
+            ],
+        ).prefetch_related('refunds').order_by('id')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'📒 Registrando {payments.count()} pago(s) en el libro de ganancias...')
+        )
+
+        created = 0
+        for payment in payments.iterator(chunk_size=options['batch_size']):
+            created += len(record_payment_succeeded(payment))
+
+            applied = [refund for refund in payment.refunds.all() if refund.applied_at]
+            for refund in applied:
+                created += len(record_refund(
+                    payment, refund.amount, refund.stripe_refund_id, when=refund.applied_at
+                ))
+
+            if payment.status == PaymentStatus.REFUNDED and not applied:
+                # Reembolsado antes de existir Refund: un único reembolso total
+                created += len(record_refund(
+                    payment,
+                    payment.amount,
+                    payment.stripe_charge_id or payment.stripe_payment_intent_id or f'payment_{payment.id}',
+                    when=payment.updated_at,
+                ))
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {created} movimiento(s) creados'))
@@ -0,0 +1,76 @@
+"""
+Management command para recalcular comisiones con el baremo actual.
+
+Útil al cambiar una regla de comisión (FeeRule): recalcula por lotes
+los pagos afectados y actualiza marketplace_fee y artisan_amount.
+
+Por defecto solo toca pagos aún no cobrados (pending y processing):
+los pagos exitosos ya están liquidados en Stripe y en el libro de
+ganancias. Para revisar el impacto sobre ellos, usar --dry-run.
+
+Uso:
+    python manage.py recompute_fees --dry-run
+    python manage.py recompute_fees --artisan 12
+    python manage.py recompute_fees --status succeeded --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+from payments.fees import recompute_fees
+from payments.models import Payment, PaymentStatus
+from payments.money import from_cents
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las comisiones de los pagos con el baremo actual'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--status',
+            action='append',
+            choices=PaymentStatus.values,
+            help='Estado de los pagos a recalcular (repetible). Default: pending y processing',
+        )
+        parser.add_argument(
+            '--artisan',
+            type=int,
+            help='Solo pagos de este artesano (ID de usuario)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Pagos por lote (default: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo calcula el impacto, sin guardar cambios',
+        )
+
+    def handle(self, *args, **options):
+        statuses = options['status'] or [PaymentStatus.PENDING, PaymentStatus.PROCESSING]
+        payments = Payment.objects.filter(status__in=statuses)
+        if options['artisan']:
+            payments = payments.filter(artisan_id=options['artisan'])
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('🔍 Modo dry-run: no se guardará nada'))
+
+        scanned = changed = delta = 0
+        for batch_scanned, batch_changed, batch_delta in recompute_fees(
+            payments,
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        ):
+            scanned += batch_scanned
+            changed += batch_changed
+            delta += batch_delta
+
+        self.stdout.write(f'   Pagos revisados: {scanned}')
+        self.stdout.write(f'   Pagos con comisión distinta: {changed}')
+        self.stdout.write(f'   Diferencia total de comisión: {from_cents(delta)} EUR')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('✅ Dry-run completado'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ {changed} pago(s) actualizados'))
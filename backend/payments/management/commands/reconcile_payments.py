@@ -0,0 +1,107 @@
+"""
+Management command para conciliar los Payment locales con Stripe.
+
+Compara estado, monto, comisión y transfer de cada Payment con lo que
+Stripe liquidó realmente, y guarda las diferencias en PaymentDiscrepancy.
+
+Uso:
+    python manage.py reconcile_payments
+    python manage.py reconcile_payments --since 2025-10-01 --until 2025-11-01
+    python manage.py reconcile_payments --days 7 --workers 8 --batch-size 1000
+
+En local se puede ejecutar contra stripe-mock definiendo STRIPE_API_BASE
+(ver docker-compose.yml).
+"""
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from payments.reconciliation import (
+    run_reconciliation,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_WORKERS,
+)
+
+
+class Command(BaseCommand):
+    help = 'Concilia los pagos locales con las balance transactions de Stripe'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Fecha de inicio (YYYY-MM-DD, inclusive)',
+        )
+        parser.add_argument(
+            '--until',
+            type=str,
+            help='Fecha de fin (YYYY-MM-DD, exclusive). Por defecto: hoy',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=1,
+            help='Días hacia atrás si no se indica --since (default: 1)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_WORKERS,
+            help=f'Tramos paginados en paralelo (default: {DEFAULT_WORKERS})',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Transacciones por lote (default: {DEFAULT_BATCH_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        until = self.parse_date(options['until']) if options['until'] else self.start_of_today()
+        if options['since']:
+            since = self.parse_date(options['since'])
+        else:
+            since = until - timedelta(days=options['days'])
+
+        if since >= until:
+            raise CommandError('--since debe ser anterior a --until')
+
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers y --batch-size deben ser mayores que 0')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'🔍 Conciliando pagos {since:%Y-%m-%d} → {until:%Y-%m-%d}...')
+        )
+
+        run = run_reconciliation(
+            since,
+            until,
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+        )
+
+        self.stdout.write(f'   Transacciones revisadas: {run.transactions_scanned}')
+        self.stdout.write(f'   Pagos emparejados: {run.payments_matched}')
+
+        if run.discrepancies_found:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'⚠️  {run.discrepancies_found} discrepancia(s) registradas '
+                    f'(conciliación #{run.id})'
+                )
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Sin discrepancias'))
+
+    def parse_date(self, value: str) -> datetime:
+        """Convierte YYYY-MM-DD en un datetime aware al inicio del día."""
+        try:
+            date = datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'Fecha inválida: {value} (formato YYYY-MM-DD)')
+        return timezone.make_aware(datetime.combine(date, time.min))
+
+    def start_of_today(self) -> datetime:
+        """Retorna el inicio del día actual (aware)."""
+        return timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
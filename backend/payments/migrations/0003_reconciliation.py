@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_rename_artist_amount_to_artisan_amount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_start', models.DateTimeField(help_text='Inicio (inclusive) de la ventana conciliada', verbose_name='Inicio de ventana')),
+                ('window_end', models.DateTimeField(help_text='Fin (exclusive) de la ventana conciliada', verbose_name='Fin de ventana')),
+                ('status', models.CharField(choices=[('running', 'En curso'), ('completed', 'Completada'), ('failed', 'Fallida')], default='running', max_length=20, verbose_name='Estado')),
+                ('transactions_scanned', models.PositiveIntegerField(default=0, verbose_name='Transacciones revisadas')),
+                ('payments_matched', models.PositiveIntegerField(default=0, verbose_name='Pagos emparejados')),
+                ('discrepancies_found', models.PositiveIntegerField(default=0, verbose_name='Discrepancias')),
+                ('error_message', models.TextField(blank=True, verbose_name='Mensaje de error')),
+                ('started_at', models.DateTimeField(auto_now_add=True, verbose_name='Inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+            ],
+            options={
+                'verbose_name': 'Conciliación',
+                'verbose_name_plural': 'Conciliaciones',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PaymentDiscrepancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('discrepancy_type', models.CharField(choices=[('missing_payment', 'Cargo sin Payment local'), ('missing_charge', 'Payment sin cargo en Stripe'), ('status', 'Estado distinto'), ('amount', 'Monto distinto'), ('fee', 'Comisión distinta'), ('transfer', 'Transfer distinto')], max_length=20, verbose_name='Tipo')),
+                ('stripe_payment_intent_id', models.CharField(blank=True, max_length=255, verbose_name='PaymentIntent ID')),
+                ('stripe_charge_id', models.CharField(blank=True, max_length=255, verbose_name='Charge ID')),
+                ('expected_value', models.CharField(blank=True, max_length=255, verbose_name='Valor local')),
+                ('actual_value', models.CharField(blank=True, max_length=255, verbose_name='Valor en Stripe')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('payment', models.ForeignKey(blank=True, help_text='Payment local (vacío si el cargo no tiene Payment)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='discrepancies', to='payments.payment', verbose_name='Pago')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='discrepancies', to='payments.reconciliationrun', verbose_name='Conciliación')),
+            ],
+            options={
+                'verbose_name': 'Discrepancia de pago',
+                'verbose_name_plural': 'Discrepancias de pagos',
+                'ordering': ['run', 'id'],
+                'indexes': [models.Index(fields=['run', 'discrepancy_type'], name='payments_pa_run_id_44f120_idx'), models.Index(fields=['payment'], name='payments_pa_payment_30d45a_idx')],
+            },
+        ),
+    ]
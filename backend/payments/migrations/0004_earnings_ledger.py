@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:19
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_reconciliation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtisanMonthlyBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Primer día del mes', verbose_name='Mes')),
+                ('gross_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Ventas brutas')),
+                ('fees_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Comisiones')),
+                ('refunded_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Reembolsado')),
+                ('transferred_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Importe ya transferido a la cuenta Stripe del artesano', max_digits=12, verbose_name='Transferido')),
+                ('payments_count', models.PositiveIntegerField(default=0, verbose_name='Número de pagos')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')),
+                ('artisan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_balances', to=settings.AUTH_USER_MODEL, verbose_name='Artesano')),
+            ],
+            options={
+                'verbose_name': 'Saldo mensual',
+                'verbose_name_plural': 'Saldos mensuales',
+                'ordering': ['-month'],
+                'constraints': [models.UniqueConstraint(fields=('artisan', 'month'), name='unique_monthly_balance_per_artisan')],
+            },
+        ),
+        migrations.CreateModel(
+            name='EarningsEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('charge', 'Cobro'), ('fee', 'Comisión'), ('refund', 'Reembolso'), ('transfer', 'Transferencia')], max_length=20, verbose_name='Tipo')),
+                ('amount', models.DecimalField(decimal_places=2, help_text='Importe en EUR (siempre positivo)', max_digits=10, verbose_name='Importe')),
+                ('stripe_object_id', models.CharField(help_text='ID del Charge, Refund o Transfer que origina el movimiento', max_length=255, verbose_name='Objeto de Stripe')),
+                ('month', models.DateField(help_text='Primer día del mes al que se imputa el movimiento', verbose_name='Mes')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('artisan', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='earnings_entries', to=settings.AUTH_USER_MODEL, verbose_name='Artesano')),
+                ('payment', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='earnings_entries', to='payments.payment', verbose_name='Pago')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de ganancias',
+                'verbose_name_plural': 'Movimientos de ganancias',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['artisan', '-created_at'], name='payments_ea_artisan_3de98f_idx')],
+                'constraints': [models.UniqueConstraint(fields=('payment', 'kind', 'stripe_object_id'), name='unique_earnings_entry_per_stripe_object')],
+            },
+        ),
+    ]
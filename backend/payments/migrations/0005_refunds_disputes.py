@@ -0,0 +1,67 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:23
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_earnings_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='refunded_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Suma de los reembolsos aplicados (EUR)', max_digits=10, verbose_name='Reembolsado'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pendiente'), ('processing', 'Procesando'), ('succeeded', 'Exitoso'), ('failed', 'Fallido'), ('refunded', 'Reembolsado'), ('partially_refunded', 'Reembolsado parcialmente'), ('disputed', 'En disputa'), ('cancelled', 'Cancelado')], default='pending', help_text='Estado actual del pago', max_length=20, verbose_name='Estado'),
+        ),
+        migrations.CreateModel(
+            name='PaymentDispute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stripe_dispute_id', models.CharField(max_length=255, unique=True, verbose_name='Dispute ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Importe disputado')),
+                ('reason', models.CharField(blank=True, help_text='Motivo indicado por Stripe (fraudulent, product_not_received...)', max_length=100, verbose_name='Motivo')),
+                ('status', models.CharField(help_text='Estado de la disputa en Stripe (needs_response, won, lost...)', max_length=50, verbose_name='Estado')),
+                ('previous_payment_status', models.CharField(choices=[('pending', 'Pendiente'), ('processing', 'Procesando'), ('succeeded', 'Exitoso'), ('failed', 'Fallido'), ('refunded', 'Reembolsado'), ('partially_refunded', 'Reembolsado parcialmente'), ('disputed', 'En disputa'), ('cancelled', 'Cancelado')], max_length=20, verbose_name='Estado previo del pago')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('closed_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de cierre')),
+                ('payment', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='disputes', to='payments.payment', verbose_name='Pago')),
+            ],
+            options={
+                'verbose_name': 'Disputa',
+                'verbose_name_plural': 'Disputas',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Refund',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stripe_refund_id', models.CharField(help_text='ID del Refund en Stripe (o de la disputa perdida)', max_length=255, unique=True, verbose_name='Refund ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Importe')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('succeeded', 'Exitoso'), ('failed', 'Fallido'), ('canceled', 'Cancelado')], default='pending', max_length=20, verbose_name='Estado')),
+                ('items', models.JSONField(blank=True, default=dict, help_text='Unidades reembolsadas por OrderItem: {"<order_item_id>": cantidad}', verbose_name='Artículos')),
+                ('reason', models.CharField(blank=True, max_length=255, verbose_name='Motivo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('applied_at', models.DateTimeField(blank=True, help_text='Cuándo se actualizaron pago, pedido y stock', null=True, verbose_name='Fecha de aplicación')),
+                ('payment', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='refunds', to='payments.payment', verbose_name='Pago')),
+                ('requested_by', models.ForeignKey(blank=True, help_text='Admin que lo solicitó (vacío si llegó desde Stripe)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Reembolso',
+                'verbose_name_plural': 'Reembolsos',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['payment'], name='payments_re_payment_0f5ef3_idx')],
+            },
+        ),
+    ]
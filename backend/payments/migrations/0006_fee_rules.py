@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:28
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_refunds_disputes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(blank=True, choices=[('ceramics', 'Cerámica'), ('jewelry', 'Joyería'), ('leather', 'Marroquinería'), ('textiles', 'Textiles'), ('wood', 'Madera'), ('glass', 'Vidrio'), ('home_decor', 'Decoración Hogar'), ('accessories', 'Accesorios'), ('other', 'Otro')], help_text='Vacío = todas las categorías', max_length=20, verbose_name='Categoría')),
+                ('min_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Importe mínimo de la línea (EUR) a partir del cual aplica el tramo', max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Importe mínimo')),
+                ('percent', models.DecimalField(decimal_places=2, max_digits=5, validators=[django.core.validators.MinValueValidator(Decimal('0.00')), django.core.validators.MaxValueValidator(Decimal('100.00'))], verbose_name='Comisión (%)')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activa')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')),
+                ('artisan', models.ForeignKey(blank=True, help_text='Vacío = todos los artesanos', limit_choices_to={'role': 'artisan'}, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='fee_rules', to=settings.AUTH_USER_MODEL, verbose_name='Artesano')),
+            ],
+            options={
+                'verbose_name': 'Regla de comisión',
+                'verbose_name_plural': 'Reglas de comisión',
+                'ordering': ['artisan', 'category', 'min_amount'],
+                'constraints': [models.UniqueConstraint(fields=('artisan', 'category', 'min_amount'), name='unique_fee_rule_tier')],
+            },
+        ),
+    ]
@@ -5,6 +5,9 @@ Modelos para la gestión de pagos con Stripe Connect.
 from django.db import models
 from decimal import Decimal
 from django.conf import settings
+from django.core.validators import MinValueValidator, MaxValueValidator
+
+from shop.models import ProductCategory
 
 
 class StripeAccountStatus(models.TextChoices):
@@ -31,6 +34,8 @@ class PaymentStatus(models.TextChoices):
     - SUCCEEDED: Pago completado exitosamente
     - FAILED: Pago fallido
     - REFUNDED: Pago reembolsado
+    - PARTIALLY_REFUNDED: Pago reembolsado en parte (algunos artículos)
+    - DISPUTED: El cliente abrió una disputa (chargeback)
     - CANCELLED: Pago cancelado
     """
     PENDING = 'pending', 'Pendiente'
@@ -38,6 +43,8 @@ class PaymentStatus(models.TextChoices):
     SUCCEEDED = 'succeeded', 'Exitoso'
     FAILED = 'failed', 'Fallido'
     REFUNDED = 'refunded', 'Reembolsado'
+    PARTIALLY_REFUNDED = 'partially_refunded', 'Reembolsado parcialmente'
+    DISPUTED = 'disputed', 'En disputa'
     CANCELLED = 'cancelled', 'Cancelado'
 
 
@@ -97,6 +104,14 @@ class Payment(models.Model):
         help_text='Monto para el artesano en EUR'
     )
     
+    refunded_amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Reembolsado',
+        help_text='Suma de los reembolsos aplicados (EUR)'
+    )
+    
     # Estado del pago
     status = models.CharField(
         max_length=20,
@@ -181,6 +196,31 @@ class Payment(models.Model):
     def __str__(self) -> str:
         return f"Payment {self.order.order_number} - {self.formatted_amount}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Guarda el estado leído para detectar cambios (ver payments/signals.py)."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None) -> None:
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if fields is None or 'status' in fields:
+            self._loaded_status = self.status
+    
+    def save(self, *args, **kwargs) -> None:
+        """Tras guardar, el estado guardado pasa a ser el de referencia."""
+        super().save(*args, **kwargs)
+        self._loaded_status = self.status
+    
+    @property
+    def status_changed(self) -> bool:
+        """
+        Si el estado es distinto del leído o guardado por última vez (True
+        para instancias que no vienen de la base de datos).
+        """
+        return self.status != getattr(self, '_loaded_status', None)
+    
     @property
     def formatted_amount(self) -> str:
         """Retorna el monto total formateado."""
@@ -196,12 +236,21 @@ class Payment(models.Model):
         """Retorna el monto del artesano formateado."""
         return f"{self.artisan_amount} EUR"
     
+    @property
+    def refundable_amount(self) -> Decimal:
+        """Importe que aún se puede reembolsar."""
+        return self.amount - self.refunded_amount
+    
     def calculate_fees(self, marketplace_fee_percent: Decimal = None) -> None:
         """
         Calcula la comisión del marketplace y el monto para el artesano.
         
+        Sin porcentaje explícito usa el baremo de comisiones (FeeRule):
+        por artesano, por categoría de cada artículo del pedido y por tramos.
+        El cálculo se hace en céntimos enteros con redondeo bancario.
+        
         Args:
-            marketplace_fee_percent: Porcentaje de comisión (default: settings.MARKETPLACE_FEE_PERCENT)
+            marketplace_fee_percent: Porcentaje fijo (ignora el baremo)
         
         Example:
             >>> payment = Payment(amount=Decimal('100.00'))
@@ -211,12 +260,608 @@ class Payment(models.Model):
             >>> payment.artisan_amount
             Decimal('90.00')
         """
-        if marketplace_fee_percent is None:
-            marketplace_fee_percent = settings.MARKETPLACE_FEE_PERCENT
+        from .fees import fee_cents, get_fee_schedule, payment_lines
+        from .money import to_cents, from_cents
+        
+        if marketplace_fee_percent is not None:
+            fee = fee_cents(to_cents(self.amount), marketplace_fee_percent)
+        else:
+            lines = payment_lines(self.order_id) if self.order_id else []
+            fee = get_fee_schedule().payment_fee_cents(
+                self.artisan_id,
+                to_cents(self.amount),
+                lines,
+            )
         
         # Calcular comisión del marketplace
-        self.marketplace_fee = (self.amount * marketplace_fee_percent) / Decimal('100')
+        self.marketplace_fee = from_cents(fee)
         
         # Calcular monto para el artesano
         self.artisan_amount = self.amount - self.marketplace_fee
 
+
+class ReconciliationRunStatus(models.TextChoices):
+    """
+    Estados de una ejecución de conciliación.
+    """
+    RUNNING = 'running', 'En curso'
+    COMPLETED = 'completed', 'Completada'
+    FAILED = 'failed', 'Fallida'
+
+
+class ReconciliationRun(models.Model):
+    """
+    Ejecución del job de conciliación de pagos contra Stripe.
+    
+    Cada ejecución recorre las balance transactions de Stripe de una ventana
+    de fechas y guarda las discrepancias encontradas en PaymentDiscrepancy.
+    Se crea desde el comando `manage.py reconcile_payments`.
+    """
+    
+    window_start = models.DateTimeField(
+        verbose_name='Inicio de ventana',
+        help_text='Inicio (inclusive) de la ventana conciliada'
+    )
+    
+    window_end = models.DateTimeField(
+        verbose_name='Fin de ventana',
+        help_text='Fin (exclusive) de la ventana conciliada'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=ReconciliationRunStatus.choices,
+        default=ReconciliationRunStatus.RUNNING,
+        verbose_name='Estado'
+    )
+    
+    # Contadores de la ejecución
+    transactions_scanned = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Transacciones revisadas'
+    )
+    
+    payments_matched = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Pagos emparejados'
+    )
+    
+    discrepancies_found = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Discrepancias'
+    )
+    
+    error_message = models.TextField(
+        blank=True,
+        verbose_name='Mensaje de error'
+    )
+    
+    started_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Inicio'
+    )
+    
+    finished_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Fin'
+    )
+    
+    class Meta:
+        ordering = ['-started_at']
+        verbose_name = 'Conciliación'
+        verbose_name_plural = 'Conciliaciones'
+    
+    def __str__(self) -> str:
+        return (
+            f"Conciliación {self.window_start:%Y-%m-%d} → {self.window_end:%Y-%m-%d} "
+            f"({self.get_status_display()})"
+        )
+
+
+class DiscrepancyType(models.TextChoices):
+    """
+    Tipos de discrepancia entre un Payment local y lo liquidado en Stripe.
+    
+    - MISSING_PAYMENT: Cargo en Stripe sin Payment local
+    - MISSING_CHARGE: Payment exitoso sin cargo en Stripe dentro de la ventana
+    - STATUS: El estado no coincide
+    - AMOUNT: El monto cobrado no coincide
+    - FEE: La comisión del marketplace no coincide
+    - TRANSFER: El transfer al artesano no coincide
+    """
+    MISSING_PAYMENT = 'missing_payment', 'Cargo sin Payment local'
+    MISSING_CHARGE = 'missing_charge', 'Payment sin cargo en Stripe'
+    STATUS = 'status', 'Estado distinto'
+    AMOUNT = 'amount', 'Monto distinto'
+    FEE = 'fee', 'Comisión distinta'
+    TRANSFER = 'transfer', 'Transfer distinto'
+
+
+class PaymentDiscrepancy(models.Model):
+    """
+    Discrepancia detectada por una ejecución de conciliación.
+    
+    Guarda el valor local (expected_value) y el valor liquidado en Stripe
+    (actual_value) como texto para poder revisarlos en el admin.
+    Los montos se guardan en céntimos, igual que los devuelve Stripe.
+    """
+    
+    run = models.ForeignKey(
+        ReconciliationRun,
+        on_delete=models.CASCADE,
+        related_name='discrepancies',
+        verbose_name='Conciliación'
+    )
+    
+    payment = models.ForeignKey(
+        Payment,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='discrepancies',
+        verbose_name='Pago',
+        help_text='Payment local (vacío si el cargo no tiene Payment)'
+    )
+    
+    discrepancy_type = models.CharField(
+        max_length=20,
+        choices=DiscrepancyType.choices,
+        verbose_name='Tipo'
+    )
+    
+    stripe_payment_intent_id = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='PaymentIntent ID'
+    )
+    
+    stripe_charge_id = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Charge ID'
+    )
+    
+    expected_value = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Valor local'
+    )
+    
+    actual_value = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Valor en Stripe'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de creación'
+    )
+    
+    class Meta:
+        ordering = ['run', 'id']
+        verbose_name = 'Discrepancia de pago'
+        verbose_name_plural = 'Discrepancias de pagos'
+        indexes = [
+            models.Index(fields=['run', 'discrepancy_type']),
+            models.Index(fields=['payment']),
+        ]
+    
+    def __str__(self) -> str:
+        return f"{self.get_discrepancy_type_display()} - {self.stripe_payment_intent_id or self.stripe_charge_id}"
+
+
+class EarningsEntryKind(models.TextChoices):
+    """
+    Tipos de movimiento del libro de ganancias de un artesano.
+    
+    - CHARGE: Cobro al cliente (importe bruto)
+    - FEE: Comisión retenida por el marketplace
+    - REFUND: Reembolso devuelto al cliente
+    - TRANSFER: Transferencia a la cuenta Stripe Connect del artesano
+    """
+    CHARGE = 'charge', 'Cobro'
+    FEE = 'fee', 'Comisión'
+    REFUND = 'refund', 'Reembolso'
+    TRANSFER = 'transfer', 'Transferencia'
+
+
+class EarningsEntry(models.Model):
+    """
+    Movimiento del libro de ganancias de un artesano.
+    
+    El libro es append-only: los movimientos no se modifican ni se borran.
+    Cada movimiento se identifica por (payment, kind, stripe_object_id), de
+    modo que registrar dos veces el mismo evento de Stripe no lo duplica.
+    
+    Los importes son siempre positivos; el signo lo da `kind`
+    (ver ArtisanMonthlyBalance.net_amount).
+    """
+    
+    artisan = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name='earnings_entries',
+        verbose_name='Artesano'
+    )
+    
+    payment = models.ForeignKey(
+        Payment,
+        on_delete=models.PROTECT,
+        related_name='earnings_entries',
+        verbose_name='Pago'
+    )
+    
+    kind = models.CharField(
+        max_length=20,
+        choices=EarningsEntryKind.choices,
+        verbose_name='Tipo'
+    )
+    
+    amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name='Importe',
+        help_text='Importe en EUR (siempre positivo)'
+    )
+    
+    stripe_object_id = models.CharField(
+        max_length=255,
+        verbose_name='Objeto de Stripe',
+        help_text='ID del Charge, Refund o Transfer que origina el movimiento'
+    )
+    
+    month = models.DateField(
+        verbose_name='Mes',
+        help_text='Primer día del mes al que se imputa el movimiento'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de creación'
+    )
+    
+    class Meta:
+        ordering = ['-created_at', '-id']
+        verbose_name = 'Movimiento de ganancias'
+        verbose_name_plural = 'Movimientos de ganancias'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['payment', 'kind', 'stripe_object_id'],
+                name='unique_earnings_entry_per_stripe_object',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['artisan', '-created_at']),
+        ]
+    
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} {self.amount} EUR - {self.stripe_object_id}"
+
+
+class ArtisanMonthlyBalance(models.Model):
+    """
+    Saldo mensual materializado de un artesano.
+    
+    Se actualiza con incrementos atómicos (F()) cada vez que se añade un
+    movimiento al libro, así el dashboard lee los totales con una sola
+    query indexada por (artisan, month) en lugar de sumar todos los pagos.
+    """
+    
+    artisan = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='monthly_balances',
+        verbose_name='Artesano'
+    )
+    
+    month = models.DateField(
+        verbose_name='Mes',
+        help_text='Primer día del mes'
+    )
+    
+    gross_amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Ventas brutas'
+    )
+    
+    fees_amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Comisiones'
+    )
+    
+    refunded_amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Reembolsado'
+    )
+    
+    transferred_amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Transferido',
+        help_text='Importe ya transferido a la cuenta Stripe del artesano'
+    )
+    
+    payments_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Número de pagos'
+    )
+    
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Fecha de actualización'
+    )
+    
+    class Meta:
+        ordering = ['-month']
+        verbose_name = 'Saldo mensual'
+        verbose_name_plural = 'Saldos mensuales'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['artisan', 'month'],
+                name='unique_monthly_balance_per_artisan',
+            ),
+        ]
+    
+    def __str__(self) -> str:
+        return f"{self.artisan} - {self.month:%Y-%m}"
+    
+    @property
+    def net_amount(self) -> Decimal:
+        """Ganancias netas del mes: ventas - comisiones - reembolsos."""
+        return self.gross_amount - self.fees_amount - self.refunded_amount
+
+
+class RefundStatus(models.TextChoices):
+    """
+    Estados de un reembolso (mismos valores que Refund.status en Stripe).
+    """
+    PENDING = 'pending', 'Pendiente'
+    SUCCEEDED = 'succeeded', 'Exitoso'
+    FAILED = 'failed', 'Fallido'
+    CANCELED = 'canceled', 'Cancelado'
+
+
+class Refund(models.Model):
+    """
+    Reembolso (total o parcial) de un pago.
+    
+    Se identifica por el ID del Refund de Stripe, de modo que el webhook
+    `charge.refunded` y la acción del admin que lo originó no lo aplican
+    dos veces. `items` guarda las unidades reembolsadas por OrderItem.
+    """
+    
+    payment = models.ForeignKey(
+        Payment,
+        on_delete=models.PROTECT,
+        related_name='refunds',
+        verbose_name='Pago'
+    )
+    
+    stripe_refund_id = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Refund ID',
+        help_text='ID del Refund en Stripe (o de la disputa perdida)'
+    )
+    
+    amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name='Importe'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=RefundStatus.choices,
+        default=RefundStatus.PENDING,
+        verbose_name='Estado'
+    )
+    
+    items = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Artículos',
+        help_text='Unidades reembolsadas por OrderItem: {"<order_item_id>": cantidad}'
+    )
+    
+    reason = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Motivo'
+    )
+    
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='Solicitado por',
+        help_text='Admin que lo solicitó (vacío si llegó desde Stripe)'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de creación'
+    )
+    
+    applied_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Fecha de aplicación',
+        help_text='Cuándo se actualizaron pago, pedido y stock'
+    )
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Reembolso'
+        verbose_name_plural = 'Reembolsos'
+        indexes = [
+            models.Index(fields=['payment']),
+        ]
+    
+    def __str__(self) -> str:
+        return f"Refund {self.stripe_refund_id} - {self.amount} EUR"
+
+
+class PaymentDispute(models.Model):
+    """
+    Disputa (chargeback) abierta por el cliente sobre un pago.
+    
+    Mientras está abierta el pago queda en DISPUTED. Al cerrarse:
+    - won: el pago vuelve a su estado anterior
+    - lost: se aplica como un reembolso del importe disputado
+    """
+    
+    payment = models.ForeignKey(
+        Payment,
+        on_delete=models.PROTECT,
+        related_name='disputes',
+        verbose_name='Pago'
+    )
+    
+    stripe_dispute_id = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Dispute ID'
+    )
+    
+    amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name='Importe disputado'
+    )
+    
+    reason = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Motivo',
+        help_text='Motivo indicado por Stripe (fraudulent, product_not_received...)'
+    )
+    
+    status = models.CharField(
+        max_length=50,
+        verbose_name='Estado',
+        help_text='Estado de la disputa en Stripe (needs_response, won, lost...)'
+    )
+    
+    previous_payment_status = models.CharField(
+        max_length=20,
+        choices=PaymentStatus.choices,
+        verbose_name='Estado previo del pago'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de creación'
+    )
+    
+    closed_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Fecha de cierre'
+    )
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Disputa'
+        verbose_name_plural = 'Disputas'
+    
+    def __str__(self) -> str:
+        return f"Dispute {self.stripe_dispute_id} ({self.status})"
+
+
+class FeeRule(models.Model):
+    """
+    Regla del baremo de comisiones del marketplace.
+    
+    Ámbito (de más a menos específico):
+    1. Artesano + categoría
+    2. Artesano
+    3. Categoría
+    4. Global (sin artesano ni categoría)
+    
+    Dentro de un ámbito, cada regla es un tramo: se aplica la de mayor
+    `min_amount` que no supere el importe de la línea. Si ninguna regla
+    aplica se usa settings.MARKETPLACE_FEE_PERCENT.
+    
+    Las reglas se cargan en memoria (payments.fees) y se recargan cuando
+    cambia alguna.
+    """
+    
+    artisan = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='fee_rules',
+        limit_choices_to={'role': 'artisan'},
+        verbose_name='Artesano',
+        help_text='Vacío = todos los artesanos'
+    )
+    
+    category = models.CharField(
+        max_length=20,
+        choices=ProductCategory.choices,
+        blank=True,
+        verbose_name='Categoría',
+        help_text='Vacío = todas las categorías'
+    )
+    
+    min_amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        validators=[MinValueValidator(Decimal('0.00'))],
+        verbose_name='Importe mínimo',
+        help_text='Importe mínimo de la línea (EUR) a partir del cual aplica el tramo'
+    )
+    
+    percent = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.00')), MaxValueValidator(Decimal('100.00'))],
+        verbose_name='Comisión (%)'
+    )
+    
+    is_active = models.BooleanField(
+        default=True,
+        verbose_name='Activa'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de creación'
+    )
+    
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Fecha de actualización'
+    )
+    
+    class Meta:
+        ordering = ['artisan', 'category', 'min_amount']
+        verbose_name = 'Regla de comisión'
+        verbose_name_plural = 'Reglas de comisión'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['artisan', 'category', 'min_amount'],
+                name='unique_fee_rule_tier',
+            ),
+        ]
+    
+    def __str__(self) -> str:
+        scope = ' / '.join(filter(None, [
+            str(self.artisan) if self.artisan_id else '',
+            self.get_category_display() if self.category else '',
+        ])) or 'Global'
+        return f"{scope} ≥ {self.min_amount} EUR: {self.percent}%"
@@ -0,0 +1,35 @@
+"""
+Conversión de importes entre EUR (Decimal) y céntimos (int).
+
+Stripe trabaja siempre en céntimos; los modelos guardan Decimal con dos
+decimales. Centralizar la conversión evita truncados con int(amount * 100).
+"""
+
+from decimal import Decimal, ROUND_HALF_EVEN
+
+
+CENT = Decimal('0.01')
+
+
+def to_cents(amount: Decimal | None) -> int | None:
+    """
+    Convierte un importe en EUR a céntimos (redondeo bancario).
+
+    Example:
+        >>> to_cents(Decimal('10.005'))
+        1000
+    """
+    if amount is None:
+        return None
+    return int((amount * 100).quantize(Decimal('1'), rounding=ROUND_HALF_EVEN))
+
+
+def from_cents(cents: int) -> Decimal:
+    """
+    Convierte céntimos a un importe en EUR con dos decimales.
+
+    Example:
+        >>> from_cents(1050)
+        Decimal('10.50')
+    """
+    return (Decimal(cents) / 100).quantize(CENT)
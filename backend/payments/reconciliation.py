@@ -0,0 +1,341 @@
+"""
+Conciliación de pagos contra Stripe.
+
+Recorre las balance transactions de tipo `charge` de una ventana de fechas
+(con el Charge expandido en `source`) y las compara con los Payment locales,
+buscándolos por el índice único de `stripe_payment_intent_id`.
+
+Memoria acotada:
+- Stripe pagina de 100 en 100 (auto_paging_iter solo retiene una página)
+- Cada worker procesa lotes de `batch_size` transacciones: una query para
+  emparejar el lote y un bulk_create para sus discrepancias
+- Solo se conservan los IDs de los Payment emparejados, para detectar
+  después los pagos exitosos que no aparecen en Stripe
+
+Concurrencia acotada: la ventana se divide en `workers` tramos que se
+paginan en paralelo (la paginación de Stripe es secuencial por cursor).
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+
+import stripe
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .models import (
+    Payment,
+    PaymentStatus,
+    PaymentDiscrepancy,
+    DiscrepancyType,
+    ReconciliationRun,
+    ReconciliationRunStatus,
+)
+from .money import to_cents
+
+
+# Configurar API key de Stripe
+stripe.api_key = settings.STRIPE_SECRET_KEY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 4
+
+
+@dataclass
+class ReconciliationStats:
+    """Contadores acumulados de una conciliación."""
+    transactions_scanned: int = 0
+    payments_matched: int = 0
+    discrepancies_found: int = 0
+
+    def __add__(self, other: 'ReconciliationStats') -> 'ReconciliationStats':
+        return ReconciliationStats(
+            self.transactions_scanned + other.transactions_scanned,
+            self.payments_matched + other.payments_matched,
+            self.discrepancies_found + other.discrepancies_found,
+        )
+
+
+def _stripe_status(charge: dict) -> str:
+    """
+    Traduce el estado de un Charge de Stripe a PaymentStatus.
+    """
+    if charge.get('refunded'):
+        return PaymentStatus.REFUNDED
+    if charge.get('status') == 'succeeded':
+        return PaymentStatus.SUCCEEDED
+    if charge.get('status') == 'failed':
+        return PaymentStatus.FAILED
+    return PaymentStatus.PROCESSING
+
+
+def split_window(start: datetime, end: datetime, parts: int) -> list[tuple[datetime, datetime]]:
+    """
+    Divide la ventana [start, end) en `parts` tramos consecutivos.
+
+    Example:
+        >>> split_window(day(1), day(5), 2)
+        [(day(1), day(3)), (day(3), day(5))]
+    """
+    parts = max(1, parts)
+    step = (end - start) / parts
+    bounds = [start + step * i for i in range(parts)] + [end]
+    return [(bounds[i], bounds[i + 1]) for i in range(parts) if bounds[i] < bounds[i + 1]]
+
+
+def iter_charge_batches(start: datetime, end: datetime, batch_size: int):
+    """
+    Pagina las balance transactions de tipo charge de la ventana [start, end).
+
+    Yields:
+        list[dict]: Lotes de como máximo `batch_size` Charges expandidos
+    """
+    transactions = stripe.BalanceTransaction.list(
+        created={'gte': int(start.timestamp()), 'lt': int(end.timestamp())},
+        type='charge',
+        expand=['data.source'],
+        limit=100,
+    )
+
+    batch = []
+    for transaction in transactions.auto_paging_iter():
+        charge = transaction.get('source')
+        if not isinstance(charge, dict):
+            # Source sin expandir: no es un Charge que podamos comparar
+            logger.warning(f"Balance transaction {transaction.get('id')} sin charge expandido")
+            continue
+
+        batch.append(charge)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def compare_payment(payment: Payment, charge: dict) -> list[tuple[str, str, str]]:
+    """
+    Compara un Payment local con el Charge liquidado en Stripe.
+
+    Returns:
+        list: Tuplas (tipo, valor local, valor en Stripe) por cada diferencia
+    """
+    differences = []
+
+    stripe_status = _stripe_status(charge)
+    if payment.status != stripe_status:
+        differences.append((DiscrepancyType.STATUS, payment.status, stripe_status))
+
+    amount_cents = to_cents(payment.amount)
+    if amount_cents != charge.get('amount'):
+        differences.append((DiscrepancyType.AMOUNT, str(amount_cents), str(charge.get('amount'))))
+
+    fee_cents = to_cents(payment.marketplace_fee)
+    application_fee = charge.get('application_fee_amount')
+    if application_fee is not None and fee_cents != application_fee:
+        differences.append((DiscrepancyType.FEE, str(fee_cents), str(application_fee)))
+
+    transfer = charge.get('transfer')
+    if transfer and payment.stripe_transfer_id != transfer:
+        differences.append((DiscrepancyType.TRANSFER, payment.stripe_transfer_id or '', transfer))
+
+    return differences
+
+
+def reconcile_batch(run: ReconciliationRun, charges: list[dict]) -> tuple[ReconciliationStats, set[int]]:
+    """
+    Empareja un lote de Charges con sus Payment y guarda las discrepancias.
+
+    Coste fijo por lote: una query (índice único de stripe_payment_intent_id)
+    y un bulk_create.
+
+    Returns:
+        tuple: (contadores del lote, IDs de Payment emparejados)
+    """
+    intent_ids = [charge['payment_intent'] for charge in charges if charge.get('payment_intent')]
+    payments = {
+        payment.stripe_payment_intent_id: payment
+        for payment in Payment.objects.filter(
+            stripe_payment_intent_id__in=intent_ids
+        ).only(
+            'id', 'status', 'amount', 'marketplace_fee',
+            'stripe_transfer_id', 'stripe_payment_intent_id',
+        )
+    }
+
+    discrepancies = []
+    matched_ids = set()
+
+    for charge in charges:
+        intent_id = charge.get('payment_intent')
+        if not intent_id:
+            # Cargos sin PaymentIntent no los crea el marketplace
+            continue
+
+        payment = payments.get(intent_id)
+        if payment is None:
+            discrepancies.append(PaymentDiscrepancy(
+                run=run,
+                discrepancy_type=DiscrepancyType.MISSING_PAYMENT,
+                stripe_payment_intent_id=intent_id,
+                stripe_charge_id=charge.get('id', ''),
+                actual_value=str(charge.get('amount')),
+            ))
+            continue
+
+        matched_ids.add(payment.id)
+        for discrepancy_type, expected, actual in compare_payment(payment, charge):
+            discrepancies.append(PaymentDiscrepancy(
+                run=run,
+                payment=payment,
+                discrepancy_type=discrepancy_type,
+                stripe_payment_intent_id=intent_id,
+                stripe_charge_id=charge.get('id', ''),
+                expected_value=expected,
+                actual_value=actual,
+            ))
+
+    PaymentDiscrepancy.objects.bulk_create(discrepancies)
+
+    stats = ReconciliationStats(
+        transactions_scanned=len(charges),
+        payments_matched=len(matched_ids),
+        discrepancies_found=len(discrepancies),
+    )
+    return stats, matched_ids
+
+
+def _reconcile_slice(run, start, end, batch_size, matched_ids, lock) -> ReconciliationStats:
+    """
+    Concilia un tramo de la ventana. Se ejecuta en un worker del pool.
+    """
+    stats = ReconciliationStats()
+    try:
+        for charges in iter_charge_batches(start, end, batch_size):
+            batch_stats, batch_matched = reconcile_batch(run, charges)
+            stats += batch_stats
+            with lock:
+                matched_ids.update(batch_matched)
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            # Cada hilo abre su propia conexión: cerrarla al terminar
+            connections.close_all()
+    return stats
+
+
+def find_missing_charges(run: ReconciliationRun, matched_ids: set[int], batch_size: int) -> int:
+    """
+    Registra los Payment exitosos de la ventana que no aparecen en Stripe.
+
+    Recorre los pagos con un iterator (sin cargar el queryset entero)
+    y guarda las discrepancias en lotes.
+
+    Returns:
+        int: Número de discrepancias MISSING_CHARGE creadas
+    """
+    payments = Payment.objects.filter(
+        status=PaymentStatus.SUCCEEDED,
+        paid_at__gte=run.window_start,
+        paid_at__lt=run.window_end,
+    ).values_list('id', 'stripe_payment_intent_id')
+
+    found = 0
+    discrepancies = []
+    for payment_id, intent_id in payments.iterator(chunk_size=batch_size):
+        if payment_id in matched_ids:
+            continue
+
+        discrepancies.append(PaymentDiscrepancy(
+            run=run,
+            payment_id=payment_id,
+            discrepancy_type=DiscrepancyType.MISSING_CHARGE,
+            stripe_payment_intent_id=intent_id or '',
+            expected_value=PaymentStatus.SUCCEEDED,
+        ))
+        if len(discrepancies) >= batch_size:
+            PaymentDiscrepancy.objects.bulk_create(discrepancies)
+            found += len(discrepancies)
+            discrepancies = []
+
+    PaymentDiscrepancy.objects.bulk_create(discrepancies)
+    return found + len(discrepancies)
+
+
+def run_reconciliation(
+    start: datetime,
+    end: datetime,
+    workers: int = DEFAULT_WORKERS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> ReconciliationRun:
+    """
+    Ejecuta una conciliación completa de la ventana [start, end).
+
+    Flow:
+    1. Crear ReconciliationRun en estado RUNNING
+    2. Dividir la ventana en `workers` tramos y paginarlos en paralelo
+    3. Emparejar cada lote con sus Payment y guardar discrepancias
+    4. Registrar los Payment exitosos que no aparecen en Stripe
+    5. Guardar contadores y marcar la ejecución como COMPLETED
+
+    Con workers=1 todo se ejecuta en el hilo actual (útil en tests).
+
+    Returns:
+        ReconciliationRun: Ejecución con sus contadores actualizados
+    """
+    run = ReconciliationRun.objects.create(window_start=start, window_end=end)
+    logger.info(f"Starting reconciliation run {run.id}: {start} -> {end}")
+
+    matched_ids = set()
+    lock = threading.Lock()
+    slices = split_window(start, end, workers)
+
+    try:
+        if len(slices) == 1:
+            stats = _reconcile_slice(run, start, end, batch_size, matched_ids, lock)
+        else:
+            stats = ReconciliationStats()
+            with ThreadPoolExecutor(max_workers=len(slices)) as executor:
+                futures = [
+                    executor.submit(
+                        _reconcile_slice, run, slice_start, slice_end,
+                        batch_size, matched_ids, lock
+                    )
+                    for slice_start, slice_end in slices
+                ]
+                for future in futures:
+                    stats += future.result()
+
+        stats.discrepancies_found += find_missing_charges(run, matched_ids, batch_size)
+
+    except Exception as e:
+        # Cualquier error (no solo de Stripe) cierra la ejecución como FAILED
+        if isinstance(e, stripe.StripeError):
+            logger.error(f"Stripe error during reconciliation run {run.id}: {str(e)}")
+        else:
+            logger.exception(f"Reconciliation run {run.id} failed")
+        run.status = ReconciliationRunStatus.FAILED
+        run.error_message = str(e)
+        run.finished_at = timezone.now()
+        run.save(update_fields=['status', 'error_message', 'finished_at'])
+        raise
+
+    run.transactions_scanned = stats.transactions_scanned
+    run.payments_matched = stats.payments_matched
+    run.discrepancies_found = stats.discrepancies_found
+    run.status = ReconciliationRunStatus.COMPLETED
+    run.finished_at = timezone.now()
+    run.save()
+
+    logger.info(
+        f"Reconciliation run {run.id} completed: {stats.transactions_scanned} transactions, "
+        f"{stats.payments_matched} matched, {stats.discrepancies_found} discrepancies"
+    )
+
+    return run
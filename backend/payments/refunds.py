@@ -0,0 +1,476 @@
+"""
+Reembolsos y disputas de pagos.
+
+Aplicar un reembolso actualiza en una sola transacción:
+- Refund (idempotente por stripe_refund_id)
+- OrderItem.refunded_quantity de los artículos reembolsados
+- Product.stock (UPDATE atómico con F())
+- Payment.refunded_amount y Payment.status
+- Order.payment_status (y CANCELLED si se reembolsa entero antes de enviarse)
+- Libro de ganancias (payments.ledger)
+
+El Payment y sus OrderItem se bloquean con select_for_update, así que
+un webhook `charge.refunded` que llegue a la vez que la acción del admin
+que lo originó no aplica el reembolso dos veces.
+"""
+
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from decimal import Decimal
+
+import stripe
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, prefetch_related_objects
+from django.utils import timezone
+
+from orders.models import OrderItem, OrderStatus
+from shop.models import Product
+from .ledger import record_refund
+from .models import (
+    Payment,
+    PaymentStatus,
+    PaymentDispute,
+    Refund,
+    RefundStatus,
+)
+from .money import to_cents, from_cents
+
+
+# Configurar API key de Stripe
+stripe.api_key = settings.STRIPE_SECRET_KEY
+
+logger = logging.getLogger(__name__)
+
+# Llamadas concurrentes a Stripe en reembolsos masivos
+REFUND_WORKERS = 8
+
+# Estados de pago que admiten (más) reembolsos
+REFUNDABLE_STATUSES = [PaymentStatus.SUCCEEDED, PaymentStatus.PARTIALLY_REFUNDED]
+
+# Estados de pedido que aún no se han enviado
+UNSHIPPED_STATUSES = [OrderStatus.PENDING, OrderStatus.PROCESSING]
+
+
+def parse_items_metadata(value: str | None) -> dict[int, int]:
+    """
+    Lee las unidades reembolsadas de la metadata de un Refund de Stripe.
+
+    Example:
+        >>> parse_items_metadata('12:1,15:2')
+        {12: 1, 15: 2}
+    """
+    items = {}
+    for part in (value or '').split(','):
+        item_id, _, quantity = part.partition(':')
+        if item_id.strip().isdigit() and quantity.strip().isdigit():
+            items[int(item_id)] = int(quantity)
+    return items
+
+
+def format_items_metadata(items: dict[int, int]) -> str:
+    """
+    Formatea las unidades reembolsadas para la metadata de Stripe
+    (los valores de metadata son strings de máximo 500 caracteres).
+    """
+    return ','.join(f'{item_id}:{quantity}' for item_id, quantity in items.items())
+
+
+def apply_refund(
+    payment_id: int,
+    stripe_refund_id: str,
+    amount: Decimal,
+    items: dict[int, int] | None = None,
+    reason: str = '',
+    restock: bool = True,
+    requested_by=None,
+) -> Refund:
+    """
+    Aplica un reembolso exitoso a pago, pedido y stock.
+
+    Es idempotente: si el Refund ya se aplicó, lo retorna sin cambios.
+
+    Args:
+        payment_id: ID del Payment reembolsado
+        stripe_refund_id: ID del Refund en Stripe
+        amount: Importe reembolsado (EUR)
+        items: Unidades por OrderItem. Si se omite y el reembolso cubre todo
+            lo pendiente, se reembolsan todas las unidades restantes
+        reason: Motivo del reembolso
+        restock: Si False no se tocan artículos ni stock (disputas perdidas)
+        requested_by: Admin que lo solicitó (None si llega desde Stripe)
+
+    Returns:
+        Refund: Reembolso aplicado
+    """
+    with transaction.atomic():
+        payment = Payment.objects.select_for_update().select_related('order').get(pk=payment_id)
+
+        refund, _ = Refund.objects.select_for_update().get_or_create(
+            stripe_refund_id=stripe_refund_id,
+            defaults={
+                'payment': payment,
+                'amount': amount,
+                'items': {str(item_id): quantity for item_id, quantity in (items or {}).items()},
+                'reason': reason,
+                'requested_by': requested_by,
+            },
+        )
+
+        if refund.applied_at:
+            return refund
+
+        amount = min(amount, payment.refundable_amount)
+        fully_refunded = amount >= payment.refundable_amount
+
+        if items is None and refund.items:
+            items = {int(item_id): quantity for item_id, quantity in refund.items.items()}
+
+        refunded_items = {}
+        if restock:
+            order_items = list(
+                OrderItem.objects.select_for_update().filter(order_id=payment.order_id)
+            )
+
+            if not items and fully_refunded:
+                items = {item.id: item.refundable_quantity for item in order_items}
+
+            stock_deltas = defaultdict(int)
+            changed = []
+            for item in order_items:
+                quantity = min((items or {}).get(item.id, 0), item.refundable_quantity)
+                if quantity <= 0:
+                    continue
+
+                item.refunded_quantity += quantity
+                refunded_items[str(item.id)] = quantity
+                stock_deltas[item.product_id] += quantity
+                changed.append(item)
+
+            OrderItem.objects.bulk_update(changed, ['refunded_quantity'])
+            for product_id, quantity in stock_deltas.items():
+                Product.objects.filter(pk=product_id).update(stock=F('stock') + quantity)
+
+        # Actualizar Payment
+        payment.refunded_amount += amount
+        payment.status = (
+            PaymentStatus.REFUNDED if fully_refunded else PaymentStatus.PARTIALLY_REFUNDED
+        )
+        payment.save(update_fields=['refunded_amount', 'status', 'updated_at'])
+
+        # Actualizar Order
+        order = payment.order
+        order.payment_status = payment.status
+        if restock and fully_refunded and order.status in UNSHIPPED_STATUSES:
+            # El stock ya se restauró arriba: la cancelación no restaura nada más
+            order.status = OrderStatus.CANCELLED
+        order.save()
+
+        refund.amount = amount
+        refund.items = refunded_items
+        refund.status = RefundStatus.SUCCEEDED
+        refund.applied_at = timezone.now()
+        refund.save()
+
+        record_refund(payment, amount, stripe_refund_id)
+
+    logger.info(
+        f"Refund {stripe_refund_id} applied to payment {payment.id}: "
+        f"{amount} EUR, items {refunded_items}"
+    )
+
+    return refund
+
+
+def find_payment(stripe_object: dict) -> Payment | None:
+    """
+    Busca el Payment de un Charge, Refund o Dispute de Stripe.
+
+    Usa el PaymentIntent (índice único) y, si no viene, el Charge.
+    """
+    payment_intent_id = stripe_object.get('payment_intent')
+    if payment_intent_id:
+        return Payment.objects.filter(stripe_payment_intent_id=payment_intent_id).first()
+
+    charge_id = stripe_object.get('charge')
+    if charge_id:
+        return Payment.objects.filter(stripe_charge_id=charge_id).first()
+
+    return None
+
+
+def handle_charge_refunded(charge: dict) -> list[Refund]:
+    """
+    Aplica los reembolsos exitosos de un evento `charge.refunded`.
+
+    Las versiones recientes de la API no incluyen `refunds` en el Charge,
+    así que si no vienen se listan desde Stripe.
+    """
+    payment = find_payment(charge)
+    if payment is None:
+        logger.error(f"Payment not found for refunded charge {charge.get('id')}")
+        return []
+
+    refunds = (charge.get('refunds') or {}).get('data')
+    if refunds is None:
+        refunds = stripe.Refund.list(charge=charge['id'], limit=100).auto_paging_iter()
+
+    applied = []
+    for stripe_refund in refunds:
+        if stripe_refund.get('status') != RefundStatus.SUCCEEDED:
+            continue
+
+        metadata = stripe_refund.get('metadata') or {}
+        applied.append(apply_refund(
+            payment.id,
+            stripe_refund['id'],
+            from_cents(stripe_refund['amount']),
+            items=parse_items_metadata(metadata.get('items')) or None,
+            reason=stripe_refund.get('reason') or '',
+        ))
+
+    return applied
+
+
+def handle_dispute_created(dispute: dict) -> PaymentDispute | None:
+    """
+    Registra una disputa abierta y marca pago y pedido como DISPUTED.
+    """
+    payment = find_payment(dispute)
+    if payment is None:
+        logger.error(f"Payment not found for dispute {dispute.get('id')}")
+        return None
+
+    with transaction.atomic():
+        payment = Payment.objects.select_for_update().select_related('order').get(pk=payment.pk)
+
+        payment_dispute, created = PaymentDispute.objects.get_or_create(
+            stripe_dispute_id=dispute['id'],
+            defaults={
+                'payment': payment,
+                'amount': from_cents(dispute['amount']),
+                'reason': dispute.get('reason') or '',
+                'status': dispute.get('status') or '',
+                'previous_payment_status': payment.status,
+            },
+        )
+
+        if created:
+            payment.status = PaymentStatus.DISPUTED
+            payment.save(update_fields=['status', 'updated_at'])
+
+            order = payment.order
+            order.payment_status = PaymentStatus.DISPUTED
+            order.save(update_fields=['payment_status', 'updated_at'])
+
+            logger.warning(f"Dispute {dispute['id']} opened for payment {payment.id}")
+
+    return payment_dispute
+
+
+def handle_dispute_closed(dispute: dict) -> PaymentDispute | None:
+    """
+    Cierra una disputa.
+
+    - won / warning_closed: el pago vuelve a su estado anterior
+    - lost: se aplica como reembolso del importe disputado, sin restaurar
+      stock (la mercancía ya salió)
+    """
+    payment_dispute = handle_dispute_created(dispute)
+    if payment_dispute is None:
+        return None
+
+    with transaction.atomic():
+        payment_dispute = PaymentDispute.objects.select_for_update().get(pk=payment_dispute.pk)
+        if payment_dispute.closed_at:
+            return payment_dispute
+
+        payment = Payment.objects.select_for_update().select_related('order').get(
+            pk=payment_dispute.payment_id
+        )
+
+        payment_dispute.status = dispute.get('status') or ''
+        payment_dispute.closed_at = timezone.now()
+        payment_dispute.save(update_fields=['status', 'closed_at'])
+
+        payment.status = payment_dispute.previous_payment_status
+        payment.save(update_fields=['status', 'updated_at'])
+
+        order = payment.order
+        order.payment_status = payment.status
+        order.save(update_fields=['payment_status', 'updated_at'])
+
+        if payment_dispute.status == 'lost':
+            apply_refund(
+                payment.id,
+                payment_dispute.stripe_dispute_id,
+                payment_dispute.amount,
+                reason='dispute_lost',
+                restock=False,
+            )
+
+    logger.info(f"Dispute {payment_dispute.stripe_dispute_id} closed: {payment_dispute.status}")
+
+    return payment_dispute
+
+
+def create_stripe_refund(
+    payment: Payment,
+    amount: Decimal,
+    items: dict[int, int] | None = None,
+    requested_by=None,
+):
+    """
+    Crea el Refund en Stripe.
+
+    La idempotency key depende de lo ya reembolsado, así que reintentar
+    la misma petición no duplica el reembolso.
+    """
+    metadata = {
+        'payment_id': payment.id,
+        'order_number': payment.order.order_number,
+    }
+    if items:
+        metadata['items'] = format_items_metadata(items)
+    if requested_by is not None:
+        metadata['requested_by'] = requested_by.id
+
+    return stripe.Refund.create(
+        payment_intent=payment.stripe_payment_intent_id,
+        amount=to_cents(amount),
+        reason='requested_by_customer',
+        metadata=metadata,
+        idempotency_key=f'refund-{payment.id}-{to_cents(payment.refunded_amount)}-{to_cents(amount)}',
+    )
+
+
+def refund_payment(
+    payment: Payment,
+    items: dict[int, int] | None = None,
+    requested_by=None,
+    stripe_refund=None,
+) -> Refund:
+    """
+    Reembolsa un pago entero o algunas unidades de sus artículos.
+
+    Args:
+        payment: Payment a reembolsar (con order cargado)
+        items: Unidades por OrderItem. None reembolsa todo lo pendiente
+        requested_by: Admin que lo solicita
+        stripe_refund: Refund ya creado en Stripe (reembolsos masivos)
+
+    Returns:
+        Refund: Aplicado si Stripe lo confirmó, PENDING si no (lo
+        aplicará el webhook `charge.refunded`)
+
+    Raises:
+        stripe.StripeError: Si Stripe rechaza el reembolso
+    """
+    if items:
+        prices = dict(
+            OrderItem.objects.filter(order_id=payment.order_id).values_list('id', 'product_price')
+        )
+        amount = sum(
+            (prices[item_id] * quantity for item_id, quantity in items.items() if item_id in prices),
+            Decimal('0.00'),
+        )
+        amount = min(amount, payment.refundable_amount)
+    else:
+        amount = payment.refundable_amount
+
+    if stripe_refund is None:
+        stripe_refund = create_stripe_refund(payment, amount, items, requested_by)
+
+    if stripe_refund['status'] == RefundStatus.SUCCEEDED:
+        return apply_refund(
+            payment.id,
+            stripe_refund['id'],
+            from_cents(stripe_refund['amount']),
+            items=items,
+            reason='requested_by_customer',
+            requested_by=requested_by,
+        )
+
+    refund, _ = Refund.objects.get_or_create(
+        stripe_refund_id=stripe_refund['id'],
+        defaults={
+            'payment': payment,
+            'amount': amount,
+            'items': {str(item_id): quantity for item_id, quantity in (items or {}).items()},
+            'reason': 'requested_by_customer',
+            'requested_by': requested_by,
+        },
+    )
+    return refund
+
+
+def create_stripe_refund_in_thread(payment: Payment, amount: Decimal, requested_by=None):
+    """create_stripe_refund desde un hilo del pool de refund_payments."""
+    try:
+        return create_stripe_refund(payment, amount, None, requested_by)
+    finally:
+        # Conexión propia del hilo (si algo consultó la base de datos)
+        connection.close()
+
+
+def refund_payments(payments, requested_by=None, workers: int = REFUND_WORKERS):
+    """
+    Reembolsa por completo varios pagos a la vez.
+
+    Las llamadas a Stripe (lo lento) se hacen en paralelo con un pool
+    acotado; los cambios en base de datos se aplican en el hilo actual,
+    una transacción por pago, a medida que Stripe responde.
+
+    Un error en un pago (de Stripe o no) se anota en `failed` y no
+    interrumpe el resto: los reembolsos ya creados en Stripe se siguen
+    registrando.
+
+    Returns:
+        tuple: (reembolsos creados, [(payment, error)] de los que fallaron)
+    """
+    eligible = [
+        payment for payment in payments
+        if payment.status in REFUNDABLE_STATUSES
+        and payment.refundable_amount > 0
+        and payment.stripe_payment_intent_id
+    ]
+
+    refunds = []
+    failed = []
+    if not eligible:
+        return refunds, failed
+
+    # Los metadatos del Refund leen payment.order: se cargan aquí (una
+    # query) y los hilos no consultan la base de datos
+    prefetch_related_objects(eligible, 'order')
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(eligible))) as executor:
+        futures = {
+            executor.submit(
+                create_stripe_refund_in_thread, payment, payment.refundable_amount, requested_by
+            ): payment
+            for payment in eligible
+        }
+
+        for future in as_completed(futures):
+            payment = futures[future]
+            try:
+                stripe_refund = future.result()
+            except stripe.StripeError as e:
+                logger.error(f"Stripe refund failed for payment {payment.id}: {str(e)}")
+                failed.append((payment, str(e)))
+                continue
+            except Exception as e:
+                logger.exception(f"Refund failed for payment {payment.id}")
+                failed.append((payment, str(e)))
+                continue
+
+            try:
+                refunds.append(refund_payment(payment, requested_by=requested_by, stripe_refund=stripe_refund))
+            except Exception as e:
+                # El Refund ya existe en Stripe: el webhook charge.refunded lo registrará
+                logger.exception(f"Recording Stripe refund {stripe_refund.id} for payment {payment.id} failed")
+                failed.append((payment, str(e)))
+
+    return refunds, failed
@@ -9,7 +9,8 @@ from django.utils import timezone
 from decimal import Decimal
 
 from orders.models import Order
-from .models import Payment, PaymentStatus
+from .models import Payment, PaymentStatus, Refund, EarningsEntry, ArtisanMonthlyBalance
+from .money import to_cents
 
 
 # Configurar API key de Stripe
@@ -82,6 +83,116 @@ class PaymentSerializer(serializers.ModelSerializer):
             }
 
 
+class RefundSerializer(serializers.ModelSerializer):
+    """
+    Serializer para mostrar reembolsos (read-only).
+    """
+    
+    class Meta:
+        model = Refund
+        fields = [
+            'id',
+            'payment',
+            'stripe_refund_id',
+            'amount',
+            'status',
+            'items',
+            'reason',
+            'created_at',
+            'applied_at',
+        ]
+        read_only_fields = fields
+
+
+class RefundItemSerializer(serializers.Serializer):
+    """Unidades de un OrderItem a reembolsar."""
+    
+    order_item = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class RefundRequestSerializer(serializers.Serializer):
+    """
+    Serializer para solicitar un reembolso (total o por artículos).
+    
+    Requiere el Payment en el contexto para validar que los artículos
+    pertenecen a su pedido y quedan unidades por reembolsar.
+    """
+    
+    items = RefundItemSerializer(many=True, required=False)
+    
+    def validate_items(self, value: list) -> dict:
+        """
+        Valida los artículos y los agrupa como {order_item_id: cantidad}.
+        
+        Raises:
+            ValidationError: Si un artículo no es del pedido o no quedan unidades
+        """
+        payment = self.context['payment']
+        refundable = {
+            item.id: item.refundable_quantity
+            for item in payment.order.items.all()
+        }
+        
+        items = {}
+        for entry in value:
+            item_id = entry['order_item']
+            if item_id not in refundable:
+                raise serializers.ValidationError(
+                    f"El artículo {item_id} no pertenece a este pedido."
+                )
+            items[item_id] = items.get(item_id, 0) + entry['quantity']
+            if items[item_id] > refundable[item_id]:
+                raise serializers.ValidationError(
+                    f"Solo quedan {refundable[item_id]} unidad(es) por reembolsar del artículo {item_id}."
+                )
+        
+        return items
+
+
+class EarningsEntrySerializer(serializers.ModelSerializer):
+    """
+    Serializer para los movimientos del libro de ganancias (read-only).
+    """
+    
+    order_number = serializers.CharField(source='payment.order.order_number', read_only=True)
+    
+    class Meta:
+        model = EarningsEntry
+        fields = [
+            'id',
+            'kind',
+            'amount',
+            'payment',
+            'order_number',
+            'stripe_object_id',
+            'month',
+            'created_at',
+        ]
+        read_only_fields = fields
+
+
+class ArtisanMonthlyBalanceSerializer(serializers.ModelSerializer):
+    """
+    Serializer para los saldos mensuales de un artesano (read-only).
+    """
+    
+    net_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    
+    class Meta:
+        model = ArtisanMonthlyBalance
+        fields = [
+            'month',
+            'gross_amount',
+            'fees_amount',
+            'refunded_amount',
+            'transferred_amount',
+            'net_amount',
+            'payments_count',
+        ]
+        read_only_fields = fields
+
+
 class CheckoutSessionSerializer(serializers.Serializer):
     """
     Serializer para crear una sesión de checkout con Stripe.
@@ -157,6 +268,9 @@ class CheckoutSessionSerializer(serializers.Serializer):
         4. Guardar stripe_payment_intent_id en Payment
         5. Retornar client_secret para frontend
         
+        La versión async (payments.async_views) reutiliza los pasos 1, 2, 4
+        y 5 y solo cambia la llamada a Stripe.
+        
         Args:
             validated_data: Datos validados (order_id)
             
@@ -166,11 +280,22 @@ class CheckoutSessionSerializer(serializers.Serializer):
         Raises:
             ValidationError: Si falla la creación en Stripe
         """
+        payment = self.create_payment()
+        
+        try:
+            payment_intent = stripe.PaymentIntent.create(
+                **self.payment_intent_params(payment)
+            )
+        except stripe.StripeError as e:
+            self.mark_failed(payment, e)
+        
+        return self.complete(payment, payment_intent)
+    
+    def create_payment(self) -> Payment:
+        """Crea el Payment en estado PENDING con las comisiones calculadas."""
         order = self.context['order']
         artisan = self.context['artisan']
         
-        # Crear Payment con comisiones calculadas
-        artisan_profile = artisan.artisan_profile
         payment = Payment(
             order=order,
             artisan=artisan,
@@ -183,54 +308,64 @@ class CheckoutSessionSerializer(serializers.Serializer):
         payment.calculate_fees()
         payment.save()
         
-        try:
-            # Crear PaymentIntent en Stripe
+        return payment
+    
+    def payment_intent_params(self, payment: Payment) -> dict:
+        """
+        Parámetros del PaymentIntent (importes en céntimos).
+        """
+        order = self.context['order']
+        artisan_profile = self.context['artisan'].artisan_profile
+        
+        return {
             # amount debe ser en centavos (EUR cents)
-            amount_cents = int(payment.amount * 100)
-            application_fee_cents = int(payment.marketplace_fee * 100)
-            
-            payment_intent = stripe.PaymentIntent.create(
-                amount=amount_cents,
-                currency='eur',
-                payment_method_types=['card'],
-                
-                # Transfer automático al artesano
-                transfer_data={
-                    'destination': artisan_profile.stripe_account_id,
-                },
-                
-                # Comisión del marketplace
-                application_fee_amount=application_fee_cents,
-                
-                # Metadata para tracking
-                metadata={
-                    'order_id': order.id,
-                    'order_number': order.order_number,
-                    'artisan_id': artisan_profile.id,
-                    'artisan_slug': artisan_profile.slug,
-                    'marketplace_name': 'MiTaller.art',
-                },
-            )
-            
-            # Guardar PaymentIntent ID
-            payment.stripe_payment_intent_id = payment_intent.id
-            payment.save()
+            'amount': to_cents(payment.amount),
+            'currency': 'eur',
+            'payment_method_types': ['card'],
             
-            # Retornar datos necesarios para el frontend
-            return {
-                'payment_intent_id': payment_intent.id,
-                'client_secret': payment_intent.client_secret,
-                'public_key': settings.STRIPE_PUBLIC_KEY,
-                'payment_id': payment.id,
-            }
+            # Transfer automático al artesano
+            'transfer_data': {
+                'destination': artisan_profile.stripe_account_id,
+            },
             
-        except stripe.error.StripeError as e:
-            # Si falla la creación en Stripe, marcar payment como FAILED
-            payment.status = PaymentStatus.FAILED
-            payment.failure_message = str(e)
-            payment.save()
+            # Comisión del marketplace
+            'application_fee_amount': to_cents(payment.marketplace_fee),
             
-            raise serializers.ValidationError(
-                f"Error al crear el pago en Stripe: {str(e)}"
-            )
-
+            # Metadata para tracking
+            'metadata': {
+                'order_id': order.id,
+                'order_number': order.order_number,
+                'artisan_id': artisan_profile.id,
+                'artisan_slug': artisan_profile.slug,
+                'marketplace_name': 'MiTaller.art',
+            },
+        }
+    
+    def complete(self, payment: Payment, payment_intent) -> dict:
+        """
+        Guarda el PaymentIntent en el Payment y retorna los datos para el frontend.
+        """
+        payment.stripe_payment_intent_id = payment_intent.id
+        payment.save()
+        
+        return {
+            'payment_intent_id': payment_intent.id,
+            'client_secret': payment_intent.client_secret,
+            'public_key': settings.STRIPE_PUBLIC_KEY,
+            'payment_id': payment.id,
+        }
+    
+    def mark_failed(self, payment: Payment, error: Exception) -> None:
+        """
+        Marca el Payment como FAILED tras un error de Stripe.
+        
+        Raises:
+            ValidationError: Siempre, con el mensaje de Stripe
+        """
+        payment.status = PaymentStatus.FAILED
+        payment.failure_message = str(error)
+        payment.save()
+        
+        raise serializers.ValidationError(
+            f"Error al crear el pago en Stripe: {str(error)}"
+        )
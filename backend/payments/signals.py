@@ -4,11 +4,13 @@ Signals para la app Payments.
 Gestiona las actualizaciones automáticas cuando cambia el estado de un pago.
 """
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 import logging
 
-from .models import Payment, PaymentStatus
+from .models import Payment, PaymentStatus, FeeRule
+from .ledger import record_payment_succeeded
+from .fees import invalidate_fee_schedule
 from orders.models import OrderStatus
 
 
@@ -63,3 +65,40 @@ def update_order_on_payment_change(sender, instance, created, **kwargs):
                 f"Order {order.order_number} payment_status updated to FAILED"
             )
 
+
+
+@receiver(post_save, sender=Payment)
+def record_earnings_on_payment_change(sender, instance, created, **kwargs):
+    """
+    Registra en el libro de ganancias el cobro de un pago exitoso.
+    
+    Los reembolsos los registra payments.refunds al aplicarlos (uno por
+    Refund de Stripe); aquí solo se asegura que el cobro de un pago
+    reembolsado esté en el libro.
+    
+    Solo actúa cuando el estado cambia (los guardados de otros campos,
+    como stripe_charge_id, no vuelven a registrar nada). El registro
+    además es idempotente: cada movimiento se identifica por el pago.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    # post_save llega antes de que save() actualice el estado de referencia
+    if not created and not instance.status_changed:
+        return
+    
+    if instance.status in (
+        PaymentStatus.SUCCEEDED,
+        PaymentStatus.PARTIALLY_REFUNDED,
+        PaymentStatus.REFUNDED,
+    ):
+        record_payment_succeeded(instance)
+
+
+@receiver(post_save, sender=FeeRule)
+@receiver(post_delete, sender=FeeRule)
+def invalidate_fee_schedule_on_rule_change(sender, instance, **kwargs):
+    """
+    Invalida la tabla de comisiones en memoria cuando cambia una regla.
+    """
+    invalidate_fee_schedule()
@@ -0,0 +1,57 @@
+"""
+Parámetros y lógica compartida del onboarding de Stripe Connect.
+
+La usan tanto las vistas síncronas (payments.views) como las async
+(payments.async_views), que solo se diferencian en cómo llaman a Stripe.
+"""
+
+from .models import StripeAccountStatus
+
+
+def express_account_params(email: str) -> dict:
+    """Parámetros para crear la cuenta Express de un artesano."""
+    return {
+        'type': 'express',
+        'country': 'ES',
+        'email': email,
+        'capabilities': {
+            'card_payments': {'requested': True},
+            'transfers': {'requested': True},
+        },
+    }
+
+
+def onboarding_link_params(account_id: str, refresh_url: str, return_url: str) -> dict:
+    """Parámetros para crear un AccountLink de onboarding."""
+    return {
+        'account': account_id,
+        'refresh_url': refresh_url,
+        'return_url': return_url,
+        'type': 'account_onboarding',
+    }
+
+
+def apply_account_status(artisan, account) -> dict:
+    """
+    Copia en el ArtisanProfile el estado de su cuenta de Stripe (sin guardar).
+
+    Returns:
+        dict: Respuesta del endpoint account-status
+    """
+    artisan.stripe_charges_enabled = account.charges_enabled
+    artisan.stripe_payouts_enabled = account.payouts_enabled
+
+    # Actualizar estado según capabilities
+    if account.charges_enabled and account.payouts_enabled:
+        artisan.stripe_account_status = StripeAccountStatus.ACTIVE
+        artisan.stripe_onboarding_completed = True
+    else:
+        # Sin enviar o enviado pero aún en revisión
+        artisan.stripe_account_status = StripeAccountStatus.PENDING
+
+    return {
+        'status': artisan.stripe_account_status,
+        'charges_enabled': artisan.stripe_charges_enabled,
+        'payouts_enabled': artisan.stripe_payouts_enabled,
+        'details_submitted': account.details_submitted,
+    }
@@ -6,21 +6,50 @@ Cubre:
 - Creación de sesiones de checkout
 - Procesamiento de webhooks de Stripe
 - Actualización de estados de pagos y pedidos
+- Conciliación de pagos contra Stripe
+- Libro de ganancias y saldos mensuales de artesanos
+- Reembolsos (totales y por artículo) y disputas
+- Baremo de comisiones por artesano, categoría y tramos
+- Endpoints async (ASGI) de Stripe Connect y checkout
 """
 
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from decimal import Decimal
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+from datetime import timedelta
+from io import StringIO
 import json
 
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.tokens import RefreshToken
+
 from accounts.models import User
 from artisans.models import ArtisanProfile
 from shop.models import Product
 from orders.models import Order, OrderItem, OrderStatus
-from .models import Payment, PaymentStatus, StripeAccountStatus
+from .models import (
+    Payment,
+    PaymentStatus,
+    StripeAccountStatus,
+    DiscrepancyType,
+    ReconciliationRun,
+    ReconciliationRunStatus,
+    EarningsEntry,
+    EarningsEntryKind,
+    ArtisanMonthlyBalance,
+    Refund,
+    PaymentDispute,
+    FeeRule,
+)
+from .reconciliation import run_reconciliation, split_window
+from .ledger import record_entries, record_payment_succeeded, record_refund
+from .refunds import refund_payments
+from .fees import fee_cents, get_fee_schedule, invalidate_fee_schedule
 
 
 class StripeConnectOnboardingTests(TestCase):
@@ -496,3 +525,1203 @@ class PaymentModelTests(TestCase):
         self.assertEqual(payment.formatted_marketplace_fee, '10.00 EUR')
         self.assertEqual(payment.formatted_artisan_amount, '90.00 EUR')
 
+
+
+
+class PaymentReconciliationTests(TestCase):
+    """
+    Tests para la conciliación de pagos contra las balance transactions de Stripe.
+    """
+    
+    def setUp(self):
+        """Configuración inicial."""
+        self.user = User.objects.create_user(
+            username='artisan',
+            email='artist@test.com',
+            password='test123',
+            role='artisan'
+        )
+        
+        self.now = timezone.now()
+        self.window_start = self.now - timedelta(days=1)
+        self.window_end = self.now + timedelta(minutes=1)
+        
+        self.payment = self.create_payment('pi_match', Decimal('100.00'))
+    
+    def create_payment(self, intent_id, amount, status=PaymentStatus.SUCCEEDED):
+        """Helper: crea un pedido con su Payment."""
+        order = Order.objects.create(
+            customer_email='test@test.com',
+            customer_name='Test',
+            shipping_address='Test',
+            shipping_city='Test',
+            shipping_postal_code='12345',
+            total_amount=amount,
+        )
+        payment = Payment(
+            order=order,
+            artisan=self.user,
+            amount=amount,
+            status=status,
+            stripe_payment_intent_id=intent_id,
+            paid_at=self.now,
+        )
+        payment.calculate_fees()
+        payment.save()
+        return payment
+    
+    def charge(self, intent_id, amount, fee=None, status='succeeded', refunded=False):
+        """Helper: balance transaction con el Charge expandido en source."""
+        return {
+            'id': f'txn_{intent_id}',
+            'source': {
+                'id': f'ch_{intent_id}',
+                'payment_intent': intent_id,
+                'amount': amount,
+                'application_fee_amount': fee,
+                'status': status,
+                'refunded': refunded,
+                'transfer': None,
+            },
+        }
+    
+    def mock_stripe(self, mock_list, transactions):
+        """Configura stripe.BalanceTransaction.list para devolver las transacciones."""
+        mock_list.return_value.auto_paging_iter.return_value = iter(transactions)
+    
+    @patch('stripe.BalanceTransaction.list')
+    def test_matching_payment_has_no_discrepancies(self, mock_list):
+        """Test que un pago que coincide con Stripe no genera discrepancias."""
+        self.mock_stripe(mock_list, [self.charge('pi_match', 10000, fee=1000)])
+        
+        run = run_reconciliation(self.window_start, self.window_end, workers=1)
+        
+        self.assertEqual(run.status, ReconciliationRunStatus.COMPLETED)
+        self.assertEqual(run.transactions_scanned, 1)
+        self.assertEqual(run.payments_matched, 1)
+        self.assertEqual(run.discrepancies_found, 0)
+        
+        # Se pide a Stripe solo la ventana y el tipo charge, con el Charge expandido
+        call_kwargs = mock_list.call_args[1]
+        self.assertEqual(call_kwargs['type'], 'charge')
+        self.assertEqual(call_kwargs['expand'], ['data.source'])
+        self.assertEqual(call_kwargs['created']['gte'], int(self.window_start.timestamp()))
+    
+    @patch('stripe.BalanceTransaction.list')
+    def test_amount_fee_and_status_mismatches(self, mock_list):
+        """Test que se detectan diferencias de monto, comisión y estado."""
+        self.mock_stripe(mock_list, [
+            self.charge('pi_match', 9000, fee=500, refunded=True),
+        ])
+        
+        run = run_reconciliation(self.window_start, self.window_end, workers=1)
+        
+        types = set(run.discrepancies.values_list('discrepancy_type', flat=True))
+        self.assertEqual(types, {
+            DiscrepancyType.AMOUNT,
+            DiscrepancyType.FEE,
+            DiscrepancyType.STATUS,
+        })
+        
+        amount = run.discrepancies.get(discrepancy_type=DiscrepancyType.AMOUNT)
+        self.assertEqual(amount.payment, self.payment)
+        self.assertEqual(amount.expected_value, '10000')
+        self.assertEqual(amount.actual_value, '9000')
+    
+    @patch('stripe.BalanceTransaction.list')
+    def test_missing_payment_and_missing_charge(self, mock_list):
+        """Test cargos sin Payment local y pagos exitosos sin cargo en Stripe."""
+        self.mock_stripe(mock_list, [self.charge('pi_unknown', 2500)])
+        
+        run = run_reconciliation(self.window_start, self.window_end, workers=1)
+        
+        self.assertEqual(run.payments_matched, 0)
+        self.assertEqual(run.discrepancies_found, 2)
+        
+        missing_payment = run.discrepancies.get(discrepancy_type=DiscrepancyType.MISSING_PAYMENT)
+        self.assertIsNone(missing_payment.payment)
+        self.assertEqual(missing_payment.stripe_payment_intent_id, 'pi_unknown')
+        
+        missing_charge = run.discrepancies.get(discrepancy_type=DiscrepancyType.MISSING_CHARGE)
+        self.assertEqual(missing_charge.payment, self.payment)
+    
+    @patch('stripe.BalanceTransaction.list')
+    def test_batches_use_one_query_each(self, mock_list):
+        """Test que cada lote se empareja con una sola query, no una por cargo."""
+        for i in range(10):
+            self.create_payment(f'pi_{i}', Decimal('20.00'))
+        self.mock_stripe(mock_list, [self.charge('pi_match', 10000, fee=1000)] + [
+            self.charge(f'pi_{i}', 2000, fee=200) for i in range(10)
+        ])
+        
+        # Crear run + 1 select por lote (2 lotes) + pagos exitosos + guardar run
+        with self.assertNumQueries(5):
+            run = run_reconciliation(
+                self.window_start, self.window_end, workers=1, batch_size=6
+            )
+        
+        self.assertEqual(run.transactions_scanned, 11)
+        self.assertEqual(run.payments_matched, 11)
+        self.assertEqual(run.discrepancies_found, 0)
+    
+    @patch('stripe.BalanceTransaction.list')
+    def test_stripe_error_marks_run_failed(self, mock_list):
+        """Test que un error de Stripe deja la ejecución en FAILED."""
+        import stripe
+        mock_list.side_effect = stripe.APIConnectionError('Network error')
+        
+        with self.assertRaises(stripe.APIConnectionError):
+            run_reconciliation(self.window_start, self.window_end, workers=1)
+        
+        run = ReconciliationRun.objects.get()
+        self.assertEqual(run.status, ReconciliationRunStatus.FAILED)
+        self.assertIn('Network error', run.error_message)
+    
+    @patch('payments.reconciliation.find_missing_charges')
+    @patch('stripe.BalanceTransaction.list')
+    def test_unexpected_error_marks_run_failed(self, mock_list, mock_missing):
+        """Test que cualquier otro error también deja la ejecución en FAILED."""
+        mock_list.return_value.auto_paging_iter.return_value = iter([])
+        mock_missing.side_effect = RuntimeError('database went away')
+        
+        with self.assertRaises(RuntimeError):
+            run_reconciliation(self.window_start, self.window_end, workers=1)
+        
+        run = ReconciliationRun.objects.get()
+        self.assertEqual(run.status, ReconciliationRunStatus.FAILED)
+        self.assertEqual(run.error_message, 'database went away')
+        self.assertIsNotNone(run.finished_at)
+    
+    def test_split_window(self):
+        """Test que la ventana se divide en tramos consecutivos sin huecos."""
+        slices = split_window(self.window_start, self.window_end, 4)
+        
+        self.assertEqual(len(slices), 4)
+        self.assertEqual(slices[0][0], self.window_start)
+        self.assertEqual(slices[-1][1], self.window_end)
+        for (_, end), (start, _) in zip(slices, slices[1:]):
+            self.assertEqual(end, start)
+    
+    @patch('stripe.BalanceTransaction.list')
+    def test_reconcile_payments_command(self, mock_list):
+        """Test del comando reconcile_payments."""
+        self.mock_stripe(mock_list, [self.charge('pi_unknown', 2500)])
+        out = StringIO()
+        
+        call_command(
+            'reconcile_payments',
+            '--since', (self.now - timedelta(days=1)).strftime('%Y-%m-%d'),
+            '--until', (self.now + timedelta(days=1)).strftime('%Y-%m-%d'),
+            '--workers', '1',
+            stdout=out,
+        )
+        
+        self.assertIn('discrepancia', out.getvalue())
+
+
+class EarningsLedgerTests(TestCase):
+    """
+    Tests para el libro de ganancias y el endpoint /earnings/.
+    """
+    
+    def setUp(self):
+        """Configuración inicial."""
+        self.user = User.objects.create_user(
+            username='artisan',
+            email='artist@test.com',
+            password='test123',
+            role='artisan'
+        )
+        self.other = User.objects.create_user(
+            username='other',
+            email='other@test.com',
+            password='test123',
+            role='artisan'
+        )
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def create_payment(self, artisan, amount, intent_id):
+        """Helper: crea un Payment pendiente con comisiones calculadas."""
+        order = Order.objects.create(
+            customer_email='test@test.com',
+            customer_name='Test',
+            shipping_address='Test',
+            shipping_city='Test',
+            shipping_postal_code='12345',
+            total_amount=amount,
+        )
+        payment = Payment(
+            order=order,
+            artisan=artisan,
+            amount=amount,
+            stripe_payment_intent_id=intent_id,
+        )
+        payment.calculate_fees()
+        payment.save()
+        return payment
+    
+    def mark_succeeded(self, payment):
+        """Helper: marca el pago como exitoso (como el webhook)."""
+        payment.status = PaymentStatus.SUCCEEDED
+        payment.paid_at = timezone.now()
+        payment.save()
+    
+    def test_succeeded_payment_records_entries_and_balance(self):
+        """Test que un pago exitoso registra cobro, comisión y transferencia."""
+        payment = self.create_payment(self.user, Decimal('100.00'), 'pi_1')
+        self.assertFalse(EarningsEntry.objects.exists())
+        
+        self.mark_succeeded(payment)
+        
+        kinds = dict(payment.earnings_entries.values_list('kind', 'amount'))
+        self.assertEqual(kinds, {
+            EarningsEntryKind.CHARGE: Decimal('100.00'),
+            EarningsEntryKind.FEE: Decimal('10.00'),
+            EarningsEntryKind.TRANSFER: Decimal('90.00'),
+        })
+        
+        balance = ArtisanMonthlyBalance.objects.get(artisan=self.user)
+        self.assertEqual(balance.gross_amount, Decimal('100.00'))
+        self.assertEqual(balance.fees_amount, Decimal('10.00'))
+        self.assertEqual(balance.net_amount, Decimal('90.00'))
+        self.assertEqual(balance.payments_count, 1)
+    
+    def test_recording_is_idempotent(self):
+        """Test que guardar de nuevo un pago exitoso no duplica movimientos."""
+        payment = self.create_payment(self.user, Decimal('100.00'), 'pi_1')
+        self.mark_succeeded(payment)
+        payment.save()
+        record_payment_succeeded(payment)
+        
+        self.assertEqual(payment.earnings_entries.count(), 3)
+        balance = ArtisanMonthlyBalance.objects.get(artisan=self.user)
+        self.assertEqual(balance.gross_amount, Decimal('100.00'))
+        self.assertEqual(balance.payments_count, 1)
+    
+    def test_charge_id_set_later_does_not_duplicate(self):
+        """Test que rellenar stripe_charge_id después no registra otro cobro."""
+        payment = self.create_payment(self.user, Decimal('100.00'), 'pi_1')
+        self.mark_succeeded(payment)
+        
+        payment.stripe_charge_id = 'ch_1'
+        payment.stripe_transfer_id = 'tr_1'
+        payment.save()
+        record_payment_succeeded(payment)
+        
+        self.assertEqual(payment.earnings_entries.count(), 3)
+        self.assertEqual(
+            set(payment.earnings_entries.values_list('stripe_object_id', flat=True)),
+            {f'payment_{payment.id}'}
+        )
+        self.assertEqual(ArtisanMonthlyBalance.objects.get(artisan=self.user).gross_amount, Decimal('100.00'))
+    
+    def test_entries_keyed_by_stripe_id_are_not_duplicated(self):
+        """Test que los movimientos antiguos (clave = ID de Stripe) cuentan como registrados."""
+        payment = self.create_payment(self.user, Decimal('100.00'), 'pi_1')
+        Payment.objects.filter(pk=payment.pk).update(status=PaymentStatus.SUCCEEDED, stripe_charge_id='ch_1')
+        payment.refresh_from_db()
+        record_entries(payment, [
+            (EarningsEntryKind.CHARGE, payment.amount, 'ch_1'),
+            (EarningsEntryKind.FEE, payment.marketplace_fee, 'ch_1'),
+            (EarningsEntryKind.TRANSFER, payment.artisan_amount, 'ch_1'),
+        ])
+        
+        self.assertEqual(record_payment_succeeded(payment), [])
+        self.assertEqual(payment.earnings_entries.count(), 3)
+    
+    @patch('payments.signals.record_payment_succeeded')
+    def test_signal_only_on_status_change(self, mock_record):
+        """Test que el receiver solo registra cuando cambia el estado."""
+        payment = self.create_payment(self.user, Decimal('100.00'), 'pi_1')
+        self.mark_succeeded(payment)
+        self.assertEqual(mock_record.call_count, 1)
+        
+        payment.stripe_charge_id = 'ch_1'
+        payment.save(update_fields=['stripe_charge_id'])
+        payment.save()
+        Payment.objects.get(pk=payment.pk).save()
+        
+        self.assertEqual(mock_record.call_count, 1)
+    
+    def test_refund_reduces_net_amount(self):
+        """Test que un reembolso parcial se resta del neto."""
+        payment = self.create_payment(self.user, Decimal('100.00'), 'pi_1')
+        self.mark_succeeded(payment)
+        
+        record_refund(payment, Decimal('30.00'), 're_1')
+        record_refund(payment, Decimal('30.00'), 're_1')
+        
+        balance = ArtisanMonthlyBalance.objects.get(artisan=self.user)
+        self.assertEqual(balance.refunded_amount, Decimal('30.00'))
+        self.assertEqual(balance.net_amount, Decimal('60.00'))
+    
+    def test_earnings_endpoint_single_query(self):
+        """Test que el endpoint lee los totales con una query, sin importar los pagos."""
+        for i in range(5):
+            self.mark_succeeded(self.create_payment(self.user, Decimal('20.00'), f'pi_{i}'))
+        self.mark_succeeded(self.create_payment(self.other, Decimal('50.00'), 'pi_other'))
+        
+        url = reverse('earnings-list')
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['totals']['gross_amount'], '100.00')
+        self.assertEqual(response.data['totals']['net_amount'], '90.00')
+        self.assertEqual(response.data['totals']['payments_count'], 5)
+        self.assertEqual(len(response.data['months']), 1)
+    
+    def test_entries_endpoint_only_own_entries(self):
+        """Test que el artesano solo ve sus movimientos."""
+        self.mark_succeeded(self.create_payment(self.user, Decimal('20.00'), 'pi_1'))
+        self.mark_succeeded(self.create_payment(self.other, Decimal('50.00'), 'pi_other'))
+        
+        response = self.client.get(reverse('earnings-entries'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertTrue(all(entry['amount'] != '50.00' for entry in response.data['results']))
+    
+    def test_admin_can_query_any_artisan(self):
+        """Test que un admin consulta las ganancias de cualquier artesano."""
+        self.mark_succeeded(self.create_payment(self.other, Decimal('50.00'), 'pi_other'))
+        admin = User.objects.create_user(
+            username='admin',
+            email='admin@test.com',
+            password='test123',
+            is_staff=True
+        )
+        self.client.force_authenticate(user=admin)
+        
+        response = self.client.get(reverse('earnings-list'), {'artisan': self.other.id})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['totals']['gross_amount'], '50.00')
+    
+    def test_customer_cannot_see_earnings(self):
+        """Test que un cliente no tiene ganancias."""
+        customer = User.objects.create_user(
+            username='customer',
+            email='customer@test.com',
+            password='test123',
+            role='customer'
+        )
+        self.client.force_authenticate(user=customer)
+        
+        response = self.client.get(reverse('earnings-list'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_payments_list_filters_by_artisan_user(self):
+        """Test que un artesano lista solo sus pagos (Payment.artisan es User)."""
+        self.create_payment(self.user, Decimal('20.00'), 'pi_1')
+        self.create_payment(self.other, Decimal('50.00'), 'pi_other')
+        
+        response = self.client.get(reverse('payment-list'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+    
+    def test_backfill_earnings_command(self):
+        """Test que el backfill registra pagos sin movimientos y es idempotente."""
+        payment = self.create_payment(self.user, Decimal('100.00'), 'pi_1')
+        # Simular un pago exitoso anterior al libro (update no dispara signals)
+        Payment.objects.filter(pk=payment.pk).update(
+            status=PaymentStatus.SUCCEEDED,
+            paid_at=timezone.now(),
+        )
+        
+        call_command('backfill_earnings', stdout=StringIO())
+        call_command('backfill_earnings', stdout=StringIO())
+        
+        self.assertEqual(payment.earnings_entries.count(), 3)
+        balance = ArtisanMonthlyBalance.objects.get(artisan=self.user)
+        self.assertEqual(balance.gross_amount, Decimal('100.00'))
+
+
+class RefundAndDisputeTests(TestCase):
+    """
+    Tests para reembolsos (webhook, API y acción del admin) y disputas.
+    """
+    
+    def setUp(self):
+        """Pedido pagado con dos artículos (2 jarrones + 1 taza)."""
+        self.user = User.objects.create_user(
+            username='artisan',
+            email='artist@test.com',
+            password='test123',
+            role='artisan'
+        )
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@test.com',
+            password='test123',
+            is_staff=True
+        )
+        
+        self.vase = Product.objects.create(
+            artisan=self.user,
+            name='Jarrón',
+            description='Test',
+            price=Decimal('30.00'),
+            stock=5,
+        )
+        self.mug = Product.objects.create(
+            artisan=self.user,
+            name='Taza',
+            description='Test',
+            price=Decimal('40.00'),
+            stock=5,
+        )
+        
+        self.order = Order.objects.create(
+            customer_email='customer@test.com',
+            customer_name='Test Customer',
+            shipping_address='Test Street',
+            shipping_city='Maó',
+            shipping_postal_code='07700',
+            total_amount=Decimal('100.00'),
+            status=OrderStatus.PROCESSING,
+            payment_status=PaymentStatus.SUCCEEDED,
+        )
+        self.vase_item = OrderItem.objects.create(
+            order=self.order,
+            product=self.vase,
+            artisan=self.user,
+            product_name='Jarrón',
+            product_price=Decimal('30.00'),
+            quantity=2,
+        )
+        self.mug_item = OrderItem.objects.create(
+            order=self.order,
+            product=self.mug,
+            artisan=self.user,
+            product_name='Taza',
+            product_price=Decimal('40.00'),
+            quantity=1,
+        )
+        
+        self.payment = Payment(
+            order=self.order,
+            artisan=self.user,
+            amount=Decimal('100.00'),
+            status=PaymentStatus.SUCCEEDED,
+            stripe_payment_intent_id='pi_test123',
+            stripe_charge_id='ch_test123',
+            paid_at=timezone.now(),
+        )
+        self.payment.calculate_fees()
+        self.payment.save()
+        
+        self.client = APIClient()
+    
+    def post_event(self, mock_construct, event_type, data):
+        """Helper: envía un evento de Stripe al webhook."""
+        mock_construct.return_value = {'type': event_type, 'data': {'object': data}}
+        return self.client.post(
+            reverse('stripe-webhook'),
+            data={},
+            HTTP_STRIPE_SIGNATURE='test_signature',
+        )
+    
+    def stripe_refund(self, refund_id, amount, items=''):
+        """Helper: Refund de Stripe exitoso."""
+        return {
+            'id': refund_id,
+            'amount': amount,
+            'status': 'succeeded',
+            'reason': 'requested_by_customer',
+            'metadata': {'items': items} if items else {},
+        }
+    
+    @patch('stripe.Webhook.construct_event')
+    def test_webhook_partial_refund_by_item(self, mock_construct):
+        """Test que un reembolso parcial restaura solo el stock de sus artículos."""
+        charge = {
+            'id': 'ch_test123',
+            'payment_intent': 'pi_test123',
+            'refunds': {'data': [
+                self.stripe_refund('re_1', 3000, items=f'{self.vase_item.id}:1'),
+            ]},
+        }
+        
+        response = self.post_event(mock_construct, 'charge.refunded', charge)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.PARTIALLY_REFUNDED)
+        self.assertEqual(self.payment.refunded_amount, Decimal('30.00'))
+        
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, PaymentStatus.PARTIALLY_REFUNDED)
+        self.assertEqual(self.order.status, OrderStatus.PROCESSING)
+        
+        self.vase_item.refresh_from_db()
+        self.assertEqual(self.vase_item.refunded_quantity, 1)
+        self.vase.refresh_from_db()
+        self.mug.refresh_from_db()
+        self.assertEqual(self.vase.stock, 6)
+        self.assertEqual(self.mug.stock, 5)
+        
+        balance = ArtisanMonthlyBalance.objects.get(artisan=self.user)
+        self.assertEqual(balance.refunded_amount, Decimal('30.00'))
+    
+    @patch('stripe.Webhook.construct_event')
+    def test_webhook_refund_is_idempotent(self, mock_construct):
+        """Test que reenviar el mismo evento no aplica el reembolso dos veces."""
+        charge = {
+            'id': 'ch_test123',
+            'payment_intent': 'pi_test123',
+            'refunds': {'data': [
+                self.stripe_refund('re_1', 3000, items=f'{self.vase_item.id}:1'),
+            ]},
+        }
+        
+        self.post_event(mock_construct, 'charge.refunded', charge)
+        self.post_event(mock_construct, 'charge.refunded', charge)
+        
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.refunded_amount, Decimal('30.00'))
+        self.vase.refresh_from_db()
+        self.assertEqual(self.vase.stock, 6)
+        self.assertEqual(Refund.objects.count(), 1)
+    
+    @patch('stripe.Webhook.construct_event')
+    def test_webhook_full_refund_cancels_order_once(self, mock_construct):
+        """Test que un reembolso total cancela el pedido sin duplicar el stock."""
+        charge = {
+            'id': 'ch_test123',
+            'payment_intent': 'pi_test123',
+            'refunds': {'data': [self.stripe_refund('re_full', 10000)]},
+        }
+        
+        self.post_event(mock_construct, 'charge.refunded', charge)
+        
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.REFUNDED)
+        
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, OrderStatus.CANCELLED)
+        self.assertEqual(self.order.payment_status, PaymentStatus.REFUNDED)
+        
+        # Stock restaurado una sola vez (refund + cancelación no se suman)
+        self.vase.refresh_from_db()
+        self.mug.refresh_from_db()
+        self.assertEqual(self.vase.stock, 7)
+        self.assertEqual(self.mug.stock, 6)
+    
+    @patch('stripe.Refund.list')
+    @patch('stripe.Webhook.construct_event')
+    def test_webhook_lists_refunds_when_not_included(self, mock_construct, mock_list):
+        """Test que si el Charge no trae refunds se listan desde Stripe."""
+        mock_list.return_value.auto_paging_iter.return_value = iter([
+            self.stripe_refund('re_1', 4000, items=f'{self.mug_item.id}:1'),
+        ])
+        
+        self.post_event(mock_construct, 'charge.refunded', {
+            'id': 'ch_test123',
+            'payment_intent': 'pi_test123',
+        })
+        
+        mock_list.assert_called_once()
+        self.mug_item.refresh_from_db()
+        self.assertEqual(self.mug_item.refunded_quantity, 1)
+    
+    @patch('stripe.Webhook.construct_event')
+    def test_dispute_won_restores_payment_status(self, mock_construct):
+        """Test que una disputa ganada devuelve el pago a su estado anterior."""
+        dispute = {
+            'id': 'dp_1',
+            'payment_intent': 'pi_test123',
+            'amount': 10000,
+            'reason': 'fraudulent',
+            'status': 'needs_response',
+        }
+        
+        self.post_event(mock_construct, 'charge.dispute.created', dispute)
+        
+        self.payment.refresh_from_db()
+        self.order.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.DISPUTED)
+        self.assertEqual(self.order.payment_status, PaymentStatus.DISPUTED)
+        
+        self.post_event(mock_construct, 'charge.dispute.closed', {**dispute, 'status': 'won'})
+        
+        self.payment.refresh_from_db()
+        self.order.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.SUCCEEDED)
+        self.assertEqual(self.order.payment_status, PaymentStatus.SUCCEEDED)
+        self.assertEqual(PaymentDispute.objects.get().status, 'won')
+    
+    @patch('stripe.Webhook.construct_event')
+    def test_dispute_lost_refunds_without_restock(self, mock_construct):
+        """Test que una disputa perdida se registra como reembolso sin tocar stock."""
+        dispute = {
+            'id': 'dp_1',
+            'payment_intent': 'pi_test123',
+            'amount': 10000,
+            'reason': 'product_not_received',
+            'status': 'lost',
+        }
+        
+        self.post_event(mock_construct, 'charge.dispute.closed', dispute)
+        
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.REFUNDED)
+        self.assertEqual(self.payment.refunded_amount, Decimal('100.00'))
+        
+        self.vase.refresh_from_db()
+        self.assertEqual(self.vase.stock, 5)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, OrderStatus.PROCESSING)
+    
+    @patch('stripe.Refund.create')
+    def test_admin_refund_items_endpoint(self, mock_create):
+        """Test que un admin reembolsa unidades concretas desde la API."""
+        mock_create.return_value = self.stripe_refund(
+            're_api', 4000, items=f'{self.mug_item.id}:1'
+        )
+        self.client.force_authenticate(user=self.admin)
+        
+        url = reverse('payment-refund', args=[self.payment.id])
+        response = self.client.post(
+            url,
+            {'items': [{'order_item': self.mug_item.id, 'quantity': 1}]},
+            format='json',
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['status'], 'succeeded')
+        
+        call_kwargs = mock_create.call_args[1]
+        self.assertEqual(call_kwargs['amount'], 4000)
+        self.assertEqual(call_kwargs['metadata']['items'], f'{self.mug_item.id}:1')
+        
+        self.mug.refresh_from_db()
+        self.assertEqual(self.mug.stock, 6)
+    
+    def test_refund_endpoint_validates_quantities(self):
+        """Test que no se pueden reembolsar más unidades de las compradas."""
+        self.client.force_authenticate(user=self.admin)
+        
+        url = reverse('payment-refund', args=[self.payment.id])
+        response = self.client.post(
+            url,
+            {'items': [{'order_item': self.mug_item.id, 'quantity': 2}]},
+            format='json',
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_refund_endpoint_requires_admin(self):
+        """Test que los artesanos no pueden reembolsar."""
+        self.client.force_authenticate(user=self.user)
+        
+        url = reverse('payment-refund', args=[self.payment.id])
+        response = self.client.post(url, {}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    @patch('stripe.Refund.create')
+    def test_bulk_refund_payments(self, mock_create):
+        """Test del reembolso masivo: ignora no reembolsables y reporta errores."""
+        import stripe
+        
+        other_order = Order.objects.create(
+            customer_email='other@test.com',
+            customer_name='Other',
+            shipping_address='Test',
+            shipping_city='Maó',
+            shipping_postal_code='07700',
+            total_amount=Decimal('20.00'),
+        )
+        failing = Payment.objects.create(
+            order=other_order,
+            artisan=self.user,
+            amount=Decimal('20.00'),
+            marketplace_fee=Decimal('2.00'),
+            artisan_amount=Decimal('18.00'),
+            status=PaymentStatus.SUCCEEDED,
+            stripe_payment_intent_id='pi_failing',
+        )
+        pending_order = Order.objects.create(
+            customer_email='pending@test.com',
+            customer_name='Pending',
+            shipping_address='Test',
+            shipping_city='Maó',
+            shipping_postal_code='07700',
+            total_amount=Decimal('20.00'),
+        )
+        Payment.objects.create(
+            order=pending_order,
+            artisan=self.user,
+            amount=Decimal('20.00'),
+            marketplace_fee=Decimal('2.00'),
+            artisan_amount=Decimal('18.00'),
+            stripe_payment_intent_id='pi_pending',
+        )
+        
+        def create_refund(**kwargs):
+            if kwargs['payment_intent'] == 'pi_failing':
+                raise stripe.InvalidRequestError('Charge already refunded', None)
+            return self.stripe_refund('re_bulk', kwargs['amount'])
+        mock_create.side_effect = create_refund
+        
+        refunds, failed = refund_payments(
+            Payment.objects.select_related('order'), requested_by=self.admin
+        )
+        
+        self.assertEqual(mock_create.call_count, 2)
+        self.assertEqual(len(refunds), 1)
+        self.assertEqual([payment for payment, _ in failed], [failing])
+        
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.REFUNDED)
+        self.assertEqual(Refund.objects.get().requested_by, self.admin)
+    
+    @patch('stripe.Refund.create')
+    def test_bulk_refund_continues_after_unexpected_error(self, mock_create):
+        """Test que un error que no es de Stripe no interrumpe el resto de reembolsos."""
+        other_order = Order.objects.create(
+            customer_email='other@test.com',
+            customer_name='Other',
+            shipping_address='Test',
+            shipping_city='Maó',
+            shipping_postal_code='07700',
+            total_amount=Decimal('20.00'),
+        )
+        failing = Payment.objects.create(
+            order=other_order,
+            artisan=self.user,
+            amount=Decimal('20.00'),
+            marketplace_fee=Decimal('2.00'),
+            artisan_amount=Decimal('18.00'),
+            status=PaymentStatus.SUCCEEDED,
+            stripe_payment_intent_id='pi_failing',
+        )
+        
+        def create_refund(**kwargs):
+            if kwargs['payment_intent'] == 'pi_failing':
+                raise ValueError('unexpected response')
+            return self.stripe_refund('re_bulk', kwargs['amount'])
+        mock_create.side_effect = create_refund
+        
+        # Sin select_related: los pedidos se cargan antes de repartir el trabajo
+        refunds, failed = refund_payments(list(Payment.objects.all()), requested_by=self.admin)
+        
+        self.assertEqual(len(refunds), 1)
+        self.assertEqual(failed, [(failing, 'unexpected response')])
+        order_numbers = {call.kwargs['metadata']['order_number'] for call in mock_create.call_args_list}
+        self.assertEqual(order_numbers, {self.order.order_number, other_order.order_number})
+
+
+class FeeEngineTests(TestCase):
+    """
+    Tests para el baremo de comisiones (FeeRule) y su tabla en memoria.
+    """
+    
+    def setUp(self):
+        """Configuración inicial."""
+        invalidate_fee_schedule()
+        self.addCleanup(invalidate_fee_schedule)
+        
+        self.user = User.objects.create_user(
+            username='artisan',
+            email='artist@test.com',
+            password='test123',
+            role='artisan'
+        )
+        self.other = User.objects.create_user(
+            username='other',
+            email='other@test.com',
+            password='test123',
+            role='artisan'
+        )
+        
+        self.jewel = Product.objects.create(
+            artisan=self.user,
+            name='Anillo',
+            description='Test',
+            category='jewelry',
+            price=Decimal('60.00'),
+            stock=5,
+        )
+        self.bowl = Product.objects.create(
+            artisan=self.user,
+            name='Cuenco',
+            description='Test',
+            category='ceramics',
+            price=Decimal('40.00'),
+            stock=5,
+        )
+    
+    def create_order(self, lines):
+        """Helper: pedido con líneas [(producto, cantidad)]."""
+        order = Order.objects.create(
+            customer_email='test@test.com',
+            customer_name='Test',
+            shipping_address='Test',
+            shipping_city='Test',
+            shipping_postal_code='12345',
+            total_amount=sum((product.price * quantity for product, quantity in lines), Decimal('0')),
+        )
+        for product, quantity in lines:
+            OrderItem.objects.create(
+                order=order,
+                product=product,
+                artisan=self.user,
+                product_name=product.name,
+                product_price=product.price,
+                quantity=quantity,
+            )
+        return order
+    
+    def test_fee_cents_bankers_rounding(self):
+        """Test que los medios céntimos se redondean al par."""
+        self.assertEqual(fee_cents(25, Decimal('10')), 2)
+        self.assertEqual(fee_cents(35, Decimal('10')), 4)
+        self.assertEqual(fee_cents(1999, Decimal('12.5')), 250)
+    
+    def test_default_percent_without_rules(self):
+        """Test que sin reglas se usa MARKETPLACE_FEE_PERCENT."""
+        schedule = get_fee_schedule()
+        self.assertEqual(schedule.percent_for(self.user.id, 'ceramics', 10000), Decimal('10.0'))
+    
+    def test_rule_precedence_and_tiers(self):
+        """Test precedencia artesano+categoría > artesano > categoría > global, y tramos."""
+        FeeRule.objects.create(percent=Decimal('12.00'))
+        FeeRule.objects.create(category='jewelry', percent=Decimal('15.00'))
+        FeeRule.objects.create(artisan=self.user, percent=Decimal('8.00'))
+        FeeRule.objects.create(artisan=self.user, category='jewelry', percent=Decimal('9.00'))
+        FeeRule.objects.create(
+            artisan=self.user, category='jewelry', min_amount=Decimal('500.00'), percent=Decimal('6.00')
+        )
+        
+        schedule = get_fee_schedule()
+        
+        self.assertEqual(schedule.percent_for(self.user.id, 'jewelry', 10000), Decimal('9.00'))
+        self.assertEqual(schedule.percent_for(self.user.id, 'jewelry', 50000), Decimal('6.00'))
+        self.assertEqual(schedule.percent_for(self.user.id, 'ceramics', 10000), Decimal('8.00'))
+        self.assertEqual(schedule.percent_for(self.other.id, 'jewelry', 10000), Decimal('15.00'))
+        self.assertEqual(schedule.percent_for(self.other.id, 'ceramics', 10000), Decimal('12.00'))
+    
+    def test_schedule_is_cached_and_invalidated_on_change(self):
+        """Test que la tabla no consulta la BD hasta que cambia una regla."""
+        rule = FeeRule.objects.create(percent=Decimal('12.00'))
+        get_fee_schedule()
+        
+        with self.assertNumQueries(0):
+            schedule = get_fee_schedule()
+        self.assertEqual(schedule.percent_for(None, '', 100), Decimal('12.00'))
+        
+        rule.percent = Decimal('20.00')
+        rule.save()
+        
+        with self.assertNumQueries(1):
+            schedule = get_fee_schedule()
+        self.assertEqual(schedule.percent_for(None, '', 100), Decimal('20.00'))
+        
+        rule.delete()
+        self.assertEqual(get_fee_schedule().percent_for(None, '', 100), Decimal('10.0'))
+    
+    def test_schedule_sees_rule_changes_from_other_processes(self):
+        """Test que un cambio que no invalidó esta cache se ve al caducar la tabla."""
+        rule = FeeRule.objects.create(percent=Decimal('12.00'))
+        get_fee_schedule()
+        
+        # Cambio hecho en otro proceso: su invalidación no llega a esta cache
+        FeeRule.objects.filter(pk=rule.pk).update(
+            percent=Decimal('20.00'), updated_at=timezone.now() + timedelta(seconds=1)
+        )
+        
+        with override_settings(FEE_SCHEDULE_MAX_AGE=3600), self.assertNumQueries(0):
+            self.assertEqual(get_fee_schedule().percent_for(None, '', 100), Decimal('12.00'))
+        
+        with override_settings(FEE_SCHEDULE_MAX_AGE=0):
+            # Huella + recarga
+            with self.assertNumQueries(2):
+                self.assertEqual(get_fee_schedule().percent_for(None, '', 100), Decimal('20.00'))
+            # Sin cambios: solo la huella
+            with self.assertNumQueries(1):
+                get_fee_schedule()
+            
+            FeeRule.objects.filter(pk=rule.pk)._raw_delete(FeeRule.objects.db)
+            self.assertEqual(get_fee_schedule().percent_for(None, '', 100), Decimal('10.0'))
+    
+    def test_calculate_fees_per_line_category(self):
+        """Test que la comisión del pago es la suma de la de cada línea."""
+        FeeRule.objects.create(category='jewelry', percent=Decimal('15.00'))
+        order = self.create_order([(self.jewel, 1), (self.bowl, 1)])
+        
+        payment = Payment(order=order, artisan=self.user, amount=Decimal('100.00'))
+        payment.calculate_fees()
+        
+        # 60.00 al 15% + 40.00 al 10%
+        self.assertEqual(payment.marketplace_fee, Decimal('13.00'))
+        self.assertEqual(payment.artisan_amount, Decimal('87.00'))
+    
+    @patch('stripe.PaymentIntent.create')
+    def test_checkout_sends_rounded_cents(self, mock_create):
+        """Test que el PaymentIntent recibe céntimos redondeados, no truncados."""
+        FeeRule.objects.create(percent=Decimal('12.50'))
+        profile = self.user.artisan_profile
+        profile.stripe_account_id = 'acct_test123'
+        profile.stripe_charges_enabled = True
+        profile.stripe_payouts_enabled = True
+        profile.stripe_onboarding_completed = True
+        profile.stripe_account_status = StripeAccountStatus.ACTIVE
+        profile.save()
+        
+        cheap = Product.objects.create(
+            artisan=self.user,
+            name='Imán',
+            description='Test',
+            category='ceramics',
+            price=Decimal('0.99'),
+            stock=5,
+        )
+        order = self.create_order([(cheap, 1)])
+        mock_create.return_value = MagicMock(id='pi_test', client_secret='secret')
+        
+        response = APIClient().post(
+            reverse('payment-create-checkout-session'),
+            {'order_id': order.id},
+            format='json',
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        call_kwargs = mock_create.call_args[1]
+        self.assertEqual(call_kwargs['amount'], 99)
+        # 99 * 12.5% = 12.375 céntimos -> 12
+        self.assertEqual(call_kwargs['application_fee_amount'], 12)
+    
+    def test_recompute_fees_command(self):
+        """Test que el recálculo por lotes actualiza solo los pagos pendientes que cambian."""
+        payments = []
+        for i in range(5):
+            order = self.create_order([(self.jewel, 1)])
+            payment = Payment(order=order, artisan=self.user, amount=Decimal('60.00'))
+            payment.calculate_fees()
+            payment.save()
+            payments.append(payment)
+        
+        Payment.objects.filter(pk=payments[0].pk).update(status=PaymentStatus.SUCCEEDED)
+        FeeRule.objects.create(category='jewelry', percent=Decimal('15.00'))
+        
+        out = StringIO()
+        # Reglas + 2 lotes x (pagos + líneas + bulk_update)
+        with self.assertNumQueries(7):
+            call_command('recompute_fees', '--batch-size', '3', stdout=out)
+        
+        self.assertIn('4 pago(s) actualizados', out.getvalue())
+        
+        fees = dict(Payment.objects.values_list('id', 'marketplace_fee'))
+        self.assertEqual(fees[payments[0].pk], Decimal('6.00'))
+        self.assertEqual(fees[payments[1].pk], Decimal('9.00'))
+        
+        payments[1].refresh_from_db()
+        self.assertEqual(payments[1].artisan_amount, Decimal('51.00'))
+    
+    def test_recompute_fees_dry_run(self):
+        """Test que --dry-run no guarda cambios."""
+        order = self.create_order([(self.jewel, 1)])
+        payment = Payment(order=order, artisan=self.user, amount=Decimal('60.00'))
+        payment.calculate_fees()
+        payment.save()
+        FeeRule.objects.create(category='jewelry', percent=Decimal('15.00'))
+        
+        out = StringIO()
+        call_command('recompute_fees', '--dry-run', stdout=out)
+        
+        self.assertIn('3.00 EUR', out.getvalue())
+        payment.refresh_from_db()
+        self.assertEqual(payment.marketplace_fee, Decimal('6.00'))
+
+
+class AsyncStripeEndpointsTests(TestCase):
+    """
+    Tests para las versiones async (ASGI) de los endpoints que llaman a Stripe.
+    """
+    
+    def setUp(self):
+        """Artesano con token JWT y un pedido listo para pagar."""
+        self.user = User.objects.create_user(
+            username='artisan',
+            email='artist@test.com',
+            password='test123',
+            role='artisan'
+        )
+        self.artist = self.user.artisan_profile
+        
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {'Authorization': f'Bearer {token}'}
+        
+        self.product = Product.objects.create(
+            artisan=self.user,
+            name='Test Product',
+            description='Test description',
+            price=Decimal('50.00'),
+            stock=10,
+        )
+        self.order = Order.objects.create(
+            customer_email='customer@test.com',
+            customer_name='Test Customer',
+            shipping_address='Test Street 123',
+            shipping_city='Maó',
+            shipping_postal_code='07700',
+            total_amount=Decimal('50.00'),
+        )
+        OrderItem.objects.create(
+            order=self.order,
+            product=self.product,
+            artisan=self.user,
+            product_name=self.product.name,
+            product_price=self.product.price,
+            quantity=1,
+        )
+    
+    def activate_stripe(self):
+        """Helper: deja al artesano listo para recibir pagos."""
+        self.artist.stripe_account_id = 'acct_test123'
+        self.artist.stripe_account_status = StripeAccountStatus.ACTIVE
+        self.artist.stripe_charges_enabled = True
+        self.artist.stripe_payouts_enabled = True
+        self.artist.stripe_onboarding_completed = True
+        self.artist.save()
+    
+    @patch('stripe.AccountLink.create_async', new_callable=AsyncMock)
+    @patch('stripe.Account.create_async', new_callable=AsyncMock)
+    async def test_start_onboarding(self, mock_account, mock_link):
+        """Test que el onboarding async crea la cuenta y el link."""
+        mock_account.return_value = MagicMock(id='acct_async')
+        mock_link.return_value = MagicMock(url='https://connect.stripe.com/setup/async')
+        
+        response = await self.async_client.post(
+            reverse('async-stripe-connect-onboarding'),
+            {
+                'refresh_url': 'http://localhost:3000/onboarding/refresh',
+                'success_url': 'http://localhost:3000/onboarding/success',
+            },
+            content_type='application/json',
+            headers=self.auth,
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['onboarding_url'], 'https://connect.stripe.com/setup/async')
+        self.assertEqual(mock_account.call_args[1]['email'], 'artist@test.com')
+        
+        await self.artist.arefresh_from_db()
+        self.assertEqual(self.artist.stripe_account_id, 'acct_async')
+    
+    async def test_onboarding_requires_urls(self):
+        """Test que faltan refresh_url y success_url."""
+        response = await self.async_client.post(
+            reverse('async-stripe-connect-onboarding'),
+            {},
+            content_type='application/json',
+            headers=self.auth,
+        )
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json())
+    
+    async def test_requires_authentication(self):
+        """Test que sin token se responde 401 y con token inválido también."""
+        url = reverse('async-stripe-connect-account-status')
+        
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 401)
+        
+        response = await self.async_client.get(url, headers={'Authorization': 'Bearer invalid'})
+        self.assertEqual(response.status_code, 401)
+    
+    async def test_requires_artisan(self):
+        """Test que un usuario sin perfil de artesano recibe 403."""
+        customer = await User.objects.acreate(
+            username='customer',
+            email='customer@test.com',
+            role='customer'
+        )
+        refresh = await sync_to_async(RefreshToken.for_user)(customer)
+        
+        response = await self.async_client.get(
+            reverse('async-stripe-connect-account-status'),
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+        )
+        
+        self.assertEqual(response.status_code, 403)
+    
+    @patch('stripe.Account.retrieve_async', new_callable=AsyncMock)
+    async def test_account_status_updates_fields(self, mock_retrieve):
+        """Test que account-status async actualiza el perfil."""
+        self.artist.stripe_account_id = 'acct_test123'
+        await self.artist.asave()
+        mock_retrieve.return_value = MagicMock(
+            charges_enabled=True,
+            payouts_enabled=True,
+            details_submitted=True,
+        )
+        
+        response = await self.async_client.get(
+            reverse('async-stripe-connect-account-status'),
+            headers=self.auth,
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'active')
+        
+        await self.artist.arefresh_from_db()
+        self.assertTrue(self.artist.stripe_onboarding_completed)
+        self.assertEqual(self.artist.stripe_account_status, StripeAccountStatus.ACTIVE)
+    
+    @patch('stripe.PaymentIntent.create_async', new_callable=AsyncMock)
+    async def test_create_checkout_session(self, mock_create):
+        """Test que el checkout async crea el Payment y el PaymentIntent."""
+        await sync_to_async(self.activate_stripe)()
+        mock_create.return_value = MagicMock(id='pi_async', client_secret='pi_async_secret')
+        
+        response = await self.async_client.post(
+            reverse('async-payment-create-checkout-session'),
+            {'order_id': self.order.id},
+            content_type='application/json',
+        )
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['client_secret'], 'pi_async_secret')
+        
+        call_kwargs = mock_create.call_args[1]
+        self.assertEqual(call_kwargs['amount'], 5000)
+        self.assertEqual(call_kwargs['application_fee_amount'], 500)
+        self.assertEqual(call_kwargs['transfer_data']['destination'], 'acct_test123')
+        
+        payment = await Payment.objects.aget(order=self.order)
+        self.assertEqual(payment.stripe_payment_intent_id, 'pi_async')
+    
+    @patch('stripe.PaymentIntent.create_async', new_callable=AsyncMock)
+    async def test_create_checkout_session_stripe_error(self, mock_create):
+        """Test que un error de Stripe marca el Payment como FAILED."""
+        import stripe
+        await sync_to_async(self.activate_stripe)()
+        mock_create.side_effect = stripe.APIConnectionError('Network error')
+        
+        response = await self.async_client.post(
+            reverse('async-payment-create-checkout-session'),
+            {'order_id': self.order.id},
+            content_type='application/json',
+        )
+        
+        self.assertEqual(response.status_code, 400)
+        payment = await Payment.objects.aget(order=self.order)
+        self.assertEqual(payment.status, PaymentStatus.FAILED)
+    
+    async def test_create_checkout_session_invalid_order(self):
+        """Test que un pedido inexistente devuelve los errores del serializer."""
+        response = await self.async_client.post(
+            reverse('async-payment-create-checkout-session'),
+            {'order_id': 99999},
+            content_type='application/json',
+        )
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('order_id', response.json())
@@ -5,19 +5,43 @@ URLs para la app payments.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from .views import StripeConnectViewSet, PaymentViewSet, StripeWebhookView
+from .views import StripeConnectViewSet, PaymentViewSet, EarningsViewSet, StripeWebhookView
+from . import async_views
 
 
 # Router para ViewSets
 router = DefaultRouter()
 router.register(r'stripe-connect', StripeConnectViewSet, basename='stripe-connect')
 router.register(r'payments', PaymentViewSet, basename='payment')
+router.register(r'earnings', EarningsViewSet, basename='earnings')
 
 # URLs
 urlpatterns = [
     # Webhook de Stripe (debe estar antes del router)
     path('webhook/stripe/', StripeWebhookView.as_view(), name='stripe-webhook'),
     
+    # Versiones async de los endpoints que llaman a Stripe (servir con ASGI)
+    path(
+        'async/stripe-connect/start-onboarding/',
+        async_views.start_onboarding,
+        name='async-stripe-connect-onboarding',
+    ),
+    path(
+        'async/stripe-connect/refresh-onboarding/',
+        async_views.refresh_onboarding,
+        name='async-stripe-connect-refresh-onboarding',
+    ),
+    path(
+        'async/stripe-connect/account-status/',
+        async_views.account_status,
+        name='async-stripe-connect-account-status',
+    ),
+    path(
+        'async/payments/create-checkout-session/',
+        async_views.create_checkout_session,
+        name='async-payment-create-checkout-session',
+    ),
+    
     # Rutas del router
     path('', include(router.urls)),
 ]
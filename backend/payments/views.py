@@ -6,13 +6,35 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.pagination import CursorPagination
 from django.utils import timezone
 import stripe
 from django.conf import settings
 import logging
 
-from .models import Payment, PaymentStatus
-from .serializers import PaymentSerializer, CheckoutSessionSerializer
+from .models import Payment, PaymentStatus, EarningsEntry, ArtisanMonthlyBalance
+from .serializers import (
+    PaymentSerializer,
+    CheckoutSessionSerializer,
+    RefundRequestSerializer,
+    RefundSerializer,
+    EarningsEntrySerializer,
+    ArtisanMonthlyBalanceSerializer,
+)
+from .ledger import earnings_summary
+from .stripe_connect import (
+    express_account_params,
+    onboarding_link_params,
+    apply_account_status,
+)
+from .refunds import (
+    handle_charge_refunded,
+    handle_dispute_created,
+    handle_dispute_closed,
+    refund_payment,
+    REFUNDABLE_STATUSES,
+)
 from orders.models import OrderStatus
 
 
@@ -98,13 +120,7 @@ class StripeConnectViewSet(viewsets.ViewSet):
             # Crear cuenta Express si no existe
             if not artisan.stripe_account_id:
                 account = stripe.Account.create(
-                    type='express',
-                    country='ES',
-                    email=request.user.email,
-                    capabilities={
-                        'card_payments': {'requested': True},
-                        'transfers': {'requested': True},
-                    },
+                    **express_account_params(request.user.email)
                 )
                 
                 artisan.stripe_account_id = account.id
@@ -114,10 +130,7 @@ class StripeConnectViewSet(viewsets.ViewSet):
             
             # Crear AccountLink para onboarding
             account_link = stripe.AccountLink.create(
-                account=artisan.stripe_account_id,
-                refresh_url=refresh_url,
-                return_url=success_url,
-                type='account_onboarding',
+                **onboarding_link_params(artisan.stripe_account_id, refresh_url, success_url)
             )
             
             # Guardar URL de onboarding (temporal, expira en pocas horas)
@@ -130,7 +143,7 @@ class StripeConnectViewSet(viewsets.ViewSet):
                 'onboarding_url': account_link.url,
             })
             
-        except stripe.error.StripeError as e:
+        except stripe.StripeError as e:
             logger.error(f"Stripe error during onboarding: {str(e)}")
             return Response(
                 {'error': f'Error al crear cuenta en Stripe: {str(e)}'},
@@ -170,10 +183,7 @@ class StripeConnectViewSet(viewsets.ViewSet):
         try:
             # Crear nuevo AccountLink
             account_link = stripe.AccountLink.create(
-                account=artisan.stripe_account_id,
-                refresh_url=refresh_url,
-                return_url=return_url,
-                type='account_onboarding',
+                **onboarding_link_params(artisan.stripe_account_id, refresh_url, return_url)
             )
             
             artisan.stripe_onboarding_url = account_link.url
@@ -185,7 +195,7 @@ class StripeConnectViewSet(viewsets.ViewSet):
                 'onboarding_url': account_link.url,
             })
             
-        except stripe.error.StripeError as e:
+        except stripe.StripeError as e:
             logger.error(f"Stripe error refreshing onboarding: {str(e)}")
             return Response(
                 {'error': f'Error al refrescar link: {str(e)}'},
@@ -223,31 +233,14 @@ class StripeConnectViewSet(viewsets.ViewSet):
             account = stripe.Account.retrieve(artisan.stripe_account_id)
             
             # Actualizar campos en ArtistProfile
-            artisan.stripe_charges_enabled = account.charges_enabled
-            artisan.stripe_payouts_enabled = account.payouts_enabled
-            
-            # Actualizar estado según capabilities
-            if account.charges_enabled and account.payouts_enabled:
-                artisan.stripe_account_status = 'active'
-                artisan.stripe_onboarding_completed = True
-            elif account.details_submitted:
-                # Submitted pero aún no activo (en revisión)
-                artisan.stripe_account_status = 'pending'
-            else:
-                artisan.stripe_account_status = 'pending'
-            
+            account_status = apply_account_status(artisan, account)
             artisan.save()
             
             logger.info(f"Updated account status for artisan {artisan.id}")
             
-            return Response({
-                'status': artisan.stripe_account_status,
-                'charges_enabled': artisan.stripe_charges_enabled,
-                'payouts_enabled': artisan.stripe_payouts_enabled,
-                'details_submitted': account.details_submitted,
-            })
+            return Response(account_status)
             
-        except stripe.error.StripeError as e:
+        except stripe.StripeError as e:
             logger.error(f"Stripe error checking account status: {str(e)}")
             return Response(
                 {'error': f'Error al verificar estado: {str(e)}'},
@@ -267,6 +260,7 @@ class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
     - GET /api/v1/payments/payments/ - Lista pagos (filtrados por usuario)
     - GET /api/v1/payments/payments/:id/ - Detalle de pago
     - POST /api/v1/payments/payments/create-checkout-session/ - Crear sesión checkout
+    - POST /api/v1/payments/payments/:id/refund/ - Reembolsar (solo admins)
     """
     
     queryset = Payment.objects.select_related('order', 'artisan').all()
@@ -288,7 +282,8 @@ class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
             return self.queryset
         
         if hasattr(user, 'artisan_profile'):
-            return self.queryset.filter(artisan=user.artisan_profile)
+            # Payment.artisan apunta a User, no a ArtisanProfile
+            return self.queryset.filter(artisan=user)
         
         # Otros usuarios no ven nada
         return Payment.objects.none()
@@ -320,6 +315,137 @@ class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
         logger.info(f"Created checkout session for order {request.data.get('order_id')}")
         
         return Response(result, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def refund(self, request, pk=None):
+        """
+        Reembolsa un pago entero o algunas unidades de sus artículos (solo admins).
+        
+        Body params:
+            items (list, opcional): [{'order_item': 12, 'quantity': 1}, ...]
+                Si se omite se reembolsa todo lo pendiente.
+        
+        Returns:
+            201: Reembolso (succeeded, o pending hasta que llegue el webhook)
+            400: Si el pago no admite reembolsos o los artículos no son válidos
+            502: Si Stripe rechaza el reembolso
+        """
+        payment = self.get_object()
+        
+        if payment.status not in REFUNDABLE_STATUSES or payment.refundable_amount <= 0:
+            return Response(
+                {'error': 'Este pago no admite reembolsos.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = RefundRequestSerializer(data=request.data, context={'payment': payment})
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            refund = refund_payment(
+                payment,
+                items=serializer.validated_data.get('items') or None,
+                requested_by=request.user,
+            )
+        except stripe.StripeError as e:
+            logger.error(f"Stripe refund failed for payment {payment.id}: {str(e)}")
+            return Response(
+                {'error': f'Error al reembolsar en Stripe: {str(e)}'},
+                status=status.HTTP_502_BAD_GATEWAY
+            )
+        
+        return Response(RefundSerializer(refund).data, status=status.HTTP_201_CREATED)
+
+
+class EarningsEntryPagination(CursorPagination):
+    """
+    Paginación por cursor para el libro de ganancias.
+    
+    Evita el COUNT(*) y el OFFSET de PageNumberPagination, que crecen
+    con el número de movimientos del artesano.
+    """
+    page_size = 50
+    ordering = ('-created_at', '-id')
+
+
+class EarningsViewSet(viewsets.GenericViewSet):
+    """
+    ViewSet con las ganancias de un artesano.
+    
+    - Artesanos ven solo sus ganancias
+    - Admins pueden consultar las de cualquier artesano con ?artisan=<user_id>
+    
+    Endpoints:
+    - GET /api/v1/payments/earnings/ - Totales y saldos mensuales
+    - GET /api/v1/payments/earnings/entries/ - Movimientos del libro (paginado por cursor)
+    """
+    
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = EarningsEntrySerializer
+    pagination_class = EarningsEntryPagination
+    
+    def get_artisan_id(self) -> int:
+        """
+        Retorna el ID del artesano (User) cuyas ganancias se consultan.
+        
+        Raises:
+            PermissionDenied: Si el usuario no es artesano ni admin
+        """
+        user = self.request.user
+        
+        if user.is_staff or user.is_superuser:
+            artisan_id = self.request.query_params.get('artisan')
+            if artisan_id and artisan_id.isdigit():
+                return int(artisan_id)
+        
+        if hasattr(user, 'artisan_profile'):
+            return user.id
+        
+        raise PermissionDenied('Solo los artesanos tienen ganancias.')
+    
+    def get_queryset(self):
+        """Movimientos del libro del artesano (índice artisan, -created_at)."""
+        return EarningsEntry.objects.filter(
+            artisan_id=self.get_artisan_id()
+        ).select_related('payment__order')
+    
+    def list(self, request):
+        """
+        Retorna los totales y el desglose mensual de ganancias.
+        
+        Una sola query sobre ArtisanMonthlyBalance (una fila por mes),
+        independiente del número de pagos del artesano.
+        
+        Returns:
+            200: {
+                'totals': {'gross_amount', 'fees_amount', 'refunded_amount',
+                           'transferred_amount', 'net_amount', 'payments_count'},
+                'months': [{'month': '2025-10-01', ...}, ...]
+            }
+        """
+        balances = list(
+            ArtisanMonthlyBalance.objects.filter(artisan_id=self.get_artisan_id())
+        )
+        
+        totals = earnings_summary(balances)
+        
+        return Response({
+            'totals': {
+                key: str(value) if key != 'payments_count' else value
+                for key, value in totals.items()
+            },
+            'months': ArtisanMonthlyBalanceSerializer(balances, many=True).data,
+        })
+    
+    @action(detail=False, methods=['get'])
+    def entries(self, request):
+        """
+        Lista los movimientos del libro de ganancias, del más reciente al más antiguo.
+        """
+        queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 class StripeWebhookView(APIView):
@@ -329,7 +455,9 @@ class StripeWebhookView(APIView):
     Stripe envía eventos cuando ocurren acciones importantes:
     - payment_intent.succeeded: Pago completado
     - payment_intent.payment_failed: Pago fallido
-    - charge.refunded: Pago reembolsado
+    - charge.refunded: Pago reembolsado (total o parcial)
+    - charge.dispute.created: Disputa abierta por el cliente
+    - charge.dispute.closed: Disputa resuelta (ganada o perdida)
     
     IMPORTANTE: Verifica la firma del webhook para seguridad.
     Los webhooks son la única fuente de verdad confiable para
@@ -379,7 +507,7 @@ class StripeWebhookView(APIView):
                 {'error': 'Invalid payload'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        except stripe.error.SignatureVerificationError as e:
+        except stripe.SignatureVerificationError as e:
             # Firma inválida
             logger.error(f"Invalid signature: {str(e)}")
             return Response(
@@ -397,6 +525,15 @@ class StripeWebhookView(APIView):
         elif event_type == 'payment_intent.payment_failed':
             self._handle_payment_failed(event_data)
         
+        elif event_type == 'charge.refunded':
+            handle_charge_refunded(event_data)
+        
+        elif event_type == 'charge.dispute.created':
+            handle_dispute_created(event_data)
+        
+        elif event_type == 'charge.dispute.closed':
+            handle_dispute_closed(event_data)
+        
         # Retornar 200 para confirmar recepción
         return Response({'status': 'received'}, status=status.HTTP_200_OK)
     
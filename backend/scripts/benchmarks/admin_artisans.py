@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+"""
+Benchmark: listado de artesanos del panel de admin.
+
+Crea N artesanos, algunos con miles de obras, productos y ventas, y
+compara la primera página del listado (20 artesanos) con:
+- Los contadores anteriores: Count('works'/'products'/'sales', distinct=True)
+  en una sola query (JOIN de las tres tablas y GROUP BY)
+- AdminArtisanViewSet.get_queryset (un COUNT correlacionado por tabla)
+
+También mide la búsqueda (`?search=`, icontains en username/email), que
+usa los índices de trigramas de accounts/0002_user_search_trgm si la base
+de datos tiene pg_trgm.
+
+Todo se hace dentro de una transacción que se deshace al final: no deja
+datos en la base de datos.
+
+El listado anterior crece con obras × productos × ventas de cada
+artesano (con 100 de cada: ~1M filas por artesano antes de agrupar), así
+que solo se mide con --legacy y pocas filas.
+
+Uso:
+    python scripts/benchmarks/admin_artisans.py
+    python scripts/benchmarks/admin_artisans.py --artisans 5000 --prolific 5 --rows 3000
+    python scripts/benchmarks/admin_artisans.py --rows 100 --legacy
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import User, UserRole
+from admin_panel.views import AdminArtisanViewSet
+from artisans.models import ArtisanProfile
+from orders.models import Order, OrderItem, OrderStatus
+from payments.models import PaymentStatus
+from shop.models import Product
+from works.models import Work
+
+
+class Rollback(Exception):
+    """Deshace la transacción del benchmark."""
+
+
+def legacy_queryset():
+    """Contadores anteriores (JOIN + COUNT DISTINCT)."""
+    return User.objects.filter(role='artisan').annotate(
+        works_count=Count('works', distinct=True),
+        products_count=Count('products', distinct=True),
+        completed_orders_count=Count(
+            'sales',
+            filter=Q(sales__order__status='completed'),
+            distinct=True
+        )
+    ).select_related('artisan_profile').order_by('-date_joined')
+
+
+def admin_queryset(**params):
+    """Queryset actual del ViewSet para unos parámetros de la URL."""
+    view = AdminArtisanViewSet()
+    view.request = Request(APIRequestFactory().get('/api/v1/admin/artisans/', params))
+    return view.get_queryset()
+
+
+def seed(artisans: int, prolific: int, rows: int) -> None:
+    """
+    Crea `artisans` artesanos (bulk, sin signals); los `prolific` primeros
+    con `rows` obras, productos y ventas cada uno.
+    """
+    rng = random.Random(42)
+    users = User.objects.bulk_create([
+        User(
+            username=f'benchmark-admin-{i}',
+            email=f'benchmark-admin-{i}@mitaller.art',
+            role=UserRole.ARTISAN,
+            is_approved=rng.random() > 0.2,
+            password='!',
+        )
+        for i in range(artisans)
+    ], batch_size=1000)
+
+    ArtisanProfile.objects.bulk_create([
+        ArtisanProfile(user=user, slug=user.username, display_name=user.username)
+        for user in users
+    ], batch_size=1000)
+
+    for index, user in enumerate(users[:prolific]):
+        Work.objects.bulk_create([
+            Work(artisan=user, title=f'Obra {i}', display_order=i + 1)
+            for i in range(rows)
+        ], batch_size=1000)
+
+        products = Product.objects.bulk_create([
+            Product(artisan=user, name=f'Producto {i}', price=Decimal('20.00'), stock=5)
+            for i in range(rows)
+        ], batch_size=1000)
+
+        orders = Order.objects.bulk_create([
+            Order(
+                order_number=f'ORD-BENCH-{index}-{i}',
+                customer_email='comprador@mitaller.art',
+                customer_name='Comprador',
+                shipping_address='Calle Test 123',
+                shipping_city='Maó',
+                shipping_postal_code='07701',
+                status=rng.choice(OrderStatus.values),
+                payment_status=rng.choice(PaymentStatus.values),
+                total_amount=Decimal('20.00'),
+            )
+            for i in range(rows)
+        ], batch_size=1000)
+
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=product,
+                artisan=user,
+                product_name=product.name,
+                product_price=product.price,
+                quantity=1,
+                subtotal=product.price,
+            )
+            for order, product in zip(orders, products)
+        ], batch_size=1000)
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            for table in ('accounts_user', 'works_work', 'shop_product', 'orders_orderitem'):
+                cursor.execute(f'ANALYZE {table}')
+
+
+def measure(label: str, queryset, repeat: int) -> None:
+    """Carga la primera página `repeat` veces y muestra tiempo y plan."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        page = list(queryset[:20])
+    elapsed = (time.perf_counter() - start) / repeat
+
+    top = max(page, key=lambda user: user.works_count, default=None)
+    print(f"\n📊 {label}")
+    print(f"   Filas:       {len(page)}")
+    if top:
+        print(f"   Mayor:       {top.username} ({top.works_count} obras, {top.products_count} productos)")
+    print(f"   Tiempo:      {elapsed * 1000:.1f} ms (media de {repeat})")
+    if connection.vendor == 'postgresql':
+        print("   Plan:")
+        for line in queryset[:20].explain(analyze=True).splitlines():
+            print(f"     {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--artisans', type=int, default=2000)
+    parser.add_argument('--prolific', type=int, default=5)
+    parser.add_argument('--rows', type=int, default=2000, help='Obras, productos y ventas por artesano prolífico')
+    parser.add_argument('--search', default='admin-1')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--legacy', action='store_true', help='Medir también el listado anterior (lento)')
+    args = parser.parse_args()
+
+    print(
+        f"🌱 Creando {args.artisans} artesanos "
+        f"({args.prolific} con {args.rows} obras, productos y ventas)..."
+    )
+
+    try:
+        with transaction.atomic():
+            seed(args.artisans, args.prolific, args.rows)
+            # Los prolíficos son los más antiguos: ponerlos en la primera página
+            measure('COUNT correlacionado (actual)', admin_queryset(ordering='date_joined'), args.repeat)
+            measure(f"Búsqueda '{args.search}' (actual)", admin_queryset(search=args.search), args.repeat)
+            if args.legacy:
+                measure('JOIN + COUNT DISTINCT (anterior)', legacy_queryset().order_by('date_joined'), args.repeat)
+            raise Rollback
+    except Rollback:
+        print("\n🧹 Datos del benchmark descartados (rollback)")
+
+
+if __name__ == '__main__':
+    main()
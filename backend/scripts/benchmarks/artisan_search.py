@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Benchmark: búsqueda en el directorio de artesanos.
+
+Crea N perfiles y compara para una misma búsqueda:
+- La búsqueda anterior (SearchFilter: icontains en display_name, bio,
+  craft_type y location, que escanea la tabla entera)
+- artisans.search.trigram_search (similitud de trigramas con índices GIN)
+
+Necesita PostgreSQL con pg_trgm y unaccent (migración
+artisans/0004_trigram_search aplicada).
+
+Todo se hace dentro de una transacción que se deshace al final: no deja
+datos en la base de datos.
+
+Uso:
+    python scripts/benchmarks/artisan_search.py
+    python scripts/benchmarks/artisan_search.py --profiles 20000 --query "ceramicca"
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from accounts.models import User, UserRole
+from artisans.models import ArtisanProfile, CraftType, MenorcaLocation
+from artisans.search import trigram_search, trigram_search_available
+
+
+WORDS = [
+    'cerámica', 'taller', 'joyas', 'madera', 'cuero', 'vidrio', 'textil',
+    'tradicional', 'menorquina', 'torno', 'esmaltes', 'avarcas', 'plata',
+    'artesanal', 'natural', 'diseño', 'forja', 'cestería', 'pintura', 'isla',
+]
+
+
+class Rollback(Exception):
+    """Deshace la transacción del benchmark."""
+
+
+def legacy_search(queryset, query: str):
+    """Búsqueda anterior de SearchFilter (cada término en algún campo)."""
+    for term in query.split():
+        queryset = queryset.filter(
+            Q(display_name__icontains=term) | Q(bio__icontains=term) |
+            Q(craft_type__icontains=term) | Q(location__icontains=term)
+        )
+    return queryset
+
+
+def seed(profiles: int) -> None:
+    """Crea `profiles` artesanos con textos aleatorios (bulk, sin signals)."""
+    rng = random.Random(42)
+    users = User.objects.bulk_create([
+        User(
+            username=f'benchmark-search-{i}',
+            email=f'benchmark-search-{i}@mitaller.art',
+            role=UserRole.ARTISAN,
+            password='!',
+        )
+        for i in range(profiles)
+    ], batch_size=1000)
+
+    ArtisanProfile.objects.bulk_create([
+        ArtisanProfile(
+            user=user,
+            slug=user.username,
+            display_name=' '.join(rng.sample(WORDS, 2)).title(),
+            short_description=' '.join(rng.sample(WORDS, 5)),
+            bio=' '.join(rng.choices(WORDS, k=40)),
+            craft_type=rng.choice(CraftType.values),
+            location=rng.choice(MenorcaLocation.values),
+        )
+        for user in users
+    ], batch_size=1000)
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE artisans_artisanprofile')
+
+
+def measure(label: str, queryset, repeat: int) -> None:
+    """Ejecuta la búsqueda `repeat` veces y muestra resultados, tiempo y plan."""
+    count = queryset.count()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        list(queryset[:20])
+    elapsed = (time.perf_counter() - start) / repeat
+
+    print(f"\n📊 {label}")
+    print(f"   Resultados:  {count}")
+    print(f"   Primeros:    {list(queryset.values_list('display_name', flat=True)[:3])}")
+    print(f"   Tiempo:      {elapsed * 1000:.1f} ms (media de {repeat})")
+    print("   Plan:")
+    for line in queryset[:20].explain(analyze=True).splitlines():
+        print(f"     {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profiles', type=int, default=20000)
+    parser.add_argument('--query', default='ceramicca')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if not trigram_search_available():
+        print("❌ La base de datos no tiene pg_trgm/unaccent (migración artisans/0004_trigram_search)")
+        sys.exit(1)
+
+    print(f"🌱 Creando {args.profiles} perfiles de artesano...")
+
+    try:
+        with transaction.atomic():
+            seed(args.profiles)
+            queryset = ArtisanProfile.objects.all()
+            measure('SearchFilter icontains (anterior)', legacy_search(queryset, args.query), args.repeat)
+            measure('Trigramas (pg_trgm + GIN)', trigram_search(queryset, args.query), args.repeat)
+            raise Rollback
+    except Rollback:
+        print("\n🧹 Datos del benchmark descartados (rollback)")
+
+
+if __name__ == '__main__':
+    main()
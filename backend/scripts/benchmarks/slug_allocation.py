@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Benchmark: asignación de slug con muchas colisiones.
+
+Crea N perfiles con slugs `base`, `base-1` ... `base-(N-1)` y compara:
+- El bucle anterior (una query exists() por sufijo probado)
+- artisans.slugs.allocate_slug (una query con LIKE 'base%')
+
+Todo se hace dentro de una transacción que se deshace al final: no deja
+datos en la base de datos.
+
+Uso:
+    python scripts/benchmarks/slug_allocation.py
+    python scripts/benchmarks/slug_allocation.py --collisions 10000
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db import connection, transaction
+
+from accounts.models import User, UserRole
+from artisans.models import ArtisanProfile
+from artisans.slugs import allocate_slug
+
+
+BASE_SLUG = 'benchmark-slug'
+
+
+class Rollback(Exception):
+    """Deshace la transacción del benchmark."""
+
+
+def legacy_allocate(base: str) -> str:
+    """Bucle anterior de ArtisanProfile.save (una query por intento)."""
+    slug = base
+    counter = 1
+    while ArtisanProfile.objects.filter(slug=slug).exists():
+        slug = f'{base}-{counter}'
+        counter += 1
+    return slug
+
+
+def seed(collisions: int) -> None:
+    """Crea `collisions` artesanos con slugs consecutivos (bulk, sin signals)."""
+    users = User.objects.bulk_create([
+        User(
+            username=f'benchmark-slug-user-{i}',
+            email=f'benchmark-slug-{i}@mitaller.art',
+            role=UserRole.ARTISAN,
+            password='!',
+        )
+        for i in range(collisions)
+    ], batch_size=1000)
+
+    ArtisanProfile.objects.bulk_create([
+        ArtisanProfile(
+            user=user,
+            slug=BASE_SLUG if i == 0 else f'{BASE_SLUG}-{i}',
+            display_name=user.username,
+        )
+        for i, user in enumerate(users)
+    ], batch_size=1000)
+
+
+def measure(label: str, allocate) -> None:
+    """Ejecuta una asignación y muestra slug, queries y tiempo."""
+    queries = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_queries):
+        start = time.perf_counter()
+        slug = allocate(BASE_SLUG)
+        elapsed = time.perf_counter() - start
+
+    print(f"\n📊 {label}")
+    print(f"   Slug:     {slug}")
+    print(f"   Queries:  {queries}")
+    print(f"   Tiempo:   {elapsed * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--collisions', type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"🌱 Creando {args.collisions} perfiles con slug '{BASE_SLUG}[-n]'...")
+
+    try:
+        with transaction.atomic():
+            seed(args.collisions)
+            measure('Bucle exists() (anterior)', legacy_allocate)
+            measure('allocate_slug (una query)', lambda base: allocate_slug(ArtisanProfile, base))
+            raise Rollback
+    except Rollback:
+        print("\n🧹 Datos del benchmark descartados (rollback)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""
+Benchmark: peticiones concurrentes por proceso en los endpoints de Stripe.
+
+Compara el endpoint síncrono (DRF) y el async de account-status, que
+hacen una llamada a Stripe por petición. Las llamadas van contra
+stripe-mock (el stand-in local de Stripe, ver docker-compose.yml), así
+que la latencia medida es la del servidor y no la de la red.
+
+Requisitos:
+1. stripe-mock corriendo:      docker compose up -d stripe-mock
+2. Servidor con UN worker y STRIPE_API_BASE apuntando a stripe-mock:
+
+   # Síncrono (WSGI, un proceso, un hilo)
+   STRIPE_API_BASE=http://localhost:12111 \\
+       gunicorn config.wsgi:application -w 1 -b 0.0.0.0:8000
+
+   # Async (ASGI, un proceso)
+   STRIPE_API_BASE=http://localhost:12111 \\
+       gunicorn config.asgi:application -c config/gunicorn_asgi.py -w 1
+
+Uso:
+    python scripts/benchmarks/stripe_async_capacity.py
+    python scripts/benchmarks/stripe_async_capacity.py --requests 500 --concurrency 50
+    python scripts/benchmarks/stripe_async_capacity.py --mode async
+
+Crea (o reutiliza) un artesano de benchmark con cuenta Stripe para
+obtener un token JWT.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+import httpx
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User, UserRole
+
+
+ENDPOINTS = {
+    'sync': '/api/v1/payments/stripe-connect/account-status/',
+    'async': '/api/v1/payments/async/stripe-connect/account-status/',
+}
+
+BENCHMARK_EMAIL = 'benchmark-artisan@mitaller.art'
+
+
+def get_token() -> str:
+    """Crea el artesano de benchmark si no existe y retorna un access token."""
+    user, created = User.objects.get_or_create(
+        email=BENCHMARK_EMAIL,
+        defaults={
+            'username': 'benchmark-artisan',
+            'role': UserRole.ARTISAN,
+            'is_approved': True,
+        }
+    )
+    if created:
+        print(f"✅ Artesano de benchmark creado: {user.email}")
+
+    artisan = user.artisan_profile
+    if not artisan.stripe_account_id:
+        # stripe-mock acepta cualquier ID de cuenta
+        artisan.stripe_account_id = 'acct_benchmark'
+        artisan.save(update_fields=['stripe_account_id'])
+
+    return str(RefreshToken.for_user(user).access_token)
+
+
+async def run(base_url: str, path: str, token: str, total: int, concurrency: int) -> dict:
+    """
+    Lanza `total` peticiones con como máximo `concurrency` en vuelo.
+
+    Returns:
+        dict: Peticiones correctas, errores, duración y latencias (segundos)
+    """
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={'Authorization': f'Bearer {token}'},
+        limits=limits,
+        timeout=60,
+    ) as client:
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    return {'ok': len(latencies), 'errors': errors, 'elapsed': elapsed, 'latencies': latencies}
+
+
+def report(mode: str, result: dict) -> None:
+    """Imprime throughput y percentiles de latencia."""
+    latencies = sorted(result['latencies'])
+    print(f"\n📊 {mode}")
+    print(f"   Peticiones OK:  {result['ok']}  (errores: {result['errors']})")
+    print(f"   Duración:       {result['elapsed']:.2f}s")
+    print(f"   Throughput:     {result['ok'] / result['elapsed']:.1f} req/s")
+
+    if latencies:
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+        print(f"   Latencia p50:   {statistics.median(latencies) * 1000:.0f} ms")
+        print(f"   Latencia p95:   {p95 * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--mode', choices=['sync', 'async', 'both'], default='both')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args()
+
+    token = get_token()
+    modes = ['sync', 'async'] if args.mode == 'both' else [args.mode]
+
+    print(f"🚀 {args.requests} peticiones, {args.concurrency} concurrentes contra {args.base_url}")
+
+    for mode in modes:
+        result = asyncio.run(
+            run(args.base_url, ENDPOINTS[mode], token, args.requests, args.concurrency)
+        )
+        report(mode, result)
+
+
+if __name__ == '__main__':
+    main()
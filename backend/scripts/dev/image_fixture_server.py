@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+"""
+Servidor local de imágenes de prueba para backfill_image_metadata.
+
+Responde a cualquier ruta con una imagen generada (ver
+images/fixture_server.py), así se puede probar el cálculo de metadatos
+sin descargar de Cloudinary.
+
+Uso:
+    python scripts/dev/image_fixture_server.py --port 8765 --latency 0.2
+    python manage.py backfill_image_metadata --origin http://127.0.0.1:8765 --concurrency 16
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from images.fixture_server import ImageFixtureServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Segundos de espera por petición')
+    args = parser.parse_args()
+
+    server = ImageFixtureServer(args.host, args.port, args.latency)
+    print(f"🖼️  Sirviendo imágenes de prueba en {server.origin} (latencia {args.latency}s)")
+    print("   Ctrl+C para parar")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+        print("\n👋 Servidor parado")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0003_alter_product_options_product_is_featured_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='shop_produc_artisan_258fbc_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['artisan', 'is_active', '-created_at'], name='shop_produc_artisan_54b30c_idx'),
+        ),
+    ]
@@ -184,8 +184,9 @@ class Product(models.Model):
         # Ordenar por destacados primero, luego más recientes
         ordering = ['-is_featured', '-created_at']
         indexes = [
-            # Índice para filtros por artesano y estado
-            models.Index(fields=['artisan', 'is_active']),
+            # Índice para filtros por artesano y estado, y para el listado
+            # público paginado de un artesano (recientes primero)
+            models.Index(fields=['artisan', 'is_active', '-created_at']),
             # Índice para filtros por artesano y categoría
             models.Index(fields=['artisan', 'category']),
             # Índice para listados públicos (activos, recientes primero)
@@ -201,6 +202,23 @@ class Product(models.Model):
         artisan_name = self.artisan.get_full_name() or self.artisan.username
         return f'{artisan_name} - {self.name}'
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Guarda el artesano leído para detectar cambios (ver artisans/signals.py)."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_artisan_id = instance.__dict__.get('artisan_id')
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None) -> None:
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if fields is None or 'artisan' in fields or 'artisan_id' in fields:
+            self._loaded_artisan_id = self.artisan_id
+    
+    def save(self, *args, **kwargs) -> None:
+        """Tras guardar, el artesano guardado pasa a ser el de referencia."""
+        super().save(*args, **kwargs)
+        self._loaded_artisan_id = self.artisan_id
+    
     @property
     def is_available(self) -> bool:
         """
@@ -3,6 +3,8 @@ Serializers para la app shop.
 Maneja la serialización de productos para la API REST.
 """
 from rest_framework import serializers
+
+from images.serializers import ImageMetadataField, ImageMetadataListSerializer, ImageSrcsetField
 from .models import Product, ProductCategory
 
 
@@ -196,15 +198,24 @@ class ProductListSerializer(serializers.ModelSerializer):
     # Campo calculado
     is_available = serializers.ReadOnlyField()
 
+    # Dimensiones y placeholder de las imágenes (una query por listado)
+    image_meta = ImageMetadataField('thumbnail_url', 'images')
+
+    # srcset responsive de la miniatura (solo con ?images=responsive)
+    thumbnail_srcset = ImageSrcsetField('thumbnail_url')
+
     class Meta:
         model = Product
+        list_serializer_class = ImageMetadataListSerializer
         fields = (
             'id',
             'artisan',
             'name',
             'description',
             'thumbnail_url',
+            'thumbnail_srcset',
             'images',
+            'image_meta',
             'category',
             'price',
             'stock',
@@ -9,6 +9,7 @@ from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from accounts.models import User, UserRole
 from artisans.models import ArtisanProfile, CraftType, MenorcaLocation
+from config.metrics import BudgetTestMixin
 from .models import Product, ProductCategory
 
 
@@ -164,7 +165,7 @@ class ProductModelTestCase(TestCase):
         self.assertEqual(products[1].id, product1.id)
 
 
-class ProductAPITestCase(APITestCase):
+class ProductAPITestCase(BudgetTestMixin, APITestCase):
     """
     Tests para la API REST de products.
     Valida endpoints, permisos, filtros y búsqueda.
@@ -278,6 +279,15 @@ class ProductAPITestCase(APITestCase):
         self.assertIn('is_available', response.data)
         self.assertIn('formatted_price', response.data)
     
+    def test_read_within_budget(self):
+        """Test: Listado y detalle dentro del presupuesto de queries, público y del artesano."""
+        detail_url = reverse('product-detail', kwargs={'pk': self.product1.pk})
+        for user in (None, self.artist1_user):
+            with self.subTest(user=user):
+                self.client.force_authenticate(user=user)
+                self.assertWithinBudget(self.client.get(self.list_url))
+                self.assertWithinBudget(self.client.get(detail_url))
+    
     def test_create_product_unauthenticated(self):
         """Test: No se puede crear producto sin autenticación."""
         data = {
@@ -6,6 +6,7 @@ from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
+from config.metrics import Budget
 from .models import Product
 from .serializers import ProductSerializer, ProductListSerializer
 from .permissions import IsArtisanOwnerOrReadOnly
@@ -53,6 +54,12 @@ class ProductViewSet(viewsets.ModelViewSet):
     
     queryset = Product.objects.select_related('artisan', 'artisan__artisan_profile')
     permission_classes = [IsAuthenticatedOrReadOnly, IsArtisanOwnerOrReadOnly]
+
+    # Presupuesto por acción (config/metrics.py): COUNT + página, sin una query por producto
+    performance_budgets = {
+        'list': Budget(queries=3, ms=300),
+        'retrieve': Budget(queries=2, ms=200),
+    }
     
     # Configuración de filtros y búsqueda
     filter_backends = [
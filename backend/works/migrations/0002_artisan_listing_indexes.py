@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('works', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='work',
+            index=models.Index(fields=['artisan', 'is_active', 'display_order'], name='works_work_artisan_5dccac_idx'),
+        ),
+    ]
@@ -127,6 +127,8 @@ class Work(models.Model):
         indexes = [
             # Índice para búsquedas por artesano y orden
             models.Index(fields=['artisan', 'display_order']),
+            # Índice para el listado público paginado de un artesano
+            models.Index(fields=['artisan', 'is_active', 'display_order']),
             # Índice para filtros por categoría
             models.Index(fields=['category']),
             # Índice para obras destacadas
@@ -138,24 +140,35 @@ class Work(models.Model):
         artisan_name = self.artisan.get_full_name() or self.artisan.username
         return f'{artisan_name} - {self.title}'
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Guarda el artesano leído para detectar cambios (ver artisans/signals.py)."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_artisan_id = instance.__dict__.get('artisan_id')
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None) -> None:
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if fields is None or 'artisan' in fields or 'artisan_id' in fields:
+            self._loaded_artisan_id = self.artisan_id
+    
     def save(self, *args, **kwargs) -> None:
         """
         Override save para auto-calcular display_order si no está establecido.
         
-        Si display_order es 0 (valor por defecto), calcula automáticamente
-        el siguiente orden disponible basado en las obras existentes del mismo artesano.
-        Esto asegura que nuevas obras se agreguen al final del portfolio.
+        Si display_order es 0 (valor por defecto), reserva la siguiente
+        posición del artesano con un UPDATE atómico sobre su contador
+        (works/ordering.py), así que las subidas simultáneas no repiten
+        posición. Esto asegura que nuevas obras se agreguen al final del portfolio.
         """
         if self.display_order == 0:
-            # Obtener el max display_order actual para este artesano
-            max_order = Work.objects.filter(artisan=self.artisan).aggregate(
-                models.Max('display_order')
-            )['display_order__max']
-            
-            # Si hay obras existentes, siguiente orden = max + 1, sino = 1
-            self.display_order = (max_order or 0) + 1
+            # Importar aquí para evitar circular imports
+            from .ordering import allocate_positions
+            self.display_order = allocate_positions(self.artisan_id)
         
         super().save(*args, **kwargs)
+        # El artesano guardado pasa a ser el de referencia
+        self._loaded_artisan_id = self.artisan_id
     
     @property
     def total_images(self) -> int:
@@ -0,0 +1,218 @@
+"""
+Ordenación del portfolio de un artesano (drag & drop).
+
+`display_order` usa claves dispersas: al reordenar el portfolio completo
+las obras quedan separadas por ORDER_GAP (1024, 2048, 3072...), así que
+mover una obra entre dos vecinas solo cambia su propia fila (se le asigna
+el punto medio entre ambas).
+
+Cuando entre dos vecinas ya no queda hueco (tras muchos movimientos al
+mismo sitio, o con obras creadas con max + 1) se renumera el portfolio
+entero una vez y se recuperan los huecos.
+
+Todas las escrituras son UPDATE filtrados por el artesano (nunca tocan
+obras de otro) y en lotes de REORDER_BATCH_SIZE filas con CASE, sin
+cargar ni guardar las obras una a una.
+
+Las obras nuevas reciben su posición de `allocate_positions`: un UPDATE
+atómico sobre el contador `ArtisanProfile.last_work_position`. El
+bloqueo de esa fila serializa las subidas simultáneas de un mismo
+artesano, así que dos obras nuevas nunca comparten posición.
+"""
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Work
+
+
+# Separación entre obras consecutivas al renumerar
+ORDER_GAP = 1024
+
+# Filas por UPDATE ... CASE al renumerar
+REORDER_BATCH_SIZE = 500
+
+# Orden del portfolio (el mismo que el listado de obras)
+PORTFOLIO_ORDERING = ('display_order', '-created_at', 'id')
+
+
+def allocate_positions(artisan_id: int, count: int = 1) -> int:
+    """
+    Reserva `count` posiciones consecutivas al final del portfolio.
+
+    Un solo UPDATE sube el contador del perfil por encima tanto de su
+    valor anterior como del mayor display_order existente (obras con
+    orden manual o reordenadas), así que no hace falta rellenarlo.
+
+    Args:
+        artisan_id: ID del User artesano
+        count: Número de posiciones a reservar
+
+    Returns:
+        int: Primera posición reservada (las demás son consecutivas)
+    """
+    # Importar aquí para evitar circular imports
+    from artisans.models import ArtisanProfile
+
+    max_order = Work.objects.filter(
+        artisan_id=OuterRef('user_id')
+    ).order_by().values('artisan_id').annotate(last=Max('display_order')).values('last')
+
+    profile = ArtisanProfile.objects.filter(user_id=artisan_id)
+
+    # El UPDATE bloquea la fila del perfil hasta el final de la transacción
+    with transaction.atomic():
+        updated = profile.update(last_work_position=Greatest(
+            F('last_work_position'), Coalesce(Subquery(max_order), 0)
+        ) + count)
+
+        if updated:
+            last = profile.values_list('last_work_position', flat=True).get()
+        else:
+            # Sin perfil no hay fila que bloquear: max + count
+            last = (Work.objects.filter(artisan_id=artisan_id).aggregate(
+                last=Max('display_order')
+            )['last'] or 0) + count
+
+    return last - count + 1
+
+
+def import_works(artisan, works: list, batch_size: int = REORDER_BATCH_SIZE) -> list:
+    """
+    Crea muchas obras de un artesano de una vez (importaciones, seeders).
+
+    Las obras sin display_order (0) reciben posiciones consecutivas al
+    final del portfolio con una sola reserva. bulk_create no dispara
+    post_save, así que el contador total_works y la cache pública se
+    actualizan aquí.
+
+    Args:
+        artisan: User artesano
+        works: Instancias de Work sin guardar
+        batch_size: Filas por INSERT
+
+    Returns:
+        list: Obras creadas
+    """
+    # Importar aquí para evitar circular imports
+    from artisans.counters import increment_counter
+
+    with transaction.atomic():
+        unordered = [work for work in works if not work.display_order]
+        if unordered:
+            first = allocate_positions(artisan.id, len(unordered))
+            for offset, work in enumerate(unordered):
+                work.display_order = first + offset
+
+        for work in works:
+            work.artisan = artisan
+        created = Work.objects.bulk_create(works, batch_size=batch_size)
+
+        increment_counter(artisan.id, 'total_works', len(created))
+
+    invalidate_portfolio(artisan.id)
+    return created
+
+
+def invalidate_portfolio(artisan_id: int) -> None:
+    """
+    Invalida la cache pública del artesano.
+
+    Los UPDATE masivos no disparan post_save: hay que avisar a mano.
+    """
+    # Importar aquí para evitar circular imports
+    from artisans.cache import invalidate_artisan_cache
+    invalidate_artisan_cache(artisan_id)
+
+
+def apply_order(artisan, order_ids: list[int]) -> int:
+    """
+    Asigna el orden `order_ids` a las obras del artesano.
+
+    Los IDs que no pertenecen al artesano se ignoran.
+
+    Args:
+        artisan: User artesano
+        order_ids: IDs de obras en el nuevo orden
+
+    Returns:
+        int: Número de obras actualizadas
+    """
+    # Un ID repetido se queda con su primera posición
+    positions = {}
+    for work_id in order_ids:
+        positions.setdefault(work_id, (len(positions) + 1) * ORDER_GAP)
+
+    items = list(positions.items())
+    updated = 0
+
+    with transaction.atomic():
+        for start in range(0, len(items), REORDER_BATCH_SIZE):
+            batch = items[start:start + REORDER_BATCH_SIZE]
+            updated += Work.objects.filter(
+                artisan=artisan,
+                id__in=[work_id for work_id, _ in batch],
+            ).update(display_order=Case(
+                *(When(id=work_id, then=Value(order)) for work_id, order in batch),
+                output_field=IntegerField(),
+            ))
+
+    if updated:
+        invalidate_portfolio(artisan.id)
+    return updated
+
+
+def move_work(artisan, work_id: int, before: int = None, after: int = None) -> int | None:
+    """
+    Mueve una obra justo antes o después de otra del mismo artesano.
+
+    Normalmente cuesta 3 queries y actualiza una sola fila; solo si no
+    queda hueco entre las vecinas se renumera el portfolio.
+
+    Args:
+        artisan: User artesano
+        work_id: Obra a mover
+        before: Obra delante de la cual se coloca
+        after: Obra detrás de la cual se coloca
+
+    Returns:
+        int | None: Nuevo display_order, o None si alguna de las obras no
+        existe o no pertenece al artesano
+    """
+    anchor_id = before if before is not None else after
+    portfolio = Work.objects.filter(artisan=artisan)
+
+    with transaction.atomic():
+        orders = dict(portfolio.filter(id__in=[work_id, anchor_id]).values_list('id', 'display_order'))
+        if len(orders) != 2:
+            return None
+
+        anchor_order = orders[anchor_id]
+        others = portfolio.exclude(id__in=[work_id, anchor_id])
+
+        if before is not None:
+            # Hueco entre la obra anterior (o 0) y el ancla
+            low = others.filter(
+                display_order__lte=anchor_order
+            ).order_by('-display_order').values_list('display_order', flat=True).first()
+            low, high = (0 if low is None else low), anchor_order
+        else:
+            # Hueco entre el ancla y la obra siguiente (o el final)
+            high = others.filter(
+                display_order__gte=anchor_order
+            ).order_by('display_order').values_list('display_order', flat=True).first()
+            low, high = anchor_order, (anchor_order + 2 * ORDER_GAP if high is None else high)
+
+        if high - low >= 2:
+            new_order = (low + high) // 2
+            portfolio.filter(id=work_id).update(display_order=new_order)
+            invalidate_portfolio(artisan.id)
+            return new_order
+
+        # Sin hueco: renumerar el portfolio con la obra ya en su sitio
+        ids = list(portfolio.exclude(id=work_id).order_by(*PORTFOLIO_ORDERING).values_list('id', flat=True))
+        position = ids.index(anchor_id) + (0 if before is not None else 1)
+        ids.insert(position, work_id)
+        apply_order(artisan, ids)
+        return (position + 1) * ORDER_GAP
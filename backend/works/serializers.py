@@ -4,6 +4,8 @@ Serializers para crear/actualizar/leer obras
 """
 
 from rest_framework import serializers
+
+from images.serializers import ImageMetadataField, ImageMetadataListSerializer, ImageSrcsetField
 from .models import Work
 
 
@@ -11,27 +13,32 @@ class ArtisanMinimalSerializer(serializers.Serializer):
     """
     Serializer mínimo para artesano (solo info necesaria en obras)
     Lee desde work.artisan (User) -> work.artisan.artisan_profile (ArtisanProfile)
-    """
-    id = serializers.SerializerMethodField()
-    slug = serializers.SerializerMethodField()
-    display_name = serializers.SerializerMethodField()
-    avatar = serializers.SerializerMethodField()
-    
-    def get_id(self, obj):
-        """Obtener ID del perfil de artesano"""
-        return obj.artisan_profile.id if hasattr(obj, 'artisan_profile') else None
     
-    def get_slug(self, obj):
-        """Obtener slug del perfil de artesano"""
-        return obj.artisan_profile.slug if hasattr(obj, 'artisan_profile') else None
-    
-    def get_display_name(self, obj):
-        """Obtener nombre para mostrar del perfil de artesano"""
-        return obj.artisan_profile.display_name if hasattr(obj, 'artisan_profile') else obj.username
+    El perfil se resuelve una sola vez por fila. Para que no cueste una
+    query por obra, el queryset debe hacer
+    select_related('artisan__artisan_profile') (ver WorkViewSet).
+    """
+    id = serializers.IntegerField(read_only=True, allow_null=True)
+    slug = serializers.CharField(read_only=True, allow_null=True)
+    display_name = serializers.CharField(read_only=True)
+    avatar = serializers.CharField(read_only=True, allow_null=True)
     
-    def get_avatar(self, obj):
-        """Obtener avatar del perfil de artesano"""
-        return obj.artisan_profile.avatar if hasattr(obj, 'artisan_profile') else None
+    def to_representation(self, obj):
+        """Serializar el perfil de artesano del User (o None si no tiene)"""
+        profile = getattr(obj, 'artisan_profile', None)
+        if profile is None:
+            return {
+                'id': None,
+                'slug': None,
+                'display_name': obj.username,
+                'avatar': None,
+            }
+        return {
+            'id': profile.id,
+            'slug': profile.slug,
+            'display_name': profile.display_name,
+            'avatar': profile.avatar,
+        }
 
 
 class WorkListSerializer(serializers.ModelSerializer):
@@ -42,9 +49,13 @@ class WorkListSerializer(serializers.ModelSerializer):
     Usado en: GET /api/v1/artisans/{slug}/works/
     """
     total_images = serializers.SerializerMethodField()
+    image_meta = ImageMetadataField('thumbnail_url', 'images')
+    # Solo con ?images=responsive
+    thumbnail_srcset = ImageSrcsetField('thumbnail_url')
     
     class Meta:
         model = Work
+        list_serializer_class = ImageMetadataListSerializer
         fields = [
             'id',
             'title',
@@ -52,9 +63,11 @@ class WorkListSerializer(serializers.ModelSerializer):
             'category',
             'is_featured',
             'thumbnail_url',
+            'thumbnail_srcset',
             'images',
             'display_order',
             'total_images',
+            'image_meta',
             'created_at',
             'updated_at',
         ]
@@ -75,9 +88,13 @@ class WorkDetailSerializer(serializers.ModelSerializer):
     """
     artisan = ArtisanMinimalSerializer(read_only=True)
     total_images = serializers.SerializerMethodField()
+    image_meta = ImageMetadataField('thumbnail_url', 'images')
+    # Solo con ?images=responsive
+    thumbnail_srcset = ImageSrcsetField('thumbnail_url')
     
     class Meta:
         model = Work
+        list_serializer_class = ImageMetadataListSerializer
         fields = [
             'id',
             'title',
@@ -86,9 +103,11 @@ class WorkDetailSerializer(serializers.ModelSerializer):
             'is_featured',
             'is_active',
             'thumbnail_url',
+            'thumbnail_srcset',
             'images',
             'display_order',
             'total_images',
+            'image_meta',
             'created_at',
             'updated_at',
             'artisan',
@@ -2,13 +2,20 @@
 Tests completos para la app works.
 Cubre modelos, serializers, permisos, views y funcionalidad de reordenamiento.
 """
-from django.test import TestCase
+import threading
+from unittest import skipUnless
+
+from django.db import close_old_connections, connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from accounts.models import User, UserRole
 from artisans.models import ArtisanProfile, CraftType, MenorcaLocation
+from config.metrics import BudgetTestMixin
 from .models import Work, WorkCategory
+from .ordering import ORDER_GAP, allocate_positions, apply_order, import_works
 
 
 class WorkModelTestCase(TestCase):
@@ -386,9 +393,10 @@ class WorkAPITestCase(APITestCase):
         self.work2.refresh_from_db()
         work3.refresh_from_db()
         
-        self.assertEqual(self.work2.display_order, 1)
-        self.assertEqual(work3.display_order, 2)
-        self.assertEqual(self.work1.display_order, 3)
+        # Claves dispersas (ORDER_GAP) para que mover una obra toque una fila
+        self.assertEqual(self.work2.display_order, ORDER_GAP)
+        self.assertEqual(work3.display_order, 2 * ORDER_GAP)
+        self.assertEqual(self.work1.display_order, 3 * ORDER_GAP)
     
     def test_reorder_works_other_artist(self):
         """Test: No se pueden reordenar obras de otro artesano."""
@@ -478,3 +486,353 @@ class WorkSignalsTestCase(TestCase):
         
         self.artisan_profile.refresh_from_db()
         self.assertEqual(self.artisan_profile.total_works, count_after_create - 1)
+
+
+class WorkReorderTestCase(APITestCase):
+    """
+    Tests para el reordenamiento en lote y los movimientos de una obra.
+    """
+    
+    def setUp(self):
+        """Artesano con 5 obras y otro artesano con una."""
+        self.user = User.objects.create_user(
+            email='artist@test.com',
+            username='artisan',
+            password='testpass123',
+            role=UserRole.ARTISAN
+        )
+        self.other_user = User.objects.create_user(
+            email='other@test.com',
+            username='other',
+            password='testpass123',
+            role=UserRole.ARTISAN
+        )
+        self.works = [
+            Work.objects.create(
+                artisan=self.user,
+                title=f'Obra {i}',
+                thumbnail_url='https://res.cloudinary.com/test/work.jpg'
+            )
+            for i in range(5)
+        ]
+        self.foreign_work = Work.objects.create(
+            artisan=self.other_user,
+            title='Ajena',
+            thumbnail_url='https://res.cloudinary.com/test/work.jpg'
+        )
+        self.url = reverse('work-reorder')
+        self.client.force_authenticate(user=self.user)
+    
+    def portfolio(self):
+        """IDs del portfolio en el orden del listado."""
+        return list(Work.objects.filter(artisan=self.user).order_by(
+            'display_order', '-created_at'
+        ).values_list('id', flat=True))
+    
+    def test_reorder_is_single_update(self):
+        """Test: El portfolio completo se guarda con un solo UPDATE."""
+        order = [work.pk for work in reversed(self.works)]
+        
+        with CaptureQueriesContext(connection) as queries:
+            apply_order(self.user, order)
+        
+        # Un UPDATE ... CASE (además del savepoint de la transacción)
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.portfolio(), order)
+    
+    def test_reorder_ignores_foreign_works(self):
+        """Test: Los IDs de otro artesano se ignoran y no se modifican."""
+        order = [self.foreign_work.pk] + [work.pk for work in self.works]
+        response = self.client.put(self.url, {'order': order}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('5 obras', response.data['message'])
+        self.foreign_work.refresh_from_db()
+        self.assertEqual(self.foreign_work.display_order, 1)
+    
+    def test_move_touches_one_row(self):
+        """Test: Mover una obra entre dos con hueco solo actualiza su fila."""
+        ids = [work.pk for work in self.works]
+        self.client.put(self.url, {'order': ids}, format='json')
+        before = dict(Work.objects.values_list('id', 'display_order'))
+        
+        response = self.client.put(
+            self.url, {'move': ids[4], 'before': ids[1]}, format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.portfolio(), [ids[0], ids[4], ids[1], ids[2], ids[3]])
+        after = dict(Work.objects.values_list('id', 'display_order'))
+        changed = [work_id for work_id in after if after[work_id] != before[work_id]]
+        self.assertEqual(changed, [ids[4]])
+        self.assertEqual(response.data['display_order'], after[ids[4]])
+    
+    def test_move_after_last(self):
+        """Test: Mover una obra detrás de la última."""
+        ids = [work.pk for work in self.works]
+        response = self.client.put(
+            self.url, {'move': ids[0], 'after': ids[4]}, format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.portfolio(), ids[1:] + [ids[0]])
+    
+    def test_move_without_gap_renumbers(self):
+        """Test: Sin hueco entre vecinas se renumera el portfolio."""
+        # Obras creadas con max + 1: 1, 2, 3, 4, 5 (sin huecos)
+        ids = [work.pk for work in self.works]
+        response = self.client.put(
+            self.url, {'move': ids[3], 'before': ids[1]}, format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.portfolio(), [ids[0], ids[3], ids[1], ids[2], ids[4]])
+        orders = sorted(Work.objects.filter(artisan=self.user).values_list('display_order', flat=True))
+        self.assertEqual(orders, [ORDER_GAP * i for i in range(1, 6)])
+    
+    def test_repeated_moves_keep_order(self):
+        """Test: Muchos movimientos al mismo hueco mantienen el orden."""
+        ids = [work.pk for work in self.works]
+        for _ in range(15):
+            # Alternar las dos primeras obras
+            ids[0], ids[1] = ids[1], ids[0]
+            response = self.client.put(
+                self.url, {'move': ids[0], 'before': ids[1]}, format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(self.portfolio(), ids)
+    
+    def test_move_foreign_work(self):
+        """Test: No se pueden mover obras de otro artesano."""
+        response = self.client.put(
+            self.url, {'move': self.foreign_work.pk, 'before': self.works[0].pk}, format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.foreign_work.refresh_from_db()
+        self.assertEqual(self.foreign_work.display_order, 1)
+    
+    def test_move_requires_one_anchor(self):
+        """Test: 'move' necesita exactamente uno de 'before' o 'after'."""
+        ids = [work.pk for work in self.works]
+        
+        response = self.client.put(self.url, {'move': ids[0]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.put(
+            self.url, {'move': ids[0], 'before': ids[1], 'after': ids[2]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class WorkPositionTestCase(TestCase):
+    """
+    Tests para la asignación de display_order a obras nuevas.
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='artist@test.com',
+            username='artisan',
+            password='testpass123',
+            role=UserRole.ARTISAN
+        )
+    
+    def create_work(self, **kwargs):
+        return Work.objects.create(
+            artisan=self.user,
+            title='Obra',
+            thumbnail_url='https://res.cloudinary.com/test/work.jpg',
+            **kwargs
+        )
+    
+    def test_new_work_goes_after_manual_order(self):
+        """Test: Tras una obra con orden manual, la nueva va detrás."""
+        self.create_work()
+        self.create_work(display_order=50)
+        
+        self.assertEqual(self.create_work().display_order, 51)
+    
+    def test_positions_not_reused_after_delete(self):
+        """Test: El contador no reutiliza posiciones de obras borradas."""
+        self.create_work()
+        last = self.create_work()
+        last.delete()
+        
+        self.assertEqual(self.create_work().display_order, 3)
+    
+    def test_allocate_positions_reserves_range(self):
+        """Test: Se reservan varias posiciones consecutivas de una vez."""
+        self.create_work()
+        
+        self.assertEqual(allocate_positions(self.user.id, 10), 2)
+        self.assertEqual(allocate_positions(self.user.id), 12)
+    
+    def test_import_works(self):
+        """Test: Importación en bloque con posiciones, contador y orden manual."""
+        self.create_work()
+        works = [
+            Work(title=f'Importada {i}', thumbnail_url='https://res.cloudinary.com/test/work.jpg')
+            for i in range(3)
+        ]
+        works.append(Work(
+            title='Con orden', thumbnail_url='https://res.cloudinary.com/test/work.jpg', display_order=500
+        ))
+        
+        # Reserva (UPDATE + SELECT), un INSERT y el contador (+ 2 savepoints)
+        with self.assertNumQueries(8):
+            import_works(self.user, works)
+        
+        self.assertEqual([work.display_order for work in works], [2, 3, 4, 500])
+        self.user.artisan_profile.refresh_from_db()
+        self.assertEqual(self.user.artisan_profile.total_works, 5)
+        self.assertEqual(self.create_work().display_order, 501)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requiere bloqueos de fila de PostgreSQL')
+class WorkPositionConcurrencyTestCase(TransactionTestCase):
+    """
+    Subidas simultáneas de un mismo artesano no repiten display_order.
+    """
+    
+    THREADS = 8
+    WORKS_PER_THREAD = 5
+    
+    def test_concurrent_creates_get_unique_positions(self):
+        """Test: Varias conexiones creando obras a la vez."""
+        user = User.objects.create_user(
+            email='artist@test.com',
+            username='artisan',
+            password='testpass123',
+            role=UserRole.ARTISAN
+        )
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+        
+        def upload():
+            try:
+                barrier.wait()
+                for i in range(self.WORKS_PER_THREAD):
+                    Work.objects.create(
+                        artisan_id=user.id,
+                        title=f'Obra {i}',
+                        thumbnail_url='https://res.cloudinary.com/test/work.jpg'
+                    )
+            except Exception as error:
+                errors.append(error)
+            finally:
+                close_old_connections()
+                connection.close()
+        
+        threads = [threading.Thread(target=upload) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(errors, [])
+        orders = list(Work.objects.filter(artisan=user).values_list('display_order', flat=True))
+        total = self.THREADS * self.WORKS_PER_THREAD
+        self.assertEqual(sorted(orders), list(range(1, total + 1)))
+
+
+class WorkListQueryCountTestCase(BudgetTestMixin, APITestCase):
+    """
+    El listado de obras no hace una query por obra para leer el perfil
+    del artesano (ArtisanMinimalSerializer).
+    """
+    
+    def setUp(self):
+        self.artisans = [
+            User.objects.create_user(
+                email=f'artist{i}@test.com',
+                username=f'artisan{i}',
+                password='testpass123',
+                role=UserRole.ARTISAN
+            )
+            for i in range(5)
+        ]
+        self.admin_user = User.objects.create_user(
+            email='admin@test.com',
+            username='admin',
+            password='testpass123',
+            role=UserRole.ADMIN,
+            is_staff=True
+        )
+    
+    def create_works(self, total):
+        """Reparte `total` obras entre los artesanos."""
+        for index, artisan in enumerate(self.artisans):
+            import_works(artisan, [
+                Work(title=f'Obra {i}', thumbnail_url='https://res.cloudinary.com/test/work.jpg')
+                for i in range(index, total, len(self.artisans))
+            ])
+    
+    def assert_pages_query_count(self, total, url, queries_per_page, user=None):
+        """Recorre todas las páginas y comprueba las queries de cada una."""
+        seen = 0
+        while url:
+            if user is not None:
+                # Usuario nuevo en cada petición (sin el perfil ya cacheado)
+                self.client.force_authenticate(user=User.objects.get(pk=user.pk))
+            with self.assertNumQueries(queries_per_page):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += len(response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, total)
+    
+    def test_public_list_query_count(self):
+        """Test: COUNT + página, sea cual sea el número de obras."""
+        for total in (20, 100, 500):
+            with self.subTest(total=total):
+                Work.objects.all().delete()
+                self.create_works(total)
+                
+                self.assert_pages_query_count(total, reverse('work-list'), 2)
+                
+                # Todas las filas de artesanos distintos llevan su perfil
+                response = self.client.get(reverse('work-list'))
+                slugs = {work['artisan']['slug'] for work in response.data['results']}
+                self.assertEqual(slugs, {artisan.artisan_profile.slug for artisan in self.artisans})
+    
+    def test_admin_list_query_count(self):
+        """Test: La rama de admin también carga el perfil con la obra."""
+        self.create_works(100)
+        
+        # Perfil de artesano del admin (no tiene) + COUNT + página
+        self.assert_pages_query_count(100, reverse('work-list'), 3, user=self.admin_user)
+    
+    def test_artisan_list_query_count(self):
+        """Test: La rama de artesano (dashboard) carga el perfil con la obra."""
+        self.create_works(500)
+        
+        # Perfil del artesano + COUNT + página
+        self.assert_pages_query_count(
+            100, f"{reverse('work-list')}?my_works=true", 3, user=self.artisans[0]
+        )
+    
+    def test_read_within_budget(self):
+        """Test: Listado y detalle dentro del presupuesto de la vista en cada rama."""
+        self.create_works(100)
+        detail_url = reverse('work-detail', kwargs={'pk': Work.objects.first().pk})
+        
+        for user in (None, self.admin_user, self.artisans[0]):
+            with self.subTest(user=user):
+                self.client.force_authenticate(user=user and User.objects.get(pk=user.pk))
+                self.assertWithinBudget(self.client.get(reverse('work-list')))
+                self.assertWithinBudget(self.client.get(f"{reverse('work-list')}?my_works=true"))
+                self.assertWithinBudget(self.client.get(detail_url))
+    
+    def test_artisan_without_profile(self):
+        """Test: Un artesano sin perfil se serializa con su username."""
+        self.create_works(20)
+        artisan = self.artisans[0]
+        artisan.artisan_profile.delete()
+        
+        response = self.client.get(reverse('work-list'))
+        
+        rows = [work['artisan'] for work in response.data['results'] if work['artisan']['slug'] is None]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0], {'id': None, 'slug': None, 'display_name': artisan.username, 'avatar': None})
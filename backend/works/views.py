@@ -10,7 +10,9 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.exceptions import PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
 
+from config.metrics import Budget
 from .models import Work
+from .ordering import apply_order, move_work
 from .serializers import WorkDetailSerializer, WorkCreateUpdateSerializer
 from .permissions import IsArtisanOwnerOrAdmin
 
@@ -30,6 +32,12 @@ class WorkViewSet(viewsets.ModelViewSet):
 
     permission_classes = [IsAuthenticatedOrReadOnly, IsArtisanOwnerOrAdmin]
 
+    # Presupuesto por acción (config/metrics.py): perfil del usuario + COUNT + página
+    performance_budgets = {
+        'list': Budget(queries=4, ms=300),
+        'retrieve': Budget(queries=2, ms=200),
+    }
+
     # Configuración de filtros y búsqueda
     filter_backends = [
         DjangoFilterBackend,
@@ -78,37 +86,39 @@ class WorkViewSet(viewsets.ModelViewSet):
             if not hasattr(user, 'artisan_profile'):
                 return Work.objects.none()
 
-            return Work.objects.filter(
-                artisan=user
-            ).select_related('artisan').order_by('display_order', '-created_at')
+            return self.works(artisan=user)
 
         # Usuario no autenticado: solo obras activas
         if not user.is_authenticated:
-            return Work.objects.filter(
-                is_active=True
-            ).select_related('artisan').order_by('display_order', '-created_at')
+            return self.works(is_active=True)
 
         # Artesano: solo sus obras (comportamiento por defecto)
         if hasattr(user, 'artisan_profile'):
-            return Work.objects.filter(
-                artisan=user
-            ).select_related('artisan').order_by('display_order', '-created_at')
+            return self.works(artisan=user)
 
         # Admin: todas las obras
         if user.is_staff or user.role == 'ADMIN':
-            return Work.objects.all().select_related(
-                'artisan'
-            ).order_by('display_order', '-created_at')
+            return self.works()
 
         # Otros usuarios autenticados: ninguna obra
         return Work.objects.none()
     
+    def works(self, **filters):
+        """
+        Obras con el artesano y su perfil cargados en la misma query
+        (ArtisanMinimalSerializer los lee en cada fila).
+        """
+        return Work.objects.filter(**filters).select_related(
+            'artisan', 'artisan__artisan_profile'
+        ).order_by('display_order', '-created_at')
+    
     def perform_create(self, serializer):
         """
         Al crear obra:
         - Asignar al artista autenticado
-        - Calcular siguiente display_order
         - Validar que el usuario sea artista
+        
+        display_order lo asigna Work.save (posición atómica al final).
         """
         user = self.request.user
         
@@ -121,17 +131,10 @@ class WorkViewSet(viewsets.ModelViewSet):
             )
             raise PermissionDenied(error_msg)
         
-        # Calcular siguiente display_order
-        last_work = Work.objects.filter(
-            artisan=user
-        ).order_by('-display_order').first()
-        
-        next_order = (last_work.display_order + 1) if last_work else 1
-        
-        # Guardar con artesano y display_order
+        # Guardar con artesano (display_order 0 = al final del portfolio)
         serializer.save(
             artisan=user,
-            display_order=next_order,
+            display_order=0,
             is_active=True
         )
 
@@ -207,16 +210,25 @@ class WorkViewSet(viewsets.ModelViewSet):
         
         Endpoint: PUT /api/v1/works/reorder/
         
-        Body:
+        Body (portfolio completo):
         {
             "order": [3, 1, 2, 5, 4]  // Array de IDs en el nuevo orden
         }
         
+        Body (mover una obra, drag & drop):
+        {
+            "move": 5,
+            "before": 1  // o "after": 2
+        }
+        
         Response:
         {
             "success": true,
             "message": "5 obras reordenadas correctamente"
         }
+        
+        Ver works/ordering.py: el portfolio completo se guarda con UPDATE
+        ... CASE en lote y mover una obra solo actualiza su fila.
         """
         user = request.user
         
@@ -227,6 +239,9 @@ class WorkViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
+        if 'move' in request.data:
+            return self._move(request)
+        
         # Obtener array de IDs
         order_ids = request.data.get('order', [])
         
@@ -246,20 +261,9 @@ class WorkViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Actualizar display_order de cada obra
-        updated_count = 0
-        for index, work_id in enumerate(order_ids, start=1):
-            try:
-                work = Work.objects.get(
-                    id=work_id,
-                    artisan=user
-                )
-                work.display_order = index
-                work.save(update_fields=['display_order'])
-                updated_count += 1
-            except Work.DoesNotExist:
-                # Ignorar IDs que no pertenecen al artista
-                continue
+        # Un UPDATE por lote, solo sobre obras del artesano
+        # (los IDs de otros artesanos se ignoran)
+        updated_count = apply_order(user, order_ids)
 
         # Si no se actualizó ninguna obra, devolver 404
         if updated_count == 0:
@@ -272,3 +276,38 @@ class WorkViewSet(viewsets.ModelViewSet):
             "success": True,
             "message": f"{updated_count} obras reordenadas correctamente"
         })
+    
+    def _move(self, request):
+        """
+        Mueve una obra antes o después de otra (`move` + `before`/`after`).
+        """
+        work_id = request.data.get('move')
+        before = request.data.get('before')
+        after = request.data.get('after')
+        
+        if (before is None) == (after is None):
+            return Response(
+                {"error": "Indica 'before' o 'after' (solo uno) junto a 'move'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        anchor_id = before if before is not None else after
+        if not all(isinstance(id, int) for id in (work_id, anchor_id)) or work_id == anchor_id:
+            return Response(
+                {"error": "'move' y 'before'/'after' deben ser IDs distintos de obras"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        display_order = move_work(request.user, work_id, before=before, after=after)
+        
+        if display_order is None:
+            return Response(
+                {"error": "No se encontraron obras que pertenezcan al artesano"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        return Response({
+            "success": True,
+            "message": "Obra movida correctamente",
+            "display_order": display_order
+        })
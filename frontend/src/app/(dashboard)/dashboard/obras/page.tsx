@@ -50,7 +50,7 @@ import {
   Eye,
   ImageIcon,
 } from 'lucide-react';
-import { useWorks, useDeleteWork, useReorderWorks } from '@/lib/hooks/useWorks';
+import { useWorks, useDeleteWork, useMoveWork } from '@/lib/hooks/useWorks';
 import { thumbUrl } from '@/lib/cloudinary';
 import type { Work } from '@/lib/api/works';
 import { WORK_CATEGORY_LABELS } from '@/types/work';
@@ -61,7 +61,7 @@ export default function WorksPage() {
   
   const { data: works, isLoading, error } = useWorks();
   const deleteWorkMutation = useDeleteWork();
-  const reorderMutation = useReorderWorks();
+  const moveMutation = useMoveWork();
   
   // Drag & drop sensors
   const sensors = useSensors(
@@ -91,14 +91,13 @@ export default function WorksPage() {
     
     if (oldIndex === -1 || newIndex === -1) return;
     
-    // Crear array reordenado
-    const reordered = [...filteredWorks];
-    const [moved] = reordered.splice(oldIndex, 1);
-    reordered.splice(newIndex, 0, moved);
-    
-    // Enviar nuevo orden al backend
-    const newOrder = reordered.map(w => w.id);
-    reorderMutation.mutate(newOrder);
+    // Enviar solo el movimiento: hacia abajo queda detrás de `over`,
+    // hacia arriba delante (el backend actualiza una sola obra)
+    const overId = Number(over.id);
+    moveMutation.mutate({
+      id: Number(active.id),
+      target: newIndex > oldIndex ? { after: overId } : { before: overId },
+    });
   };
   
   // Handle delete
@@ -32,6 +32,7 @@ import { WorkGrid } from '@/components/works';
 import { FeaturedProducts } from '@/components/products';
 import type { Artisan } from '@/types/artisan';
 import type { WorkListItem } from '@/types/work';
+import type { CursorPaginatedResponse } from '@/types';
 
 // Base URL del backend
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
@@ -66,30 +67,42 @@ async function getArtisan(slug: string): Promise<Artisan | null> {
 
 /**
  * Fetch colecciones/galerías del artesano desde nuevo endpoint custom
- * Retorna lista de colecciones con sus portadas (thumbnails)
+ * Retorna todas sus colecciones con sus portadas (thumbnails), siguiendo
+ * la paginación por cursor hasta la última página
  */
 async function getArtisanWorks(slug: string): Promise<WorkListItem[]> {
+  const url = `${API_URL}/api/v1/artisans/${slug}/works/`;
+  const works: WorkListItem[] = [];
+
   try {
-    const res = await fetch(`${API_URL}/api/v1/artisans/${slug}/works/`, {
-      // Revalidar: sin caché en dev, 1 hora en prod (se revalida on-demand al actualizar)
-      next: { 
-        revalidate: process.env.NODE_ENV === 'development' ? 0 : 3600 
-      },
-    });
+    let query = '';
+    do {
+      const res = await fetch(`${url}${query}`, {
+        // Revalidar: sin caché en dev, 1 hora en prod (se revalida on-demand al actualizar)
+        next: { 
+          revalidate: process.env.NODE_ENV === 'development' ? 0 : 3600 
+        },
+      });
 
-    if (!res.ok) {
-      console.error(`Error fetching works: ${res.status}`);
-      
-      // Si es 404, el artesano simplemente no tiene obras
-      if (res.status === 404) return [];
-      
-      // Para otros errores, lanzar
-      throw new Error(
-        `Error fetching works: ${res.status} ${res.statusText}`
-      );
-    }
+      if (!res.ok) {
+        console.error(`Error fetching works: ${res.status}`);
+        
+        // Si es 404, el artesano simplemente no tiene obras
+        if (res.status === 404) return [];
+        
+        // Para otros errores, lanzar
+        throw new Error(
+          `Error fetching works: ${res.status} ${res.statusText}`
+        );
+      }
 
-    return res.json();
+      const data: CursorPaginatedResponse<WorkListItem> = await res.json();
+      works.push(...data.results);
+      // Solo el query string de `next` (cursor): el host es el que vio el backend
+      query = data.next ? new URL(data.next).search : '';
+    } while (query);
+
+    return works;
   } catch (error) {
     console.error('Error fetching works:', error);
     // Si hay error obteniendo obras, retornar array vacío
@@ -1,8 +1,8 @@
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
-import { Users, Package, ShoppingCart } from 'lucide-react';
+import { Users, Package, ShoppingCart, CreditCard } from 'lucide-react';
 
 export interface RecentActivityItem {
-  type: 'artisan' | 'product' | 'order';
+  type: 'artisan' | 'product' | 'order' | 'payment';
   timestamp: string;
   message: string;
   status?: string;
@@ -21,6 +21,8 @@ export default function RecentActivity({ activities }: RecentActivityProps) {
         return <Package className="h-4 w-4" />;
       case 'order':
         return <ShoppingCart className="h-4 w-4" />;
+      case 'payment':
+        return <CreditCard className="h-4 w-4" />;
       default:
         return null;
     }
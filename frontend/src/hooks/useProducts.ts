@@ -7,6 +7,7 @@ import {
 } from '@tanstack/react-query';
 import { toast } from 'sonner';
 import axiosInstance from '@/lib/axios';
+import { getAllPages } from '@/lib/api/pagination';
 import type {
   Product,
   ProductFormData,
@@ -417,12 +418,8 @@ export function useArtisanProducts(
         params.append('category', filters.category);
       }
 
-      const response = await axiosInstance.get<Product[]>(
-        `/api/v1/artisans/${artisanSlug}/products/`,
-        { params }
-      );
-
-      return response.data;
+      // Todas las páginas: la tienda y su filtro de categorías necesitan el catálogo completo
+      return getAllPages<Product>(`/api/v1/artisans/${artisanSlug}/products/`, params);
     },
     enabled: !!artisanSlug, // Solo ejecutar si hay slug
     staleTime: 3 * 60 * 1000, // 3 minutos
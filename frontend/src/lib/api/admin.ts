@@ -6,6 +6,7 @@ export type Artisan = {
   email: string;
   role: string;
   is_approved: boolean;
+  is_active: boolean;
   is_featured: boolean;
   date_joined: string;
   updated_at: string;
@@ -19,6 +20,15 @@ export type Artisan = {
   can_be_deleted: boolean;
 };
 
+export type ModerationAction = 'approve' | 'reject' | 'feature' | 'unfeature';
+
+export type BulkModerationResult = {
+  success: boolean;
+  action: ModerationAction;
+  updated_count: number;
+  message: string;
+};
+
 export type AdminStats = {
   total_artisans: number;
   pending_artisans: number;
@@ -29,12 +39,21 @@ export type AdminStats = {
 };
 
 export interface RecentActivity {
-  type: 'artisan' | 'product' | 'order';
+  id: number;
+  type: 'artisan' | 'product' | 'order' | 'payment';
+  object_id: number;
   timestamp: string;
   message: string;
   status?: string;
 }
 
+// Página del feed de actividad (paginación por cursor)
+export interface ActivityPage {
+  next: string | null;
+  previous: string | null;
+  results: RecentActivity[];
+}
+
 export interface SalesChartData {
   date: string;
   sales: number;
@@ -53,6 +72,92 @@ export interface DashboardStats {
   products_out_of_stock: number;
   recent_activity: RecentActivity[];
   sales_chart: SalesChartData[];
+  generated_at: string; // Momento en que se calculó la instantánea (se refresca cada minuto)
+}
+
+export interface DeleteArtisanResult {
+  user_id: string;
+  username: string;
+  works_deleted: number;
+  products_deleted: number;
+  images_to_delete: number;
+  image_purge_job: number;   // Borrado de imágenes en segundo plano
+  success: boolean;
+}
+
+export interface ImagePurgeJob {
+  id: number;
+  artisan_id: number;
+  username: string;
+  status: 'pending' | 'running' | 'completed' | 'failed';
+  total: number;
+  purged: number;
+  failed: number;
+  progress: number;          // 0-100
+  error: string;
+  attempts: number;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
+// Histograma de una métrica (buckets acumulables por `le`, null = sin límite)
+export interface MetricHistogram {
+  buckets: { le: number | null; count: number }[];
+  count: number;
+  sum: number;
+  max: number;
+  mean: number | null;
+  p50: number | null;
+  p95: number | null;
+}
+
+// Métricas de una ruta de la API (queries y tiempos en ms) frente a su presupuesto
+export interface RouteMetrics {
+  route: string;             // "GET product-list"
+  view: string;
+  action: string;
+  budget: { queries: number | null; ms: number | null } | null;
+  requests: number;
+  over_budget: number;
+  queries: MetricHistogram;
+  db_ms: MetricHistogram;
+  render_ms: MetricHistogram;
+  total_ms: MetricHistogram;
+}
+
+export interface RequestMetrics {
+  pid: number;               // Solo de un worker: para el total, sumar los buckets de cada pid distinto
+  since: string;
+  routes: RouteMetrics[];    // Más lentas (p95) primero
+}
+
+// Perfil de una petición (cabecera X-Profile: 1 como staff)
+export interface RequestProfile {
+  id: string;
+  created_at: string;
+  method: string;
+  path: string;
+  view: string;
+  status_code: number;
+  user_id: number;
+  username: string;
+  duration_ms: number;
+  queries: number;
+  db_ms: number;
+}
+
+export interface RequestProfileDetail extends RequestProfile {
+  sql: { sql: string; many: boolean; at_ms: number; ms: number }[];
+  top_functions: {
+    name: string;
+    file: string;
+    line: number;
+    calls: number;
+    primitive_calls: number;
+    self_ms: number;
+    cumulative_ms: number;
+  }[];
 }
 
 export const adminApi = {
@@ -77,7 +182,7 @@ export const adminApi = {
 
   // Eliminar artesano
   deleteArtisan: (id: string) =>
-    axiosInstance.delete(`/api/v1/admin/artisans/${id}/`),
+    axiosInstance.delete<DeleteArtisanResult>(`/api/v1/admin/artisans/${id}/`),
 
   // Aprobar múltiples artesanos
   bulkApproveArtisans: (artisanIds: number[]) =>
@@ -85,10 +190,44 @@ export const adminApi = {
       artisan_ids: artisanIds,
     }),
 
+  // Aprobar, rechazar o destacar varios artesanos (los emails se envían en segundo plano)
+  bulkModerateArtisans: (action: ModerationAction, artisanIds: number[]) =>
+    axiosInstance.post<BulkModerationResult>('/api/v1/admin/artisans/bulk-moderate/', {
+      action,
+      artisan_ids: artisanIds,
+    }),
+
   // Estadísticas básicas
   getStats: () =>
     axiosInstance.get<AdminStats>('/api/v1/admin/artisans/stats/'),
 
+  // Progreso del borrado de imágenes de un artesano eliminado
+  getImagePurgeJob: (id: number) =>
+    axiosInstance.get<ImagePurgeJob>(`/api/v1/admin/image-purge-jobs/${id}/`),
+
+  // Feed de actividad completo (pasar `next` para la página siguiente)
+  getActivity: (cursorUrl?: string, type?: RecentActivity['type']) =>
+    axiosInstance.get<ActivityPage>(cursorUrl ?? '/api/v1/admin/activity/', {
+      params: cursorUrl ? undefined : { type },
+    }),
+
+  // Queries y latencia por endpoint
+  getRequestMetrics: () =>
+    axiosInstance.get<RequestMetrics>('/api/v1/admin/metrics/'),
+
+  // Perfiles de peticiones guardados (los más recientes primero)
+  getProfiles: () =>
+    axiosInstance.get<RequestProfile[]>('/api/v1/admin/profiles/'),
+
+  getProfile: (id: string) =>
+    axiosInstance.get<RequestProfileDetail>(`/api/v1/admin/profiles/${id}/`),
+
+  // Descarga del perfil: .prof (pstats) o JSON para speedscope.app
+  downloadProfile: (id: string, format: 'pstats' | 'speedscope') =>
+    axiosInstance.get<Blob>(`/api/v1/admin/profiles/${id}/${format}/`, {
+      responseType: 'blob',
+    }),
+
   // Dashboard con KPIs completos
   getDashboardStats: async (): Promise<DashboardStats> => {
     const { data } = await axiosInstance.get('/api/v1/admin/artisans/dashboard-stats/');
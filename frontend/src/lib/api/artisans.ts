@@ -4,6 +4,7 @@
  */
 
 import axiosInstance from '../axios';
+import { getAllPages } from './pagination';
 import type {
   Artisan,
   ArtisanListItem,
@@ -69,11 +70,10 @@ export async function updateMyArtisanProfile(
 }
 
 /**
- * Obtener obras de un artesano específico
+ * Obtener todas las obras de un artesano específico (recorre todas las páginas)
  * Endpoint: GET /api/v1/artisans/{slug}/works/
  */
 export async function getArtisanWorks(slug: string): Promise<WorkListItem[]> {
-  const response = await axiosInstance.get<WorkListItem[]>(`/api/v1/artisans/${slug}/works/`);
-  return response.data;
+  return getAllPages<WorkListItem>(`/api/v1/artisans/${slug}/works/`);
 }
 
@@ -0,0 +1,40 @@
+/**
+ * Helpers para endpoints con paginación por cursor
+ * (CursorPaginatedResponse: next / previous / results, sin count)
+ */
+
+import axiosInstance from '@/lib/axios';
+import type { CursorPaginatedResponse } from '@/types';
+
+/**
+ * Query string de la siguiente página (cursor y filtros incluidos).
+ *
+ * `next` es una URL absoluta construida con el host que vio el backend;
+ * se reutiliza solo su query string sobre la URL original.
+ */
+export function nextPageQuery(next: string): string {
+  return new URL(next).search;
+}
+
+/**
+ * Obtiene todos los elementos de un listado paginado por cursor,
+ * siguiendo `next` hasta que es null.
+ */
+export async function getAllPages<T>(
+  url: string,
+  params?: URLSearchParams
+): Promise<T[]> {
+  const response = await axiosInstance.get<CursorPaginatedResponse<T>>(url, { params });
+  const results = [...response.data.results];
+
+  let next = response.data.next;
+  while (next) {
+    const page = await axiosInstance.get<CursorPaginatedResponse<T>>(
+      `${url}${nextPageQuery(next)}`
+    );
+    results.push(...page.data.results);
+    next = page.data.next;
+  }
+
+  return results;
+}
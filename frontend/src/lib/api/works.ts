@@ -94,3 +94,18 @@ export async function reorderWorks(orderIds: number[]): Promise<void> {
   await axiosInstance.put('/api/v1/works/reorder/', { order: orderIds });
 }
 
+/**
+ * Mover una obra antes o después de otra (drag & drop)
+ * 
+ * Solo se actualiza la obra movida en el backend.
+ * 
+ * @param id - Obra movida
+ * @param target - `{ before: id }` o `{ after: id }`
+ */
+export async function moveWork(
+  id: number,
+  target: { before: number } | { after: number }
+): Promise<void> {
+  await axiosInstance.put('/api/v1/works/reorder/', { move: id, ...target });
+}
+
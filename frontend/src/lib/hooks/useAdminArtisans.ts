@@ -60,7 +60,7 @@ export const useDeleteArtisan = () => {
       queryClient.invalidateQueries({ queryKey: ['admin', 'artisans'] });
       const data = response.data;
       toast.success(
-        `Eliminado: ${data.username} (${data.works_deleted} obras, ${data.images_deleted} imágenes)`
+        `Eliminado: ${data.username} (${data.works_deleted} obras, ${data.products_deleted} productos). ${data.images_to_delete} imágenes se borrarán en segundo plano`
       );
     },
     onError: (error: any) => {
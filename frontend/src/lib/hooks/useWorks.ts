@@ -291,3 +291,67 @@ export function useReorderWorks() {
   });
 }
 
+/**
+ * Hook para mover una obra (drag & drop)
+ * 
+ * Envía solo el movimiento (`move` + `before`/`after`) en lugar del
+ * orden completo: el backend actualiza una sola fila.
+ * 
+ * Features:
+ * - Optimistic update (UI se actualiza instantáneamente)
+ * - Rollback automático si falla
+ * - Revalida páginas públicas (ISR)
+ */
+export function useMoveWork() {
+  const queryClient = useQueryClient();
+  const user = useAuthStore(state => state.user);
+  
+  return useMutation({
+    mutationFn: ({ id, target }: {
+      id: number;
+      target: { before: number } | { after: number };
+    }) => worksApi.moveWork(id, target),
+    
+    // Optimistic update
+    onMutate: async ({ id, target }) => {
+      await queryClient.cancelQueries({ queryKey: ['works'] });
+      
+      const previousWorks = queryClient.getQueryData<Work[]>(['works']);
+      
+      if (previousWorks) {
+        const moved = previousWorks.find(w => w.id === id);
+        const rest = previousWorks.filter(w => w.id !== id);
+        const anchorId = 'before' in target ? target.before : target.after;
+        const anchorIndex = rest.findIndex(w => w.id === anchorId);
+        
+        if (moved && anchorIndex !== -1) {
+          rest.splice('before' in target ? anchorIndex : anchorIndex + 1, 0, moved);
+          queryClient.setQueryData(['works'], rest);
+        }
+      }
+      
+      return { previousWorks };
+    },
+    
+    // Si falla, revertir
+    onError: (error: Error, variables, context) => {
+      if (context?.previousWorks) {
+        queryClient.setQueryData(['works'], context.previousWorks);
+      }
+      
+      toast.error('Error al reordenar', {
+        description: error.message,
+      });
+    },
+    
+    onSuccess: () => {
+      queryClient.invalidateQueries({ queryKey: ['works'] });
+      
+      if (user?.artisan_profile?.slug) {
+        revalidatePublicPages(user.artisan_profile.slug);
+      }
+      
+      toast.success('Orden actualizado');
+    },
+  });
+}
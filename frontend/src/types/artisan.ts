@@ -1,5 +1,7 @@
 // Tipos para artesanos (craftspeople) de MiTaller.art
 
+import type { ImageMetaMap } from './image';
+
 /**
  * Usuario mínimo (del artesano)
  */
@@ -48,6 +50,7 @@ export interface Artisan {
   location: Location;
   avatar: string | null;
   cover_image: string | null;
+  image_meta?: ImageMetaMap; // Dimensiones y placeholder de avatar y portada
   website: string | null;
   instagram: string | null;
   instagram_url: string | null;
@@ -82,6 +85,8 @@ export interface ArtisanListItem {
   craft_type: CraftType;
   location: Location;
   avatar: string | null;
+  image_meta?: ImageMetaMap; // Dimensiones y placeholder del avatar
+  thumbnail_srcset?: string | null; // srcset del avatar (solo con ?images=responsive)
   total_works: number;
   total_products: number;
   is_featured: boolean;
@@ -0,0 +1,20 @@
+/**
+ * Metadatos precalculados de imágenes de Cloudinary (app `images` del backend)
+ *
+ * Permiten reservar el espacio de la imagen (width/height) y pintar un
+ * placeholder (blurhash o dominant_color) antes de descargarla.
+ */
+export type ImageMeta = {
+  width: number;
+  height: number;
+  bytes: number;
+  format: string;           // 'jpeg', 'png', 'webp'...
+  blurhash: string;         // https://blurha.sh
+  dominant_color: string;   // '#rrggbb'
+};
+
+/**
+ * Metadatos por URL de imagen (`image_meta` en obras, productos y artesanos)
+ * Solo incluye las imágenes ya procesadas.
+ */
+export type ImageMetaMap = Record<string, ImageMeta>;
@@ -44,6 +44,9 @@ export type {
   CartSummary,
 } from './product';
 
+// Image types (metadatos precalculados de Cloudinary)
+export type { ImageMeta, ImageMetaMap } from './image';
+
 // Cart types (multi-vendor)
 export type {
   CartItemsByArtisan,
@@ -85,3 +88,10 @@ export type PaginatedResponse<T> = {
   previous: string | null;
   results: T[];
 };
+
+/** Respuesta con paginación por cursor (sin count) */
+export type CursorPaginatedResponse<T> = {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+};
@@ -1,6 +1,7 @@
 // Tipos para productos de la tienda
 
 import type { CraftType } from './artisan';
+import type { ImageMetaMap } from './image';
 
 /**
  * Referencia simplificada al artesano en un producto
@@ -26,6 +27,8 @@ export type Product = {
   stock: number;
   thumbnail_url: string;
   images: string[];
+  image_meta?: ImageMetaMap; // Dimensiones y placeholder por URL
+  thumbnail_srcset?: string | null; // srcset de la miniatura (solo con ?images=responsive)
   is_active: boolean;
   is_featured: boolean; // Producto destacado por el artesano
   pickup_available: boolean; // Permite recogida en taller
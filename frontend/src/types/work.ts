@@ -1,5 +1,7 @@
 // Tipos para obras de portfolio de artistas
 
+import type { ImageMetaMap } from './image';
+
 /**
  * Categorías de obras disponibles (sincronizadas con backend WorkCategory)
  */
@@ -51,6 +53,8 @@ export type WorkListItem = {
   category: WorkCategory | null;
   is_featured: boolean;
   display_order: number;
+  image_meta?: ImageMetaMap;       // Dimensiones y placeholder por URL
+  thumbnail_srcset?: string | null; // Solo con ?images=responsive
 };
 
 /**
@@ -69,6 +73,8 @@ export type Work = {
   display_order: number;
   is_featured: boolean;
   total_images: number;            // thumbnail + images.length
+  image_meta?: ImageMetaMap;       // Dimensiones y placeholder por URL
+  thumbnail_srcset?: string | null; // Solo con ?images=responsive
   created_at: string;
   updated_at: string;
 };